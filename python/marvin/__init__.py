@@ -23,18 +23,23 @@ __version__ = '2.2.2dev'
 # else:
 #     __version__ = get_version()
 
+# Records the time spent in each stage of the initialisation.
+from marvin.core.timing import init_timings, timed
+
 # Does this so that the implicit module definitions in extern can happen.
-from marvin import extern
+with timed('extern'):
+    from marvin import extern
 
-from marvin.core.exceptions import MarvinUserWarning, MarvinError
-from brain.utils.general.general import getDbMachine
-from brain import bconfig
-from brain.core.core import URLMapDict
+with timed('brain'):
+    from marvin.core.exceptions import MarvinUserWarning, MarvinError
+    from brain.utils.general.general import getDbMachine
+    from brain import bconfig
+    from brain.core.core import URLMapDict
 
-# Inits the log
-from brain.core.logger import initLog
+    # Inits the log
+    from brain.core.logger import initLog
 
-from astropy.wcs import FITSFixedWarning
+    from astropy.wcs import FITSFixedWarning
 
 # Defines log dir.
 if 'MARVIN_LOGS_DIR' in os.environ:
@@ -81,6 +86,44 @@ class MarvinConfig(object):
         xyorig (str):
             Globally set the origin point for all your spaxel selections.  Either 'center' or 'lower'.
             Default is 'center'
+        fits_cache_dir (str):
+            If set, gzipped FITS files are decompressed once into this directory and
+            memory-mapped from there. Default is None (gzipped files are read directly).
+        fits_cache_size (int):
+            The maximum size, in bytes, of ``fits_cache_dir``. The least recently used
+            files are removed when the limit is exceeded. Default is None (no limit).
+        array_cache (`~marvin.utils.general.arraycache.ArrayCache`):
+            If set, the extensions downloaded from the API are stored in this cache and
+            shared between tools and processes. Default is None.
+        array_format (str):
+            How arrays are requested from the API. Either ``'json'`` (nested lists),
+            ``'binary'``, or ``'binary-zlib'``. Default is ``'binary'``.
+        query_cache (`~marvin.utils.general.querycache.QueryCache`):
+            If set, the results of local queries are cached in this object and
+            reused when the same query is run again. Default is None.
+        query_workers (int):
+            The number of local queries submitted with ``Query.submit`` that run
+            concurrently. Default is 4.
+        profile_queries (bool):
+            If True, local queries record their SQL, plan, and timings in the query
+            history. See :mod:`marvin.utils.db.queryprofile`. Default is False.
+        use_flat_views (bool):
+            If True, local queries run on the flat materialised views of the release
+            when the views have all their parameters and are up to date with the
+            data. See :mod:`marvin.utils.db.flatviews`. Default is False.
+        prepared_statements (bool):
+            If True, local queries with bounded results run as server-side prepared
+            statements, prepared once per connection. Default is False.
+        tool_workers (int):
+            The number of Marvin Tools initialised concurrently when converting query
+            results in remote mode. Default is 8.
+        lazy_init (bool):
+            If True, the database models are imported and reflected, the database
+            connection tested, the query datamodel forms built, and the API client
+            imported the first time they are used, instead of when importing Marvin.
+            Set from the ``MARVIN_LAZY_INIT`` environment variable, which must be
+            set before importing Marvin. The time spent in each stage is recorded
+            in ``marvin.init_timings``. Default is False.
     '''
     def __init__(self):
 
@@ -96,6 +139,17 @@ class MarvinConfig(object):
         self.download = False
         self.use_sentry = True
         self.add_github_message = True
+        self.fits_cache_dir = None
+        self.fits_cache_size = None
+        self.array_cache = None
+        self.array_format = 'binary'
+        self.tool_workers = 8
+        self.query_cache = None
+        self.query_workers = 4
+        self.profile_queries = False
+        self.use_flat_views = False
+        self.prepared_statements = False
+        self.lazy_init = os.environ.get('MARVIN_LAZY_INIT', '').lower() in ['1', 'true', 'yes']
 
         self._plantTree()
         self._checkSDSSAccess()
@@ -237,14 +291,16 @@ class MarvinConfig(object):
         """Retrieves the URLMap the first time it is needed."""
 
         if self._urlmap is None or (isinstance(self._urlmap, dict) and len(self._urlmap) == 0):
-            try:
-                response = Interaction('api/general/getroutemap', request_type='get')
-            except Exception as e:
-                warnings.warn('Cannot retrieve URLMap. Remote functionality will not work: {0}'.format(e),
-                              MarvinUserWarning)
-                self.urlmap = URLMapDict()
-            else:
-                self.urlmap = response.getRouteMap()
+            with timed('urlmap'):
+                from marvin.api.api import Interaction
+                try:
+                    response = Interaction('api/general/getroutemap', request_type='get')
+                except Exception as e:
+                    warnings.warn('Cannot retrieve URLMap. Remote functionality will not work: {0}'.format(e),
+                                  MarvinUserWarning)
+                    self.urlmap = URLMapDict()
+                else:
+                    self.urlmap = response.getRouteMap()
 
         return self._urlmap
 
@@ -252,7 +308,11 @@ class MarvinConfig(object):
     def urlmap(self, value):
         """Manually sets the URLMap."""
         self._urlmap = value
-        arg_validate.urlmap = self._urlmap
+
+        # With lazy_init the API may not have been imported yet.
+        api_base = sys.modules.get('marvin.api.base')
+        if api_base is not None:
+            api_base.arg_validate.urlmap = self._urlmap
 
     @property
     def xyorig(self):
@@ -464,11 +524,13 @@ class MarvinConfig(object):
                 self._sdss_access_isloaded = True
 
 
-config = MarvinConfig()
+with timed('config'):
+    config = MarvinConfig()
 
-# Inits the Database session and ModelClasses
-from marvin.db.marvindb import MarvinDB
-marvindb = MarvinDB(dbtype=config.db)
+# Inits the Database session and ModelClasses. With lazy_init, on first use.
+with timed('marvindb'):
+    from marvin.db.marvindb import MarvinDB
+    marvindb = MarvinDB(dbtype=config.db, lazy=config.lazy_init)
 
 # Init MARVIN_DIR
 marvindir = os.environ.get('MARVIN_DIR', None)
@@ -478,7 +540,10 @@ if not marvindir:
     os.environ['MARVIN_DIR'] = marvindir
 
 # Inits the URL Route Map
-from marvin.api.api import Interaction
 config.sasurl = 'https://api.sdss.org/marvin2/'
 
-from marvin.api.base import arg_validate
+if not config.lazy_init:
+    with timed('api'):
+        from marvin.api.api import Interaction
+        from marvin.api.base import arg_validate
+
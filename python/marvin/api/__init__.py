@@ -63,8 +63,18 @@ params = {'query': {'searchfilter': fields.String(allow_none=True),
                     'params': fields.DelimitedList(fields.String(), allow_none=True),
                     'return_all': fields.Boolean(allow_none=True),
                     'format_type': fields.String(allow_none=True, validate=validate.OneOf(['list', 'listdict', 'dictlist'])),
-                    'caching': fields.Boolean(allow_none=True)
+                    'caching': fields.Boolean(allow_none=True),
+                    'count_mode': fields.String(missing='exact', validate=validate.OneOf(['exact', 'estimate', 'auto'])),
+                    'parallel': fields.Integer(allow_none=True, validate=validate.Range(min=1, max=16))
                     },
+          'batch': {'plateifus': fields.DelimitedList(fields.String(validate=validate.Regexp('^[0-9]{4,5}-[0-9]{3,5}$')),
+                                                      allow_none=True, validate=validate.Length(min=1, max=500))
+                    },
+          'spaxels': {'x': fields.DelimitedList(fields.Integer(validate=validate.Range(min=0, max=100)),
+                                                allow_none=True, validate=validate.Length(min=1, max=5000)),
+                      'y': fields.DelimitedList(fields.Integer(validate=validate.Range(min=0, max=100)),
+                                                allow_none=True, validate=validate.Length(min=1, max=5000))
+                      },
           'search': {'searchbox': fields.String(required=True),
                      'parambox': fields.DelimitedList(fields.String(), allow_none=True)
                      },
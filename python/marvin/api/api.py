@@ -13,8 +13,9 @@ Revision History:
 from __future__ import print_function
 from __future__ import division
 from brain.api.api import BrainInteraction
+from marvin.api.arrays import decode_arrays
 
-configkeys = ['release', 'session_id']
+configkeys = ['release', 'session_id', 'array_format']
 
 
 class Interaction(BrainInteraction):
@@ -78,6 +79,9 @@ class Interaction(BrainInteraction):
         >>> # get the data in your response
         >>> data = response.getData()
         >>> print(data)
+
+    Arrays sent by the server in binary form (see :mod:`marvin.api.arrays` and
+    ``config.array_format``) are decoded into numpy arrays by ``getData``.
     '''
 
     def _loadConfigParams(self):
@@ -90,3 +94,10 @@ class Interaction(BrainInteraction):
                     self.params[k] = config.__getattribute__(k)
         else:
             self.params = {k: config.__getattribute__(k) for k in configkeys}
+
+    def getData(self, *args, **kwargs):
+        """Returns the data from the response, decoding any binary-encoded arrays."""
+
+        data = super(Interaction, self).getData(*args, **kwargs)
+
+        return decode_arrays(data)
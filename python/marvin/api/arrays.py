@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# arrays.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Binary transport of numpy arrays through the API.
+
+By default, arrays returned by the API are serialised as nested JSON lists,
+which is very inefficient for large arrays such as cube extensions. Clients
+can request a binary encoding by sending the ``array_format`` parameter
+(set from ``marvin.config.array_format``):
+
+- ``'json'``: nested lists (the default for clients that do not send the
+  parameter).
+- ``'binary'``: the raw little-endian buffer of the array, base64-encoded,
+  along with its dtype and shape.
+- ``'binary-zlib'``: as ``'binary'`` but the buffer is compressed with zlib.
+
+The encoded array is still embedded in the JSON response, so servers that do
+not know about ``array_format`` simply return lists, which the client accepts
+as well. `~marvin.api.api.Interaction` decodes the arrays transparently in
+``getData``.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import base64
+import zlib
+
+import numpy as np
+
+
+__all__ = ['ARRAY_FORMATS', 'encode_array', 'decode_array', 'decode_arrays',
+           'get_array_format']
+
+
+ARRAY_FORMATS = ('json', 'binary', 'binary-zlib')
+
+_ENCODED_KEY = '__ndarray__'
+
+
+def encode_array(array, array_format='json'):
+    """Encodes an array for a JSON response.
+
+    Parameters:
+        array (`numpy.ndarray` or None):
+            The array to encode.
+        array_format (str):
+            One of `ARRAY_FORMATS`.
+
+    Returns:
+        encoded:
+            ``None`` if ``array`` is ``None``, a nested list if
+            ``array_format='json'``, or a dictionary with the base64-encoded
+            buffer, dtype, shape, and compression otherwise.
+
+    """
+
+    if array is None:
+        return None
+
+    assert array_format in ARRAY_FORMATS, 'invalid array_format {0!r}'.format(array_format)
+
+    array = np.asarray(array)
+
+    if array_format == 'json':
+        return array.tolist()
+
+    # FITS data are big-endian; always send little-endian, C-contiguous buffers.
+    dtype = array.dtype.newbyteorder('<') if array.dtype.byteorder != '|' else array.dtype
+    buffer = np.ascontiguousarray(array, dtype=dtype).tobytes()
+
+    compression = None
+    if array_format == 'binary-zlib':
+        buffer = zlib.compress(buffer, 1)
+        compression = 'zlib'
+
+    return {_ENCODED_KEY: base64.b64encode(buffer).decode('ascii'),
+            'dtype': dtype.str,
+            'shape': list(array.shape),
+            'compression': compression}
+
+
+def decode_array(encoded):
+    """Decodes an array encoded with `encode_array`.
+
+    Lists are converted to arrays. For binary encodings, the returned array
+    is a read-only view of the decoded buffer (no further copy is made).
+    Callers should use it directly (e.g., with `numpy.asarray`) and only
+    ``.copy()`` it if they need to modify it in place.
+
+    """
+
+    if encoded is None:
+        return None
+
+    if isinstance(encoded, dict) and _ENCODED_KEY in encoded:
+
+        buffer = base64.b64decode(encoded[_ENCODED_KEY])
+
+        if encoded.get('compression') == 'zlib':
+            buffer = zlib.decompress(buffer)
+
+        return np.frombuffer(buffer, dtype=np.dtype(encoded['dtype'])).reshape(encoded['shape'])
+
+    return np.array(encoded)
+
+
+def decode_arrays(data):
+    """Recursively decodes all the binary-encoded arrays in a dictionary.
+
+    Values that are not binary-encoded arrays are returned unchanged. Lists
+    are not traversed, so legacy nested-list arrays are not walked.
+
+    """
+
+    if isinstance(data, dict):
+        if _ENCODED_KEY in data:
+            return decode_array(data)
+        return dict((key, decode_arrays(value)) for key, value in data.items())
+
+    return data
+
+
+def get_array_format(request):
+    """Returns the array format requested by the client in a Flask request."""
+
+    array_format = request.values.get('array_format', 'json')
+
+    return array_format if array_format in ARRAY_FORMATS else 'json'
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# batch.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Prefetching of the remote initialisation data for many galaxies.
+
+Instantiating a `~marvin.tools.cube.Cube` or `~marvin.tools.maps.Maps` in
+remote mode requires one API call per object (and more to retrieve its NSA
+and DAPall information). For samples of thousands of galaxies the time is
+dominated by the latency of those requests. `get_batch_payloads` retrieves
+the same data for many galaxies from the batch routes, a few hundred per
+request, and the tools can then be instantiated without calling the API by
+passing the payload as ``data``::
+
+    >>> payloads = get_batch_payloads('cube', ['8485-1901', '7443-12701'])
+    >>> cube = Cube(plateifu='8485-1901', data=payloads['8485-1901'])
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import marvin
+from marvin.api.api import Interaction
+from marvin.core.exceptions import MarvinError
+
+
+__all__ = ['get_batch_payloads', 'has_batch_route']
+
+
+_batch_routes = {'cube': ('getCubesBatch', 'cubes'),
+                 'maps': ('getMapsBatch', 'maps')}
+
+
+def has_batch_route(tooltype):
+    """Returns True if the server provides a batch route for ``tooltype``."""
+
+    if tooltype not in _batch_routes:
+        return False
+
+    try:
+        return _batch_routes[tooltype][0] in marvin.config.urlmap['api']
+    except Exception:
+        return False
+
+
+def get_batch_payloads(tooltype, plateifus, release=None, bintype=None, template=None,
+                       chunk_size=200):
+    """Returns the data needed to instantiate many tools remotely.
+
+    Parameters:
+        tooltype ({'cube', 'maps'}):
+            The type of tool.
+        plateifus (list):
+            The list of plate-ifus.
+        release (str):
+            The release of the data. Defaults to ``marvin.config.release``.
+        bintype (str):
+            For Maps, the bintype. If None, the default bintype for the release.
+        template (str):
+            For Maps, the template. If None, the default template for the release.
+        chunk_size (int):
+            The number of galaxies requested at once (at most 500).
+
+    Returns:
+        payloads (dict):
+            A dictionary of plate-ifu to the data to be passed as ``data`` to
+            the tool. Plate-ifus that could not be loaded by the server are
+            not included.
+
+    """
+
+    assert tooltype in _batch_routes, 'tooltype must be one of {0}'.format(list(_batch_routes))
+    assert 0 < chunk_size <= 500, 'chunk_size must be between 1 and 500'
+
+    if not has_batch_route(tooltype):
+        raise MarvinError('the server does not provide a batch route for {0}'.format(tooltype))
+
+    release = release or marvin.config.release
+
+    route, key = _batch_routes[tooltype]
+    url = marvin.config.urlmap['api'][route]['url']
+
+    if tooltype == 'maps':
+        from marvin.utils.datamodel.dap import datamodel
+        dapdm = datamodel[release]
+        url = url.format(bintype=dapdm.get_bintype(bintype).name,
+                         template=dapdm.get_template(template).name)
+
+    plateifus = list(plateifus)
+    payloads = {}
+
+    for ii in range(0, len(plateifus), chunk_size):
+
+        chunk = plateifus[ii:ii + chunk_size]
+
+        try:
+            response = Interaction(url, params={'plateifus': ','.join(chunk),
+                                                'release': release})
+        except Exception as ee:
+            raise MarvinError('found a problem retrieving batch data: {0}'.format(str(ee)))
+
+        payloads.update(response.getData()[key])
+
+    return payloads
@@ -10,6 +10,7 @@ from flask import jsonify, request, Response
 import json
 
 from marvin import config
+from marvin.api.arrays import encode_array, get_array_format
 from marvin.api.base import BaseView, arg_validate as av
 from marvin.core.exceptions import MarvinError
 from marvin.utils.general import parseIdentifier, mangaid2plateifu
@@ -80,6 +81,37 @@ def _getCube(name, use_file=False, release=None, **kwargs):
     return cube, results
 
 
+def _getCubePayload(cube, plateifu, nsa=False):
+    ''' Returns the data needed to instantiate a cube remotely
+
+    If ``nsa=True``, the NSA information is included so that the client does
+    not need to request it separately.
+    '''
+
+    try:
+        nsa_data = cube.nsa
+    except (MarvinError, BrainError):
+        nsa_data = None
+
+    wavelength = (cube._wavelength.tolist() if isinstance(cube._wavelength, np.ndarray)
+                  else cube._wavelength)
+
+    payload = {'plateifu': plateifu,
+               'mangaid': cube.mangaid,
+               'ra': cube.ra,
+               'dec': cube.dec,
+               'header': cube.header.tostring(),
+               'redshift': nsa_data.z if nsa_data else -9999,
+               'wavelength': wavelength,
+               'wcs_header': cube.wcs.to_header_string(),
+               'shape': cube._shape}
+
+    if nsa:
+        payload['nsa'] = nsa_data
+
+    return payload
+
+
 class CubeView(BaseView):
     ''' Class describing API calls related to MaNGA Cubes '''
 
@@ -198,23 +230,79 @@ class CubeView(BaseView):
         self.update_results(res)
 
         if cube:
+            self.results['data'] = _getCubePayload(cube, name)
+
+        return jsonify(self.results)
 
-            try:
-                nsa_data = cube.nsa
-            except (MarvinError, BrainError):
-                nsa_data = None
-
-            wavelength = (cube._wavelength.tolist() if isinstance(cube._wavelength, np.ndarray)
-                          else cube._wavelength)
-            self.results['data'] = {'plateifu': name,
-                                    'mangaid': cube.mangaid,
-                                    'ra': cube.ra,
-                                    'dec': cube.dec,
-                                    'header': cube.header.tostring(),
-                                    'redshift': nsa_data.z if nsa_data else -9999,
-                                    'wavelength': wavelength,
-                                    'wcs_header': cube.wcs.to_header_string(),
-                                    'shape': cube._shape}
+    @route('/batch/', methods=['POST'], endpoint='getCubesBatch')
+    @av.check_args(use_params='batch', required='plateifus')
+    def getCubesBatch(self, args):
+        '''Returns the information to instantiate the cubes for a list of plate-ifus.
+
+        .. :quickref: Cube; Get the cubes for a list of plate-ifus
+
+        :form plateifus: comma-separated list of plate-ifus (up to 500)
+        :form release: the release of MaNGA
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson json data: dictionary of returned data
+        :json dict cubes: for each plate-ifu, the same data returned by
+            :http:post:`/marvin2/api/cubes/(name)/` plus the full NSA information
+        :json dict errors: for each plate-ifu that failed, the error message
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           POST /marvin2/api/cubes/batch/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+           plateifus=8485-1901,7443-12701&release=MPL-5
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": {"cubes": {"8485-1901": {"plateifu": "8485-1901",
+                                               "mangaid": "1-209232",
+                                               "header": "XTENSION= 'IMAGE', NAXIS=3, .... END",
+                                               "nsa": {"z": 0.0407447, ...},
+                                               ...},
+                                 "7443-12701": {...}},
+                       "errors": {}
+              }
+           }
+
+        '''
+
+        plateifus = args.pop('plateifus')
+
+        cubes = {}
+        errors = {}
+        for plateifu in plateifus:
+            cube, res = _getCube(plateifu, **args)
+            if cube is None:
+                errors[plateifu] = res.get('error', None)
+            else:
+                cubes[plateifu] = _getCubePayload(cube, plateifu, nsa=True)
+
+        self.results['status'] = 1
+        self.results['data'] = {'cubes': cubes, 'errors': errors}
 
         return jsonify(self.results)
 
@@ -230,6 +318,7 @@ class CubeView(BaseView):
         :param cube_extension: The name of the cube extension.  Either flux, ivar, or mask.
         :form release: the release of MaNGA
         :form use_file: if True, forces to load the cube from a file.
+        :form array_format: json, binary, or binary-zlib. See :mod:`marvin.api.arrays`.
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -278,7 +367,8 @@ class CubeView(BaseView):
             if extension_data is None:
                 self.results['data'] = {'extension_data': None}
             else:
-                self.results['data'] = {'extension_data': extension_data.tolist()}
+                self.results['data'] = {'extension_data': encode_array(
+                    extension_data, array_format=get_array_format(request))}
 
         return Response(json.dumps(self.results), mimetype='application/json')
 
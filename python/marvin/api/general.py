@@ -24,6 +24,7 @@ from brain.api.general import BrainGeneralRequestsView
 from marvin.utils.general import mangaid2plateifu as mangaid2plateifu
 from marvin.utils.general import get_nsa_data
 from marvin.api.base import arg_validate as av
+from marvin import marvindb
 import json
 
 
@@ -203,3 +204,65 @@ class GeneralRequestsView(BrainGeneralRequestsView):
             self.results['error'] = 'get_nsa_data failed with error: {0}'.format(str(ee))
 
         return Response(json.dumps(self.results), mimetype='application/json')
+
+    @route('/dbpool/', endpoint='getDbPoolStatus', methods=['GET', 'POST'])
+    @av.check_args()
+    def get_db_pool_status(self, args):
+        """Returns the status of the database connection pool of the server.
+
+        .. :quickref: General; Returns the status of the database connection pool
+
+        :form release: the release of MaNGA
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson json data: dictionary of returned data
+        :json int size: the size of the pool
+        :json int checked_out: the number of connections in use
+        :json int overflow: the number of connections above the pool size
+        :json int waits: the number of checkouts that waited for a connection
+        :json float wait_time: the total time waited, in seconds
+        :json int timeouts: the number of checkouts that timed out
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           GET /marvin2/api/general/dbpool/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": {"external_pooler": false, "size": 10, "checked_out": 2,
+                       "checked_in": 8, "overflow": 0, "max_overflow": 10, "timeout": 30,
+                       "waits": 0, "wait_time": 0.0, "timeouts": 0}
+           }
+
+        """
+
+        status = marvindb.pool_status()
+
+        if status is None:
+            self.results['status'] = -1
+            self.results['error'] = 'no database connection'
+        else:
+            self.results['data'] = status
+            self.results['status'] = 1
+
+        return jsonify(self.results)
@@ -11,8 +11,10 @@ from __future__ import print_function
 from __future__ import absolute_import
 
 from flask_classful import route
-from flask import jsonify
+from flask import jsonify, request
+from brain.core.exceptions import BrainError
 
+import marvin.api.arrays
 import marvin.api.base
 import marvin.core.exceptions
 import marvin.tools.maps
@@ -58,6 +60,37 @@ def _getMaps(name, **kwargs):
     return maps, results
 
 
+def _getMapsPayload(maps, extras=False):
+    """Returns the data needed to instantiate a Maps remotely.
+
+    If ``extras=True``, the NSA and DAPall information are included so that
+    the client does not need to request them separately.
+
+    """
+
+    payload = {'mangaid': maps.mangaid,
+               'plateifu': maps.plateifu,
+               'header': maps.header.tostring(),
+               'wcs': maps.wcs.to_header_string(),
+               'bintype': maps.bintype.name,
+               'template': maps.template.name,
+               'shape': maps._shape}
+
+    if extras:
+
+        try:
+            payload['nsa'] = maps.nsa
+        except (marvin.core.exceptions.MarvinError, BrainError):
+            payload['nsa'] = None
+
+        try:
+            payload['dapall'] = maps.dapall
+        except marvin.core.exceptions.MarvinError:
+            payload['dapall'] = None
+
+    return payload
+
+
 class MapsView(marvin.api.base.BaseView):
     """Class describing API calls related to MaNGA Maps."""
 
@@ -182,23 +215,86 @@ class MapsView(marvin.api.base.BaseView):
         if maps is None:
             return jsonify(self.results)
 
-        header = maps.header.tostring()
-        wcs_header = maps.wcs.to_header_string()
-        bintype = maps.bintype.name
-        template = maps.template.name
-        shape = maps._shape
-
         # Redefines plateifu and mangaid from the Maps
-        mangaid = maps.mangaid
-        plateifu = maps.plateifu
+        self.results['data'] = _getMapsPayload(maps)
+
+        return jsonify(self.results)
+
+    @route('/batch/<bintype>/<template>/', methods=['POST'], endpoint='getMapsBatch')
+    @marvin.api.base.arg_validate.check_args(use_params='batch', required='plateifus')
+    def getMapsBatch(self, args, bintype, template):
+        '''Returns the parameters needed to initialise the Maps for a list of plate-ifus.
+
+        .. :quickref: Maps; Get the maps for a list of plate-ifus
+
+        :param bintype: The bintype associated with the maps
+        :param template: The template associated with the maps
+        :form plateifus: comma-separated list of plate-ifus (up to 500)
+        :form release: the release of MaNGA data
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson json data: dictionary of returned data
+        :json dict maps: for each plate-ifu, the same data returned by
+            :http:post:`/marvin2/api/maps/(name)/(bintype)/(template)/` plus the
+            NSA and DAPall information
+        :json dict errors: for each plate-ifu that failed, the error message
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           POST /marvin2/api/maps/batch/SPX/GAU-MILESHC/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+           plateifus=8485-1901,7443-12701&release=MPL-6
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-6"},
+              "utahconfig": {"release": "MPL-6", "mode": "local"},
+              "traceback": null,
+              "data": {"maps": {"8485-1901": {"plateifu": "8485-1901",
+                                              "mangaid": "1-209232",
+                                              "bintype": "SPX",
+                                              "template": "GAU-MILESHC",
+                                              "nsa": {...},
+                                              "dapall": {...},
+                                              ...},
+                                "7443-12701": {...}},
+                       "errors": {}
+              }
+           }
+
+        '''
+
+        plateifus = args.pop('plateifus')
+        args = self._pop_args(args, arglist=['bintype', 'template'])
 
-        self.results['data'] = {'mangaid': mangaid,
-                                'plateifu': plateifu,
-                                'header': header,
-                                'wcs': wcs_header,
-                                'bintype': bintype,
-                                'template': template,
-                                'shape': shape}
+        maps = {}
+        errors = {}
+        for plateifu in plateifus:
+            mm, results = _getMaps(plateifu, bintype=bintype, template=template, **args)
+            if mm is None:
+                errors[plateifu] = results.get('error', None)
+            else:
+                maps[plateifu] = _getMapsPayload(mm, extras=True)
+
+        self.results['status'] = 1
+        self.results['data'] = {'maps': maps, 'errors': errors}
 
         return jsonify(self.results)
 
@@ -218,6 +314,7 @@ class MapsView(marvin.api.base.BaseView):
         :param property_name: The property_name of the map to be extractred. E.g., `'emline_gflux'`.
         :param channel: If the ``property_name`` contains multiple channels, the channel to use, e.g., ``ha_6564'. Otherwise, ``None``
         :form release: the release of MaNGA data
+        :form array_format: json, binary, or binary-zlib. See :mod:`marvin.api.arrays`.
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -278,9 +375,10 @@ class MapsView(marvin.api.base.BaseView):
         try:
             mmap = maps.getMap(property_name=str(property_name), channel=str(channel))
             self.results['data'] = {}
-            self.results['data']['value'] = mmap.value.tolist()
-            self.results['data']['ivar'] = mmap.ivar.tolist() if mmap.ivar is not None else None
-            self.results['data']['mask'] = mmap.mask.tolist() if mmap.mask is not None else None
+            array_format = marvin.api.arrays.get_array_format(request)
+            for key in ['value', 'ivar', 'mask']:
+                self.results['data'][key] = marvin.api.arrays.encode_array(
+                    getattr(mmap, key), array_format=array_format)
             self.results['data']['unit'] = mmap.unit.to_string()
         except Exception as ee:
             self.results['error'] = 'Failed to parse input name {0}: {1}'.format(name, str(ee))
@@ -432,3 +530,87 @@ class MapsView(marvin.api.base.BaseView):
                                                'mask': mask}
 
         return jsonify(self.results)
+
+    @route('/<name>/<bintype>/<template>/quantities/', methods=['POST'],
+           endpoint='getMapsQuantitiesSpaxels')
+    @marvin.api.base.arg_validate.check_args(use_params='spaxels', required=['x', 'y'])
+    def getMapsQuantitiesSpaxels(self, args, name, bintype, template):
+        """Returns all the quantities for a list of spaxels.
+
+        .. :quickref: Maps; Returns all the quantities for a list of spaxels
+
+        :param name: The name of the maps as plate-ifu or mangaid
+        :param bintype: The bintype associated with the maps
+        :param template: The template associated with the maps
+        :form x: comma-separated list of x coordinates (origin is ``lower``, up to 5000)
+        :form y: comma-separated list of y coordinates (origin is ``lower``, up to 5000)
+        :form release: the release of MaNGA
+        :form array_format: json, binary, or binary-zlib. See :mod:`marvin.api.arrays`.
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson json data: dictionary of returned data
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           POST /marvin2/api/maps/8485-1901/SPX/GAU-MILESHC/quantities/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+           x=10,15&y=12,8&release=MPL-6
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-6"},
+              "utahconfig": {"release": "MPL-6", "mode": "local"},
+              "traceback": null,
+              "data": {"emline_gflux_ha6564": {"value": [2.3, 1.1], "ivar": [...], "mask": [...]},
+                       "binid": ...}
+              }
+           }
+        """
+
+        xx = args.pop('x')
+        yy = args.pop('y')
+        args = self._pop_args(args, arglist=['name'])
+
+        if len(xx) != len(yy):
+            self.results['error'] = 'x and y must have the same length.'
+            return jsonify(self.results)
+
+        maps, res = _getMaps(name, **args)
+        self.update_results(res)
+
+        if maps:
+
+            self.results['data'] = {}
+            array_format = marvin.api.arrays.get_array_format(request)
+
+            try:
+                spaxels_quantities = maps._get_spaxels_quantities(xx, yy)
+            except Exception as ee:
+                self.results['error'] = 'Failed to get the spaxels of {0}: {1}'.format(name, ee)
+                return jsonify(self.results)
+
+            for quant in spaxels_quantities:
+                quantity = spaxels_quantities[quant]
+                self.results['data'][quant] = dict(
+                    (key, marvin.api.arrays.encode_array(getattr(quantity, key),
+                                                         array_format=array_format))
+                    for key in ['value', 'ivar', 'mask'])
+
+        return jsonify(self.results)
@@ -17,10 +17,11 @@ import json
 import os
 
 from flask_classful import route
-from flask import jsonify, Response
+from flask import jsonify, request, Response
 
 from marvin import config
 from marvin.tools.modelcube import ModelCube
+from marvin.api.arrays import encode_array, get_array_format
 from marvin.api.base import BaseView, arg_validate as av
 from marvin.core.exceptions import MarvinError
 from marvin.utils.general import parseIdentifier, mangaid2plateifu
@@ -208,6 +209,7 @@ class ModelCubeView(BaseView):
         :param template: The template associated with this modelcube.
         :param modelcube_extension: The name of the cube extension.  Either flux, ivar, or mask.
         :form release: the release of MaNGA
+        :form array_format: json, binary, or binary-zlib. See :mod:`marvin.api.arrays`.
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -256,7 +258,8 @@ class ModelCubeView(BaseView):
             if extension_data is None:
                 self.results['data'] = {'extension_data': None}
             else:
-                self.results['data'] = {'extension_data': extension_data.tolist()}
+                self.results['data'] = {'extension_data': encode_array(
+                    extension_data, array_format=get_array_format(request))}
 
         return Response(json.dumps(self.results), mimetype='application/json')
 
@@ -279,6 +282,7 @@ class ModelCubeView(BaseView):
         :param template: The template associated with this modelcube.
         :param modelcube_extension: The name of the cube extension.
         :form release: the release of MaNGA
+        :form array_format: json, binary, or binary-zlib. See :mod:`marvin.api.arrays`.
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -324,7 +328,8 @@ class ModelCubeView(BaseView):
             try:
                 model = modelcube.datamodel.from_fits_extension(modelcube_extension)
                 binid_data = modelcube.get_binid(model)
-                self.results['data'] = {'binid': binid_data.tolist()}
+                self.results['data'] = {'binid': encode_array(
+                    binid_data, array_format=get_array_format(request))}
             except Exception as ee:
                 self.results['error'] = str(ee)
 
@@ -107,6 +107,7 @@ class PlateView(BaseView):
         :resjson json data: dictionary of returned data
         :json string plateid: the plateid
         :json dict header: the cube header as a dict
+        :json list cubes: the plateifu, mangaid, ra, and dec of each cube on the plate
         :resheader Content-Type: application/json
         :statuscode 200: no error
         :statuscode 422: invalid input parameters
@@ -132,19 +133,20 @@ class PlateView(BaseView):
               "utahconfig": {"release": "MPL-5", "mode": "local"},
               "traceback": null,
               "data": {"plateid": "8485",
-                    "header": {"AIRMSMAX": "1.07643", "AIRMSMED": "1.04336", "AIRMSMIN": "1.03694", ... }
+                    "header": {"AIRMSMAX": "1.07643", "AIRMSMED": "1.04336", "AIRMSMIN": "1.03694", ... },
+                    "cubes": [{"plateifu": "8485-12701", "mangaid": "1-209191", "ra": 232.45, "dec": 48.64}, ...]
               }
            }
 
         """
         args = self._pop_args(args, arglist=['plateid'])
-        plate, results = _getPlate(plateid, nocubes=True, **args)
+        plate, results = _getPlate(plateid, **args)
         self.update_results(results)
 
         if not isinstance(plate, type(None)):
-            # For now we don't return anything here, maybe later.
-
-            platedict = {'plateid': plateid, 'header': plate._hdr}
+            # The cube metadata let the client list the cubes without a second request.
+            platedict = {'plateid': plateid, 'header': plate._hdr,
+                         'cubes': [cube.metadata for cube in plate]}
             self.results['data'] = platedict
 
         return jsonify(self.results)
@@ -165,6 +167,7 @@ class PlateView(BaseView):
         :resjson string traceback: traceback of an error, null if None
         :resjson json data: dictionary of returned data
         :json list plateifus: a list of plate-ifus for this plate
+        :json list cubes: the plateifu, mangaid, ra, and dec of each cube on the plate
         :resheader Content-Type: application/json
         :statuscode 200: no error
         :statuscode 422: invalid input parameters
@@ -189,7 +192,8 @@ class PlateView(BaseView):
               "inconfig": {"release": "MPL-5"},
               "utahconfig": {"release": "MPL-5", "mode": "local"},
               "traceback": null,
-              "data": {"plateifus": ["8485-12701","8485-12702","8485-1901","8485-1902", ...]
+              "data": {"plateifus": ["8485-12701","8485-12702","8485-1901","8485-1902", ...],
+                       "cubes": [{"plateifu": "8485-12701", "mangaid": "1-209191", "ra": 232.45, "dec": 48.64}, ...]
               }
            }
 
@@ -201,6 +205,7 @@ class PlateView(BaseView):
 
         if not isinstance(plate, type(None)):
             plateifus = [cube.plateifu for cube in plate]
-            self.results['data'] = {'plateifus': plateifus}
+            self.results['data'] = {'plateifus': plateifus,
+                                    'cubes': [cube.metadata for cube in plate]}
 
         return jsonify(self.results)
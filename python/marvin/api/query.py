@@ -1,9 +1,11 @@
 from flask_classful import route
 from flask import request, jsonify, Response, current_app, redirect, url_for, stream_with_context
 from marvin.tools.query import doQuery, Query
+from marvin.tools.queryjob import get_job
 from marvin.core.exceptions import MarvinError
 from marvin.api.base import BaseView, arg_validate as av
 from marvin.utils.db import get_traceback
+from marvin.utils.db.queryprofile import get_slow_queries
 from marvin.utils.datamodel.query.base import bestparams
 from marvin.web.extensions import limiter
 import json
@@ -33,12 +35,37 @@ def _get_runtime(query):
     return runtime
 
 
+def _submit_query(searchfilter, **kwargs):
+    ''' Submit the query as a local job and return the job '''
+
+    release = kwargs.pop('release', None)
+    start = kwargs.pop('start', None)
+    end = kwargs.pop('end', None)
+    parallel = kwargs.pop('parallel', None)
+    kwargs['returnparams'] = kwargs.pop('params', None)
+    kwargs['returntype'] = kwargs.pop('rettype', None)
+
+    try:
+        q = Query(searchfilter=searchfilter, release=release, mode='local', **kwargs)
+        job = q.submit(start=start, end=end, parallel=parallel)
+    except Exception as e:
+        raise MarvinError('Query submit failed with {0}: {1}'.format(e.__class__.__name__, e))
+    else:
+        return job
+
+
 def _getCubes(searchfilter, **kwargs):
     """Run query locally at Utah and format the output into the full JSON """
 
     # run the query
     q, r = _run_query(searchfilter, **kwargs)
 
+    return _format_results(q, r, searchfilter, **kwargs)
+
+
+def _format_results(q, r, searchfilter, **kwargs):
+    """Format the query and results into the full JSON """
+
     # get the subset keywords
     start = kwargs.get('start', None)
     end = kwargs.get('end', None)
@@ -58,7 +85,8 @@ def _getCubes(searchfilter, **kwargs):
     # set up the output
     output = dict(data=results, query=r.showQuery(), chunk=limit,
                   filter=searchfilter, params=q.params, returnparams=params, runtime=_get_runtime(q),
-                  queryparams_order=q.queryparams_order, count=len(results), totalcount=r.totalcount)
+                  queryparams_order=q.queryparams_order, count=len(results), totalcount=r.totalcount,
+                  count_estimated=r.count_estimated)
     return output
 
 
@@ -374,6 +402,285 @@ class QueryView(BaseView):
         # this needs to be json.dumps until sas-vm at Utah updates to 2.7.11
         return Response(stream_with_context(json.dumps(self.results)), mimetype='application/json')
 
+    @route('/jobs/', methods=['POST'], endpoint='submitquery')
+    @av.check_args(use_params='query', required='searchfilter')
+    def submit_query(self, args):
+        ''' Submits a query to run asynchronously on the server
+
+        .. :quickref: Query; Submit a query to run asynchronously
+
+        :query string release: the release of MaNGA
+        :form searchfilter: your string searchfilter expression
+        :form params: the list of return parameters
+        :form limit: the limiting number of results to return for large results
+        :form sort: a string parameter name to sort on
+        :form order: the order of the sort, either ``desc`` or ``asc``
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson string data: dictionary of returned data
+        :json string job_id: the id of the query job
+        :json string status: the status of the job
+        :json float progress: the fraction of the job completed
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           POST /marvin2/api/query/jobs/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5", "searchfilter": "nsa.z<0.1"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": {"job_id": "5c1f0b5e8f0b4e6a9d3c1a2b3c4d5e6f", "status": "pending",
+                       "progress": 0.0, "stage": null, "error": null, ...}
+           }
+
+        '''
+        searchfilter = args.pop('searchfilter', None)
+
+        try:
+            job = _submit_query(searchfilter, **args)
+        except MarvinError as e:
+            self.results['error'] = str(e)
+            self.results['traceback'] = get_traceback(asstring=True)
+        else:
+            self.results['status'] = 1
+            self.results['data'] = job.to_dict()
+
+        return jsonify(self.results)
+
+    @route('/jobs/<jobid>/', methods=['GET', 'POST'], endpoint='getqueryjob')
+    @av.check_args()
+    def get_query_job(self, args, jobid):
+        ''' Returns the status of a query job
+
+        .. :quickref: Query; Get the status of a query job
+
+        :param jobid: the id of the query job
+        :query string release: the release of MaNGA
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson string data: dictionary of returned data
+        :json string job_id: the id of the query job
+        :json string status: one of pending, running, done, failed, or cancelled
+        :json float progress: the fraction of the job completed
+        :json string stage: the stage of the query being run
+        :json string error: the error message if the job failed
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           GET /marvin2/api/query/jobs/5c1f0b5e8f0b4e6a9d3c1a2b3c4d5e6f/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": {"job_id": "5c1f0b5e8f0b4e6a9d3c1a2b3c4d5e6f", "status": "running",
+                       "progress": 0.3, "stage": "execute", "error": null, ...}
+           }
+
+        '''
+
+        try:
+            job = get_job(jobid)
+        except MarvinError as e:
+            self.results['error'] = str(e)
+        else:
+            self.results['status'] = 1
+            self.results['data'] = job.to_dict()
+
+        return jsonify(self.results)
+
+    @route('/jobs/<jobid>/cancel/', methods=['POST'], endpoint='cancelqueryjob')
+    @av.check_args()
+    def cancel_query_job(self, args, jobid):
+        ''' Cancels a query job
+
+        Cancels the statement running in the database, if any.
+
+        .. :quickref: Query; Cancel a query job
+
+        :param jobid: the id of the query job
+        :query string release: the release of MaNGA
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson string data: dictionary of returned data, as in the job status
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           POST /marvin2/api/query/jobs/5c1f0b5e8f0b4e6a9d3c1a2b3c4d5e6f/cancel/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        '''
+
+        try:
+            job = get_job(jobid)
+            job.cancel()
+        except MarvinError as e:
+            self.results['error'] = str(e)
+            self.results['traceback'] = get_traceback(asstring=True)
+        else:
+            self.results['status'] = 1
+            self.results['data'] = job.to_dict()
+
+        return jsonify(self.results)
+
+    @route('/jobs/<jobid>/results/', methods=['GET', 'POST'], endpoint='getqueryjobresults')
+    @av.check_args()
+    def get_query_job_results(self, args, jobid):
+        ''' Returns the results of a finished query job
+
+        The response has the same content as the ``querycubes`` route.
+
+        .. :quickref: Query; Get the results of a query job
+
+        :param jobid: the id of the query job
+        :query string release: the release of MaNGA
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson string data: the list of results
+        :resheader Content-Type: application/octet-stream
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           GET /marvin2/api/query/jobs/5c1f0b5e8f0b4e6a9d3c1a2b3c4d5e6f/results/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        '''
+
+        try:
+            job = get_job(jobid)
+            if job.status() != 'done':
+                raise MarvinError('query job {0} is {1}'.format(jobid, job.status()))
+            results = job.result()
+        except MarvinError as e:
+            self.results['error'] = str(e)
+            self.results['traceback'] = get_traceback(asstring=True)
+        else:
+            self.results['status'] = 1
+            self.update_results(_format_results(job.query, results, job.query.searchfilter,
+                                                limit=job.query.limit,
+                                                params=job.query._returnparams))
+
+        packed = msgpack.packb(self.results, use_bin_type=True)
+        return Response(stream_with_context(packed), mimetype='application/octet-stream')
+
+    @route('/profile/', methods=['GET', 'POST'], endpoint='getqueryprofile')
+    @av.check_args(use_params='query')
+    def get_query_profile(self, args):
+        ''' Returns the slowest profiled queries of a release
+
+        Queries are profiled when ``config.profile_queries`` is set on the
+        server. See :mod:`marvin.utils.db.queryprofile`.
+
+        .. :quickref: Query; Get the slowest profiled queries
+
+        :query string release: the release of MaNGA
+        :form limit: the maximum number of queries to return
+        :resjson int status: status of response. 1 if good, -1 if bad.
+        :resjson string error: error message, null if None
+        :resjson json inconfig: json of incoming configuration
+        :resjson json utahconfig: json of outcoming configuration
+        :resjson string traceback: traceback of an error, null if None
+        :resjson string data: the list of profiled queries, slowest first
+        :json string searchfilter: the search filter
+        :json int nprofiles: the number of profiled runs
+        :json float mean_time: the mean total time of the runs, in seconds
+        :json float max_time: the maximum total time of the runs, in seconds
+        :json int nplans: the number of distinct plans used by the runs
+        :resheader Content-Type: application/json
+        :statuscode 200: no error
+        :statuscode 422: invalid input parameters
+
+        **Example request**:
+
+        .. sourcecode:: http
+
+           GET /marvin2/api/query/profile/ HTTP/1.1
+           Host: api.sdss.org
+           Accept: application/json, */*
+
+        **Example response**:
+
+        .. sourcecode:: http
+
+           HTTP/1.1 200 OK
+           Content-Type: application/json
+           {
+              "status": 1,
+              "error": null,
+              "inconfig": {"release": "MPL-5"},
+              "utahconfig": {"release": "MPL-5", "mode": "local"},
+              "traceback": null,
+              "data": [{"searchfilter": "nsa.z<0.1", "nprofiles": 3, "mean_time": 2.1,
+                        "max_time": 3.4, "nplans": 1, ...}, ...]
+           }
+
+        '''
+
+        try:
+            queries = get_slow_queries(args['release'], limit=args.get('limit', 100))
+        except Exception as e:
+            self.results['error'] = 'Failed to retrieve the query profiles: {0}'.format(e)
+            self.results['traceback'] = get_traceback(asstring=True)
+        else:
+            self.results['status'] = 1
+            self.results['data'] = queries
+
+        return jsonify(self.results)
+
     @route('/getparamslist/', methods=['GET', 'POST'], endpoint='getparams')
     @av.check_args(use_params='query', required='paramdisplay')
     def getparamslist(self, args):
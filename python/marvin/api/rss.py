@@ -13,10 +13,11 @@
 from __future__ import division
 from __future__ import print_function
 
-from flask import jsonify
+from flask import jsonify, request
 from flask_classful import route
 
 from marvin.tools.rss import RSS
+from marvin.api.arrays import encode_array, get_array_format
 from marvin.api.base import BaseView, arg_validate as av
 from marvin.core.exceptions import MarvinError
 from marvin.utils.general import parseIdentifier
@@ -121,12 +122,17 @@ class RSSView(BaseView):
     @route('/<name>/fibers/', methods=['GET', 'POST'], endpoint='getRSSAllFibers')
     @av.check_args()
     def getAllFibers(self, args, name):
-        """Returns a list of all the flux, ivar, mask, and wavelength arrays for all fibres.
+        """Returns the flux, ivar, mask, and wavelength arrays for all fibres.
+
+        If ``array_format`` is sent, the flux, ivar, and mask are returned as
+        single ``(nfibers, nwave)`` arrays, encoded as requested. Otherwise, a
+        list of ``[flux, ivar, mask]`` is returned for each fibre.
 
         .. :quickref: RSS; Get a list of flux, ivar, mask, and wavelength arrays for all fibers
 
         :param name: The name of the cube as plate-ifu or mangaid
         :form release: the release of MaNGA
+        :form array_format: json, binary, or binary-zlib. See :mod:`marvin.api.arrays`.
         :resjson int status: status of response. 1 if good, -1 if bad.
         :resjson string error: error message, null if None
         :resjson json inconfig: json of incoming configuration
@@ -135,6 +141,7 @@ class RSSView(BaseView):
         :resjson json data: dictionary of returned data
         :json list rssfiber: the flux, ivar, mask arrays for the given rssfiber index
         :json list wavelength: the wavelength arrays for all fibers
+        :json flux: with array_format, the flux of all the fibres (also ivar and mask)
         :resheader Content-Type: application/json
         :statuscode 200: no error
         :statuscode 422: invalid input parameters
@@ -175,14 +182,19 @@ class RSSView(BaseView):
         rss, results = _getRSS(name, **args)
         self.update_results(results)
 
-        if rss:
+        if rss and 'array_format' in request.values:
+            array_format = get_array_format(request)
+            self.results['data'] = dict((key, encode_array(getattr(rss, key),
+                                                           array_format=array_format))
+                                        for key in ['wavelength', 'flux', 'ivar', 'mask'])
+
+        elif rss:
             self.results['data'] = {}
-            self.results['data']['wavelength'] = rss[0].wavelength.tolist()
+            self.results['data']['wavelength'] = rss.wavelength.tolist()
 
-            for ii, fiber in enumerate(rss):
-                flux = fiber.value.tolist()
-                ivar = fiber.ivar.tolist()
-                mask = fiber.mask.tolist()
-                self.results['data'][ii] = [flux, ivar, mask]
+            flux, ivar, mask = rss.flux, rss.ivar, rss.mask
+            for ii in range(len(rss)):
+                self.results['data'][ii] = [flux[ii].tolist(), ivar[ii].tolist(),
+                                            mask[ii].tolist()]
 
         return jsonify(self.results)
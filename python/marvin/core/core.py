@@ -24,12 +24,13 @@ from brain.core.exceptions import BrainError
 import marvin
 import marvin.api.api
 
-from marvin.core import marvin_pickle
+from marvin.core import marvin_pickle, snapshot
 from marvin.core.exceptions import MarvinUserWarning, MarvinError
 from marvin.core.exceptions import MarvinMissingDependency, MarvinBreadCrumb
 
 from marvin.utils.db import testDbConnection
 from marvin.utils.general import mangaid2plateifu, get_nsa_data, get_dapall_file, map_dapall
+from marvin.utils.general.catalogue import get_dapall_index
 
 try:
     from sdss_access.path import Path
@@ -82,9 +83,12 @@ class MarvinToolsClass(object, six.with_metaclass(abc.ABCMeta)):
             ignored.
         mode ({'local', 'remote', 'auto'}):
             The load mode to use. See :ref:`mode-decision-tree`.
-        data (:class:`~astropy.io.fits.HDUList`, SQLAlchemy object, or None):
+        data (:class:`~astropy.io.fits.HDUList`, SQLAlchemy object, dict, or None):
             An astropy ``HDUList`` or a SQLAlchemy object, to be used for
-            initialisation. If ``None``, the :ref:`normal <marvin-dma>`` mode
+            initialisation. A dictionary is interpreted as the data returned
+            by the API for this object (e.g., from one of the batch routes,
+            see `marvin.api.batch`) and forces remote mode without making a
+            new request. If ``None``, the :ref:`normal <marvin-dma>`` mode
             will be used.
         release (str):
             The MPL/DR version of the data to use.
@@ -130,6 +134,11 @@ class MarvinToolsClass(object, six.with_metaclass(abc.ABCMeta)):
 
         self.mode = mode if mode is not None else marvin.config.mode
 
+        # A dictionary of prefetched API data can only be used in remote mode.
+        if isinstance(self.data, dict):
+            assert self.mode in ['auto', 'remote'], 'data dictionaries require remote mode.'
+            self.mode = 'remote'
+
         self._release = release if release is not None else marvin.config.release
 
         self._drpver, self._dapver = marvin.config.lookUpVersions(release=self._release)
@@ -361,7 +370,10 @@ class MarvinToolsClass(object, six.with_metaclass(abc.ABCMeta)):
         data = None
         if idict['data_origin'] == 'file':
             try:
-                data = astropy.io.fits.open(idict['filename'])
+                if snapshot.is_snapshot(idict['filename']):
+                    data = snapshot.open_snapshot_hdus(idict['filename'])
+                else:
+                    data = astropy.io.fits.open(idict['filename'])
             except Exception as ee:
                 warnings.warn('there was a problem reloading the FITS object: {0}. '
                               'The object has been unpickled but not all the functionality '
@@ -370,20 +382,27 @@ class MarvinToolsClass(object, six.with_metaclass(abc.ABCMeta)):
         self.__dict__.update(idict)
         self.data = data
 
-    def save(self, path=None, overwrite=False):
-        """Pickles the object.
+    def save(self, path=None, overwrite=False, format=None):
+        """Pickles the object or saves it as an HDF5 snapshot.
 
         If ``path=None``, uses the default location of the file in the tree
-        but changes the extension of the file to ``.mpf``. Returns the path
-        of the saved pickle file.
+        but changes the extension of the file to ``.mpf`` (or ``.h5`` for
+        snapshots). Returns the path of the saved file.
+
+        Snapshots (see :mod:`marvin.core.snapshot`) store the data of the
+        object, so that it can be restored without the original file, and
+        read each extension only when it is accessed. They require ``h5py``
+        and ``data_origin='file'``.
 
         Parameters:
-            obj:
-                Marvin object to pickle.
             path (str):
                 Path of saved file. Default is ``None``.
             overwrite (bool):
                 If ``True``, overwrite existing file. Default is ``False``.
+            format ({None, 'mpf', 'hdf5'}):
+                The format of the file. If ``None``, paths with extension
+                ``.h5`` or ``.hdf5`` are saved as snapshots and any other path
+                is pickled.
 
         Returns:
             str:
@@ -391,19 +410,27 @@ class MarvinToolsClass(object, six.with_metaclass(abc.ABCMeta)):
 
         """
 
+        if snapshot.use_snapshot(path, format=format):
+            if path is None:
+                path = marvin_pickle.get_default_path(self, extension=snapshot.SNAPSHOT_EXTENSION)
+            return snapshot.save_snapshot(self, path, overwrite=overwrite)
+
         return marvin_pickle.save(self, path=path, overwrite=overwrite)
 
     @classmethod
     def restore(cls, path, delete=False):
-        """Restores a MarvinToolsClass object from a pickled file.
+        """Restores a MarvinToolsClass object from a pickled file or a snapshot.
 
-        If ``delete=True``, the pickled file will be removed after it has been
-        unplickled. Note that, for objects with ``data_origin='file'``, the
-        original file must exists and be in the same path as when the object
-        was first created.
+        If ``delete=True``, the file will be removed after it has been
+        restored. Note that, for pickled objects with ``data_origin='file'``,
+        the original file must exists and be in the same path as when the
+        object was first created. Snapshots do not need the original file.
 
         """
 
+        if snapshot.is_snapshot(path):
+            return snapshot.restore_snapshot(path, delete=delete)
+
         return marvin_pickle.restore(path, delete=delete)
 
     @property
@@ -555,17 +582,13 @@ class DAPallMixIn(object):
         if not os.path.exists(dapall_path):
             raise MarvinError('cannot find DAPall file in the system.')
 
-        dapall_hdu = astropy.io.fits.open(dapall_path)
-
-        header = dapall_hdu[0].header
-        dapall_table = dapall_hdu[-1].data
+        dapall_index = get_dapall_index(self._drpver, self._dapver)
 
-        dapall_row = dapall_table[(dapall_table['PLATEIFU'] == self.plateifu) &
-                                  (dapall_table['DAPTYPE'] == daptype)]
+        indices = dapall_index.find((self.plateifu, daptype), key=('plateifu', 'daptype'))
 
-        assert len(dapall_row) == 1, 'cannot find matching row in DAPall.'
+        assert len(indices) == 1, 'cannot find matching row in DAPall.'
 
-        return map_dapall(header, dapall_row[0])
+        return map_dapall(dapall_index.header, dapall_index.data[indices[0]])
 
     def _get_dapall_from_db(self):
         """Uses the DB to retrieve the DAPAll data."""
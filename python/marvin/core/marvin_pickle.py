@@ -23,6 +23,35 @@ from six import string_types
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
 
 
+def get_default_path(obj, extension='.mpf'):
+    """Returns the default path to which a core object is saved.
+
+    This is the location of the file in the tree, with the extension of the
+    file (normally ``.fits.gz``) replaced by ``extension``.
+
+    """
+
+    from marvin.core.core import MarvinToolsClass
+
+    assert isinstance(obj, MarvinToolsClass), 'path=None is only allowed for core objects.'
+
+    path = obj._getFullPath()
+    if path is None:
+        raise MarvinError('cannot determine the default path in the '
+                          'tree for this file. You can overcome this '
+                          'by calling save with a path keyword with '
+                          'the path to which the file should be saved.')
+    assert isinstance(path, string_types), 'path must be a string.'
+
+    # Replaces the extension (normally fits.gz)
+    if path.endswith('.fits.gz'):
+        path = path[:-len('.fits.gz')]
+    else:
+        path = os.path.splitext(path)[0]
+
+    return path + extension
+
+
 def save(obj, path=None, overwrite=False):
     """Pickles the object.
 
@@ -43,25 +72,8 @@ def save(obj, path=None, overwrite=False):
             Path of saved file.
     """
 
-    from marvin.core.core import MarvinToolsClass
-
     if path is None:
-        assert isinstance(obj, MarvinToolsClass), 'path=None is only allowed for core objects.'
-        path = obj._getFullPath()
-        assert isinstance(path, string_types), 'path must be a string.'
-        if path is None:
-            raise MarvinError('cannot determine the default path in the '
-                              'tree for this file. You can overcome this '
-                              'by calling save with a path keyword with '
-                              'the path to which the file should be saved.')
-
-        # Replaces the extension (normally fits) with mpf
-        if '.fits.gz' in path:
-            path = path.strip('.fits.gz')
-        else:
-            path = os.path.splitext(path)[0]
-
-        path += '.mpf'
+        path = get_default_path(obj, extension='.mpf')
 
     path = os.path.realpath(os.path.expanduser(path))
 
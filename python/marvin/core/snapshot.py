@@ -0,0 +1,723 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# snapshot.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Snapshots of Marvin objects in HDF5 files.
+
+`~marvin.tools.cube.Cube`, `~marvin.tools.maps.Maps`,
+`~marvin.tools.modelcube.ModelCube`, `~marvin.tools.quantities.map.Map`, and
+`~marvin.tools.results.Results` can be saved as snapshots, an alternative to
+the pickled ``.mpf`` files. A snapshot is an HDF5 file in which the arrays are
+stored as chunked, compressed datasets and everything else is stored as JSON
+metadata. Restoring a snapshot does not use `pickle` and does not need the
+original FITS file::
+
+    >>> maps.save('maps_8485-1901.h5')
+    >>> maps = Maps.restore('maps_8485-1901.h5')
+    >>> ha = maps.emline_gflux_ha_6564
+
+Snapshots of tools contain every extension of the FITS file, with its header.
+The extensions are read from the snapshot when they are first accessed, so in
+the example above only the headers and the ``EMLINE_GFLUX`` extensions (and
+the BINID map) are read. ``hdu.section`` gives access to the HDF5 dataset of
+an extension, to read part of it without loading the whole array. The
+snapshot is closed once the data of all the extensions have been read, or
+when the tool is deleted.
+
+Snapshots require `h5py <http://www.h5py.org>`_. Only tools with
+``data_origin='file'`` can be saved as snapshots.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import copy
+import importlib
+import json
+import os
+import warnings
+
+import numpy as np
+import six
+
+from astropy import units
+from astropy.io import fits
+
+from marvin.core.exceptions import MarvinError, MarvinUserWarning
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+__all__ = ['save_snapshot', 'restore_snapshot', 'is_snapshot', 'use_snapshot',
+           'open_snapshot_hdus', 'SnapshotHDU', 'SnapshotHDUList']
+
+
+#: The version of the snapshot format.
+SNAPSHOT_VERSION = 1
+
+#: The file extension of snapshots.
+SNAPSHOT_EXTENSION = '.h5'
+
+# The signature at the beginning of every HDF5 file.
+_HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+
+# The classes that can be saved as snapshots, and their modules.
+_snapshot_classes = {'Cube': 'marvin.tools.cube',
+                     'Maps': 'marvin.tools.maps',
+                     'ModelCube': 'marvin.tools.modelcube',
+                     'Map': 'marvin.tools.quantities.map',
+                     'Results': 'marvin.tools.results'}
+
+# Flags of a Map, stored as the value of their mask.
+_map_flags = ['manga_target1', 'manga_target2', 'manga_target3', 'quality_flag']
+
+
+def _check_h5py():
+    """Raises an error if h5py is not installed."""
+
+    if h5py is None:
+        raise MarvinError('h5py is required to save and restore snapshots.')
+
+
+def _get_class(name):
+    """Returns one of the classes that can be saved as snapshots."""
+
+    if name not in _snapshot_classes:
+        raise MarvinError('cannot restore snapshots of class {0!r}.'.format(name))
+
+    return getattr(importlib.import_module(_snapshot_classes[name]), name)
+
+
+def is_snapshot(path):
+    """Returns True if ``path`` is an HDF5 file (as opposed to a pickle file)."""
+
+    try:
+        with open(os.path.realpath(os.path.expanduser(path)), 'rb') as fin:
+            return fin.read(len(_HDF5_SIGNATURE)) == _HDF5_SIGNATURE
+    except (IOError, OSError):
+        return False
+
+
+def use_snapshot(path=None, format=None):
+    """Returns True if an object must be saved as a snapshot instead of pickled.
+
+    Parameters:
+        path (str):
+            The path to which the object will be saved. Paths with extension
+            ``.h5`` or ``.hdf5`` are saved as snapshots.
+        format ({None, 'mpf', 'hdf5'}):
+            The format. If None, the format is inferred from ``path``, with
+            ``'mpf'`` (pickle) as default.
+
+    """
+
+    assert format in [None, 'mpf', 'hdf5'], 'format must be one of None, mpf, or hdf5.'
+
+    if format is not None:
+        return format == 'hdf5'
+
+    return path is not None and os.path.splitext(path)[1].lower() in ['.h5', '.hdf5']
+
+
+class _SnapshotEncoder(json.JSONEncoder):
+    """Encodes numpy types as JSON."""
+
+    def default(self, obj):
+
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        elif isinstance(obj, np.generic):
+            return obj.item()
+        elif isinstance(obj, six.binary_type):
+            return obj.decode('utf-8', 'replace')
+
+        return str(obj)
+
+
+def _to_json(value):
+    return json.dumps(value, cls=_SnapshotEncoder)
+
+
+def _write_text(group, name, text):
+    """Stores a string as a dataset of bytes, which is not limited in size like attributes."""
+
+    group.create_dataset(name, data=np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
+
+
+def _read_text(group, name):
+    """Reads a string written with `_write_text`."""
+
+    return group[name][()].tobytes().decode('utf-8')
+
+
+def _create_dataset(group, name, array, compression='gzip', compression_level=4):
+    """Creates a chunked and compressed dataset."""
+
+    array = np.asarray(array)
+
+    kwargs = {}
+    if compression and array.ndim > 0 and array.size > 0:
+        kwargs = {'compression': compression, 'shuffle': True, 'chunks': True}
+        if compression == 'gzip':
+            kwargs['compression_opts'] = compression_level
+
+    return group.create_dataset(name, data=array, **kwargs)
+
+
+def _to_arrays(values):
+    """Converts the lists in a dictionary decoded from JSON back to arrays."""
+
+    return dict((key, np.array(value) if isinstance(value, list) else value)
+                for key, value in values.items())
+
+
+class SnapshotHDU(object):
+    """An extension of a snapshot, with the interface of an astropy HDU.
+
+    The header is parsed and the data are read from the snapshot the first
+    time they are accessed.
+
+    Parameters:
+        name (str):
+            The name of the extension.
+        header (str):
+            The header of the extension, as a string.
+        dataset (`h5py.Dataset`):
+            The dataset with the data of the extension, or None if the
+            extension has no data.
+        on_load (callable):
+            A function called, without arguments, after the data are read.
+
+    """
+
+    def __init__(self, name, header, dataset=None, on_load=None):
+
+        self.name = name
+        self._header_str = header
+        self._header = None
+        self._dataset = dataset
+        self._data = None
+        self._on_load = on_load
+
+    def __repr__(self):
+
+        return '<SnapshotHDU (name={0!r}, loaded={1})>'.format(self.name, self.loaded)
+
+    @property
+    def header(self):
+        """The `~astropy.io.fits.Header` of the extension."""
+
+        if self._header is None:
+            self._header = fits.Header.fromstring(self._header_str)
+
+        return self._header
+
+    @property
+    def data(self):
+        """The data of the extension, read from the snapshot on first access."""
+
+        if self._data is None and self._dataset is not None:
+            self._data = self._dataset[()]
+            if self._data.dtype.names is not None:
+                self._data = self._data.view(np.recarray)
+            if self._on_load is not None:
+                self._on_load()
+
+        return self._data
+
+    @property
+    def section(self):
+        """The HDF5 dataset of the extension, which can be sliced without reading all of it.
+
+        The dataset can only be read while the snapshot is open.
+
+        """
+
+        return self._dataset
+
+    @property
+    def loaded(self):
+        """True if the data have been read."""
+
+        return self._data is not None
+
+
+class SnapshotHDUList(fits.HDUList):
+    """The extensions of a snapshot, with the interface of an `~astropy.io.fits.HDUList`.
+
+    Extensions can be accessed by index or (case-insensitive) name.
+
+    Parameters:
+        hdus (list):
+            A list of `.SnapshotHDU`.
+        h5file (`h5py.File`):
+            The open snapshot file. It is closed by `~.SnapshotHDUList.close`
+            or once the data of all the extensions have been read.
+
+    """
+
+    def __init__(self, hdus, h5file=None):
+
+        # The HDUs are not astropy HDUs, so they are added after the HDUList is initialised.
+        fits.HDUList.__init__(self)
+        list.extend(self, hdus)
+
+        self._h5file = h5file
+
+        for hdu in self:
+            hdu._on_load = self._close_if_loaded
+
+    def __repr__(self):
+
+        return '<SnapshotHDUList {0!r}>'.format([hdu.name for hdu in self])
+
+    def __len__(self):
+        return list.__len__(self)
+
+    def __iter__(self):
+        return list.__iter__(self)
+
+    def __getitem__(self, key):
+
+        if isinstance(key, six.string_types):
+            return list.__getitem__(self, self.index_of(key))
+
+        return list.__getitem__(self, key)
+
+    def __contains__(self, key):
+
+        try:
+            self.index_of(key)
+        except KeyError:
+            return False
+
+        return True
+
+    def index_of(self, key):
+        """Returns the index of an extension, by name."""
+
+        for idx, hdu in enumerate(self):
+            if hdu.name.upper() == key.upper():
+                return idx
+
+        raise KeyError('Extension {0!r} not found.'.format(key))
+
+    def readall(self):
+        """Reads the data of all the extensions."""
+
+        for hdu in self:
+            hdu.data
+
+    def info(self, output=None):
+        """Prints the extensions in the snapshot."""
+
+        for idx, hdu in enumerate(self):
+            print('{0:<4}{1:<20}{2}'.format(idx, hdu.name, 'loaded' if hdu.loaded else ''))
+
+    def _close_if_loaded(self):
+        """Closes the snapshot file if the data of all the extensions have been read."""
+
+        if all(hdu.loaded or hdu.section is None for hdu in self):
+            self.close()
+
+    def close(self, *args, **kwargs):
+        """Closes the snapshot file. Data already read remain available."""
+
+        if self._h5file is not None:
+            try:
+                self._h5file.close()
+            except Exception:
+                pass
+            self._h5file = None
+
+
+def _hdu_array(hdu):
+    """Returns the data of an HDU as a numpy array, or None."""
+
+    data = hdu.data
+
+    if data is None:
+        return None
+
+    if isinstance(data, fits.FITS_rec):
+        # Converts the columns (e.g., logical columns) to numpy types.
+        return np.rec.fromarrays([np.asarray(data[name]) for name in data.names],
+                                 names=data.names)
+
+    return np.asarray(data)
+
+
+def _save_tool(h5file, obj, **kwargs):
+    """Saves a Cube, Maps, or ModelCube."""
+
+    if obj.data_origin != 'file' or obj.data is None:
+        raise MarvinError('only objects with data_origin=\'file\' can be saved as snapshots.')
+
+    metadata = {'release': obj.release, 'plateifu': obj.plateifu, 'mangaid': obj.mangaid,
+                'nsa_source': getattr(obj, 'nsa_source', 'auto')}
+
+    if hasattr(obj, 'bintype'):
+        metadata['bintype'] = obj.bintype.name
+        metadata['template'] = obj.template.name
+
+    # Keeps the NSA and DAPall data, if they have been loaded.
+    if getattr(obj, '_nsa', None) is not None:
+        metadata['nsa'] = dict(obj._nsa)
+    if getattr(obj, '_dapall', None) is not None:
+        metadata['dapall'] = dict(obj._dapall)
+
+    hdus = h5file.create_group('hdus')
+    for idx, hdu in enumerate(obj.data):
+
+        group = hdus.create_group('{0:03d}'.format(idx))
+        group.attrs['name'] = hdu.name
+        _write_text(group, 'header', hdu.header.tostring())
+
+        data = _hdu_array(hdu)
+        if data is None:
+            continue
+
+        try:
+            _create_dataset(group, 'data', data, **kwargs)
+        except (TypeError, ValueError) as ee:
+            warnings.warn('cannot save the data of extension {0!r}: {1}'.format(hdu.name, ee),
+                          MarvinUserWarning)
+
+    return metadata
+
+
+def open_snapshot_hdus(path):
+    """Opens the extensions of a snapshot of a tool.
+
+    Parameters:
+        path (str):
+            The path of the snapshot.
+
+    Returns:
+        hdus (`.SnapshotHDUList`):
+            The extensions of the snapshot. The data are not read until they
+            are accessed.
+
+    """
+
+    _check_h5py()
+
+    h5file = h5py.File(os.path.realpath(os.path.expanduser(path)), 'r')
+
+    if 'hdus' not in h5file:
+        h5file.close()
+        raise MarvinError('{0} is not a snapshot of a Marvin tool.'.format(path))
+
+    hdus = []
+    for key in sorted(h5file['hdus']):
+        group = h5file['hdus'][key]
+        name = group.attrs['name']
+        name = name.decode('utf-8') if isinstance(name, six.binary_type) else str(name)
+        hdus.append(SnapshotHDU(name, _read_text(group, 'header'),
+                                dataset=group['data'] if 'data' in group else None))
+
+    return SnapshotHDUList(hdus, h5file=h5file)
+
+
+def _restore_tool(path, toolclass, metadata):
+    """Restores a Cube, Maps, or ModelCube."""
+
+    from marvin.utils.general.structs import DotableCaseInsensitive
+
+    kwargs = {}
+    if metadata.get('bintype', None) is not None:
+        kwargs['bintype'] = metadata['bintype']
+        kwargs['template'] = metadata['template']
+
+    # The snapshot is closed by the HDUList once all the data are read, or when the tool is deleted.
+    hdus = open_snapshot_hdus(path)
+
+    try:
+        obj = toolclass(filename=path, data=hdus, mode='local',
+                        release=metadata['release'], nsa_source=metadata['nsa_source'],
+                        **kwargs)
+    except Exception:
+        hdus.close()
+        raise
+
+    if metadata.get('nsa', None) is not None:
+        obj._nsa = DotableCaseInsensitive(_to_arrays(metadata['nsa']))
+    if metadata.get('dapall', None) is not None:
+        obj._dapall = _to_arrays(metadata['dapall'])
+
+    return obj
+
+
+def _save_map(h5file, obj, **kwargs):
+    """Saves a Map."""
+
+    metadata = {'unit': obj.unit.to_string(), 'property': None, 'dapver': None, 'flags': {}}
+
+    if obj._datamodel is not None:
+        metadata['property'] = obj._datamodel.full()
+        metadata['dapver'] = obj._datamodel.parent.release
+
+    if obj._maps is not None:
+        metadata.update({'release': obj._maps.release, 'plateifu': obj._maps.plateifu,
+                         'mangaid': obj._maps.mangaid, 'bintype': obj._maps.bintype.name,
+                         'template': obj._maps.template.name})
+
+    for name in _map_flags:
+        flag = getattr(obj, name, None)
+        if flag is not None and flag.mask is not None:
+            metadata['flags'][name] = int(flag.mask)
+
+    arrays = h5file.create_group('arrays')
+    for name in ['value', 'ivar', 'mask', 'binid']:
+        array = getattr(obj, name)
+        if array is not None:
+            _create_dataset(arrays, name, array, **kwargs)
+
+    return metadata
+
+
+def _restore_map(h5file, mapclass, metadata):
+    """Restores a Map."""
+
+    from marvin.utils.datamodel.dap import datamodel
+    from marvin.utils.datamodel.dap.base import spaxel
+
+    arrays = h5file['arrays']
+    value, ivar, mask, binid = [arrays[name][()] if name in arrays else None
+                                for name in ['value', 'ivar', 'mask', 'binid']]
+
+    prop = None
+    if metadata['property'] is not None:
+        prop = datamodel[metadata['dapver']].properties[metadata['property']]
+
+    with units.add_enabled_units([spaxel]):
+        unit = units.Unit(metadata['unit'])
+
+    obj = mapclass(value, unit=unit, ivar=ivar, mask=mask, binid=binid)
+    obj._datamodel = prop
+
+    # The flags are copied because the Maskbit instances of the datamodel are shared.
+    flags = metadata['flags'] if prop is not None else {}
+    for name, flag_mask in flags.items():
+        bitmask = 'MANGA_DAPQUAL' if name == 'quality_flag' else name.upper()
+        flag = copy.copy(prop.parent.bitmasks[bitmask])
+        flag.mask = flag_mask
+        setattr(obj, name, flag)
+
+    if all(name in flags for name in _map_flags[:3]):
+        obj.target_flags = [obj.manga_target1, obj.manga_target2, obj.manga_target3]
+
+    return obj
+
+
+def _save_results(h5file, obj, **kwargs):
+    """Saves a Results."""
+
+    metadata = {'searchfilter': obj.searchfilter, 'params': obj._params,
+                'returnparams': obj.returnparams, 'returntype': obj.returntype,
+                'limit': obj.limit, 'release': obj._release, 'mode': obj.mode,
+                'count': obj.count, 'totalcount': obj.totalcount,
+                'count_estimated': obj.count_estimated, 'chunk': obj.chunk,
+                'start': obj.start, 'end': obj.end, 'sortcol': obj.sortcol,
+                'order': obj.order, 'runtime': obj._runtime,
+                'query': obj.query if isinstance(obj.query, six.string_types) else None,
+                'columns': []}
+
+    # Only the runtime of remote results (a dictionary) can be stored as JSON.
+    if not isinstance(metadata['runtime'], dict):
+        metadata['runtime'] = None
+
+    columns = h5file.create_group('columns')
+    data = obj._get_column_data() if obj.count else None
+    data = data if data is not None else {}
+
+    for idx, (name, array) in enumerate(data.items()):
+
+        column = {'name': name, 'kind': array.dtype.kind, 'values': None}
+
+        if array.dtype.kind == 'U':
+            array = np.char.encode(array, 'utf-8')
+
+        if array.dtype.kind == 'O':
+            # Columns with arrays or mixed types are stored in the metadata.
+            column['values'] = array.tolist()
+        else:
+            _create_dataset(columns, '{0:03d}'.format(idx), array, **kwargs)
+
+        metadata['columns'].append(column)
+
+    return metadata
+
+
+def _restore_results(h5file, resultsclass, metadata):
+    """Restores a Results."""
+
+    columns = []
+    for idx, column in enumerate(metadata['columns']):
+        if column['kind'] == 'O':
+            columns.append(column['values'])
+            continue
+        array = h5file['columns']['{0:03d}'.format(idx)][()]
+        if column['kind'] == 'U':
+            array = np.char.decode(array, 'utf-8')
+        columns.append(array.tolist())
+
+    rows = list(zip(*columns))
+
+    obj = resultsclass(results=rows, count=len(rows), totalcount=metadata['totalcount'],
+                       searchfilter=metadata['searchfilter'], params=metadata['params'],
+                       returnparams=metadata['returnparams'], limit=metadata['limit'],
+                       release=metadata['release'], mode=metadata['mode'],
+                       query=metadata['query'], runtime=metadata['runtime'],
+                       count_estimated=metadata['count_estimated'], chunk=metadata['chunk'],
+                       start=metadata['start'], end=metadata['end'])
+
+    # Set after instantiation, so that the results are not converted to tools.
+    obj.returntype = metadata['returntype']
+    obj.sortcol = metadata['sortcol']
+    obj.order = metadata['order']
+
+    return obj
+
+
+def save_snapshot(obj, path, overwrite=False, compression='gzip', compression_level=4):
+    """Saves an object as an HDF5 snapshot.
+
+    Parameters:
+        obj:
+            The `~marvin.tools.cube.Cube`, `~marvin.tools.maps.Maps`,
+            `~marvin.tools.modelcube.ModelCube`,
+            `~marvin.tools.quantities.map.Map`, or
+            `~marvin.tools.results.Results` to save.
+        path (str):
+            The path of the snapshot.
+        overwrite (bool):
+            If ``True``, overwrites an existing file. Otherwise, warns and
+            returns None.
+        compression (str):
+            The HDF5 compression filter for the arrays (``'gzip'``, ``'lzf'``,
+            or None).
+        compression_level (int):
+            The level of ``'gzip'`` compression, from 0 to 9.
+
+    Returns:
+        path (str):
+            The real path of the snapshot.
+
+    """
+
+    _check_h5py()
+
+    from marvin.core.core import MarvinToolsClass
+    from marvin.tools.quantities.map import Map
+    from marvin.tools.results import Results
+
+    # Subclasses of Map (e.g., EnhancedMap) are restored as a Map.
+    classname = obj.__class__.__name__
+    if isinstance(obj, MarvinToolsClass) and classname in _snapshot_classes:
+        save_object = _save_tool
+    elif isinstance(obj, Map):
+        save_object, classname = _save_map, 'Map'
+    elif isinstance(obj, Results):
+        save_object, classname = _save_results, 'Results'
+    else:
+        raise MarvinError('cannot save objects of class {0!r} as snapshots.'
+                          .format(obj.__class__.__name__))
+
+    path = os.path.realpath(os.path.expanduser(path))
+
+    if os.path.isdir(path):
+        raise MarvinError('path must be a full route, including the filename.')
+
+    if os.path.exists(path) and not overwrite:
+        warnings.warn('file already exists. Not overwriting.', MarvinUserWarning)
+        return
+
+    dirname = os.path.dirname(path)
+    if not os.path.exists(dirname):
+        os.makedirs(dirname)
+
+    # Writes to a temporary file, so that a failure does not leave a partial snapshot.
+    tmp_path = path + '.tmp'
+
+    try:
+        with h5py.File(tmp_path, 'w') as h5file:
+            metadata = save_object(h5file, obj, compression=compression,
+                                   compression_level=compression_level)
+            h5file.attrs['marvin_snapshot'] = SNAPSHOT_VERSION
+            h5file.attrs['class'] = classname
+            _write_text(h5file, 'metadata', _to_json(metadata))
+        os.rename(tmp_path, path)
+    except Exception as ee:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if isinstance(ee, MarvinError):
+            raise
+        raise MarvinError('error found while saving the snapshot: {0}'.format(str(ee)))
+
+    return path
+
+
+def restore_snapshot(path, delete=False):
+    """Restores an object from an HDF5 snapshot.
+
+    Parameters:
+        path (str):
+            The path of the snapshot.
+        delete (bool):
+            If ``True``, removes the snapshot once the object has been
+            restored. The data of tools are then read into memory first.
+
+    Returns:
+        obj:
+            The restored object.
+
+    """
+
+    _check_h5py()
+
+    assert isinstance(path, six.string_types), 'path must be a string.'
+
+    path = os.path.realpath(os.path.expanduser(path))
+
+    if not os.path.exists(path):
+        raise MarvinError('the path does not exists.')
+
+    with h5py.File(path, 'r') as h5file:
+
+        if 'marvin_snapshot' not in h5file.attrs:
+            raise MarvinError('{0} is not a Marvin snapshot.'.format(path))
+
+        if int(h5file.attrs['marvin_snapshot']) > SNAPSHOT_VERSION:
+            raise MarvinError('the snapshot was created by a newer version of Marvin.')
+
+        classname = h5file.attrs['class']
+        classname = (classname.decode('utf-8')
+                     if isinstance(classname, six.binary_type) else str(classname))
+        objclass = _get_class(classname)
+        metadata = json.loads(_read_text(h5file, 'metadata'))
+
+        if classname == 'Map':
+            obj = _restore_map(h5file, objclass, metadata)
+        elif classname == 'Results':
+            obj = _restore_results(h5file, objclass, metadata)
+        else:
+            obj = None
+
+    # Tools keep the snapshot open to read the extensions lazily. Reading all
+    # the extensions closes it.
+    if obj is None:
+        obj = _restore_tool(path, objclass, metadata)
+        if delete is True:
+            obj.data.readall()
+
+    if delete is True:
+        os.remove(path)
+
+    return obj
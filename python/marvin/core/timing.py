@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# timing.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Timings of the initialisation stages of Marvin.
+
+``import marvin`` and the first use of the database, the query datamodels, and
+the URL map record the time they take in `init_timings`, by stage, e.g.,
+``'config'``, ``'marvindb'``, ``'db.models'``, or ``'urlmap'``::
+
+    >>> import marvin
+    >>> marvin.init_timings
+    OrderedDict([('extern', 0.01), ('config', 0.12), ('marvindb', 2.3), ...])
+
+``bin/benchmark_import`` reports these timings over several fresh
+interpreters, with and without ``MARVIN_LAZY_INIT``.
+
+This module only uses the standard library, so that it can be imported before
+anything else.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import contextlib
+import time
+from collections import OrderedDict
+
+
+__all__ = ['init_timings', 'timed']
+
+
+# Seconds spent in each stage, in the order in which they first ran.
+init_timings = OrderedDict()
+
+
+@contextlib.contextmanager
+def timed(stage):
+    """Adds the time spent in the block to the timing of ``stage``."""
+
+    start = time.time()
+
+    try:
+        yield
+    finally:
+        init_timings[stage] = init_timings.get(stage, 0.) + time.time() - start
@@ -14,12 +14,15 @@ from sqlalchemy import create_engine, MetaData
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.event import listen
-from sqlalchemy.pool import Pool
+from sqlalchemy.pool import Pool, QueuePool, NullPool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from marvin.core import caching_query
 from marvin import config
 from hashlib import md5
 from dogpile.cache.region import make_region
 import os
+import threading
+import time
 
 # DOGPILE CACHING SETUP
 
@@ -108,6 +111,54 @@ def clearSearchPathCallback(dbapi_con, connection_record):
 listen(Pool, 'connect', clearSearchPathCallback)
 
 
+# default options of the connection pool
+pool_defaults = {'pool_size': 10, 'max_overflow': 10, 'pool_timeout': 30, 'pool_recycle': 1800}
+
+
+class MonitoredQueuePool(QueuePool):
+    '''A QueuePool that keeps statistics of the checkouts that had to wait
+
+    A checkout waits when all the connections, including the overflow, are
+    checked out. The statistics are returned by `DatabaseConnection.pool_status`.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super(MonitoredQueuePool, self).__init__(*args, **kwargs)
+        # the QueuePool default. -1 means that the overflow is not limited
+        self._overflow_limit = kwargs.get('max_overflow', 10)
+        self._stats = {'waits': 0, 'wait_time': 0., 'timeouts': 0}
+        self._stats_lock = threading.Lock()
+
+    def _exhausted(self):
+        ''' Returns True if a checkout has to wait for a connection to be returned '''
+
+        if self._overflow_limit < 0:
+            return False
+
+        return self.checkedin() == 0 and self.overflow() >= self._overflow_limit
+
+    def _do_get(self):
+        exhausted = self._exhausted()
+        starttime = time.time()
+        try:
+            return super(MonitoredQueuePool, self)._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self._stats['timeouts'] += 1
+            raise
+        finally:
+            if exhausted:
+                with self._stats_lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time'] += time.time() - starttime
+
+    def recreate(self):
+        # keeps the statistics when the pool is recreated, e.g., on dispose
+        pool = super(MonitoredQueuePool, self).recreate()
+        pool._stats = self._stats
+        return pool
+
+
 class DatabaseConnection(object):
     '''This class defines an object that makes a connection to a database.
        The "DatabaseConnection" object takes as its parameter the SQLAlchemy
@@ -127,8 +178,26 @@ class DatabaseConnection(object):
     '''
     _singletons = dict()
 
-    def __new__(cls, database_connection_string=None, expire_on_commit=True):
-        """This overrides the object's usual creation mechanism."""
+    def __new__(cls, database_connection_string=None, expire_on_commit=True, pool_options=None,
+                external_pooler=False):
+        """This overrides the object's usual creation mechanism.
+
+        Parameters:
+            database_connection_string (str):
+                The SQLAlchemy connection string.
+            expire_on_commit (bool):
+                Passed to the sessionmaker.
+            pool_options (dict):
+                Options of the connection pool (``pool_size``, ``max_overflow``,
+                ``pool_timeout``, ``pool_recycle``, ``pool_pre_ping``) that
+                override `pool_defaults`.
+            external_pooler (bool):
+                If True, connections are managed by an external pooler such as
+                PgBouncer, so no connections are pooled in the process. The
+                ``search_path`` must then be set on the server side, e.g., with
+                ``ALTER ROLE ... SET search_path``, because session settings do
+                not persist across transactions in transaction pooling mode.
+        """
 
         if cls not in cls._singletons:
             assert database_connection_string is not None, "A database connection string must be specified!"
@@ -140,9 +209,16 @@ class DatabaseConnection(object):
             me = cls._singletons[cls]  # just for convenience (think "self")
 
             me.database_connection_string = database_connection_string
+            me.external_pooler = external_pooler
+
+            if external_pooler:
+                pool_kwargs = {'poolclass': NullPool}
+            else:
+                pool_kwargs = dict(pool_defaults, poolclass=MonitoredQueuePool)
+                pool_kwargs.update(pool_options or {})
 
             # change 'echo' to print each SQL query (for debugging/optimizing/the curious)
-            me.engine = create_engine(me.database_connection_string, echo=False, pool_size=10, pool_recycle=1800)
+            me.engine = create_engine(me.database_connection_string, echo=False, **pool_kwargs)
 
             me.metadata = MetaData()
             me.metadata.bind = me.engine
@@ -154,4 +230,28 @@ class DatabaseConnection(object):
 
         return cls._singletons[cls]
 
+    def pool_status(self):
+        '''Returns the status of the connection pool
+
+        Returns:
+            status (dict):
+                The number of connections checked out, checked in, and in
+                overflow, the pool size, and the number of checkouts that
+                waited for a connection (with the total time waited) or timed
+                out. ``max_overflow`` is -1 if the overflow is not limited.
+                With an external pooler, only ``external_pooler`` is returned.
+        '''
+
+        pool = self.engine.pool
+
+        if self.external_pooler or not isinstance(pool, MonitoredQueuePool):
+            return {'external_pooler': self.external_pooler}
+
+        status = {'external_pooler': False, 'size': pool.size(), 'checked_out': pool.checkedout(),
+                  'checked_in': pool.checkedin(), 'overflow': max(pool.overflow(), 0),
+                  'max_overflow': pool._overflow_limit, 'timeout': pool.timeout()}
+        status.update(getattr(pool, '_stats', {}))
+
+        return status
+
 
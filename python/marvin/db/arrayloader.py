@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# @Filename: arrayloader.py
+# @License: BSD 3-Clause
+
+''' Set-based loading of spaxel tables into numpy arrays.
+
+    The tables that store the spaxels of a cube (``mangadatadb.spaxel``,
+    ``mangadapdb.modelspaxel``) or the properties of a DAP MAPS file
+    (``mangadapdb.spaxelprop*``) have one row per spaxel. The functions in
+    this module retrieve all the requested columns for a cube or file in a
+    single pass over a server-side cursor and place each row directly in its
+    ``(y, x)`` position of a preallocated array. No ``ORDER BY`` is needed and
+    the shape of the output comes from the cube itself rather than from the
+    number of rows.
+
+    Array columns are returned by Postgres in their binary representation
+    (``array_send``), so values keep their full precision. The rows of each
+    chunk are joined and decoded with a single `numpy.frombuffer` call, instead of going
+    through a Python list of floats per spaxel.
+
+    NULL values (and NULL elements of arrays) are replaced by a fill value,
+    ``NaN`` for float columns and 0 for integer columns unless a different
+    value is given in ``fill_values``, before being cast to the dtype of the
+    output array.
+'''
+
+from __future__ import print_function
+from __future__ import division
+from __future__ import absolute_import
+
+import struct
+
+import numpy as np
+
+from sqlalchemy import Float, Integer, cast, func
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION
+
+
+__all__ = ['load_cube_arrays', 'load_map_arrays', 'load_row_arrays']
+
+
+# numpy dtypes of the elements of the binary arrays, by Postgres type oid.
+_ELEMENT_DTYPES = {21: '>i2', 23: '>i4', 20: '>i8', 700: '>f4', 701: '>f8'}
+
+# Size of the header of a 1D binary array: ndim, has_null, oid, size, and lower bound.
+_HEADER_SIZE = 20
+
+
+def _array_as_binary(column):
+    ''' Returns an expression that renders an array column in binary form.
+
+        Arrays of types other than integers and floats (e.g., ``numeric``)
+        are cast to ``double precision`` first.
+    '''
+
+    item_type = getattr(column.type, 'item_type', None)
+    expression = column
+    if not isinstance(item_type, (Float, Integer)):
+        expression = cast(column, ARRAY(DOUBLE_PRECISION))
+
+    return func.array_send(expression).label(column.key)
+
+
+def _get_fill_value(column, dtype, fill_values):
+    ''' Returns the value that replaces NULLs in a column. '''
+
+    if column in fill_values:
+        return fill_values[column]
+
+    return 0 if np.dtype(dtype).kind in 'iub' else np.nan
+
+
+def _parse_array_binary(data, dtype, fill_value):
+    ''' Parses the binary representation of a 1D array into an array of ``dtype``. '''
+
+    data = bytes(data)
+
+    ndim, has_null, oid = struct.unpack('>iii', data[:12])
+    if ndim == 0:
+        return np.zeros(0, dtype=dtype)
+
+    nvalues = struct.unpack('>i', data[12:16])[0]
+    element = np.dtype(_ELEMENT_DTYPES[oid])
+
+    if not has_null:
+        records = np.frombuffer(data, offset=_HEADER_SIZE,
+                                dtype=[('length', '>i4'), ('value', element)])
+        return records['value'].astype(dtype)
+
+    # Each element is preceded by its length, which is -1 for NULLs.
+    values = np.full(nvalues, fill_value, dtype=dtype)
+    offset = _HEADER_SIZE
+    for ii in range(nvalues):
+        length = struct.unpack('>i', data[offset:offset + 4])[0]
+        offset += 4
+        if length >= 0:
+            values[ii] = np.frombuffer(data, dtype=element, count=1, offset=offset)[0]
+            offset += length
+
+    return values
+
+
+def _parse_array_chunk(blobs, dtype, fill_value):
+    ''' Parses the binary arrays of a chunk of rows into a 2D array.
+
+    If all the arrays are 1D, have the same length, and contain no NULLs,
+    the rows are decoded at once. Otherwise, each row is parsed separately.
+
+    Returns:
+        values, valid:
+            An array of shape ``(len(blobs), nvalues)`` and a boolean array
+            that is False for the NULL rows, or ``(None, None)`` if all the
+            rows are NULL.
+
+    '''
+
+    valid = np.array([blob is not None for blob in blobs], dtype=bool)
+    if not valid.any():
+        return None, None
+
+    blobs = [bytes(blob) for blob in blobs if blob is not None]
+    first = blobs[0]
+
+    uniform = (struct.unpack('>i', first[:4])[0] == 1 and
+               all(len(blob) == len(first) and blob[4:12] == first[4:12] for blob in blobs))
+
+    if uniform and struct.unpack('>i', first[4:8])[0] == 0:
+        nvalues = struct.unpack('>i', first[12:16])[0]
+        element = np.dtype(_ELEMENT_DTYPES[struct.unpack('>i', first[8:12])[0]])
+        records = np.frombuffer(b''.join(blobs),
+                                dtype=[('header', 'V{0}'.format(_HEADER_SIZE)),
+                                       ('elements', [('length', '>i4'), ('value', element)],
+                                        (nvalues, ))])
+        parsed = records['elements']['value'].astype(dtype)
+    else:
+        parsed = np.array([_parse_array_binary(blob, dtype, fill_value) for blob in blobs],
+                          dtype=dtype)
+
+    values = np.full((len(valid), parsed.shape[1]), fill_value, dtype=dtype)
+    values[valid] = parsed
+
+    return values, valid
+
+
+def _iter_chunks(result, chunk_size):
+    ''' Yields the rows of a query result in lists of ``chunk_size``. '''
+
+    rows = []
+    for row in result:
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield rows
+            rows = []
+
+    if len(rows) > 0:
+        yield rows
+
+
+def load_cube_arrays(session, table, columns, shape, *criteria, **kwargs):
+    ''' Loads the array columns of a spaxel table as 3D datacubes.
+
+    Parameters:
+        session (SQLAlchemy session):
+            The session to use.
+        table (SQLAlchemy model class):
+            The spaxel table (e.g., ``datadb.Spaxel``). Must have ``x`` and
+            ``y`` columns.
+        columns (list):
+            The names of the array columns to load.
+        shape (tuple):
+            The spatial shape of the cube, ``(ny, nx)``. The spectral
+            dimension is determined from the first row.
+        criteria:
+            Filters that restrict the query to a single cube
+            (e.g., ``Spaxel.cube_pk == cube.pk``).
+        chunk_size (int):
+            The number of rows fetched from the cursor at a time.
+            Defaults to 500.
+        dtypes (dict):
+            A dictionary of column name to numpy dtype. Columns not in the
+            dictionary default to ``float64``.
+        fill_values (dict):
+            A dictionary of column name to the value that replaces NULLs.
+            Defaults to ``NaN`` for float columns and 0 for integer columns.
+
+    Returns:
+        arrays (dict):
+            A dictionary of column name to an array of shape
+            ``(nwave, ny, nx)``, with the same ordering as the FITS datacube.
+            Returns ``None`` for all the columns if no rows are found.
+
+    '''
+
+    chunk_size = kwargs.get('chunk_size', 500)
+    dtypes = kwargs.get('dtypes', {})
+    fill_values = kwargs.get('fill_values', {})
+
+    ny, nx = shape
+
+    binary_columns = [_array_as_binary(getattr(table, column)) for column in columns]
+    query = session.query(table.x, table.y, *binary_columns).filter(*criteria)
+
+    arrays = dict((column, None) for column in columns)
+
+    # yield_per uses a server-side cursor (stream_results) with psycopg2.
+    for rows in _iter_chunks(query.yield_per(chunk_size), chunk_size):
+
+        chunk = list(zip(*rows))
+        xx = np.array(chunk[0], dtype=int)
+        yy = np.array(chunk[1], dtype=int)
+
+        for ii, column in enumerate(columns):
+
+            dtype = dtypes.get(column, np.float64)
+            values, valid = _parse_array_chunk(chunk[ii + 2], dtype,
+                                               _get_fill_value(column, dtype, fill_values))
+            if values is None:
+                continue
+
+            if arrays[column] is None:
+                arrays[column] = np.zeros((values.shape[1], ny, nx), dtype=dtype)
+
+            arrays[column][:, yy[valid], xx[valid]] = values[valid].T
+
+    return arrays
+
+
+def load_row_arrays(session, table, columns, *criteria, **kwargs):
+    ''' Loads the array columns of a table as 2D arrays, one row per table row.
+
+    Used for the fibres of an RSS (``mangadatadb.rssfiber``), which have no
+    spatial position.
+
+    Parameters:
+        session (SQLAlchemy session):
+            The session to use.
+        table (SQLAlchemy model class):
+            The table (e.g., ``datadb.RssFiber``).
+        columns (list):
+            The names of the array columns to load.
+        criteria:
+            Filters that restrict the query to a single object
+            (e.g., ``RssFiber.cube_pk == cube.pk``).
+        order_by:
+            The column that sets the order of the rows. Defaults to the
+            primary key of ``table``.
+        nrows (int):
+            The number of rows, if known. Otherwise, they are counted.
+        chunk_size (int):
+            The number of rows fetched from the cursor at a time.
+            Defaults to 100.
+        dtypes (dict):
+            A dictionary of column name to numpy dtype. Columns not in the
+            dictionary default to ``float64``.
+        fill_values (dict):
+            A dictionary of column name to the value that replaces NULLs.
+            Defaults to ``NaN`` for float columns and 0 for integer columns.
+
+    Returns:
+        arrays (dict):
+            A dictionary of column name to an array of shape
+            ``(nrows, nwave)``. Returns ``None`` for all the columns if no
+            rows are found.
+
+    '''
+
+    chunk_size = kwargs.get('chunk_size', 100)
+    dtypes = kwargs.get('dtypes', {})
+    fill_values = kwargs.get('fill_values', {})
+    order_by = kwargs.get('order_by', None)
+    order_by = order_by if order_by is not None else table.pk
+
+    binary_columns = [_array_as_binary(getattr(table, column)) for column in columns]
+    query = session.query(*binary_columns).filter(*criteria)
+
+    nrows = kwargs.get('nrows', None)
+    nrows = nrows if nrows is not None else query.count()
+
+    arrays = dict((column, None) for column in columns)
+
+    # yield_per uses a server-side cursor (stream_results) with psycopg2.
+    start = 0
+    for rows in _iter_chunks(query.order_by(order_by).yield_per(chunk_size), chunk_size):
+
+        chunk = list(zip(*rows))
+        index = np.arange(start, start + len(rows))
+        start += len(rows)
+
+        for jj, column in enumerate(columns):
+
+            dtype = dtypes.get(column, np.float64)
+            values, valid = _parse_array_chunk(chunk[jj], dtype,
+                                               _get_fill_value(column, dtype, fill_values))
+            if values is None:
+                continue
+
+            if arrays[column] is None:
+                arrays[column] = np.zeros((nrows, values.shape[1]), dtype=dtype)
+
+            arrays[column][index[valid]] = values[valid]
+
+    return arrays
+
+
+def load_map_arrays(session, table, columns, shape, *criteria, **kwargs):
+    ''' Loads scalar columns of a spaxel table as 2D maps.
+
+    Parameters:
+        session (SQLAlchemy session):
+            The session to use.
+        table (SQLAlchemy model class):
+            The table (e.g., ``dapdb.SpaxelProp6``). Must have ``x`` and
+            ``y`` columns.
+        columns (list):
+            The names of the columns to load.
+        shape (tuple):
+            The shape of the map, ``(ny, nx)``.
+        criteria:
+            Filters that restrict the query to a single file or cube
+            (e.g., ``SpaxelProp6.file_pk == file.pk``).
+        chunk_size (int):
+            The number of rows fetched from the cursor at a time.
+            Defaults to 10000.
+        dtypes (dict):
+            A dictionary of column name to numpy dtype. Columns not in the
+            dictionary default to ``float64``.
+        fill_values (dict):
+            A dictionary of column name to the value that replaces NULLs.
+            Defaults to ``NaN`` for float columns and 0 for integer columns.
+
+    Returns:
+        arrays (dict):
+            A dictionary of column name to an array of shape ``(ny, nx)``,
+            with the same ordering as the FITS map.
+
+    '''
+
+    chunk_size = kwargs.get('chunk_size', 10000)
+    dtypes = kwargs.get('dtypes', {})
+    fill_values = kwargs.get('fill_values', {})
+
+    arrays = dict((column, np.zeros(shape, dtype=dtypes.get(column, np.float64)))
+                  for column in columns)
+    fill_values = dict((column, _get_fill_value(column, arrays[column].dtype, fill_values))
+                       for column in columns)
+
+    query = session.query(table.x, table.y,
+                          *[getattr(table, column) for column in columns]).filter(*criteria)
+
+    for rows in _iter_chunks(query.yield_per(chunk_size), chunk_size):
+        _fill_map_arrays(arrays, columns, rows, fill_values)
+
+    return arrays
+
+
+def _fill_map_arrays(arrays, columns, rows, fill_values):
+    ''' Places a chunk of rows in the output arrays using fancy indexing.
+
+    NULLs are replaced by the fill value of the column and the values are
+    cast directly to the dtype of the output array.
+
+    '''
+
+    chunk = list(zip(*rows))
+    xx = np.array(chunk[0], dtype=int)
+    yy = np.array(chunk[1], dtype=int)
+
+    for ii, column in enumerate(columns):
+        fill_value = fill_values[column]
+        values = np.array([fill_value if value is None else value for value in chunk[ii + 2]],
+                          dtype=arrays[column].dtype)
+        arrays[column][yy, xx] = values
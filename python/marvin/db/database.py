@@ -44,11 +44,17 @@ if db_info["host"] == 'localhost':
 else:
     database_connection_string = 'postgresql+psycopg2://%(user)s:%(password)s@%(host)s:%(port)i/%(database)s' % db_info
 
+# Connection pool options, e.g., pool_size: 20 or external_pooler: true in dbconfig.ini
+pool_options = {key: db_info[key] for key in ['pool_size', 'max_overflow', 'pool_timeout',
+                                              'pool_recycle', 'pool_pre_ping'] if key in db_info}
+external_pooler = db_info.get('external_pooler', False)
+
 # Make a database connection
 try:
     db = DatabaseConnection()
 except AssertionError as e:
-    db = DatabaseConnection(database_connection_string=database_connection_string)
+    db = DatabaseConnection(database_connection_string=database_connection_string,
+                            pool_options=pool_options, external_pooler=external_pooler)
     engine = db.engine
     metadata = db.metadata
     Session = db.Session
@@ -12,36 +12,75 @@ Revision History:
 '''
 from __future__ import print_function
 from __future__ import division
-from brain.db.modelGraph import ModelGraph
 from marvin import config, log
+from marvin.core.timing import timed
 import inspect
+import threading
 
 __author__ = 'Brian Cherinka'
 
 
+# Attributes set when the db is initialised. With lazy=True, the first access
+# to any of them initialises the db.
+_lazy_attributes = ['db', 'datadb', 'sampledb', 'dapdb', 'spaxelpropdict', 'session',
+                    'isdbconnected', 'modelgraph', 'cache_bits']
+
+
 class MarvinDB(object):
-    ''' Class designed to handle database related things with Marvin '''
+    ''' Class designed to handle database related things with Marvin
+
+    With ``lazy=True``, the database is not set up, the ModelClasses not
+    imported, and the connection not tested until one of the db attributes,
+    e.g., ``session`` or ``datadb``, is first used.
+    '''
 
     def __init__(self, *args, **kwargs):
         self.dbtype = kwargs.get('dbtype', None)
-        self.db = None
         self.log = kwargs.get('log', None)
         self.error = []
-        self.__init_the_db()
+        self._init_lock = threading.RLock()
+        self._initialised = False
+        if not kwargs.get('lazy', False):
+            self._initialise()
+
+    def __getattr__(self, name):
+        ''' Initialises the db on first access to one of its attributes
+
+        Only called for attributes that are not set, i.e., before the db is
+        initialised, or for attributes that do not exist.
+        '''
+        if name in _lazy_attributes and not self.__dict__.get('_initialised', True):
+            self._initialise()
+            return getattr(self, name)
+        raise AttributeError('{0!r} object has no attribute {1!r}'.format(
+            self.__class__.__name__, name))
+
+    def _initialise(self):
+        ''' Initializes the db once, in a thread-safe way '''
+        with self._init_lock:
+            if self._initialised:
+                return
+            self._initialised = True
+            self.db = None
+            self.__init_the_db()
 
     def __init_the_db(self):
         ''' Initialize the db '''
         if self.dbtype:
-            self._setupDB()
+            with timed('db.setup'):
+                self._setupDB()
         if self.db:
-            self._importModels()
+            with timed('db.models'):
+                self._importModels()
         else:
             self.datadb = None
             self.sampledb = None
             self.dapdb = None
         self._setSession()
-        self.testDbConnection()
-        self._setModelGraph()
+        with timed('db.connection'):
+            self.testDbConnection()
+        with timed('db.modelgraph'):
+            self._setModelGraph()
         self.cache_bits = []
         if self.db:
             self._addCache()
@@ -112,8 +151,22 @@ class MarvinDB(object):
                 'Clean{0}'.format(self.spaxelpropdict[self._release])}
 
     def _setSession(self):
-        ''' Sets the database session '''
-        self.session = self.db.Session() if self.db else None
+        ''' Sets the database session
+
+        The session is the scoped session registry, which proxies to a
+        separate session for each thread. In the web app the session is
+        removed at the end of each request (see `remove_session`).
+        '''
+        self.session = self.db.Session if self.db else None
+
+    def remove_session(self):
+        ''' Closes and removes the session of the current thread, returning its connection to the pool '''
+        if self.db:
+            self.db.Session.remove()
+
+    def pool_status(self):
+        ''' Returns the status of the database connection pool, or None if there is no database '''
+        return self.db.pool_status() if self.db else None
 
     def testDbConnection(self):
         ''' Test the database connection to ensure it works.  Sets a boolean variable isdbconnected '''
@@ -130,6 +183,10 @@ class MarvinDB(object):
 
     def forceDbOff(self):
         ''' Force the database to turn off '''
+        if not self._initialised:
+            self.modelgraph = None
+            self.cache_bits = []
+            self._initialised = True
         self.db = None
         self.session = None
         self.isdbconnected = False
@@ -139,7 +196,10 @@ class MarvinDB(object):
 
     def forceDbOn(self, dbtype=None):
         ''' Force the database to turn on '''
-        self.__init_the_db()
+        if not self._initialised:
+            self._initialise()
+        else:
+            self.__init_the_db()
 
     def generateClassDict(self, module=None, lower=None):
         ''' Generates a dictionary of the Model Classes, based on class name as key, to the object class.
@@ -174,6 +234,7 @@ class MarvinDB(object):
 
     def _setModelGraph(self):
         ''' Initiates the ModelGraph using all available ModelClasses '''
+        from brain.db.modelGraph import ModelGraph
         models = list(filter(None, [self.datadb, self.sampledb, self.dapdb]))
         if models:
             self.modelgraph = ModelGraph(models)
@@ -11,12 +11,14 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.engine import reflection
 from sqlalchemy import ForeignKeyConstraint
 from sqlalchemy.inspection import inspect
-from sqlalchemy.schema import Column
-from sqlalchemy.types import Integer
+from sqlalchemy.schema import Column, Index
+from sqlalchemy.types import Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy import case, cast, Float
 import re
 from marvin.db.database import db
+from marvin.db.arrayloader import load_cube_arrays
 import marvin.db.models.DataModelClasses as datadb
 from astropy.io import fits
 import numpy as np
@@ -343,22 +345,23 @@ class ModelCube(Base):
         For example, ``modelcube.get3DCube('flux')`` will return the original
         flux cube with the same ordering as the FITS data cube.
 
-        Note that this method seems to be really slow retrieving arrays (this
-        is especially serious for large IFUs).
-
         """
 
-        session = db.Session.object_session(self)
-        spaxels = session.query(getattr(ModelSpaxel, extension)).filter(
-            ModelSpaxel.modelcube_pk == self.pk).order_by(ModelSpaxel.x, ModelSpaxel.y).all()
+        return self.get3DCubes([extension])[extension]
+
+    def get3DCubes(self, extensions=('flux', 'ivar', 'mask')):
+        """Returns a dictionary of 3D arrays for a list of modelspaxel columns.
 
-        # Assumes cubes are always square (!)
-        nx = ny = int(np.sqrt(len(spaxels)))
-        nwave = len(spaxels[0][0])
+        All the columns are retrieved in a single pass over a server-side
+        cursor. See `marvin.db.arrayloader.load_cube_arrays`.
+
+        """
 
-        spArray = np.array(spaxels)
+        session = db.Session.object_session(self)
+        dtypes = dict((ext, np.int32) for ext in extensions if 'mask' in ext)
 
-        return spArray.transpose().reshape((nwave, ny, nx)).transpose(0, 2, 1)
+        return load_cube_arrays(session, ModelSpaxel, extensions, self.file.cube.spatial_shape,
+                                ModelSpaxel.modelcube_pk == self.pk, dtypes=dtypes)
 
 
 class ModelSpaxel(Base):
@@ -385,6 +388,50 @@ class DapAll(Base):
         return '<DapAll (pk={0}, file={1})'.format(self.pk, self.file_pk)
 
 
+class SpaxelSummary(Base):
+    ''' Number of good spaxels per file in a spaxelprop table
+
+    Maintained by :mod:`marvin.utils.db.spaxelsummary`; defined explicitly so
+    that the model is available before the table is created.
+    '''
+    __tablename__ = 'spaxel_summary'
+    __table_args__ = (Index('spaxel_summary_file_source_idx', 'file_pk', 'source'),
+                      {'schema': 'mangadapdb'})
+
+    pk = Column(Integer, primary_key=True)
+    file_pk = Column(Integer, nullable=False)
+    source = Column(String, nullable=False)
+    goodcount = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return '<SpaxelSummary (pk={0}, file={1}, source={2})'.format(self.pk, self.file_pk,
+                                                                      self.source)
+
+
+class SpaxelHistogram(Base):
+    ''' Cumulative histograms of a spaxelprop property per file
+
+    Maintained by :mod:`marvin.utils.db.spaxelsummary`.
+    '''
+    __tablename__ = 'spaxel_histogram'
+    __table_args__ = (Index('spaxel_histogram_file_source_property_idx',
+                            'file_pk', 'source', 'property'),
+                      {'schema': 'mangadapdb'})
+
+    pk = Column(Integer, primary_key=True)
+    file_pk = Column(Integer, nullable=False)
+    source = Column(String, nullable=False)
+    property = Column(String, nullable=False)
+    edges = Column(ARRAY(Float(precision=53)), nullable=False)
+    nvalid = Column(Integer, nullable=False)
+    nabove = Column(ARRAY(Integer), nullable=False)
+    natleast = Column(ARRAY(Integer), nullable=False)
+
+    def __repr__(self):
+        return '<SpaxelHistogram (pk={0}, file={1}, source={2}, property={3})'.format(
+            self.pk, self.file_pk, self.source, self.property)
+
+
 # Now we create the remaining tables.
 insp = inspect(db.engine)
 schemaName = 'mangadapdb'
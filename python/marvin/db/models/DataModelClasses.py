@@ -11,16 +11,17 @@ from operator import *
 from astropy.io import fits
 
 from sqlalchemy.orm import relationship, deferred
-from sqlalchemy.schema import Column
+from sqlalchemy.schema import Column, ForeignKey, Index
 from sqlalchemy.engine import reflection
 from sqlalchemy.dialects.postgresql import *
-from sqlalchemy.types import Float, Integer
+from sqlalchemy.types import Float, Integer, String, Text
 from sqlalchemy.orm.session import Session
 from sqlalchemy import select, func  # for aggregate, other functions
 from sqlalchemy.ext.hybrid import hybrid_property, hybrid_method
 from sqlalchemy.sql import column
 from sqlalchemy_utils import Timestamp
 from marvin.db.ArrayUtils import ARRAY_D
+from marvin.db.arrayloader import load_cube_arrays
 from marvin.core.caching_query import RelationshipCache
 import numpy as np
 
@@ -321,28 +322,54 @@ class Cube(Base, ArrayOps):
         else:
             return None
 
+    @property
+    def spatial_shape(self):
+        """Returns the ``(ny, nx)`` shape of the cube.
+
+        Uses the NAXIS2 and NAXIS1 keywords from the cube header. If they are
+        not available, falls back to the (square) ``cube_shape``. The shape is
+        queried once per instance.
+
+        """
+
+        if getattr(self, '_spatial_shape', None) is not None:
+            return self._spatial_shape
+
+        session = Session.object_session(self)
+        naxis = dict(session.query(FitsHeaderKeyword.label, FitsHeaderValue.value).join(
+            FitsHeaderValue).filter(FitsHeaderValue.cube == self,
+                                    FitsHeaderKeyword.label.in_(['NAXIS1', 'NAXIS2'])).all())
+
+        try:
+            self._spatial_shape = (int(naxis['NAXIS2']), int(naxis['NAXIS1']))
+        except (KeyError, ValueError):
+            self._spatial_shape = tuple(self.shape.shape)
+
+        return self._spatial_shape
+
     def get3DCube(self, extension='flux'):
         """Returns a 3D array of ``extension`` from the cube spaxels.
 
         For example, ``cube.get3DCube('flux')`` will return the original
         flux cube with the same ordering as the FITS data cube.
 
-        Note that this method seems to be really slow retrieving arrays (this
-        is especially serious for large IFUs).
-
         """
 
-        session = Session.object_session(self)
-        spaxels = session.query(getattr(Spaxel, extension)).filter(
-            Spaxel.cube_pk == self.pk).order_by(Spaxel.x, Spaxel.y).all()
+        return self.get3DCubes([extension])[extension]
+
+    def get3DCubes(self, extensions=('flux', 'ivar', 'mask')):
+        """Returns a dictionary of 3D arrays for a list of spaxel columns.
 
-        # Assumes cubes are always square (!)
-        nx = ny = int(np.sqrt(len(spaxels)))
-        nwave = len(spaxels[0][0])
+        All the columns are retrieved in a single pass over a server-side
+        cursor. See `marvin.db.arrayloader.load_cube_arrays`.
 
-        spArray = np.array(spaxels)
+        """
+
+        session = Session.object_session(self)
+        dtypes = dict((ext, np.int32) for ext in extensions if 'mask' in ext)
 
-        return spArray.transpose().reshape((nwave, ny, nx)).transpose(0, 2, 1)
+        return load_cube_arrays(session, Spaxel, extensions, self.spatial_shape,
+                                Spaxel.cube_pk == self.pk, dtypes=dtypes)
 
     @hybrid_property
     def plateifu(self):
@@ -785,6 +812,33 @@ class QueryMeta(Base, Timestamp):
         return '<QueryMeta (pk={0}, filter={1}), count={2}>'.format(self.pk, self.searchfilter, self.count)
 
 
+class QueryProfile(Base):
+    ''' Timings and plan of a profiled query run
+
+    Written by :mod:`marvin.utils.db.queryprofile` when query profiling is
+    enabled; defined explicitly so that the model is available before the
+    table is created.
+    '''
+    __tablename__ = 'query_profile'
+    __table_args__ = (Index('query_profile_query_pk_idx', 'query_pk'),
+                      {'schema': 'history'})
+
+    pk = Column(Integer, primary_key=True)
+    query_pk = Column(Integer, ForeignKey('history.query.pk'), nullable=False)
+    sql = Column(Text)
+    plan_hash = Column(String(32))
+    nrows = Column(Integer)
+    count_time = Column(Float)
+    fetch_time = Column(Float)
+    build_time = Column(Float)
+    total_time = Column(Float)
+    created = Column(TIMESTAMP)
+
+    def __repr__(self):
+        return '<QueryProfile (pk={0}, query_pk={1}, total_time={2})>'.format(self.pk, self.query_pk,
+                                                                             self.total_time)
+
+
 # Define relationships
 # ========================
 
@@ -826,6 +880,8 @@ PipelineInfo.completionStatus = relationship(PipelineCompletionStatus, backref="
 # from AuxDB
 CubeHeader.cube = relationship(Cube, backref='hdr')
 
+QueryMeta.profiles = relationship(QueryProfile, backref='querymeta')
+
 # ---------------------------------------------------------
 # Test that all relationships/mappings are self-consistent.
 # ---------------------------------------------------------
@@ -256,6 +256,19 @@ CREATE INDEX CONCURRENTLY ms_y_idx ON mangadapdb.modelspaxel using BTREE(y);
 
 CREATE INDEX CONCURRENTLY dapall_file_pk_idx ON mangadapdb.dapall using BTREE(file_pk);
 
+CREATE TABLE mangadapdb.spaxel_summary (pk serial PRIMARY KEY NOT NULL, file_pk INTEGER NOT NULL,
+    source TEXT NOT NULL, goodcount INTEGER NOT NULL);
+
+CREATE TABLE mangadapdb.spaxel_histogram (pk serial PRIMARY KEY NOT NULL, file_pk INTEGER NOT NULL,
+    source TEXT NOT NULL, property TEXT NOT NULL, edges DOUBLE PRECISION[] NOT NULL,
+    nvalid INTEGER NOT NULL, nabove INTEGER[] NOT NULL, natleast INTEGER[] NOT NULL);
+
+CREATE INDEX CONCURRENTLY spaxel_summary_file_source_idx ON mangadapdb.spaxel_summary using BTREE(file_pk, source);
+CREATE INDEX CONCURRENTLY spaxel_histogram_file_source_property_idx ON mangadapdb.spaxel_histogram using BTREE(file_pk, source, property);
+
+# spaxel_summary and spaxel_histogram are populated with marvin.utils.db.spaxelsummary.build_spaxel_summary
+# after loading the spaxelprop (and cleanspaxelprop) tables.
+
 # CleanSpaxelProp after the initial load of SpaxelProp.  Run these only after populating the spaxeprop tables with
 # the new columns and data for each MPL.
 #
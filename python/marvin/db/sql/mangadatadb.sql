@@ -125,6 +125,10 @@ create schema history;
 create table history.query (pk serial primary key not null, searchfilter text, n_run integer, count integer,
 	release varchar(8), created timestamp, updated timestamp);
 create index concurrently filter_idx on history.query using btree(searchfilter);
+create table history.query_profile (pk serial primary key not null, query_pk integer not null references history.query(pk),
+	sql text, plan_hash varchar(32), nrows integer, count_time double precision, fetch_time double precision,
+	build_time double precision, total_time double precision, created timestamp);
+create index concurrently query_profile_query_pk_idx on history.query_profile using btree(query_pk);
 
 INSERT INTO mangadatadb.fiber_type VALUES (0, 'IFU'),(1,'SKY');
 INSERT INTO mangadatadb.target_type VALUES (0, 'science'),(1,'sky'),(2,'standard');
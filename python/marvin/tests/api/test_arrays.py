@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_arrays.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import json
+
+import numpy as np
+import pytest
+
+from marvin.api.arrays import encode_array, decode_array, decode_arrays
+
+
+@pytest.fixture(params=['>f4', '<f8', '>i4', 'u1', '?'])
+def array(request):
+    return (np.arange(24) % 3).reshape((2, 3, 4)).astype(request.param)
+
+
+class TestArrayTransport(object):
+
+    @pytest.mark.parametrize('array_format', ['json', 'binary', 'binary-zlib'])
+    def test_roundtrip(self, array, array_format):
+        encoded = json.loads(json.dumps(encode_array(array, array_format=array_format)))
+        decoded = decode_array(encoded)
+        assert decoded.shape == array.shape
+        assert np.all(decoded == array)
+
+    @pytest.mark.parametrize('array_format', ['binary', 'binary-zlib'])
+    def test_little_endian(self, array, array_format):
+        encoded = encode_array(array, array_format=array_format)
+        assert not encoded['dtype'].startswith('>')
+
+    def test_none(self):
+        assert encode_array(None, array_format='binary') is None
+        assert decode_array(None) is None
+
+    def test_bad_format(self, array):
+        with pytest.raises(AssertionError):
+            encode_array(array, array_format='arrow')
+
+    def test_decode_arrays(self, array):
+        data = {'value': encode_array(array, array_format='binary'),
+                'ivar': None,
+                'unit': 'km/s',
+                'nested': {'mask': encode_array(array, array_format='binary-zlib')}}
+        decoded = decode_arrays(data)
+        assert np.all(decoded['value'] == array)
+        assert np.all(decoded['nested']['mask'] == array)
+        assert decoded['ivar'] is None
+        assert decoded['unit'] == 'km/s'
+
+    def test_binary_not_copied(self, array):
+        decoded = decode_array(encode_array(array, array_format='binary'))
+        assert decoded.flags.writeable is False
+        assert np.asarray(decoded) is decoded
@@ -44,6 +44,24 @@ class TestGetCube(object):
             page.route_no_valid_params(page.url.format(name=name), missing, reqtype=reqtype, params=params, errmsg=errmsg)
 
 
+@pytest.mark.parametrize('page', [('api', 'getCubesBatch')], ids=['getcubesbatch'], indirect=True)
+class TestGetCubesBatch(object):
+
+    def test_batch_success(self, galaxy, page, params):
+        params.update({'plateifus': '{0},{0}'.format(galaxy.plateifu)})
+        page.load_page('post', page.url, params=params)
+        page.assert_success()
+        cubes = page.json['data']['cubes']
+        assert list(cubes.keys()) == [galaxy.plateifu]
+        assert cubes[galaxy.plateifu]['mangaid'] == galaxy.mangaid
+        assert cubes[galaxy.plateifu]['nsa'] is not None
+        assert page.json['data']['errors'] == {}
+
+    def test_batch_no_plateifus(self, page, params):
+        page.route_no_valid_params(page.url, 'plateifus', reqtype='post', params=params,
+                                   errmsg='Missing data for required field.')
+
+
 @pytest.mark.slow
 @pytest.mark.parametrize('page', [('api', 'getCubeExtension')], ids=['getcubeext'], indirect=True)
 class TestCubeExtension(object):
@@ -76,3 +76,17 @@ class TestGeneralNSADrpall(object):
         assert page.json['data'] is None
         assert page.json['status'] == -1
         assert page.json['error'] == error
+
+
+@pytest.mark.parametrize('page', [('api', 'getDbPoolStatus')], ids=['dbpool'], indirect=True)
+class TestGeneralDbPool(object):
+
+    @pytest.mark.parametrize('reqtype', [('get'), ('post')])
+    def test_pool_status(self, page, params, reqtype):
+        page.load_page(reqtype, page.url, params=params)
+        page.assert_success()
+        status = page.json['data']
+        if not status['external_pooler']:
+            if status['max_overflow'] >= 0:
+                assert status['checked_out'] <= status['size'] + status['max_overflow']
+            assert status['waits'] >= 0
@@ -57,6 +57,42 @@ class TestGetMaps(object):
             page.route_no_valid_params(url, missing, reqtype='post', params=params, errmsg=errmsg)
 
 
+@pytest.mark.parametrize('page', [('api', 'getMapsBatch')], ids=['getMapsBatch'], indirect=True)
+class TestGetMapsBatch(object):
+
+    def test_batch_success(self, galaxy, page, params):
+        url = page.url.format(bintype=galaxy.bintype.name, template=galaxy.template.name)
+        params.update({'plateifus': galaxy.plateifu})
+        page.load_page('post', url, params=params)
+        page.assert_success()
+        maps = page.json['data']['maps'][galaxy.plateifu]
+        assert maps['bintype'] == galaxy.bintype.name
+        assert maps['template'] == galaxy.template.name
+        assert maps['shape'] == list(galaxy.shape)
+
+
+@pytest.mark.parametrize('page', [('api', 'getMapsQuantitiesSpaxels')],
+                         ids=['getMapsQuantitiesSpaxels'], indirect=True)
+class TestGetMapsQuantitiesSpaxels(object):
+
+    def test_spaxels_success(self, galaxy, page, params):
+        url = page.url.format(name=galaxy.plateifu, bintype=galaxy.bintype.name,
+                              template=galaxy.template.name)
+        params.update({'x': '15,1', 'y': '8,2'})
+        page.load_page('post', url, params=params)
+        page.assert_success()
+        stellar_vel = page.json['data']['stellar_vel']
+        assert len(stellar_vel['value']) == 2
+        assert len(stellar_vel['ivar']) == 2
+
+    def test_spaxels_length_mismatch(self, galaxy, page, params):
+        url = page.url.format(name=galaxy.plateifu, bintype=galaxy.bintype.name,
+                              template=galaxy.template.name)
+        params.update({'x': '15,1', 'y': '8'})
+        page.load_page('post', url, params=params)
+        assert 'x and y must have the same length' in page.json['error']
+
+
 @pytest.mark.parametrize('page', [('api', 'getmap')], ids=['getmap'], indirect=True)
 class TestGetSingleMap(object):
 
@@ -32,6 +32,8 @@ class TestGetPlate(object):
         page.load_page(reqtype, page.url.format(**params), params=params)
         page.assert_success(data)
         assert data['plateid'] == page.json['data']['plateid']
+        cubes = dict((cube['plateifu'], cube) for cube in page.json['data']['cubes'])
+        assert cubes[galaxy.plateifu]['mangaid'] == galaxy.mangaid
 
     @pytest.mark.parametrize('plateid, missing, errmsg',
                              [(None, 'release', 'Missing data for required field.'),
@@ -57,6 +59,8 @@ class TestGetPlateCubes(object):
         data = {'plateifus': [galaxy.plateifu]}
         page.load_page(reqtype, page.url.format(**params), params=params)
         page.assert_success(data)
+        plateifus = [cube['plateifu'] for cube in page.json['data']['cubes']]
+        assert plateifus == page.json['data']['plateifus']
 
     @pytest.mark.parametrize('plateid, missing, errmsg',
                              [(None, 'release', 'Missing data for required field.'),
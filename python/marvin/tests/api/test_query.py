@@ -72,6 +72,33 @@ class TestQueryCubes(object):
         page.route_no_valid_params(page.url, missing, reqtype=reqtype, errmsg=errmsg)
 
 
+@pytest.mark.parametrize('page', [('api', 'submitquery')], ids=['submitquery'], indirect=True)
+class TestQuerySubmit(object):
+
+    def test_submit_success(self, page, params):
+        params.update({'searchfilter': 'nsa.z < 0.1'})
+        page.load_page('post', page.url, params=params)
+        page.assert_success()
+        assert page.json['data']['job_id'] is not None
+        assert page.json['data']['status'] in ['pending', 'running', 'done']
+
+    def test_submit_failure(self, page, params):
+        page.route_no_valid_params(page.url, 'searchfilter', reqtype='post', params=params,
+                                   errmsg='Missing data for required field.')
+
+
+@pytest.mark.parametrize('page', [('api', 'getqueryprofile')], ids=['getqueryprofile'], indirect=True)
+class TestQueryProfile(object):
+
+    @pytest.mark.parametrize('reqtype', [('get'), ('post')])
+    def test_profile_success(self, page, params, reqtype):
+        params.update({'limit': 5})
+        page.load_page(reqtype, page.url, params=params)
+        page.assert_success()
+        assert isinstance(page.json['data'], list)
+        assert len(page.json['data']) <= 5
+
+
 @pytest.mark.parametrize('page', [('api', 'getparams')], ids=['getparams'], indirect=True)
 class TestQueryGetParams(object):
 
@@ -57,3 +57,10 @@ class TestGetRssFibers(object):
             page.route_no_valid_params(page.url.format(name=galaxy.plateifu), missing, reqtype=reqtype, errmsg=errmsg)
         else:
             page.route_no_valid_params(page.url.format(name=name), missing, reqtype=reqtype, params=params, errmsg=errmsg)
+
+    @pytest.mark.parametrize('array_format', ['json', 'binary'])
+    def test_stacked_arrays(self, galaxy, page, params, array_format):
+        params.update({'array_format': array_format})
+        page.load_page('post', page.url.format(name=galaxy.plateifu), params=params)
+        page.assert_success()
+        assert set(page.json['data'].keys()) == set(['wavelength', 'flux', 'ivar', 'mask'])
@@ -9,6 +9,8 @@
 # @Last Modified time: 2017-06-12 19:13:15
 
 from __future__ import print_function, division, absolute_import
+from marvin.core.timing import init_timings, timed
+from marvin.db.marvindb import MarvinDB
 from marvin.utils.general.structs import Dotable, DotableCaseInsensitive
 import pytest
 
@@ -39,3 +41,39 @@ class TestCoreDotable(object):
         assert dotdictci[key.upper()] == dotdictci.__getattr__(key.lower())
         assert dotdictci[key.lower()] == dotdictci.__getattr__(key.upper())
         assert dotdictci[key.lower()] == dotdictci.__getattr__(key.lower())
+
+
+class TestTiming(object):
+
+    def test_timed(self):
+        with timed('test.stage'):
+            pass
+        first = init_timings['test.stage']
+        with timed('test.stage'):
+            pass
+        assert init_timings['test.stage'] >= first
+        del init_timings['test.stage']
+
+
+class TestLazyMarvinDB(object):
+
+    def test_lazy(self):
+        mdb = MarvinDB(dbtype=None, lazy=True)
+        assert mdb._initialised is False
+        assert 'session' not in mdb.__dict__
+
+        assert mdb.isdbconnected is False
+        assert mdb._initialised is True
+        assert mdb.session is None
+        assert mdb.datadb is None
+
+    def test_not_lazy(self):
+        mdb = MarvinDB(dbtype=None)
+        assert mdb._initialised is True
+        assert 'isdbconnected' in mdb.__dict__
+
+    def test_missing_attribute(self):
+        mdb = MarvinDB(dbtype=None, lazy=True)
+        with pytest.raises(AttributeError):
+            mdb.not_an_attribute
+        assert mdb._initialised is False
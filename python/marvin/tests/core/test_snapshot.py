@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_snapshot.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from marvin.core import marvin_pickle
+from marvin.core.exceptions import MarvinError
+from astropy.io import fits
+
+from marvin.core.snapshot import SnapshotHDU, SnapshotHDUList, is_snapshot, use_snapshot
+from marvin.tools.cube import Cube
+from marvin.tools.maps import Maps
+
+
+h5py = pytest.importorskip('h5py')
+
+
+class TestUseSnapshot(object):
+
+    @pytest.mark.parametrize('path, format, expected',
+                             [('cube.h5', None, True),
+                              ('cube.HDF5', None, True),
+                              ('cube.mpf', None, False),
+                              (None, None, False),
+                              ('cube.mpf', 'hdf5', True),
+                              ('cube.h5', 'mpf', False)])
+    def test_use_snapshot(self, path, format, expected):
+        assert use_snapshot(path, format=format) is expected
+
+    def test_is_snapshot(self, temp_scratch):
+        path = marvin_pickle.save({'a': 1}, path=str(temp_scratch.join('snapshot.mpf')),
+                                  overwrite=True)
+        assert is_snapshot(path) is False
+        assert is_snapshot(str(temp_scratch.join('does_not_exist.h5'))) is False
+
+
+class TestSnapshotHDUList(object):
+
+    def test_init(self):
+        hdus = SnapshotHDUList([SnapshotHDU('PRIMARY', fits.Header().tostring())])
+        assert isinstance(hdus, fits.HDUList)
+        assert hdus._file is None
+        assert len(hdus) == 1
+        assert 'primary' in hdus
+
+    def test_closed_when_loaded(self, temp_scratch):
+        path = str(temp_scratch.join('hdus.h5'))
+        with h5py.File(path, 'w') as h5file:
+            h5file.create_dataset('flux', data=np.arange(3.))
+            h5file.create_dataset('ivar', data=np.ones(3))
+
+        h5file = h5py.File(path, 'r')
+        header = fits.Header().tostring()
+        hdus = SnapshotHDUList([SnapshotHDU('PRIMARY', header),
+                                SnapshotHDU('FLUX', header, dataset=h5file['flux']),
+                                SnapshotHDU('IVAR', header, dataset=h5file['ivar'])],
+                               h5file=h5file)
+
+        assert np.all(hdus['FLUX'].data == np.arange(3.))
+        assert hdus._h5file is h5file
+        assert np.all(hdus['IVAR'].data == 1)
+        assert hdus._h5file is None
+        assert not h5file.id.valid
+
+
+class TestToolSnapshot(object):
+
+    def test_cube(self, galaxy, temp_scratch):
+        cube = Cube(filename=galaxy.cubepath, release=galaxy.release)
+        path = cube.save(str(temp_scratch.join('cube.h5')), overwrite=True)
+        assert is_snapshot(path)
+
+        restored = Cube.restore(path)
+        assert isinstance(restored, Cube)
+        assert isinstance(restored.data, SnapshotHDUList)
+        assert restored.data_origin == 'file'
+        assert restored.plateifu == cube.plateifu
+        assert restored.release == cube.release
+        assert (restored.flux.value == cube.flux.value).all()
+
+    def test_maps_lazy(self, galaxy, temp_scratch):
+        maps = Maps(filename=galaxy.mapspath, release=galaxy.release)
+        path = maps.save(str(temp_scratch.join('maps.h5')), overwrite=True)
+
+        restored = Maps.restore(path)
+        assert restored.bintype.name == maps.bintype.name
+        assert restored.template.name == maps.template.name
+        assert restored.data['EMLINE_GFLUX'].loaded is False
+
+        ha = restored.getMap('emline_gflux', channel='ha_6564')
+        assert np.allclose(ha.value, maps.getMap('emline_gflux', channel='ha_6564').value)
+        assert restored.data['EMLINE_GFLUX'].loaded is True
+        assert restored.data['STELLAR_VEL'].loaded is False
+
+    def test_restore_without_fits(self, galaxy, temp_scratch):
+        filename = str(temp_scratch.join(os.path.basename(galaxy.mapspath)))
+        shutil.copy(galaxy.mapspath, filename)
+
+        maps = Maps(filename=filename, release=galaxy.release)
+        path = maps.save(str(temp_scratch.join('maps_nofits.h5')), overwrite=True)
+        os.remove(filename)
+
+        restored = Maps.restore(path)
+        assert restored.plateifu == maps.plateifu
+        assert restored.getMap('stellar_vel').shape == tuple(galaxy.shape)
+
+    def test_delete(self, galaxy, temp_scratch):
+        cube = Cube(filename=galaxy.cubepath, release=galaxy.release)
+        path = cube.save(str(temp_scratch.join('cube_delete.h5')), overwrite=True)
+        restored = Cube.restore(path, delete=True)
+        assert os.path.exists(path) is False
+        assert restored.flux is not None
+        assert restored.data._h5file is None
+
+    def test_remote_fails(self, galaxy, temp_scratch):
+        cube = Cube(plateifu=galaxy.plateifu, release=galaxy.release, mode='remote')
+        with pytest.raises(MarvinError) as ee:
+            cube.save(str(temp_scratch.join('cube_remote.h5')), overwrite=True)
+        assert 'data_origin=\'file\'' in str(ee.value)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_arrayloader.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import struct
+
+import numpy as np
+import pytest
+
+from marvin.db.arrayloader import _fill_map_arrays, _parse_array_binary, _parse_array_chunk
+
+
+def _array_send(values, oid=701, fmt='d'):
+    """Returns the Postgres binary representation (array_send) of a 1D array."""
+
+    has_null = int(any(value is None for value in values))
+    data = struct.pack('>iiiii', 1, has_null, oid, len(values), 1)
+    size = struct.calcsize('>' + fmt)
+    for value in values:
+        data += struct.pack('>i', -1) if value is None else \
+            struct.pack('>i', size) + struct.pack('>' + fmt, value)
+
+    return data
+
+
+class TestArrayLoader(object):
+
+    @pytest.mark.parametrize('oid, fmt, dtype, fill_value, expected',
+                             [(701, 'd', np.float64, np.nan, [1., np.nan, 3.]),
+                              (700, 'f', np.float32, np.nan, [1., np.nan, 3.]),
+                              (23, 'i', np.int32, 0, [1, 0, 3])])
+    def test_parse_array_binary_nulls(self, oid, fmt, dtype, fill_value, expected):
+        values = _parse_array_binary(_array_send([1, None, 3], oid=oid, fmt=fmt),
+                                     dtype, fill_value)
+        assert values.dtype == dtype
+        assert np.allclose(values, expected, equal_nan=True)
+
+    def test_parse_array_binary_precision(self):
+        value = 0.1234567890123456789
+        values = _parse_array_binary(_array_send([value, 2.]), np.float64, np.nan)
+        assert values[0] == value
+
+    def test_parse_array_chunk(self):
+        blobs = [_array_send([1., 2.]), None, _array_send([3., 4.])]
+        values, valid = _parse_array_chunk(blobs, np.float64, np.nan)
+        assert valid.tolist() == [True, False, True]
+        assert np.allclose(values[valid], [[1., 2.], [3., 4.]])
+        assert np.isnan(values[1]).all()
+
+    def test_parse_array_chunk_nulls(self):
+        blobs = [_array_send([1., None]), _array_send([3., 4.])]
+        values, valid = _parse_array_chunk(blobs, np.float64, -1.)
+        assert np.allclose(values, [[1., -1.], [3., 4.]])
+
+    def test_parse_array_chunk_all_null(self):
+        assert _parse_array_chunk([None, None], np.float64, np.nan) == (None, None)
+
+    def test_fill_map_arrays_nulls(self):
+        arrays = {'value': np.zeros((2, 2)), 'mask': np.zeros((2, 2), dtype=np.int32)}
+        rows = [(0, 0, 1.5, 2 ** 30), (1, 1, None, None)]
+
+        _fill_map_arrays(arrays, ['value', 'mask'], rows, {'value': np.nan, 'mask': 0})
+
+        assert arrays['value'][0, 0] == pytest.approx(1.5)
+        assert np.isnan(arrays['value'][1, 1])
+        assert arrays['mask'][0, 0] == 2 ** 30
+        assert arrays['mask'][1, 1] == 0
@@ -8,6 +8,7 @@ import numpy as np
 from astropy import wcs
 
 from marvin import config, marvindb
+from marvin.api.batch import get_batch_payloads
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
 from marvin.tests import marvin_test_if
 from marvin.tools.cube import Cube
@@ -118,6 +119,20 @@ class TestCube(object):
 
         assert 'filename not allowed in remote mode' in str(ee.value)
 
+    def test_load_from_batch_payload(self, galaxy):
+        payloads = get_batch_payloads('cube', [galaxy.plateifu], release=galaxy.release)
+        cube = Cube(plateifu=galaxy.plateifu, data=payloads[galaxy.plateifu],
+                    release=galaxy.release)
+        assert cube.data_origin == 'api'
+        assert cube.mangaid == galaxy.mangaid
+        assert cube._nsa is not None
+
+    def test_load_payload_local(self, galaxy):
+        with pytest.raises(AssertionError) as ee:
+            Cube(plateifu=galaxy.plateifu, data={}, mode='local')
+
+        assert 'data dictionaries require remote mode' in str(ee.value)
+
     def test_getFullPath_no_plateifu(self, galaxy):
         cube = Cube(mangaid=galaxy.mangaid)
         cube.plateifu = None
@@ -175,6 +190,19 @@ class TestCube(object):
         cube = Cube(plateifu=galaxy.plateifu)
         cube._getExtensionData(extName='flux')
 
+    @marvin_test_if('include', data_origin=['db'])
+    @pytest.mark.slow
+    def test_get3DCubes_db_matches_file(self, galaxy):
+        cube_db = Cube(plateifu=galaxy.plateifu, mode='local')
+        cube_file = Cube(filename=galaxy.cubepath)
+
+        assert cube_db._shape == cube_file._shape
+
+        arrays = cube_db.data.get3DCubes(['flux', 'mask'])
+        assert arrays['flux'].shape == cube_file.data['FLUX'].data.shape
+        assert arrays['flux'][:, 15, 17] == pytest.approx(cube_file.data['FLUX'].data[:, 15, 17])
+        assert (arrays['mask'] == cube_file.data['MASK'].data).all()
+
 
 class TestWCS(object):
 
@@ -182,7 +210,7 @@ class TestWCS(object):
         assert cube.data_origin == cube.exporigin
         assert isinstance(cube.wcs, wcs.WCS)
         comp = cube.wcs.wcs.pc if cube.data_origin == 'api' else cube.wcs.wcs.cd
-        assert pytest.approx(comp[1, 1], 0.000138889)
+        assert comp[1, 1] == pytest.approx(0.000138889)
 
 
 class TestPickling(object):
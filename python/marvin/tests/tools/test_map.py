@@ -117,6 +117,22 @@ class TestMap(object):
         map_restored = Map.restore(str(fout), delete=True)
         assert tuple(map_.shape) == tuple(map_restored.shape)
 
+    def test_save_and_restore_snapshot(self, temp_scratch, map_):
+        pytest.importorskip('h5py')
+
+        fout = temp_scratch.join('test_map.h5')
+        map_.save(str(fout), overwrite=True)
+        assert fout.check() is True
+
+        map_restored = Map.restore(str(fout), delete=True)
+        assert (map_restored.value == map_.value).all()
+        assert (map_restored.ivar == map_.ivar).all()
+        assert (map_restored.mask == map_.mask).all()
+        assert map_restored.unit == map_.unit
+        assert map_restored.datamodel.full() == map_.datamodel.full()
+        if map_.quality_flag is not None:
+            assert map_restored.quality_flag.mask == map_.quality_flag.mask
+
     @pytest.mark.parametrize('property_name, channel',
                              [('emline_gflux', 'ha_6564'),
                               ('stellar_vel', None)])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_plate.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import pytest
+
+from marvin.tests import marvin_test_if
+from marvin.tools.cube import Cube
+from marvin.tools.plate import Plate, PlateCube
+
+
+@pytest.fixture(autouse=True)
+def skipbins(galaxy):
+    if galaxy.bintype.name not in ['SPX', 'NONE']:
+        pytest.skip('Skipping all bins for Plate tests')
+    if galaxy.template.name not in ['MILES-THIN', 'GAU-MILESHC']:
+        pytest.skip('Skipping all templates for Plate tests')
+
+
+@pytest.fixture()
+def plate(galaxy, mode):
+    return Plate(plate=galaxy.plate, release=galaxy.release, mode=mode)
+
+
+class TestPlateCube(object):
+
+    def test_metadata_does_not_load(self):
+        handle = PlateCube('8485-1901', mangaid='1-209232', ra=232.5, dec=48.7)
+        assert handle.mangaid == '1-209232'
+        assert handle.metadata == {'plateifu': '8485-1901', 'mangaid': '1-209232',
+                                   'ra': 232.5, 'dec': 48.7}
+        assert handle.loaded is False
+        assert 'loaded=False' in repr(handle)
+
+    def test_private_attributes_do_not_load(self):
+        handle = PlateCube('8485-1901')
+        with pytest.raises(AttributeError):
+            handle._not_an_attribute
+        assert handle.loaded is False
+
+    @pytest.mark.parametrize('filename',
+                             ['/sas/v2_3_1/8485/stack/manga-8485-1901-LOGCUBE.fits.gz',
+                              '/sas/v2_3_1/8485/mastar/manga-8485-1901-LOGCUBE.fits.gz'])
+    def test_plateifu_from_filename(self, filename):
+        assert Plate._getPlateifuFromFilename(filename) == '8485-1901'
+
+
+class TestPlate(object):
+
+    @marvin_test_if('include', data_origin=['db'])
+    def test_plate_from_db(self, galaxy, data_origin):
+        plate = Plate(plate=galaxy.plate, release=galaxy.release, mode='local')
+        assert plate.data_origin == 'db'
+        assert galaxy.plateifu in plate
+        assert plate[galaxy.plateifu].mangaid == galaxy.mangaid
+        assert plate[galaxy.plateifu]._data is None
+
+    def test_cubes_not_loaded(self, plate, galaxy):
+        assert galaxy.plateifu in plate
+        assert all(isinstance(handle, PlateCube) for handle in plate)
+        assert not any(handle.loaded for handle in plate)
+
+    def test_handles_keep_no_rows(self, plate):
+        assert all(handle._data is None for handle in plate)
+        assert all(isinstance(handle.metadata['ra'], (float, type(None))) for handle in plate)
+
+    def test_handle_metadata(self, plate, galaxy):
+        handle = plate[galaxy.plateifu]
+        assert handle.plateifu == galaxy.plateifu
+        assert handle.mangaid == galaxy.mangaid
+        assert handle.loaded is False
+
+    def test_handle_loads_cube(self, plate, galaxy):
+        handle = plate[galaxy.plateifu]
+        assert handle.dir3d == 'stack'
+        assert handle.loaded is True
+        assert isinstance(handle.cube, Cube)
+        assert handle.cube.plateifu == galaxy.plateifu
+        assert handle.cube.mangaid == galaxy.mangaid
+
+    def test_cube_attribute(self, plate, galaxy):
+        assert getattr(plate, 'cube{0}'.format(galaxy.ifu)).plateifu == galaxy.plateifu
+
+    def test_load_cubes(self, plate, galaxy):
+        cubes = plate.load_cubes()
+        assert len(cubes) == len(plate)
+        assert all(isinstance(cube, Cube) for cube in cubes)
+        assert all(handle.loaded for handle in plate)
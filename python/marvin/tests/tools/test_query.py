@@ -12,10 +12,19 @@ from __future__ import print_function, division, absolute_import
 from marvin.tools.query import Query, doQuery
 from marvin.core.exceptions import MarvinError
 from marvin import config
+from marvin.utils.general import temp_setattr
+from marvin.utils.general.querycache import compiled_cache
+from marvin.utils.db.flatviews import build_flat_views, drop_flat_views
 from marvin.tools.cube import Cube
 from marvin.tools.maps import Maps
 from marvin.tools.spaxel import Spaxel
 from marvin.tools.modelcube import ModelCube
+from marvin.tools.queryjob import QueryJob
+import threading
+from collections import OrderedDict
+
+import sqlalchemy
+
 import pytest
 
 
@@ -105,6 +114,36 @@ class TestQuerySearches(object):
         count = query.expdata['queries'][sfilter]
         assert count['count'] == res.totalcount
 
+    @pytest.mark.parametrize('use_summary', [True, False])
+    @pytest.mark.parametrize('query', [('npergood(emline_gflux_ha_6564 > 5) > 20')],
+                             indirect=True, ids=['npergood'])
+    def test_npergood_summary(self, query, use_summary):
+        if query.mode == 'remote':
+            pytest.skip('the summary tables are only used in local mode')
+        query.use_summary = use_summary
+        res = query.run()
+        count = query.expdata['queries']['npergood(emline_gflux_ha_6564 > 5) > 20']
+        assert count['count'] == res.totalcount
+
+    @pytest.mark.parametrize('count_mode', ['estimate', 'auto'])
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_count_mode(self, query, count_mode):
+        if query.mode == 'remote':
+            pytest.skip('the count mode is only applied in local mode')
+        query.count_mode = count_mode
+        res = query.run()
+        count = query.expdata['queries']['nsa.z < 0.1']['count']
+        assert res.count_estimated == query.count_estimated
+        if not res.count_estimated:
+            assert res.totalcount == count
+        else:
+            assert res.totalcount > 0
+
+    def test_bad_count_mode(self):
+        with pytest.raises(AssertionError) as cm:
+            Query(searchfilter='nsa.z < 0.1', count_mode='bad')
+        assert 'count_mode must be either exact, estimate, or auto' in str(cm.value)
+
     # @pytest.mark.parametrize('query, qmode',
     #                          [('nsa.z < 0.1', 'count'),
     #                           ('nsa.z < 0.1', 'first')],
@@ -210,6 +249,261 @@ class TestQueryReturnType(object):
         assert errmsg in str(cm.value)
 
 
+class TestQuerySubmit(object):
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_submit(self, query):
+        job = query.submit()
+        res = job.result(timeout=300)
+        count = query.expdata['queries']['nsa.z < 0.1']['count']
+        assert job.status() == 'done'
+        assert job.progress() == 1
+        assert res.totalcount == count
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_cancel(self, query, monkeypatch):
+        if query.mode == 'remote':
+            pytest.skip('only testing local cancellation')
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def _run(**kwargs):
+            started.set()
+            release.wait(60)
+            return None
+
+        # blocks the fetch until the job has been cancelled
+        monkeypatch.setattr(query, 'run', _run)
+        job = query.submit()
+        assert started.wait(60)
+        assert job.cancel() is True
+        release.set()
+
+        with pytest.raises(MarvinError) as cm:
+            job.result(timeout=60)
+        assert 'cancelled' in str(cm.value)
+        assert job.status() == 'cancelled'
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_cancel_done(self, query):
+        if query.mode == 'remote':
+            pytest.skip('only testing local cancellation')
+        job = query.submit()
+        job.result(timeout=300)
+        assert job.cancel() is False
+        assert job.status() == 'done'
+
+    def test_abstract(self):
+
+        class IncompleteJob(QueryJob):
+            def status(self):
+                return 'done'
+
+        with pytest.raises(TypeError):
+            IncompleteJob()
+
+
+class TestQueryKeyset(object):
+
+    @pytest.mark.parametrize('greater', [True, False])
+    @pytest.mark.parametrize('nulls_ahead', [True, False])
+    @pytest.mark.parametrize('start', [(2.0, 3), (None, 5)])
+    def test_keyset_filter_nulls(self, greater, nulls_ahead, start):
+        engine = sqlalchemy.create_engine('sqlite://')
+        metadata = sqlalchemy.MetaData()
+        table = sqlalchemy.Table('keyset', metadata,
+                                 sqlalchemy.Column('pk', sqlalchemy.Integer, primary_key=True),
+                                 sqlalchemy.Column('z', sqlalchemy.Float))
+        metadata.create_all(engine)
+
+        rows = [(1, 1.0), (2, None), (3, 2.0), (4, 2.0), (5, None), (6, 3.0), (7, None)]
+        engine.execute(table.insert(), [{'pk': pk, 'z': z} for pk, z in rows])
+
+        keyset_filter = Query._get_keyset_filter([table.c.z, table.c.pk], start,
+                                                 greater, nulls_ahead)
+        selected = set(row[0] for row in
+                       engine.execute(sqlalchemy.select([table.c.pk]).where(keyset_filter)))
+
+        # NULLs sort after all the values in the direction of the selection if nulls_ahead
+        null_rank = float('inf') if greater == nulls_ahead else -float('inf')
+
+        def rank(z, pk):
+            return (null_rank if z is None else z, pk)
+
+        expected = set(pk for pk, z in rows
+                       if (rank(z, pk) > rank(*start)) == greater and rank(z, pk) != rank(*start))
+
+        assert selected == expected
+
+
+class TestQueryParallel(object):
+
+    @pytest.mark.parametrize('query', [('emline_gflux_ha_6564 > 25')], indirect=True)
+    def test_parallel_count(self, query):
+        res = query.run(parallel=4)
+        count = query.expdata['queries']['emline_gflux_ha_6564 > 25']['count']
+        assert res.totalcount == count
+
+    @pytest.mark.parametrize('order', ['asc', 'desc'])
+    @pytest.mark.parametrize('query', [('emline_gflux_ha_6564 > 25')], indirect=True)
+    def test_parallel_sort(self, query, order):
+        if query.mode == 'remote':
+            pytest.skip('only comparing the local results')
+        kwargs = dict(searchfilter=query.searchfilter, mode='local', sort='emline_gflux_ha_6564',
+                      order=order, caching=False)
+        single = Query(**kwargs).run(start=10, end=30)
+        sharded = Query(**kwargs).run(start=10, end=30, parallel=4)
+        assert sharded.totalcount == single.totalcount
+        assert sharded.results['emline_gflux_ha_6564'] == single.results['emline_gflux_ha_6564']
+
+
+class TestQueryFlatViews(object):
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_no_flat_views(self, query):
+        if query.mode == 'remote':
+            pytest.skip('flat views are only used in local mode')
+        query = Query(searchfilter=query.searchfilter, mode='local', use_flat_views=False)
+        assert query._flatview is None
+        res = query.run()
+        assert res.totalcount == query.expdata['queries']['nsa.z < 0.1']['count']
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_flat_view_matches_joins(self, query):
+        if query.mode == 'remote':
+            pytest.skip('flat views are only used in local mode')
+
+        release = query._release
+        built = build_flat_views(release, levels=['cube'])
+        try:
+            kwargs = dict(searchfilter=query.searchfilter, mode='local', release=release,
+                          sort='cube.plateifu', caching=False)
+            flat = Query(use_flat_views=True, **kwargs)
+            joined = Query(use_flat_views=False, **kwargs)
+            assert flat._flatview is not None
+            assert joined._flatview is None
+
+            flatres = flat.run()
+            joinedres = joined.run()
+            assert flatres.totalcount == joinedres.totalcount
+            assert flatres.results == joinedres.results
+        finally:
+            if built:
+                drop_flat_views(release, levels=['cube'])
+
+
+class TestQueryCompiledCache(object):
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_parsed_cache(self, query):
+        if query.mode == 'remote':
+            pytest.skip('the compiled query cache is only used in local mode')
+        hits = compiled_cache.metrics['hits']
+        newquery = Query(searchfilter='nsa.z<0.1', mode='local')
+        assert compiled_cache.metrics['hits'] > hits
+        assert str(newquery._parsed) == str(query._parsed)
+
+    @pytest.mark.parametrize('prepared', [True, False])
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1 and ifu.name = 19*')], indirect=True)
+    def test_prepared(self, query, prepared, monkeypatch):
+        if query.mode == 'remote':
+            pytest.skip('prepared statements are only used in local mode')
+
+        executed = []
+        execute_prepared = Query._execute_prepared
+
+        def _execute_prepared(self, sql, params):
+            executed.append(sql)
+            return execute_prepared(self, sql, params)
+
+        monkeypatch.setattr(Query, '_execute_prepared', _execute_prepared)
+        with temp_setattr(config, 'prepared_statements', [prepared]):
+            first = Query(searchfilter=query.searchfilter, mode='local', caching=False).run()
+            second = Query(searchfilter=query.searchfilter, mode='local', caching=False).run()
+        assert first.results == second.results
+        assert len(executed) == (2 if prepared else 0)
+        assert all('$1' in sql for sql in executed)
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1 and ifu.name = 19*')], indirect=True)
+    def test_compiled_once(self, query, monkeypatch):
+        if query.mode == 'remote':
+            pytest.skip('the compiled query cache is only used in local mode')
+
+        compiled = []
+        get_prepared_sql = Query._get_prepared_sql
+
+        def _get_prepared_sql(self, query):
+            compiled.append(query)
+            return get_prepared_sql(self, query)
+
+        monkeypatch.setattr(Query, '_get_prepared_sql', _get_prepared_sql)
+        compiled_cache.clear()
+        first = Query(searchfilter=query.searchfilter, mode='local', caching=False).run()
+        second = Query(searchfilter=query.searchfilter, mode='local', caching=False).run()
+        assert first.results == second.results
+        assert len(compiled) == 1
+
+        # a query modified after it was built is compiled every time
+        modified = Query(searchfilter=query.searchfilter, mode='local', caching=False)
+        modified.query = modified.query.distinct()
+        modified.run()
+        assert len(compiled) == 2
+
+    def test_prepared_lru(self):
+
+        class Cursor(object):
+            def __init__(self):
+                self.statements = []
+
+            def execute(self, sql):
+                self.statements.append(sql)
+
+        cursor = Cursor()
+        prepared = OrderedDict()
+        for name in ['first', 'second', 'first', 'third']:
+            Query._prepare(cursor, prepared, name, 'select 1', max_prepared=2)
+
+        assert list(prepared) == ['first', 'third']
+        assert cursor.statements == ['PREPARE first AS select 1', 'PREPARE second AS select 1',
+                                     'PREPARE third AS select 1', 'DEALLOCATE second']
+
+
+class TestQueryExplain(object):
+
+    @pytest.mark.parametrize('analyze', [False, True])
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_explain(self, query, analyze):
+        if query.mode == 'remote':
+            pytest.skip('explain is only available in local mode')
+        plan = query.explain(analyze=analyze)
+        assert 'cost=' in plan
+        assert ('actual time' in plan) is analyze
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_explain_json(self, query):
+        if query.mode == 'remote':
+            pytest.skip('explain is only available in local mode')
+        plan = query.explain(plan_format='json')
+        assert 'Node Type' in plan[0]['Plan']
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_explain_no_side_effects(self, query):
+        if query.mode == 'remote':
+            pytest.skip('explain is only available in local mode')
+        sqlquery = query.query
+        query.explain()
+        assert query.query is sqlquery
+
+    @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
+    def test_explain_remote(self, query):
+        if query.mode == 'local':
+            pytest.skip('only testing remote mode')
+        with pytest.raises(MarvinError) as cm:
+            query.explain()
+        assert 'explain is only available for queries in local mode' in str(cm.value)
+
+
 class TestQueryPickling(object):
 
     @pytest.mark.parametrize('query', [('nsa.z < 0.1')], indirect=True)
@@ -10,7 +10,7 @@
 
 from __future__ import print_function, division, absolute_import
 from marvin.tools.query import Query
-from marvin.tools.results import Results, ResultSet, marvintuple
+from marvin.tools.results import Results, ResultSet, marvintuple, ToolProxy, _create_tools
 from marvin.tools.cube import Cube
 from marvin.tools.maps import Maps
 from marvin.tools.spaxel import Spaxel
@@ -171,6 +171,45 @@ class TestResultsOutput(object):
         assert isinstance(json_res, list)
 
 
+class TestResultsColumnar(object):
+
+    def test_rows_are_lazy(self, results):
+        assert results._resultset is None
+        assert isinstance(results.results, ResultSet)
+        assert results._resultset is not None
+
+    def test_topandas_matches_rows(self, results):
+        df = results.toDataFrame()
+        assert list(df.columns) == list(results.results[0]._fields)
+        assert len(df) == results.count
+        assert tuple(df.iloc[0]) == results.results[0]
+
+    def test_totable_matches_rows(self, results):
+        table = results.toTable()
+        assert tuple(table[0]) == results.results[0]
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    def test_sort_columns(self, results):
+        results.sort('z', order='desc')
+        zz = results.getListOf('z')
+        assert zz == sorted(zz, reverse=True)
+        assert [row.z for row in results.results] == zz
+
+    def test_columns_ignore_row_changes(self, results):
+        zz = results.getListOf('z')
+        results.results.sort('z', reverse=True)
+        assert results.getListOf('z') == zz
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    def test_extend_set_columns(self, results):
+        results.getSubset(0, limit=2)
+        first = results.getListOf('plateifu')
+        results.extendSet(start=1, chunk=2)
+        plateifus = results.getListOf('plateifu')
+        assert plateifus[:2] == first
+        assert plateifus == [row.plateifu for row in results.results]
+
+
 class TestResultsGetParams(object):
 
     def test_get_attribute(self, results, columns):
@@ -349,6 +388,72 @@ class TestResultsPaging(object):
         assert results.count == results.totalcount
 
 
+class TestResultsKeyset(object):
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    @pytest.mark.parametrize('order', ['asc', 'desc'])
+    def test_pages_match_offset(self, results, order):
+        if results.mode == 'remote':
+            pytest.skip('keyset pagination is only used in local mode')
+
+        pages = []
+        for pagination in ['offset', 'keyset']:
+            q = Query(searchfilter=results.searchfilter, mode='local', limit=10, sort='nsa.z',
+                      order=order, count_threshold=10, pagination=pagination,
+                      release=results._release)
+            r = q.run()
+            rows = [r.results['z']]
+            r.getNext(chunk=10)
+            rows.append(r.results['z'])
+            r.getNext(chunk=10)
+            r.getPrevious(chunk=10)
+            rows.append(r.results['z'])
+            pages.append(rows)
+
+        assert pages[0] == pages[1]
+        assert pages[1][1] == pages[1][2]
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    def test_keyset_set(self, results):
+        if results.mode == 'remote':
+            pytest.skip('keyset pagination is only used in local mode')
+        q = Query(searchfilter=results.searchfilter, mode='local', limit=10, count_threshold=10,
+                  pagination='keyset', release=results._release)
+        r = q.run()
+        assert r._keyset is not None
+        assert len(r.results[0]) == len(r.columns)
+
+
+class TestResultsStreaming(object):
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    @pytest.mark.parametrize('prefetch', [True, False])
+    def test_iter_rows(self, results, prefetch):
+        current = copy.copy(results.results)
+        columns = results.columns
+        batches = list(results.iter_rows(chunksize=20, prefetch=prefetch))
+        assert all(isinstance(batch, ResultSet) for batch in batches)
+        assert all(len(batch) <= 20 for batch in batches)
+        assert sum(len(batch) for batch in batches) == results.totalcount
+        assert batches[1].index == len(batches[0])
+        assert results.results == current
+        assert results.columns is columns
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    def test_iter_rows_break(self, results):
+        for batch in results.iter_rows(chunksize=5):
+            break
+        assert len(batch) == 5
+        assert batch[0].plateifu is not None
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1')], indirect=True)
+    def test_query_stream(self, results):
+        query = results._queryobj.query
+        nrows = sum(len(rows) for rows in results._queryobj.stream(chunksize=50))
+        assert nrows == results.totalcount
+        assert results._queryobj.query is query
+
+
 class TestResultsPickling(object):
 
     def test_pickle_save(self, results, temp_scratch):
@@ -363,6 +468,17 @@ class TestResultsPickling(object):
         r = Results.restore(str(file))
         assert r.searchfilter == results.searchfilter
 
+    def test_snapshot_restore(self, results, temp_scratch):
+        pytest.importorskip('h5py')
+        file = temp_scratch.join('test_results.h5')
+        results.save(str(file), overwrite=True)
+        assert file.check() is True
+        r = Results.restore(str(file))
+        assert r.searchfilter == results.searchfilter
+        assert r.count == results.count
+        assert r.columns.list_params('remote') == results.columns.list_params('remote')
+        assert r.results == results.results
+
 
 class TestResultsConvertTool(object):
 
@@ -394,4 +510,44 @@ class TestResultsConvertTool(object):
         assert cm.type == error
         assert errmsg in str(cm.value)
 
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1 and haflux > 25')], indirect=True)
+    @pytest.mark.parametrize('n_workers', [1, 4])
+    def test_convert_parallel(self, results, n_workers):
+        results.convertToTool('cube', limit=3, n_workers=n_workers)
+        plateifus = results.getListOf('plateifu')[0:3]
+        assert [obj.plateifu for obj in results.objects] == plateifus
+
+    @pytest.mark.parametrize('results', [('nsa.z < 0.1 and haflux > 25')], indirect=True)
+    def test_convert_lazy(self, results):
+        results.convertToTool('cube', limit=2, lazy=True)
+        proxy = results.objects[0]
+        assert isinstance(proxy, ToolProxy)
+        assert proxy._tool is None
+        assert proxy.plateifu == results.results[0].plateifu
+        assert isinstance(proxy._tool, Cube)
+
+
+class _Tool(object):
+
+    def __init__(self, plateifu=None, mode=None):
+        self.plateifu = plateifu
+        self.mode = mode
+
+
+class TestCreateTools(object):
+
+    @pytest.mark.parametrize('n_workers', [1, 3])
+    def test_order(self, n_workers):
+        kwargs = [{'plateifu': str(ii)} for ii in range(10)]
+        tools = _create_tools(_Tool, kwargs, n_workers=n_workers)
+        assert [tool.plateifu for tool in tools] == [str(ii) for ii in range(10)]
+
+    def test_lazy(self):
+        tools = _create_tools(_Tool, [{'plateifu': '8485-1901'}], lazy=True)
+        assert 'not loaded' in repr(tools[0])
+        assert tools[0].plateifu == '8485-1901'
+        assert isinstance(tools[0]._tool, _Tool)
 
+    def test_bad_pool(self):
+        with pytest.raises(AssertionError):
+            _create_tools(_Tool, [], pool='greenlet')
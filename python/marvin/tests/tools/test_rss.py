@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_rss.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import numpy as np
+import pytest
+from six.moves import cPickle as pickle
+
+from marvin.tools.quantities import Spectrum
+from marvin.tools.rss import RSS, RSSFiber
+
+
+@pytest.fixture(autouse=True)
+def skipbins(galaxy):
+    if galaxy.bintype.name not in ['SPX', 'NONE']:
+        pytest.skip('Skipping all bins for RSS tests')
+    if galaxy.template.name not in ['MILES-THIN', 'GAU-MILESHC']:
+        pytest.skip('Skipping all templates for RSS tests')
+
+
+@pytest.fixture()
+def rss_file(galaxy):
+    return RSS(filename=galaxy.rsspath, release=galaxy.release)
+
+
+@pytest.mark.slow
+class TestRSSArrays(object):
+
+    def test_arrays(self, rss_file):
+        nfibers = rss_file.data['FLUX'].header['NAXIS2']
+        assert len(rss_file) == nfibers
+        assert rss_file.flux.shape == (nfibers, len(rss_file.wavelength))
+        assert rss_file.ivar.shape == rss_file.flux.shape
+        assert rss_file.mask.shape == rss_file.flux.shape
+
+    def test_fibers_on_demand(self, rss_file):
+        assert 1 not in rss_file._fibers
+
+        fiber = rss_file[1]
+        assert isinstance(fiber, RSSFiber)
+        assert rss_file._fibers[1] is fiber
+        assert rss_file[1] is fiber
+        assert rss_file[-1] is rss_file[len(rss_file) - 1]
+        assert np.all(fiber.value == rss_file.flux[1])
+        assert np.all(fiber.ivar == rss_file.ivar[1])
+        assert np.all(fiber.mask == rss_file.mask[1])
+        assert np.shares_memory(fiber.value, rss_file.flux)
+
+    def test_iterate(self, rss_file):
+        fibers = list(rss_file)
+        assert len(fibers) == len(rss_file)
+        assert all(isinstance(fiber, RSSFiber) for fiber in fibers)
+        assert len(rss_file[0:3]) == 3
+        assert list(reversed(rss_file))[0] is rss_file[-1]
+
+    def test_contains(self, rss_file):
+        assert None not in rss_file
+        fiber = rss_file[2]
+        assert fiber in rss_file
+        assert rss_file.index(fiber) == 2
+        assert rss_file.count(fiber) == 1
+
+    def test_pickle(self, rss_file):
+        rss_file[0]
+        restored = pickle.loads(pickle.dumps(rss_file))
+        assert restored._fibers == {}
+        assert len(restored) == len(rss_file)
+        assert np.all(restored[0].value == rss_file.flux[0])
+
+    def test_snr(self, rss_file):
+        assert np.allclose(rss_file.snr[2], np.abs(rss_file.flux[2]) * np.sqrt(rss_file.ivar[2]))
+
+    def test_masked_flux(self, rss_file):
+        masked = rss_file.masked_flux(use_ivar=False)
+        assert np.all(masked.mask == (rss_file.mask > 0))
+
+    @pytest.mark.parametrize('fibers', [[0], [0, 1, 2]])
+    def test_stack(self, rss_file, fibers):
+        stacked = rss_file.stack(fibers=fibers, use_mask=False)
+        assert isinstance(stacked, Spectrum)
+        assert stacked.shape == rss_file.wavelength.shape
+
+        ivar = rss_file.ivar[fibers].astype(float)
+        assert np.allclose(stacked.ivar, ivar.sum(axis=0))
+
+        if len(fibers) == 1:
+            good = ivar[0] > 0
+            assert np.allclose(stacked.value[good], rss_file.flux[0][good])
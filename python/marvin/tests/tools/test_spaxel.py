@@ -15,9 +15,11 @@ from __future__ import absolute_import
 import itertools
 import os
 
+import numpy as np
 import pytest
 import astropy.io.fits
 
+import marvin.utils.general.general
 from marvin import config
 
 from marvin.core.exceptions import MarvinError
@@ -28,7 +30,7 @@ from marvin.tools.cube import Cube
 from marvin.tools.maps import Maps
 from marvin.tools.modelcube import ModelCube
 from marvin.tools.quantities import Spectrum
-from marvin.tools.spaxel import SpaxelBase, Spaxel, Bin
+from marvin.tools.spaxel import SpaxelBase, Spaxel, Bin, SpaxelBatch
 from marvin.tests import marvin_test_if
 
 
@@ -633,3 +635,133 @@ class TestModelCubeGetSpaxel(object):
         assert pytest.approx(spaxel_getspaxel_file.binned_flux.mask[idx], mask)
         assert pytest.approx(spaxel_getspaxel_db.binned_flux.mask[idx], mask)
         assert pytest.approx(spaxel_getspaxel_api.binned_flux.mask[idx], mask)
+
+
+class TestGetSpaxels(object):
+
+    def _get_maps_kwargs(self, galaxy, data_origin):
+
+        if data_origin == 'file':
+            maps_kwargs = dict(filename=galaxy.mapspath)
+        else:
+            maps_kwargs = dict(plateifu=galaxy.plateifu, release=galaxy.release,
+                               bintype=galaxy.bintype, template=galaxy.template,
+                               mode='local' if data_origin == 'db' else 'remote')
+
+        return maps_kwargs
+
+    def test_cube_getspaxels(self, cube, galaxy):
+
+        xx = [galaxy.spaxel['x'], 1, galaxy.spaxel['x']]
+        yy = [galaxy.spaxel['y'], 2, galaxy.spaxel['y']]
+
+        batch = cube.getSpaxels(x=xx, y=yy, xyorig='lower', properties=False)
+
+        assert isinstance(batch, SpaxelBatch)
+        assert len(batch) == 3
+        assert batch.plateifu == galaxy.plateifu
+        assert batch.flux.value.shape == (3, len(cube._wavelength))
+        assert batch.flux.ivar.shape == batch.flux.value.shape
+        assert batch.flux.mask.shape == batch.flux.value.shape
+
+        spec_idx = galaxy.spaxel['specidx']
+        assert batch.flux.value[0, spec_idx] == pytest.approx(galaxy.spaxel['flux'])
+        assert batch.flux.ivar[0, spec_idx] == pytest.approx(galaxy.spaxel['ivar'])
+        assert batch.flux.mask[0, spec_idx] == pytest.approx(galaxy.spaxel['mask'])
+        assert np.all(batch.flux.value[0] == batch.flux.value[2])
+
+    def test_cube_getspaxels_matches_getspaxel(self, cube, galaxy):
+
+        batch = cube.getSpaxels(x=[1, 3], y=[2, 4], xyorig='lower', properties=False)
+        spaxels = cube.getSpaxel(x=[1, 3], y=[2, 4], xyorig='lower', properties=False)
+
+        for ii, spaxel in enumerate(spaxels):
+            assert spaxel.x == batch.x[ii]
+            assert spaxel.y == batch.y[ii]
+            assert np.allclose(spaxel.flux.value, batch.flux.value[ii])
+            assert spaxel.ra == pytest.approx(batch.ra[ii])
+            assert spaxel.dec == pytest.approx(batch.dec[ii])
+
+    def test_cube_getspaxels_null_row(self, cube, monkeypatch):
+
+        if cube.data_origin != 'db':
+            pytest.skip('only testing NULL DB rows')
+
+        getSpaxelRowsXY = marvin.utils.general.general.getSpaxelRowsXY
+
+        class NullFlux(object):
+            def __init__(self, row):
+                self._row = row
+
+            def __getattr__(self, name):
+                return None if name == 'flux' else getattr(self._row, name)
+
+        def _get_rows(*args, **kwargs):
+            rows = getSpaxelRowsXY(*args, **kwargs)
+            return [rows[0], NullFlux(rows[1])]
+
+        monkeypatch.setattr(marvin.utils.general.general, 'getSpaxelRowsXY', _get_rows)
+
+        batch = cube.getSpaxels(x=[1, 3], y=[2, 4], xyorig='lower', properties=False)
+
+        assert batch.flux.value.shape == (2, len(cube._wavelength))
+        assert np.isfinite(batch.flux.value[0]).any()
+        assert np.isnan(batch.flux.value[1]).all()
+        assert batch.flux.ivar.shape == batch.flux.value.shape
+
+    def test_cube_getspaxels_out_of_limits(self, cube):
+
+        with pytest.raises(MarvinError) as ee:
+            cube.getSpaxels(x=[1, 100], y=[1, 1], xyorig='lower', properties=False)
+
+        assert 'some indices are out of limits' in str(ee.value)
+
+    def test_maps_getspaxels(self, galaxy, data_origin):
+
+        maps = Maps(**self._get_maps_kwargs(galaxy, data_origin))
+
+        batch = maps.getSpaxels(x=[15, 1], y=[8, 2], xyorig='lower', drp=False)
+
+        assert len(batch.maps_quantities) == len(maps.datamodel)
+        assert len(batch.cube_quantities) == 0
+        assert batch.maps_quantities['stellar_vel'].value.shape == (2, )
+
+        if not maps.is_binned():
+            expected = galaxy.stellar_vel_ivar_x15_y8_lower[galaxy.release][galaxy.template.name]
+            assert batch.maps_quantities['stellar_vel'].ivar[0] == pytest.approx(expected,
+                                                                                 abs=1e-6)
+
+    def test_maps_getspaxels_remote_fallbacks(self, galaxy, monkeypatch):
+
+        maps = Maps(**self._get_maps_kwargs(galaxy, 'api'))
+        bulk = maps.getSpaxels(x=[15, 1], y=[8, 2], xyorig='lower', drp=False)
+
+        # without the bulk route, few spaxels are requested one by one
+        monkeypatch.delitem(config.urlmap['api'], 'getMapsQuantitiesSpaxels')
+        by_spaxel = maps.getSpaxels(x=[15, 1], y=[8, 2], xyorig='lower', drp=False)
+
+        for name in ['stellar_vel', 'emline_gflux_ha_6564']:
+            assert np.allclose(bulk.maps_quantities[name].value,
+                               by_spaxel.maps_quantities[name].value, equal_nan=True)
+            assert np.allclose(bulk.maps_quantities[name].ivar,
+                               by_spaxel.maps_quantities[name].ivar, equal_nan=True)
+
+    @marvin_test_if(mark='skip', galaxy=dict(release=['MPL-4']))
+    def test_modelcube_getspaxels(self, galaxy, data_origin):
+
+        if data_origin == 'file':
+            kwargs = {'filename': galaxy.modelpath}
+        elif data_origin == 'db':
+            kwargs = {'plateifu': galaxy.plateifu}
+        elif data_origin == 'api':
+            kwargs = {'plateifu': galaxy.plateifu, 'mode': 'remote'}
+
+        modelcube = ModelCube(bintype=galaxy.bintype, template=galaxy.template,
+                              release=galaxy.release, **kwargs)
+
+        batch = modelcube.getSpaxels(x=[1, 2], y=[2, 1], xyorig='lower',
+                                     drp=False, properties=False)
+
+        assert batch.getModelCube() is modelcube
+        assert batch.binned_flux.value.shape == (2, len(modelcube._wavelength))
+        assert batch.full_fit.value.shape == (2, len(modelcube._wavelength))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_arraycache.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import os
+
+import numpy as np
+import pytest
+
+from marvin.utils.general.arraycache import ArrayCache, NpzArrayCache
+
+
+@pytest.fixture(scope='function')
+def array_cache(tmpdir):
+    return NpzArrayCache(str(tmpdir.join('arrays')))
+
+
+class TestNpzArrayCache(object):
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            ArrayCache()
+
+    def test_set_get_empty(self, array_cache):
+        array_cache.set(('MPL-6', '8485-1901', 'emline_gflux:ha_6564', 'ivar'), np.zeros(0))
+        cached = array_cache.get(('MPL-6', '8485-1901', 'emline_gflux:ha_6564', 'ivar'))
+        assert cached is not None
+        assert cached.size == 0
+
+    def test_get_missing(self, array_cache):
+        assert array_cache.get(('MPL-6', '8485-1901', 'FLUX')) is None
+
+    def test_set_get(self, array_cache):
+        array = np.arange(60, dtype=np.float32).reshape((3, 4, 5))
+        key = ('MPL-6', '8485-1901', 'FLUX')
+        array_cache.set(key, array)
+
+        cached = array_cache.get(key)
+        assert cached.dtype == array.dtype
+        assert np.all(cached == array)
+
+    def test_keys_differ(self, array_cache):
+        array_cache.set(('MPL-6', '8485-1901', 'FLUX', 'SPX', 'GAU-MILESHC'), np.zeros(3))
+        assert array_cache.get(('MPL-6', '8485-1901', 'FLUX', 'HYB10', 'GAU-MILESHC')) is None
+
+    def test_set_none(self, array_cache):
+        array_cache.set(('MPL-6', '8485-1901', 'FLUX'), None)
+        assert len(os.listdir(array_cache.directory)) == 0
+
+    def test_eviction(self, tmpdir):
+        array_cache = NpzArrayCache(str(tmpdir.join('arrays')))
+        array_cache.set(('a',), np.random.random(1000))
+        size = os.path.getsize(array_cache._get_path(('a',)))
+        os.utime(array_cache._get_path(('a',)), (0, 0))
+
+        array_cache.max_size = size
+        array_cache.set(('b',), np.random.random(1000))
+
+        assert array_cache.get(('a',)) is None
+        assert array_cache.get(('b',)) is not None
+
+    def test_clear(self, array_cache):
+        array_cache.set(('a',), np.zeros(3))
+        array_cache.clear()
+        assert array_cache.get(('a',)) is None
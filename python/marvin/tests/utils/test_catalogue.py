@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_catalogue.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from marvin.utils.general.catalogue import CatalogueIndex
+
+
+@pytest.fixture(scope='function')
+def catalogue(tmpdir):
+    columns = fits.ColDefs([
+        fits.Column(name='PLATEIFU', format='12A',
+                    array=np.array(['8485-1901', '7443-12701', '8485-1902', '8485-1901'])),
+        fits.Column(name='MANGAID', format='12A',
+                    array=np.array(['1-209232 ', '12-98126', '1-209113', '1-209232'])),
+        fits.Column(name='DAPTYPE', format='20A',
+                    array=np.array(['SPX-GAU-MILESHC', 'SPX-GAU-MILESHC',
+                                    'SPX-GAU-MILESHC', 'HYB10-GAU-MILESHC'])),
+        fits.Column(name='Z', format='E', array=np.array([0.04, 0.02, 0.03, 0.04]))])
+    path = str(tmpdir.join('catalogue.fits'))
+    fits.HDUList([fits.PrimaryHDU(), fits.BinTableHDU.from_columns(columns)]).writeto(path)
+    return CatalogueIndex(path)
+
+
+class TestCatalogueIndex(object):
+
+    def test_find(self, catalogue):
+        assert catalogue.find('1-209232', key='mangaid') == [0, 3]
+        assert catalogue.find('1-1', key='mangaid') == []
+
+    def test_find_case_insensitive(self, catalogue):
+        assert catalogue.find('7443-12701', key='PLATEIFU') == [1]
+
+    def test_find_composite(self, catalogue):
+        key = ('plateifu', 'daptype')
+        assert catalogue.find(('8485-1901', 'HYB10-GAU-MILESHC'), key=key) == [3]
+
+    def test_get_indices(self, catalogue):
+        indices = catalogue.get_indices(['8485-1902', 'bad', '8485-1901'])
+        assert indices.tolist() == [2, -1, 0]
+
+    def test_lookup(self, catalogue):
+        rows = catalogue.lookup(['8485-1902', 'bad', '7443-12701'])
+        assert len(rows) == 2
+        assert np.allclose(rows['Z'], [0.03, 0.02])
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_fitsaccess.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import gzip
+import os
+import shutil
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+import marvin
+
+from marvin.utils.general.fitsaccess import (open_fits, get_uncompressed_path,
+                                             clear_fits_cache)
+
+
+@pytest.fixture(scope='function')
+def gzfile(tmpdir):
+    data = np.arange(4 * 3 * 2, dtype=np.float32).reshape((4, 3, 2))
+    hdulist = fits.HDUList([fits.PrimaryHDU(), fits.ImageHDU(data, name='FLUX')])
+
+    path = str(tmpdir.join('cube.fits'))
+    hdulist.writeto(path)
+
+    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+
+    os.remove(path)
+
+    return path + '.gz', data
+
+
+class TestOpenFits(object):
+
+    def test_open_gzip_nocache(self, gzfile):
+        path, data = gzfile
+        hdulist = open_fits(path, cache_dir=None)
+        assert np.all(hdulist['FLUX'].data[:, 1, 0] == data[:, 1, 0])
+        hdulist.close()
+
+    def test_none_disables_configured_cache(self, gzfile, tmpdir, monkeypatch):
+        path, data = gzfile
+        cache_dir = str(tmpdir.join('cache_config'))
+        monkeypatch.setattr(marvin.config, 'fits_cache_dir', cache_dir)
+
+        hdulist = open_fits(path, cache_dir=None)
+        assert hdulist.filename() == path
+        hdulist.close()
+        assert not os.path.exists(cache_dir)
+
+        hdulist = open_fits(path)
+        assert hdulist.filename().startswith(cache_dir)
+        hdulist.close()
+
+    def test_open_gzip_cache(self, gzfile, tmpdir):
+        path, data = gzfile
+        cache_dir = str(tmpdir.join('cache'))
+
+        hdulist = open_fits(path, cache_dir=cache_dir)
+        assert hdulist.filename().startswith(cache_dir)
+        assert not hdulist.filename().endswith('.gz')
+        assert np.all(hdulist['FLUX'].data[:, 2, 1] == data[:, 2, 1])
+        hdulist.close()
+
+        assert len(os.listdir(cache_dir)) == 1
+
+    def test_cache_reused(self, gzfile, tmpdir):
+        path, __ = gzfile
+        cache_dir = str(tmpdir.join('cache'))
+
+        first = get_uncompressed_path(path, cache_dir)
+        second = get_uncompressed_path(path, cache_dir)
+        assert first == second
+        assert len(os.listdir(cache_dir)) == 1
+
+    def test_cache_eviction(self, gzfile, tmpdir):
+        path, __ = gzfile
+        cache_dir = str(tmpdir.join('cache'))
+
+        first = get_uncompressed_path(path, cache_dir)
+
+        other = str(tmpdir.join('other.fits.gz'))
+        shutil.copy(path, other)
+        os.utime(first, (0, 0))
+
+        second = get_uncompressed_path(other, cache_dir, max_size=os.path.getsize(first))
+        assert os.path.exists(second)
+        assert not os.path.exists(first)
+
+    def test_clear_cache(self, gzfile, tmpdir):
+        path, __ = gzfile
+        cache_dir = str(tmpdir.join('cache'))
+
+        get_uncompressed_path(path, cache_dir)
+        clear_fits_cache(cache_dir)
+        assert len(os.listdir(cache_dir)) == 0
@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_flatviews.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import pytest
+
+from marvin.utils.db.flatviews import get_view_name
+
+
+class TestFlatViews(object):
+
+    @pytest.mark.parametrize('release, level, name',
+                             [('MPL-6', 'cube', 'flat_cube_mpl_6'),
+                              ('DR14', 'spaxel', 'flat_spaxel_dr14'),
+                              ('MPL-4', 'spaxel', 'flat_spaxel_mpl_4')])
+    def test_view_name(self, release, level, name):
+        assert get_view_name(release, level) == name
+
+    def test_bad_level(self):
+        with pytest.raises(AssertionError) as cm:
+            get_view_name('MPL-6', 'rss')
+        assert 'level must be one of cube, spaxel' in str(cm.value)
@@ -18,6 +18,8 @@ Revision history:
 from __future__ import division
 from __future__ import print_function
 
+import time
+
 import pytest
 import numpy as np
 from astropy.io import fits
@@ -31,7 +33,7 @@ from marvin.tools.quantities import Spectrum
 from marvin.utils.general.structs import DotableCaseInsensitive
 from marvin.core.exceptions import MarvinError
 from marvin.utils.general import (convertCoords, get_nsa_data, getWCSFromPng, get_plot_params,
-                                  _sort_dir)
+                                  _sort_dir, prefetch, getSpaxelRowsColumn)
 from marvin.utils.datamodel.dap.plotting import get_default_plot_params
 
 
@@ -234,3 +236,71 @@ class TestSortDir(object):
         dir_ = _sort_dir(spec, class_)
         dir_public = [it for it in dir_ if it[0] is not '_']
         assert set(dir_public) == set(expected)
+
+
+class TestSpaxelRowsColumn(object):
+
+    @pytest.mark.parametrize('ext, dtype, expected',
+                             [(None, np.float64, [1.5, np.nan]),
+                              ('ivar', np.float64, [1.5, 0.]),
+                              ('mask', np.int64, [1, 0])])
+    def test_null_values(self, ext, dtype, expected):
+        rows = [DotableCaseInsensitive({'col': 1.5 if ext != 'mask' else 1}),
+                DotableCaseInsensitive({'col': None})]
+        values = getSpaxelRowsColumn(rows, 'col', ext=ext)
+        assert values.dtype == dtype
+        assert np.allclose(values, expected, equal_nan=True)
+
+    @pytest.mark.parametrize('nwave', [None, 3])
+    def test_null_array_rows(self, nwave):
+        rows = [DotableCaseInsensitive({'col': [1., 2., 3.]}),
+                DotableCaseInsensitive({'col': None}),
+                DotableCaseInsensitive({'col': [4., 5., 6.]})]
+        values = getSpaxelRowsColumn(rows, 'col', nwave=nwave)
+        assert values.shape == (3, 3)
+        assert np.isnan(values[1]).all()
+        assert np.allclose(values[2], [4., 5., 6.])
+
+    def test_null_array_rows_ivar(self):
+        rows = [DotableCaseInsensitive({'col': None}),
+                DotableCaseInsensitive({'col': [1., 2.]})]
+        values = getSpaxelRowsColumn(rows, 'col', ext='ivar')
+        assert np.allclose(values, [[0., 0.], [1., 2.]])
+
+
+class TestPrefetch(object):
+
+    @pytest.mark.parametrize('size', [1, 3])
+    def test_prefetch(self, size):
+        assert list(prefetch(iter(range(10)), size=size)) == list(range(10))
+
+    def test_prefetch_error(self):
+
+        def _gen():
+            yield 1
+            raise ValueError('failed fetching')
+
+        with pytest.raises(ValueError) as cm:
+            list(prefetch(_gen()))
+        assert 'failed fetching' in str(cm.value)
+
+    def test_prefetch_break(self):
+        closed = []
+
+        def _gen():
+            try:
+                for ii in range(100):
+                    yield ii
+            finally:
+                closed.append(True)
+
+        gen = prefetch(_gen())
+        assert next(gen) == 0
+        gen.close()
+
+        # the producer notices the stop and closes the generator in the background
+        for __ in range(50):
+            if closed:
+                break
+            time.sleep(0.1)
+        assert closed == [True]
@@ -158,3 +158,41 @@ class TestMaskbit(object):
         mb.mask = mask
         actual = mb.get_mask(labels, mask=custom_mask, dtype=bool)
         assert (actual == expected).all()
+
+    @pytest.mark.parametrize('values, expected',
+                             [(np.array([1, 2]), [['BITZERO'], ['BITONE']]),
+                              (np.array([[4, 4], [4, 4]]), [[['BITTWO'], ['BITTWO']],
+                                                            [['BITTWO'], ['BITTWO']]])])
+    def test_values_to_labels_equal_lengths(self, values, expected):
+        mb = Maskbit(name=name, schema=schema, description=description)
+        assert mb.values_to_labels(values=values) == expected
+
+    def test_values_to_bit_array(self):
+        mb = Maskbit(name=name, schema=schema, description=description)
+        mb.mask = mask
+        actual = mb.values_to_bit_array()
+        assert actual.shape == (2, 2, 4)
+        assert actual.dtype == bool
+        assert actual[1, 1].tolist() == [False, False, True, True]
+
+        flat = mb.values_to_bit_array(flatten=True)
+        assert flat.shape == (4, 4)
+        assert flat[1].tolist() == [True, False, False, False]
+
+    def test_encode_label_sets(self):
+        mb = Maskbit(name=name, schema=schema, description=description)
+        codes, label_sets = mb.encode_label_sets(np.array([[0, 12], [12, 1]]))
+        assert codes.shape == (2, 2)
+        assert label_sets == [[], ['BITZERO'], ['BITTWO', 'BITTHREE']]
+        assert label_sets[codes[0, 1]] == ['BITTWO', 'BITTHREE']
+
+    @pytest.mark.parametrize('labels, any_expected, all_expected',
+                             [('BITONE', [[False, False], [True, True]],
+                               [[False, False], [True, True]]),
+                              (['BITZERO', 'BITTWO'], [[True, True], [True, True]],
+                               [[False, True], [True, False]])])
+    def test_any_all_of(self, labels, any_expected, all_expected):
+        mb = Maskbit(name=name, schema=schema, description=description)
+        mb.mask = custom_mask
+        assert mb.any_of(labels).tolist() == any_expected
+        assert mb.all_of(labels).tolist() == all_expected
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_querycache.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import pytest
+
+from marvin.utils.general.querycache import (QueryCache, LRUQueryCache, DiskQueryCache,
+                                             MemcachedQueryCache, CompiledQueryCache,
+                                             make_query_key, normalise_searchfilter)
+
+
+@pytest.fixture(params=['lru', 'disk', 'memcached'])
+def query_cache(request, tmpdir):
+    if request.param == 'lru':
+        return LRUQueryCache(max_entries=2)
+    elif request.param == 'memcached':
+        pytest.importorskip('dogpile.cache')
+        return MemcachedQueryCache(backend='dogpile.cache.memory')
+    return DiskQueryCache(str(tmpdir.join('queries')))
+
+
+def _key(searchfilter='nsa.z < 0.1', release='MPL-5', **kwargs):
+    return make_query_key(searchfilter, ['cube.mangaid', 'nsa.z'], release, **kwargs)
+
+
+class TestQueryKey(object):
+
+    @pytest.mark.parametrize('searchfilter',
+                             ['nsa.z<0.1 AND ifu.name=19*',
+                              '  nsa.z <  0.1 and ifu.name = 19*',
+                              'nsa.z < 0.1 And ifu.name= 19*'])
+    def test_normalise(self, searchfilter):
+        assert normalise_searchfilter(searchfilter) == 'nsa.z < 0.1 and ifu.name = 19*'
+
+    def test_normalise_quoted(self):
+        searchfilter = "nsa.z<0.1 AND cube.name = 'a OR b'"
+        assert normalise_searchfilter(searchfilter) == "nsa.z < 0.1 and cube.name = 'a OR b'"
+
+    def test_key_equivalent_filters(self):
+        assert _key('nsa.z<0.1') == _key('nsa.z < 0.1')
+
+    @pytest.mark.parametrize('kwargs', [{'release': 'MPL-6'}, {'sort': 'nsa.z'},
+                                        {'start': 10, 'end': 20}, {'return_all': True},
+                                        {'use_summary': True}, {'use_flat_views': True}])
+    def test_key_differ(self, kwargs):
+        assert _key() != _key(**kwargs)
+
+
+class TestQueryCache(object):
+
+    def test_set_get(self, query_cache):
+        query_cache.set(_key(), {'rows': [(1, 2)], 'totalcount': 1})
+        assert query_cache.get(_key())['rows'] == [(1, 2)]
+        assert query_cache.get(_key(sort='nsa.z')) is None
+        assert query_cache.metrics['hits'] == 1
+        assert query_cache.metrics['misses'] == 1
+        assert query_cache.hit_rate == 0.5
+
+    def test_invalidate_release(self, query_cache):
+        query_cache.set(_key(release='MPL-5'), {'rows': []})
+        query_cache.set(_key(release='MPL-6'), {'rows': []})
+        query_cache.invalidate('MPL-5')
+        assert query_cache.get(_key(release='MPL-5')) is None
+        assert query_cache.get(_key(release='MPL-6')) is not None
+
+    def test_invalidate_all(self, query_cache):
+        query_cache.set(_key(release='MPL-5'), {'rows': []})
+        query_cache.invalidate()
+        assert query_cache.get(_key(release='MPL-5')) is None
+
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            QueryCache()
+
+    def test_lru_eviction(self):
+        query_cache = LRUQueryCache(max_entries=2)
+        for ii in range(3):
+            query_cache.set(_key(start=ii), {'rows': [ii]})
+        assert query_cache.get(_key(start=0)) is None
+        assert query_cache.get(_key(start=2)) is not None
+
+
+class TestCompiledQueryCache(object):
+
+    def test_kinds(self):
+        cache = CompiledQueryCache()
+        cache.set('parsed', 'nsa.z < 0.1', 'parsed')
+        cache.set('sql', 'nsa.z < 0.1', 'sql')
+        assert cache.get('parsed', 'nsa.z < 0.1') == 'parsed'
+        assert cache.get('sql', 'nsa.z < 0.1') == 'sql'
+        assert cache.get('joins', 'nsa.z < 0.1') is None
+        assert cache.metrics == {'hits': 2, 'misses': 1}
+
+    def test_eviction(self):
+        cache = CompiledQueryCache(max_entries=2)
+        for ii in range(3):
+            cache.set('sql', ii, ii)
+        cache.set('parsed', 0, 0)
+        assert cache.get('sql', 0) is None
+        assert cache.get('sql', 2) == 2
+        assert cache.get('parsed', 0) == 0
+
+    def test_clear(self):
+        cache = CompiledQueryCache()
+        cache.set('sql', 0, 0)
+        cache.clear()
+        assert cache.get('sql', 0) is None
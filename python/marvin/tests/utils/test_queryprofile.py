@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_queryprofile.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import copy
+import json
+
+from marvin.utils.db.queryprofile import plan_hash
+
+
+plan = [{'Plan': {'Node Type': 'Limit', 'Startup Cost': 0.85, 'Total Cost': 30.3,
+                  'Plan Rows': 100,
+                  'Plans': [{'Node Type': 'Index Scan', 'Parent Relationship': 'Outer',
+                             'Relation Name': 'cube', 'Index Name': 'cube_pkey',
+                             'Startup Cost': 0.42, 'Total Cost': 1200.5, 'Plan Rows': 4000}]}}]
+
+
+class TestPlanHash(object):
+
+    def test_json_string(self):
+        assert plan_hash(json.dumps(plan)) == plan_hash(plan)
+
+    def test_ignores_costs(self):
+        other = copy.deepcopy(plan)
+        other[0]['Plan']['Total Cost'] = 100.
+        other[0]['Plan']['Plans'][0]['Plan Rows'] = 10
+        assert plan_hash(other) == plan_hash(plan)
+
+    def test_different_plan(self):
+        other = copy.deepcopy(plan)
+        other[0]['Plan']['Plans'][0]['Node Type'] = 'Seq Scan'
+        del other[0]['Plan']['Plans'][0]['Index Name']
+        assert plan_hash(other) != plan_hash(plan)
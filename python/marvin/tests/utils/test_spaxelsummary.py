@@ -0,0 +1,27 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_spaxelsummary.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import division, print_function, absolute_import
+
+import time
+
+import pytest
+
+from marvin.utils.db import spaxelsummary
+
+
+@pytest.fixture()
+def edges_cache(monkeypatch):
+    monkeypatch.setattr(spaxelsummary, '_edges_cache', {})
+    return spaxelsummary._edges_cache
+
+
+class TestEdgesCache(object):
+
+    def test_cached(self, edges_cache):
+        edges_cache[('cleanspaxelprop6', 'stellar_vel')] = ([0., 10.], time.time())
+        assert spaxelsummary.get_histogram_edges('cleanspaxelprop6', 'stellar_vel') == [0., 10.]
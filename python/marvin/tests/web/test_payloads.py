@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# test_payloads.py
+#
+# Licensed under a 3-clause BSD license.
+
+from __future__ import print_function, division, absolute_import
+
+import threading
+
+import pytest
+
+import marvin.web.payloads as payloads
+from marvin.web.controllers.galaxy import _get_plotparams
+from marvin.web.payloads import (WebPayloadCache, make_payload_key, popular_galaxies,
+                                 record_view, start_warming)
+
+
+class DictBackend(object):
+    """A minimal in-memory backend with the interface of the Flask cache."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key, None)
+
+    def set(self, key, value, timeout=None):
+        self.values[key] = value
+
+
+@pytest.fixture()
+def payload_cache():
+    return WebPayloadCache(backend=DictBackend())
+
+
+class TestPayloadKey(object):
+
+    def test_key(self):
+        key = make_payload_key('map', 'MPL-6', '8485-1901', 'SPX', 'GAU-MILESHC',
+                               'emline_gflux:ha_6564')
+        assert key == 'marvin_web/map/MPL-6/8485-1901/SPX/GAU-MILESHC/emline_gflux:ha_6564'
+
+    def test_keys_differ(self):
+        assert make_payload_key('map', 'MPL-6', '8485-1901', 'SPX') != \
+            make_payload_key('map', 'MPL-6', '8485-1901', 'HYB10')
+
+
+class TestWebPayloadCache(object):
+
+    def test_set_get(self, app, payload_cache):
+        with app.app_context():
+            payload_cache.set('key', {'values': [1, 2]})
+            assert payload_cache.get('key') == {'values': [1, 2]}
+            assert payload_cache.get('other') is None
+        assert payload_cache.metrics == {'hits': 1, 'misses': 1, 'sets': 1}
+
+    def test_no_app_context(self, payload_cache):
+        payload_cache.set('key', {'values': [1, 2]})
+        assert payload_cache.get('key') is None
+        assert payload_cache.backend.values == {}
+
+    def test_disabled(self, app, payload_cache, monkeypatch):
+        monkeypatch.setitem(app.config, 'WEB_PAYLOAD_CACHE', False)
+        with app.app_context():
+            payload_cache.set('key', {'values': [1, 2]})
+            assert payload_cache.get('key') is None
+
+
+class TestWarming(object):
+
+    def test_popular_galaxies(self):
+        for plateifu, views in [('7443-12701', 1), ('8485-1901', 3), ('8485-1902', 2)]:
+            for __ in range(views):
+                record_view('MPL-0', plateifu)
+        assert popular_galaxies('MPL-0', n_galaxies=2) == ['8485-1901', '8485-1902']
+        assert popular_galaxies('MPL-1') == []
+
+    def test_disabled(self, app):
+        assert start_warming(app, ['8485-1901'], release='MPL-0') == []
+
+    def test_single_bounded_worker(self, app, monkeypatch):
+        started = threading.Event()
+        proceed = threading.Event()
+        warmed = []
+
+        def warm_galaxy(plateifu, release):
+            started.set()
+            proceed.wait(5)
+            warmed.append(plateifu)
+
+        monkeypatch.setattr(payloads, 'warm_galaxy', warm_galaxy)
+        monkeypatch.setattr(payloads, '_warm_worker', None)
+        monkeypatch.setitem(app.config, 'WEB_PAYLOAD_WARMING', True)
+        monkeypatch.setitem(app.config, 'WEB_PAYLOAD_WARM_QUEUE', 2)
+
+        assert start_warming(app, ['8485-1901'], release='MPL-0') == ['8485-1901']
+        worker = payloads._warm_worker
+        assert started.wait(5)
+
+        # the worker is busy, so only two galaxies fit in the queue
+        queued = start_warming(app, ['8485-1902', '8485-3701', '8485-3702'], release='MPL-0')
+        assert queued == ['8485-1902', '8485-3701']
+        assert start_warming(app, ['8485-1902'], release='MPL-0') == []
+        assert payloads._warm_worker is worker
+
+        proceed.set()
+        payloads._warm_queue.join()
+        assert warmed == ['8485-1901', '8485-1902', '8485-3701']
+        assert not any(release == 'MPL-0' for release, __ in payloads._warming)
+
+
+class TestPlotParams(object):
+
+    def test_bits(self, galaxy):
+        plotparams = _get_plotparams(galaxy.dapver, 'emline_gflux')
+        assert 'nocov' in plotparams['bits']
+        assert _get_plotparams(galaxy.dapver, 'emline_gflux')['bits'] is plotparams['bits']
@@ -12,6 +12,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
+import collections
 import warnings
 
 from astropy.io import fits
@@ -30,7 +31,10 @@ from marvin.core.exceptions import MarvinError, MarvinUserWarning
 from marvin.tools.quantities import DataCube, Spectrum
 from marvin.utils.datamodel.drp import datamodel
 from marvin.utils.general import get_nsa_data, FuzzyDict
+from marvin.utils.general.arraycache import get_array_cache
+from marvin.utils.general.fitsaccess import open_fits
 from marvin.utils.general.maskbit import get_manga_target
+from marvin.utils.general.structs import DotableCaseInsensitive
 
 
 class Cube(MarvinToolsClass, NSAMixIn):
@@ -156,7 +160,7 @@ class Cube(MarvinToolsClass, NSAMixIn):
             assert isinstance(data, fits.HDUList), 'data is not an HDUList object'
         else:
             try:
-                self.data = fits.open(self.filename)
+                self.data = open_fits(self.filename)
             except (IOError, OSError) as err:
                 raise OSError('filename {0} cannot be found: {1}'.format(self.filename, err))
 
@@ -232,20 +236,27 @@ class Cube(MarvinToolsClass, NSAMixIn):
             self.data = self.data
 
             self._wavelength = np.array(self.data.wavelength.wavelength)
-            self._shape = self.data.shape.shape
+            self._shape = self.data.spatial_shape
 
     def _load_cube_from_api(self):
         """Calls the API and retrieves the necessary information to instantiate the cube."""
 
-        url = marvin.config.urlmap['api']['getCube']['url']
+        if isinstance(self.data, dict):
+            # Prefetched, e.g., from the batch route.
+            data = self.data
+        else:
+            url = marvin.config.urlmap['api']['getCube']['url']
+
+            try:
+                response = self._toolInteraction(url.format(name=self.plateifu))
+            except Exception as ee:
+                raise MarvinError('found a problem when checking if remote cube '
+                                  'exists: {0}'.format(str(ee)))
 
-        try:
-            response = self._toolInteraction(url.format(name=self.plateifu))
-        except Exception as ee:
-            raise MarvinError('found a problem when checking if remote cube '
-                              'exists: {0}'.format(str(ee)))
+            data = response.getData()
 
-        data = response.getData()
+        if data.get('nsa', None) is not None and self.nsa_source in ['auto', 'nsa']:
+            self._nsa = DotableCaseInsensitive(collections.OrderedDict(data['nsa']))
 
         self.header = fits.Header.fromstring(data['header'])
         self.wcs = WCS(fits.Header.fromstring(data['wcs_header']))
@@ -391,7 +402,13 @@ class Cube(MarvinToolsClass, NSAMixIn):
             # If the table is "spaxel", this must be a 3D cube. If it is "cube",
             # uses self.data, which is basically the DataModelClass.Cube instance.
             if model.db_table == 'spaxel':
-                ext_data = self.data.get3DCube(model.db_column(ext))
+                # Loads the value, ivar, and mask cubes in a single pass and caches all of them.
+                exts = [None] + [ee for ee in ['ivar', 'mask'] if self._get_ext_name(model, ee)]
+                columns = [model.db_column(ee) for ee in exts]
+                arrays = self.data.get3DCubes(columns)
+                for ee, column in zip(exts, columns):
+                    self._extension_data[self._get_ext_name(model, ee)] = arrays[column]
+                ext_data = arrays[model.db_column(ext)]
             elif model.db_table == 'cube':
                 ext_data = getattr(self.data, model.db_column(ext))
             else:
@@ -399,21 +416,31 @@ class Cube(MarvinToolsClass, NSAMixIn):
 
         elif self.data_origin == 'api':
 
-            params = {'release': self._release}
-            url = marvin.config.urlmap['api']['getExtension']['url']
+            array_cache = get_array_cache()
+            cache_key = (self._release, self.plateifu, ext_name)
 
-            try:
-                response = self._toolInteraction(
-                    url.format(name=self.plateifu,
-                               cube_extension=model.fits_extension(ext).lower()),
-                    params=params)
-            except Exception as ee:
-                raise MarvinError('found a problem when checking if remote cube '
-                                  'exists: {0}'.format(str(ee)))
+            ext_data = array_cache.get(cache_key) if array_cache else None
 
-            data = response.getData()
-            cube_ext_data = data['extension_data']
-            ext_data = np.array(cube_ext_data) if cube_ext_data is not None else None
+            if ext_data is None:
+
+                params = {'release': self._release}
+                url = marvin.config.urlmap['api']['getExtension']['url']
+
+                try:
+                    response = self._toolInteraction(
+                        url.format(name=self.plateifu,
+                                   cube_extension=model.fits_extension(ext).lower()),
+                        params=params)
+                except Exception as ee:
+                    raise MarvinError('found a problem when checking if remote cube '
+                                      'exists: {0}'.format(str(ee)))
+
+                data = response.getData()
+                cube_ext_data = data['extension_data']
+                ext_data = np.asarray(cube_ext_data) if cube_ext_data is not None else None
+
+                if array_cache and ext_data is not None:
+                    array_cache.set(cache_key, ext_data)
 
         self._extension_data[ext_name] = ext_data
 
@@ -529,6 +556,93 @@ class Cube(MarvinToolsClass, NSAMixIn):
 
         return cube_quantities
 
+    def _get_spaxels_quantities(self, x, y):
+        """Returns a dictionary of quantities for a list of spaxels.
+
+        Like `._get_spaxel_quantities` but for arrays of coordinates. Each
+        datacube extension is read and indexed only once (in the DB, all the
+        spaxels are retrieved in a single query). Returns a dictionary of
+        `~marvin.tools.spaxel.SpaxelBatchQuantity` in which the datacube
+        arrays have shape ``(len(x), nwave)``.
+
+        """
+
+        SpaxelBatchQuantity = marvin.tools.spaxel.SpaxelBatchQuantity
+
+        x = np.atleast_1d(x).astype(int)
+        y = np.atleast_1d(y).astype(int)
+
+        cube_quantities = FuzzyDict({})
+
+        _db_rows = None
+        if self.data_origin == 'db':
+            datadb = marvin.marvindb.datadb
+            _db_rows = marvin.utils.general.general.getSpaxelRowsXY(
+                datadb.Spaxel, x, y, datadb.Spaxel.cube == self.data)
+
+        wavelength = np.array(self._wavelength)
+
+        for dm in self.datamodel.datacubes:
+
+            data = {'value': None, 'ivar': None, 'mask': None}
+
+            for key in data:
+
+                if key == 'ivar' and not dm.has_ivar():
+                    continue
+                if key == 'mask' and not dm.has_mask():
+                    continue
+
+                ext = None if key == 'value' else key
+
+                if self.data_origin == 'db':
+                    # NULL spaxels are filled as in Maps and ModelCube, unless there are no data.
+                    colname = dm.db_column(ext)
+                    if all(getattr(row, colname) is None for row in _db_rows):
+                        spaxels_data = None
+                    else:
+                        spaxels_data = marvin.utils.general.general.getSpaxelRowsColumn(
+                            _db_rows, colname, ext=ext, nwave=len(wavelength))
+                else:
+                    ext_data = self._get_extension_data(dm.name, ext)
+                    spaxels_data = ext_data[:, y, x].T if ext_data is not None else None
+
+                if key == 'value' and spaxels_data is None:
+                    break
+
+                data[key] = spaxels_data
+
+            if data['value'] is None:
+                warnings.warn('cannot find {!r} data for {!r}. '
+                              'Maybe the data is not in the DB.'.format(
+                                  dm.name, self.plateifu), MarvinUserWarning)
+                cube_quantities[dm.name] = None
+                continue
+
+            cube_quantities[dm.name] = SpaxelBatchQuantity(data['value'],
+                                                           ivar=data['ivar'],
+                                                           mask=data['mask'],
+                                                           wavelength=wavelength,
+                                                           unit=dm.unit)
+
+        # Spectra are the same for all the spaxels so we only store them once.
+        for dm in self.datamodel.spectra:
+
+            value = self._get_extension_data(dm.name)
+
+            if value is None:
+                cube_quantities[dm.name] = None
+                continue
+
+            std = self._get_extension_data(dm.name, 'std') if dm.has_std() else None
+
+            cube_quantities[dm.name] = SpaxelBatchQuantity(np.array(value),
+                                                           std=std,
+                                                           wavelength=wavelength,
+                                                           unit=dm.unit)
+
+        return cube_quantities
+
     @property
     def manga_target1(self):
         """Return MANGA_TARGET1 flag."""
@@ -610,6 +724,45 @@ class Cube(MarvinToolsClass, NSAMixIn):
                                                       maps=properties,
                                                       modelcube=models, **kwargs)
 
+    def getSpaxels(self, x=None, y=None, ra=None, dec=None,
+                   properties=True, models=False, **kwargs):
+        """Returns a `~marvin.tools.spaxel.SpaxelBatch` for a list of coordinates.
+
+        The bulk version of `.getSpaxel`. Instead of a list of
+        :class:`~marvin.tools.spaxel.Spaxel` objects, returns a single
+        columnar object in which, for instance, ``batch.flux.value`` is an
+        array of shape ``(N, nwave)`` with the spectra of the ``N`` input
+        coordinates. Each extension is read only once, which makes this
+        method much faster than `.getSpaxel` for large numbers of spaxels.
+
+        Parameters:
+            x,y,ra,dec,xyorig:
+                As in `.getSpaxel`.
+            properties (bool):
+                If ``True``, the batch will include the DAP properties from
+                the default Maps matching this cube.
+            models (`~marvin.tools.modelcube.ModelCube` or bool):
+                If ``True`` or a `~marvin.tools.modelcube.ModelCube`, the
+                batch will include the model spectra.
+
+        Returns:
+            batch (`~marvin.tools.spaxel.SpaxelBatch`):
+                The quantities for the input coordinates.
+
+        Example:
+            >>> cube = Cube(plateifu='8485-1901')
+            >>> batch = cube.getSpaxels(x=[10, 11, 12], y=[5, 5, 5],
+            >>>                         xyorig='lower', properties=False)
+            >>> batch.flux.value.shape
+            (3, 4563)
+
+        """
+
+        return marvin.utils.general.general.getSpaxels(x=x, y=y, ra=ra, dec=dec,
+                                                       cube=self,
+                                                       maps=properties,
+                                                       modelcube=models, **kwargs)
+
     def getMaps(self, **kwargs):
         """Retrieves the DAP :class:`~marvin.tools.maps.Maps` for this cube.
 
@@ -12,6 +12,7 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import absolute_import
 
+import collections
 import copy
 import inspect
 import itertools
@@ -38,6 +39,7 @@ from marvin.utils.datamodel.dap import datamodel
 from marvin.utils.datamodel.dap.base import Property, Channel
 from marvin.utils.general import FuzzyDict, turn_off_ion
 from marvin.utils.general.maskbit import get_manga_target
+from marvin.utils.general.structs import DotableCaseInsensitive
 
 from .quantities import AnalysisProperty
 
@@ -348,28 +350,43 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn):
         # Creates the WCS from the cube's WCS header
         self.wcs = astropy.wcs.WCS(self.data.cube.wcs.makeHeader())
 
-        self._shape = self.data.cube.shape.shape
+        self._shape = self.data.cube.spatial_shape
 
     def _load_maps_from_api(self):
         """Loads a Maps object from remote."""
 
-        url = marvin.config.urlmap['api']['getMaps']['url']
+        if isinstance(self.data, dict):
+            # Prefetched, e.g., from the batch route.
+            data = self.data
+        else:
+            url = marvin.config.urlmap['api']['getMaps']['url']
 
-        url_full = url.format(name=self.plateifu,
-                              bintype=self.bintype.name,
-                              template=self.template.name)
+            url_full = url.format(name=self.plateifu,
+                                  bintype=self.bintype.name,
+                                  template=self.template.name)
 
-        try:
-            response = self._toolInteraction(url_full)
-        except Exception as ee:
-            raise marvin.core.exceptions.MarvinError(
-                'found a problem when checking if remote maps exists: {0}'.format(str(ee)))
+            try:
+                response = self._toolInteraction(url_full)
+            except Exception as ee:
+                raise marvin.core.exceptions.MarvinError(
+                    'found a problem when checking if remote maps exists: {0}'.format(str(ee)))
 
-        data = response.getData()
+            data = response.getData()
 
         if self.plateifu not in data['plateifu']:
             raise marvin.core.exceptions.MarvinError('remote maps has a different plateifu!')
 
+        if data.get('bintype', self.bintype.name) != self.bintype.name or \
+                data.get('template', self.template.name) != self.template.name:
+            raise marvin.core.exceptions.MarvinError('remote maps has a different bintype '
+                                                     'or template!')
+
+        if data.get('nsa', None) is not None and self.nsa_source in ['auto', 'nsa']:
+            self._nsa = DotableCaseInsensitive(collections.OrderedDict(data['nsa']))
+
+        if data.get('dapall', None) is not None:
+            self._dapall = data['dapall']
+
         self.header = astropy.io.fits.Header.fromstring(data['header'])
 
         # Sets the mangaid
@@ -456,6 +473,149 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn):
 
         return maps_quantities
 
+    def _get_spaxels_quantities(self, x, y):
+        """Returns a dictionary of quantities for a list of spaxels.
+
+        Like `._get_spaxel_quantities` but for arrays of coordinates. Each
+        extension is indexed only once and, in the DB, each table is queried
+        only once for all the spaxels. In remote mode, all the spaxels are
+        retrieved with the bulk spaxels route. If the server does not provide
+        it, each spaxel is requested separately when there are fewer spaxels
+        than properties and, otherwise, each property is retrieved as a full
+        map and then indexed. Returns a dictionary of
+        `~marvin.tools.spaxel.SpaxelBatchQuantity` with arrays of shape
+        ``(len(x), )``.
+
+        """
+
+        mdb = marvin.marvindb
+
+        SpaxelBatchQuantity = marvin.tools.spaxel.SpaxelBatchQuantity
+
+        x = np.atleast_1d(x).astype(int)
+        y = np.atleast_1d(y).astype(int)
+
+        if self.data_origin == 'api':
+            if 'getMapsQuantitiesSpaxels' in marvin.config.urlmap['api']:
+                return self._get_spaxels_quantities_from_api(x, y)
+            elif len(x) < len(self.datamodel):
+                return self._get_spaxels_quantities_by_spaxel(x, y)
+
+        maps_quantities = FuzzyDict({})
+
+        # Stores a dictionary of (table, rows)
+        _db_rows = {}
+
+        for dm in self.datamodel:
+
+            data = {'value': None, 'ivar': None, 'mask': None}
+
+            if self.data_origin == 'api':
+
+                value, ivar, mask = marvin.tools.quantities.Map._get_map_from_api(self, dm)
+
+                data['value'] = value[y, x]
+                data['ivar'] = ivar[y, x] if ivar is not None else None
+                data['mask'] = mask[y, x] if mask is not None else None
+
+            else:
+
+                for key in data:
+
+                    if key == 'ivar' and not dm.has_ivar():
+                        continue
+                    if key == 'mask' and not dm.has_mask():
+                        continue
+
+                    if self.data_origin == 'file':
+
+                        extname = dm.name + '' if key == 'value' else dm.name + '_' + key
+
+                        if dm.channel:
+                            data[key] = self.data[extname].data[dm.channel.idx, y, x]
+                        else:
+                            data[key] = self.data[extname].data[y, x]
+
+                    elif self.data_origin == 'db':
+
+                        table = getattr(mdb.dapdb, dm.model)
+
+                        if table not in _db_rows:
+                            _db_rows[table] = marvin.utils.general.general.getSpaxelRowsXY(
+                                table, x, y, table.file_pk == self.data.pk)
+
+                        ext = None if key == 'value' else key
+                        data[key] = marvin.utils.general.general.getSpaxelRowsColumn(
+                            _db_rows[table], dm.db_column(ext=ext), ext=ext)
+
+            maps_quantities[dm.full()] = SpaxelBatchQuantity(data['value'],
+                                                             ivar=data['ivar'],
+                                                             mask=data['mask'],
+                                                             unit=dm.unit)
+
+        return maps_quantities
+
+    def _get_spaxels_quantities_from_api(self, x, y, chunk_size=5000):
+        """Returns the quantities for a list of spaxels from the bulk spaxels route."""
+
+        SpaxelBatchQuantity = marvin.tools.spaxel.SpaxelBatchQuantity
+
+        url = marvin.config.urlmap['api']['getMapsQuantitiesSpaxels']['url'].format(
+            name=self.plateifu, bintype=self.bintype.name, template=self.template.name)
+
+        chunks = []
+        for ii in range(0, len(x), chunk_size):
+            params = {'release': self._release,
+                      'x': ','.join(str(xx) for xx in x[ii:ii + chunk_size]),
+                      'y': ','.join(str(yy) for yy in y[ii:ii + chunk_size])}
+            try:
+                response = self._toolInteraction(url, params=params)
+            except Exception as ee:
+                raise marvin.core.exceptions.MarvinError(
+                    'found a problem when getting the spaxels: {0}'.format(str(ee)))
+            chunks.append(response.getData())
+
+        maps_quantities = FuzzyDict({})
+
+        for dm in self.datamodel:
+
+            data = {}
+            for key in ['value', 'ivar', 'mask']:
+                arrays = [chunk[dm.full()][key] for chunk in chunks]
+                data[key] = None if arrays[0] is None else np.concatenate(arrays)
+
+            maps_quantities[dm.full()] = SpaxelBatchQuantity(data['value'],
+                                                             ivar=data['ivar'],
+                                                             mask=data['mask'],
+                                                             unit=dm.unit)
+
+        return maps_quantities
+
+    def _get_spaxels_quantities_by_spaxel(self, x, y):
+        """Returns the quantities for a list of spaxels, requesting each spaxel from the API."""
+
+        SpaxelBatchQuantity = marvin.tools.spaxel.SpaxelBatchQuantity
+
+        spaxels = [self._get_spaxel_quantities(xx, yy) for xx, yy in zip(x, y)]
+
+        maps_quantities = FuzzyDict({})
+
+        for dm in self.datamodel:
+
+            props = [spaxel[dm.full()] for spaxel in spaxels]
+
+            data = {}
+            for key in ['value', 'ivar', 'mask']:
+                values = [getattr(prop, key) for prop in props]
+                data[key] = None if values[0] is None else np.array(values)
+
+            maps_quantities[dm.full()] = SpaxelBatchQuantity(data['value'],
+                                                             ivar=data['ivar'],
+                                                             mask=data['mask'],
+                                                             unit=dm.unit)
+
+        return maps_quantities
+
     def get_binid(self, binid=None):
         """Returns a 2D array containing the binid map.
 
@@ -573,6 +733,33 @@ class Maps(MarvinToolsClass, NSAMixIn, DAPallMixIn):
             x=x, y=y, ra=ra, dec=dec,
             cube=drp, maps=self, modelcube=model, **kwargs)
 
+    def getSpaxels(self, x=None, y=None, ra=None, dec=None,
+                   drp=True, model=False, **kwargs):
+        """Returns a `~marvin.tools.spaxel.SpaxelBatch` for a list of coordinates.
+
+        The bulk version of `.getSpaxel`. Instead of a list of
+        :class:`~marvin.tools.spaxel.Spaxel` objects, returns a single
+        columnar object in which each property is an array with one value
+        per input coordinate (e.g., ``batch.emline_gflux_ha_6564.value``).
+
+        Parameters:
+            x,y,ra,dec,xyorig:
+                As in `.getSpaxel`.
+            drp (bool):
+                If ``True``, the batch will include the DRP spectra.
+            model (bool):
+                If ``True``, the batch will include the `.ModelCube` data.
+
+        Returns:
+            batch (`~marvin.tools.spaxel.SpaxelBatch`):
+                The quantities for the input coordinates.
+
+        """
+
+        return marvin.utils.general.general.getSpaxels(
+            x=x, y=y, ra=ra, dec=dec,
+            cube=drp, maps=self, modelcube=model, **kwargs)
+
     def _match_properties(self, property_name, channel=None, exact=False):
         """Returns the best match for a property_name+channel."""
 
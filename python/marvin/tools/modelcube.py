@@ -30,8 +30,16 @@ from marvin.core.exceptions import MarvinError
 from marvin.tools.quantities import DataCube, Spectrum
 from marvin.utils.datamodel.dap import datamodel, Model
 from marvin.utils.general import FuzzyDict
+from marvin.utils.general.arraycache import get_array_cache
+from marvin.utils.general.fitsaccess import open_fits
 from marvin.utils.general.maskbit import get_manga_target
 
+try:
+    import marvin.db.arrayloader
+except ImportError:
+    # sqlalchemy is not installed, so there is no DB access.
+    pass
+
 
 class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
     """A class to interface with MaNGA DAP model cubes.
@@ -177,7 +185,7 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
             assert isinstance(self.data, fits.HDUList), 'data is not an HDUList object'
         else:
             try:
-                self.data = fits.open(self.filename)
+                self.data = open_fits(self.filename)
             except IOError as err:
                 raise IOError('filename {0} cannot be found: {1}'.format(self.filename, err))
 
@@ -264,7 +272,7 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
             self.wcs = WCS(self.data.file.cube.wcs.makeHeader())
             self._wavelength = np.array(self.data.file.cube.wavelength.wavelength, dtype=np.float)
             self._redcorr = np.array(self.data.redcorr[0].value, dtype=np.float)
-            self._shape = self.data.file.cube.shape.shape
+            self._shape = self.data.file.cube.spatial_shape
 
             self.plateifu = str(self.header['PLATEIFU'].strip())
             self.mangaid = str(self.header['MANGAID'].strip())
@@ -286,8 +294,8 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
 
         self.header = fits.Header.fromstring(data['header'])
         self.wcs = WCS(fits.Header.fromstring(data['wcs_header']))
-        self._wavelength = np.array(data['wavelength'])
-        self._redcorr = np.array(data['redcorr'])
+        self._wavelength = np.asarray(data['wavelength'])
+        self._redcorr = np.asarray(data['redcorr'])
         self._shape = tuple(data['shape'])
 
         self.plateifu = str(self.header['PLATEIFU'].strip())
@@ -376,6 +384,34 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
             x=x, y=y, ra=ra, dec=dec,
             cube=drp, maps=properties, modelcube=self, **kwargs)
 
+    def getSpaxels(self, x=None, y=None, ra=None, dec=None,
+                   drp=True, properties=True, **kwargs):
+        """Returns a `~marvin.tools.spaxel.SpaxelBatch` for a list of coordinates.
+
+        The bulk version of `.getSpaxel`. Instead of a list of
+        :class:`~marvin.tools.spaxel.Spaxel` objects, returns a single
+        columnar object in which, for instance, ``batch.full_fit.value`` is an
+        array of shape ``(N, nwave)`` with the model spectra of the ``N``
+        input coordinates.
+
+        Parameters:
+            x,y,ra,dec,xyorig:
+                As in `.getSpaxel`.
+            drp (bool):
+                If ``True``, the batch will include the DRP spectra.
+            properties (bool):
+                If ``True``, the batch will include the DAP properties.
+
+        Returns:
+            batch (`~marvin.tools.spaxel.SpaxelBatch`):
+                The quantities for the input coordinates.
+
+        """
+
+        return marvin.utils.general.general.getSpaxels(
+            x=x, y=y, ra=ra, dec=dec,
+            cube=drp, maps=properties, modelcube=self, **kwargs)
+
     def _get_extension_data(self, name, ext=None):
         """Returns the data from an extension."""
 
@@ -389,28 +425,44 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
             ext_data = self.data[model.fits_extension(ext)].data
 
         elif self.data_origin == 'db':
-            # If the table is "spaxel", this must be a 3D cube. If it is "cube",
-            # uses self.data, which is basically the DataModelClass.Cube instance.
-            ext_data = self.data.get3DCube(model.db_column(ext))
+            # Loads the value, ivar, and mask cubes in a single pass and caches all of them.
+            exts = [None] + [ee for ee in ['ivar', 'mask']
+                             if getattr(model, 'has_{0}'.format(ee))()]
+            columns = [model.db_column(ee) for ee in exts]
+            arrays = self.data.get3DCubes(columns)
+            for ee, column in zip(exts, columns):
+                self._extension_data[model.fits_extension(ee)] = arrays[column]
+            ext_data = arrays[model.db_column(ext)]
 
         elif self.data_origin == 'api':
 
-            params = {'release': self._release}
-            url = marvin.config.urlmap['api']['getModelCubeExtension']['url']
+            array_cache = get_array_cache()
+            cache_key = (self._release, self.plateifu, ext_name,
+                         self.bintype.name, self.template.name)
 
-            try:
-                response = self._toolInteraction(
-                    url.format(name=self.plateifu,
-                               modelcube_extension=model.fits_extension(ext).lower(),
-                               bintype=self.bintype.name, template=self.template.name),
-                    params=params)
-            except Exception as ee:
-                raise MarvinError('found a problem when checking if remote '
-                                  'modelcube exists: {0}'.format(str(ee)))
+            ext_data = array_cache.get(cache_key) if array_cache else None
 
-            data = response.getData()
-            cube_ext_data = data['extension_data']
-            ext_data = np.array(cube_ext_data) if cube_ext_data is not None else None
+            if ext_data is None:
+
+                params = {'release': self._release}
+                url = marvin.config.urlmap['api']['getModelCubeExtension']['url']
+
+                try:
+                    response = self._toolInteraction(
+                        url.format(name=self.plateifu,
+                                   modelcube_extension=model.fits_extension(ext).lower(),
+                                   bintype=self.bintype.name, template=self.template.name),
+                        params=params)
+                except Exception as ee:
+                    raise MarvinError('found a problem when checking if remote '
+                                      'modelcube exists: {0}'.format(str(ee)))
+
+                data = response.getData()
+                cube_ext_data = data['extension_data']
+                ext_data = np.asarray(cube_ext_data) if cube_ext_data is not None else None
+
+                if array_cache and ext_data is not None:
+                    array_cache.set(cache_key, ext_data)
 
         self._extension_data[ext_name] = ext_data
 
@@ -490,6 +542,59 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
 
         return modelcube_quantities
 
+    def _get_spaxels_quantities(self, x, y):
+        """Returns a dictionary of quantities for a list of spaxels.
+
+        Like `._get_spaxel_quantities` but for arrays of coordinates. Each
+        extension is indexed only once (in the DB, all the spaxels are
+        retrieved in a single query). Returns a dictionary of
+        `~marvin.tools.spaxel.SpaxelBatchQuantity` with arrays of shape
+        ``(len(x), nwave)``.
+
+        """
+
+        SpaxelBatchQuantity = marvin.tools.spaxel.SpaxelBatchQuantity
+
+        x = np.atleast_1d(x).astype(int)
+        y = np.atleast_1d(y).astype(int)
+
+        modelcube_quantities = FuzzyDict({})
+
+        _db_rows = None
+        if self.data_origin == 'db':
+            dapdb = marvin.marvindb.dapdb
+            _db_rows = marvin.utils.general.general.getSpaxelRowsXY(
+                dapdb.ModelSpaxel, x, y, dapdb.ModelSpaxel.modelcube_pk == self.data.pk)
+
+        wavelength = np.array(self._wavelength)
+
+        for dm in self.datamodel:
+
+            data = {'value': None, 'ivar': None, 'mask': None}
+
+            for key in data:
+
+                if key == 'ivar' and not dm.has_ivar():
+                    continue
+                if key == 'mask' and not dm.has_mask():
+                    continue
+
+                ext = None if key == 'value' else key
+
+                if self.data_origin == 'db':
+                    data[key] = marvin.utils.general.general.getSpaxelRowsColumn(
+                        _db_rows, dm.db_column(ext), ext=ext, nwave=len(wavelength))
+                else:
+                    data[key] = self._get_extension_data(dm.name, ext)[:, y, x].T
+
+            modelcube_quantities[dm.name] = SpaxelBatchQuantity(data['value'],
+                                                                ivar=data['ivar'],
+                                                                mask=data['mask'],
+                                                                wavelength=wavelength,
+                                                                unit=dm.unit)
+
+        return modelcube_quantities
+
     def get_binid(self, model=None):
         """Returns the 2D array for the binid map associated with ``model``."""
 
@@ -518,15 +623,11 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
             mdb = marvin.marvindb
 
             table = mdb.dapdb.ModelSpaxel
-            column = getattr(table, binid_prop.db_column())
-
-            binid_list = mdb.session.query(column).filter(
-                table.modelcube_pk == self.data.pk).order_by(table.x, table.y).all()
-
-            nx = ny = int(np.sqrt(len(binid_list)))
-            binid_array = np.array(binid_list)
+            column = binid_prop.db_column()
 
-            return binid_array.transpose().reshape((ny, nx)).transpose(1, 0)
+            return marvin.db.arrayloader.load_map_arrays(
+                mdb.session, table, [column], self._shape,
+                table.modelcube_pk == self.data.pk, dtypes={column: int})[column]
 
         elif self.data_origin == 'api':
 
@@ -549,7 +650,7 @@ class ModelCube(MarvinToolsClass, NSAMixIn, DAPallMixIn):
                 raise MarvinError('found a problem while getting the binid from API: {}'
                                   .format(str(response.results['error'])))
 
-            return np.array(response.getData()['binid'])
+            return np.asarray(response.getData()['binid'])
 
     @property
     def binned_flux(self):
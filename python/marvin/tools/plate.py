@@ -10,6 +10,8 @@
 
 from __future__ import print_function
 from __future__ import division
+import os
+import re
 from marvin.core.core import MarvinToolsClass
 from marvin.core.exceptions import MarvinError
 from marvin.tools.cube import Cube
@@ -25,17 +27,159 @@ except ImportError:
     Path = None
 
 
+class PlateCube(object):
+    '''A lightweight handle to a cube in a `Plate`.
+
+    `Plate` retrieves the metadata of all its cubes at once and returns a
+    `PlateCube` for each of them. The handle only keeps scalar metadata, so
+    it does not depend on the DB session used to create it. The full
+    `~marvin.tools.cube.Cube` is only instantiated, using the API payload
+    already retrieved if available, the first time its data are accessed.
+    Any attribute not defined in the handle, e.g., ``flux`` or ``getSpaxel``,
+    is retrieved from the cube.
+
+    Note that a `PlateCube` is not an instance of `~marvin.tools.cube.Cube`;
+    use `PlateCube.cube` or `Plate.load_cubes` to get the cube objects.
+
+    Parameters:
+        plateifu (str):
+            The plate-ifu of the cube.
+        mode ({'local', 'remote', 'auto'}):
+            The load mode of the cube.
+        release (str):
+            The MPL/DR version of the data to use.
+        mangaid (str):
+            The mangaid of the cube, if known.
+        ra, dec (float):
+            The coordinates of the target, if known.
+        filename (str):
+            The path of the cube file, for plates loaded from files.
+        data (dict):
+            The API payload passed to the cube as ``data``.
+
+    Example:
+        >>> plate = Plate(plate=8485)
+        >>> plate['1901']
+        <Marvin PlateCube (plateifu='8485-1901', mangaid='1-209232', loaded=False)>
+        >>> plate['1901'].flux  # instantiates the cube
+        >>> plate['1901'].cube
+        <Marvin Cube (plateifu='8485-1901', mode='local', data_origin='db')>
+
+    '''
+
+    def __init__(self, plateifu, mode=None, release=None, mangaid=None, ra=None, dec=None,
+                 filename=None, data=None):
+
+        self.plateifu = plateifu
+        self.mode = mode
+        self.release = release
+        self.filename = filename
+
+        self._data = data
+        self._cube = None
+        self._meta = {'mangaid': mangaid, 'ra': ra, 'dec': dec}
+
+    def __repr__(self):
+
+        return ('<Marvin PlateCube (plateifu={0!r}, mangaid={1!r}, loaded={2})>'
+                .format(self.plateifu, self._meta['mangaid'], self.loaded))
+
+    def __getattr__(self, value):
+
+        # Avoids instantiating the cube for private attributes, e.g., when pickling.
+        if value.startswith('_'):
+            raise AttributeError(value)
+
+        return getattr(self.cube, value)
+
+    def __getitem__(self, xy):
+
+        return self.cube[xy]
+
+    def __dir__(self):
+
+        attrs = set(dir(self.__class__)) | set(self.__dict__)
+        if self.loaded:
+            attrs |= set(dir(self._cube))
+
+        return sorted(attrs)
+
+    @property
+    def loaded(self):
+        '''True if the full cube has been instantiated.'''
+
+        return self._cube is not None
+
+    @property
+    def cube(self):
+        '''The full `~marvin.tools.cube.Cube`, instantiated on first access.'''
+
+        if self._cube is None:
+            if self.filename:
+                self._cube = Cube(filename=self.filename, mode=self.mode, release=self.release)
+            else:
+                self._cube = Cube(plateifu=self.plateifu, mode=self.mode, release=self.release,
+                                  data=self._data)
+            self._data = None
+
+        return self._cube
+
+    def _get_meta(self, key):
+        '''Returns a metadata value, reading the file header if needed.'''
+
+        if self._meta[key] is None:
+            if self.loaded or not self.filename:
+                return getattr(self.cube, key)
+
+            header = fits.getheader(self.filename, 1)
+            self._meta.update(mangaid=header['MANGAID'].strip(),
+                              ra=float(header['OBJRA']), dec=float(header['OBJDEC']))
+
+        return self._meta[key]
+
+    @property
+    def mangaid(self):
+        '''The mangaid of the target.'''
+
+        return self._get_meta('mangaid')
+
+    @property
+    def ra(self):
+        '''The RA of the target.'''
+
+        return self._get_meta('ra')
+
+    @property
+    def dec(self):
+        '''The declination of the target.'''
+
+        return self._get_meta('dec')
+
+    @property
+    def metadata(self):
+        '''A dictionary with the plate-ifu, mangaid, RA, and Dec of the target.'''
+
+        ra, dec = self.ra, self.dec
+
+        return {'plateifu': self.plateifu, 'mangaid': self.mangaid,
+                'ra': float(ra) if ra is not None else None,
+                'dec': float(dec) if dec is not None else None}
+
+
 class Plate(MarvinToolsClass, FuzzyList):
     '''A class to interface with MaNGA Plate.
 
     This class represents a Plate, initialised either
     from a file, a database, or remotely via the Marvin API. The class
     inherits from Python's list class, and is defined as a list of
-    Cube objects.  As it inherits from list, it can do all the standard Python
+    `PlateCube` objects.  As it inherits from list, it can do all the standard Python
     list operations.
 
-    When instanstantiated, Marvin Plate will attempt to discover and load all the Cubes
-    associated with this plate.
+    When instanstantiated, Marvin Plate will discover all the Cubes associated
+    with this plate and retrieve their metadata at once, with a single DB
+    query or API request, without opening the cube files. Each `PlateCube`
+    instantiates its full Cube the first time its data are accessed. Use
+    `load_cubes` to instantiate all of them at once.
 
     Parameters:
         plate (str):
@@ -54,7 +198,7 @@ class Plate(MarvinToolsClass, FuzzyList):
 
     Attributes:
         cubeXXXX (object):
-            The Marvin Cube object for the given ifu, e.g. cube1901 refers to the Cube for plateifu 8485-1901
+            The `PlateCube` for the given ifu, e.g. cube1901 refers to the Cube for plateifu 8485-1901
         plate/plateid (int):
             The plate id for this plate
         cartid (str):
@@ -75,7 +219,7 @@ class Plate(MarvinToolsClass, FuzzyList):
     Return:
         plate:
             An object representing the Plate entity. The object is a list of
-            Cube objects, one for each IFU cube in the Plate entity.
+            `PlateCube` objects, one for each IFU cube in the Plate entity.
 
     Example:
         >>> from marvin.tools.plate import Plate
@@ -88,10 +232,14 @@ class Plate(MarvinToolsClass, FuzzyList):
         >>>
         >>> # access the plate via index to access the individual cubes
         >>> plate[0]
-        >>> <Marvin Cube (plateifu='8485-12701', mode='local', data_origin='db')>
+        >>> <Marvin PlateCube (plateifu='8485-12701', mangaid='1-209191', loaded=False)>
         >>>
         >>> # or by name
         >>> plate['12702']
+        >>> <Marvin PlateCube (plateifu='8485-12702', mangaid='1-209199', loaded=False)>
+        >>>
+        >>> # the full Cube is instantiated when accessing its data
+        >>> plate['12702'].cube
         >>> <Marvin Cube (plateifu='8485-12702', mode='local', data_origin='db')>
         >>>
     '''
@@ -103,6 +251,7 @@ class Plate(MarvinToolsClass, FuzzyList):
         self._cubes = None
         self._plate = None
         self._pdict = None
+        self._cubes_meta = None
         self.platedir = None
         self.nocubes = nocubes
 
@@ -240,13 +389,15 @@ class Plate(MarvinToolsClass, FuzzyList):
         response = self._toolInteraction(url)
         data = response.getData()
         self._hdr = data['header']
+        # Servers that list the cubes along with the plate save a second request.
+        self._cubes_meta = data.get('cubes', None)
         self.data_origin = 'api'
         self._makePdict()
 
     def _initCubes(self):
-        ''' Initialize a list of Marvin Cube objects '''
+        ''' Initialize a list of PlateCube handles with the cube metadata '''
 
-        _cubes = [None]
+        _cubes = []
         if self.data_origin == 'file':
             sdss_path = Path()
             if self.dir3d == 'stack':
@@ -255,25 +406,90 @@ class Plate(MarvinToolsClass, FuzzyList):
             else:
                 cubes = sdss_path.expand('mangamastar', drpver=self._drpver,
                                          plate=self.plateid, ifu='*')
-            _cubes = [Cube(filename=cube, mode=self.mode, release=self.release) for cube in cubes]
+            _cubes = [self._makeCube(self._getPlateifuFromFilename(cube), filename=cube)
+                      for cube in cubes]
 
         elif self.data_origin == 'db':
-            _cubes = [Cube(plateifu=cube.plateifu, mode=self.mode, release=self.release)
-                      for cube in self._plate.cubes]
+            _cubes = [self._makeCube('{0}-{1}'.format(plate, ifuname), mangaid=mangaid,
+                                     ra=ra, dec=dec)
+                      for plate, mangaid, ra, dec, ifuname in self._getCubesFromDB()]
 
         elif self.data_origin == 'api':
-            routeparams = {'plateid': self.plateid}
-            url = config.urlmap['api']['getPlateCubes']['url'].format(**routeparams)
+            if self._cubes_meta is None:
+                routeparams = {'plateid': self.plateid}
+                url = config.urlmap['api']['getPlateCubes']['url'].format(**routeparams)
 
-            # Make the API call
-            response = self._toolInteraction(url)
-            data = response.getData()
-            plateifus = data['plateifus']
-            _cubes = [Cube(plateifu=pifu, mode=self.mode, release=self.release) for pifu in plateifus]
+                # Make the API call
+                response = self._toolInteraction(url)
+                data = response.getData()
+                self._cubes_meta = data.get('cubes', None) or \
+                    [{'plateifu': pifu} for pifu in data['plateifus']]
+
+            _cubes = [self._makeCube(**meta) for meta in self._cubes_meta]
 
         FuzzyList.__init__(self, _cubes)
         self.mapper = (lambda e: e.plateifu)
 
+    def _makeCube(self, plateifu, **kwargs):
+        ''' Returns a PlateCube with the mode and release of the plate '''
+
+        return PlateCube(plateifu, mode=self.mode, release=self.release, **kwargs)
+
+    def _getCubesFromDB(self):
+        ''' Returns the plate, mangaid, RA, Dec, and IFU name of the DB cubes of this plate '''
+
+        mdb = marvindb
+        dbcube = mdb.datadb.Cube
+
+        try:
+            cubes = mdb.session.query(dbcube.plate, dbcube.mangaid, dbcube.ra, dbcube.dec,
+                                      mdb.datadb.IFUDesign.name).select_from(dbcube).join(
+                mdb.datadb.PipelineInfo, mdb.datadb.PipelineVersion, mdb.datadb.IFUDesign).\
+                filter(dbcube.plate == self.plateid,
+                       mdb.datadb.PipelineVersion.version == self._drpver).\
+                order_by(mdb.datadb.IFUDesign.name).all()
+        except Exception as ee:
+            raise MarvinError('Could not retrieve the cubes for plate {0}: {1}'
+                              .format(self.plateid, ee))
+
+        return cubes
+
+    @staticmethod
+    def _getPlateifuFromFilename(filename):
+        ''' Returns the plate-ifu of a cube file, reading its header only if needed '''
+
+        match = re.match(r'manga-([0-9]+)-([0-9]+)-', os.path.basename(filename))
+        if match:
+            return '{0}-{1}'.format(*match.groups())
+
+        return fits.getheader(filename, 1)['PLATEIFU'].strip()
+
+    def load_cubes(self):
+        '''Instantiates the full cubes of the plate at once.
+
+        In remote mode, if the server provides a batch route, the data of all
+        the cubes not yet loaded are retrieved with a single request instead
+        of one request per cube.
+
+        Returns:
+            cubes (list):
+                The list of `~marvin.tools.cube.Cube` objects of the plate.
+
+        '''
+
+        pending = [handle for handle in self if not handle.loaded]
+
+        if self.data_origin == 'api' and len(pending) > 0:
+            from marvin.api.batch import get_batch_payloads, has_batch_route
+
+            if has_batch_route('cube'):
+                payloads = get_batch_payloads('cube', [handle.plateifu for handle in pending],
+                                              release=self.release)
+                for handle in pending:
+                    handle._data = payloads.get(handle.plateifu, None)
+
+        return [handle.cube for handle in self]
+
     def _setParams(self):
         ''' Set the plate parameters '''
         self.ra = self._pdict.get('ra', None)
@@ -25,17 +25,20 @@ import numpy as np
 import marvin
 import marvin.api.api
 import marvin.core.marvin_pickle
+import marvin.core.snapshot
 import marvin.core.exceptions
 from marvin.utils.datamodel.dap.base import Property
 from marvin.utils.datamodel.dap.plotting import get_default_plot_params
 import marvin.utils.plot.map
 import marvin.utils.general
+import marvin.utils.general.arraycache
 from marvin.utils.general.general import add_doc
 
 from .base_quantity import QuantityMixIn
 
 try:
     import sqlalchemy
+    import marvin.db.arrayloader
 except ImportError:
     sqlalchemy = None
 
@@ -244,27 +247,25 @@ class Map(units.Quantity, QuantityMixIn):
         assert prop.model is not None
         table = getattr(mdb.dapdb, prop.model)
 
+        # Loads value, ivar, and mask in a single pass placing each row at its (y, x).
         fullname_value = prop.db_column()
-        value = mdb.session.query(getattr(table, fullname_value)).filter(
-            table.file_pk == maps.data.pk).order_by(table.spaxel_index).all()
+        fullname_ivar = prop.db_column(ext='ivar') if prop.ivar else None
+        fullname_mask = prop.db_column(ext='mask') if prop.mask else None
 
-        shape = (int(np.sqrt(len(value))), int(np.sqrt(len(value))))
-        value = np.array(value).reshape(shape).T
+        columns = [column for column in [fullname_value, fullname_ivar, fullname_mask]
+                   if column is not None]
+        dtypes = {fullname_mask: np.int32} if fullname_mask else {}
 
-        ivar = None
-        mask = None
+        # A NULL inverse variance means that there is no information for that spaxel.
+        fill_values = {fullname_ivar: 0.} if fullname_ivar else {}
 
-        if prop.ivar:
-            fullname_ivar = prop.db_column(ext='ivar')
-            ivar = mdb.session.query(getattr(table, fullname_ivar)).filter(
-                table.file_pk == maps.data.pk).order_by(table.spaxel_index).all()
-            ivar = np.array(ivar).reshape(shape).T
+        arrays = marvin.db.arrayloader.load_map_arrays(
+            mdb.session, table, columns, maps._shape,
+            table.file_pk == maps.data.pk, dtypes=dtypes, fill_values=fill_values)
 
-        if prop.mask:
-            fullname_mask = prop.db_column(ext='mask')
-            mask = mdb.session.query(getattr(table, fullname_mask)).filter(
-                table.file_pk == maps.data.pk).order_by(table.spaxel_index).all()
-            mask = np.array(mask).reshape(shape).T
+        value = arrays[fullname_value]
+        ivar = arrays[fullname_ivar] if fullname_ivar else None
+        mask = arrays[fullname_mask] if fullname_mask else None
 
         return value, ivar, mask
 
@@ -272,6 +273,16 @@ class Map(units.Quantity, QuantityMixIn):
     def _get_map_from_api(maps, prop):
         """Initialise the `.Map` from the API."""
 
+        array_cache = marvin.utils.general.arraycache.get_array_cache()
+
+        if array_cache:
+            cache_key = (maps._release, maps.plateifu, prop.full(),
+                         maps.bintype.name, maps.template.name)
+            cached = [array_cache.get(cache_key + (ext,)) for ext in ['value', 'ivar', 'mask']]
+            if all(array is not None for array in cached):
+                # Empty arrays record an ivar or mask that the API did not return.
+                return tuple(array if array.size > 0 else None for array in cached)
+
         url = marvin.config.urlmap['api']['getmap']['url']
 
         url_full = url.format(
@@ -294,17 +305,23 @@ class Map(units.Quantity, QuantityMixIn):
             raise marvin.core.exceptions.MarvinError(
                 'something went wrong. Error is: {0}'.format(response.results['error']))
 
-        value = np.array(data['value'])
-        ivar = np.array(data['ivar']) if data['ivar'] is not None else None
-        mask = np.array(data['mask']) if data['mask'] is not None else None
+        # The Map copies the arrays, so the decoded buffers are used directly.
+        value = np.asarray(data['value'])
+        ivar = np.asarray(data['ivar']) if data['ivar'] is not None else None
+        mask = np.asarray(data['mask']) if data['mask'] is not None else None
+
+        if array_cache:
+            for ext, array in zip(['value', 'ivar', 'mask'], [value, ivar, mask]):
+                array_cache.set(cache_key + (ext,), array if array is not None else np.zeros(0))
 
         return value, ivar, mask
 
-    def save(self, path, overwrite=False):
-        """Pickle the map to a file.
+    def save(self, path, overwrite=False, format=None):
+        """Pickle the map to a file, or save it as an HDF5 snapshot.
 
-        This method will fail if the map is associated to a Maps loaded
-        from the db.
+        Pickling will fail if the map is associated to a Maps loaded
+        from the db. Snapshots (see :mod:`marvin.core.snapshot`) store the
+        arrays of the map and can be saved for any map.
 
         Parameters:
             path (str):
@@ -316,26 +333,40 @@ class Map(units.Quantity, QuantityMixIn):
             overwrite (bool):
                 If True, and the ``path`` already exists, overwrites it.
                 Otherwise it will fail.
+            format ({None, 'mpf', 'hdf5'}):
+                The format of the file. If ``None``, paths with extension
+                ``.h5`` or ``.hdf5`` are saved as snapshots and any other path
+                is pickled.
 
         Returns:
             path (str):
                 The realpath to which the file has been saved.
         """
+
+        use_snapshot = marvin.core.snapshot.use_snapshot(path, format=format)
+
         # check for file extension
         if not os.path.splitext(path)[1]:
-            path = os.path.join(path + '.mpf')
+            path = os.path.join(path + ('.h5' if use_snapshot else '.mpf'))
+
+        if use_snapshot:
+            return marvin.core.snapshot.save_snapshot(self, path, overwrite=overwrite)
 
         return marvin.core.marvin_pickle.save(self, path=path, overwrite=overwrite)
 
     @classmethod
     def restore(cls, path, delete=False):
-        """Restore a Map object from a pickled file.
+        """Restore a Map object from a pickled file or a snapshot.
 
-        If ``delete=True``, the pickled file will be removed after it has been
-        unplickled. Note that, for map objects instantiated from a Maps object
+        If ``delete=True``, the file will be removed after it has been
+        restored. Note that, for map objects pickled from a Maps object
         with ``data_origin='file'``, the original file must exists and be
         in the same path as when the object was first created.
         """
+
+        if marvin.core.snapshot.is_snapshot(path):
+            return marvin.core.snapshot.restore_snapshot(path, delete=delete)
+
         return marvin.core.marvin_pickle.restore(path, delete=delete)
 
     @property
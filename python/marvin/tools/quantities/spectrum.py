@@ -56,7 +56,7 @@ class Spectrum(Quantity, QuantityMixIn):
                 wavelength_unit=Angstrom, ivar=None, std=None,
                 mask=None, dtype=None, copy=True, **kwargs):
 
-        flux = np.array(flux)
+        flux = np.asarray(flux)
 
         # If the scale is defined, creates a new composite unit with the input scale.
         if scale is not None:
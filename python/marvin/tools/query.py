@@ -14,27 +14,40 @@ from __future__ import print_function, division, unicode_literals
 from marvin.core.exceptions import MarvinError, MarvinUserWarning, MarvinBreadCrumb
 from marvin.utils.general.structs import string_folding_wrapper
 from sqlalchemy_boolean_search import parse_boolean_search, BooleanSearchException
-from sqlalchemy import func
+from sqlalchemy import func, and_, or_
 from marvin import config, marvindb
 from marvin.tools.results import Results
 from marvin.utils.datamodel.query import datamodel
 from marvin.utils.datamodel.query.base import query_params
 from marvin.utils.general import temp_setattr
+from marvin.utils.general import prefetch as prefetch_iterator
+from marvin.utils.general.querycache import (get_query_cache, make_query_key, compiled_cache,
+                                             normalise_searchfilter)
+from marvin.utils.db.flatviews import get_flat_view, column_key, presence_key, is_dap_model
 from marvin.api.api import Interaction
 from marvin.core import marvin_pickle
 from marvin.tools.results import remote_mode_only
+from marvin.tools.queryjob import LocalQueryJob, RemoteQueryJob
 from sqlalchemy import bindparam
 from sqlalchemy.orm import aliased
 from sqlalchemy.dialects import postgresql
-from sqlalchemy.sql.expression import desc
+from sqlalchemy.sql.expression import asc, desc, nullsfirst, nullslast
+from sqlalchemy.sql import visitors
+from sqlalchemy.schema import Column
 from operator import le, ge, gt, lt, eq, ne
 from collections import defaultdict, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import copy
 import datetime
+import hashlib
+import itertools
+import json
 import numpy as np
 import warnings
 import os
 import re
 import six
+import uuid
 from functools import wraps
 
 try:
@@ -45,6 +58,9 @@ except:
 __all__ = ['Query', 'doQuery']
 opdict = {'<=': le, '>=': ge, '>': gt, '<': lt, '!=': ne, '=': eq, '==': eq}
 
+# The maximum number of prepared statements kept on each pooled connection.
+MAX_PREPARED = 64
+
 breadcrumb = MarvinBreadCrumb()
 
 
@@ -68,9 +84,10 @@ def doQuery(*args, **kwargs):
     """
     start = kwargs.pop('start', None)
     end = kwargs.pop('end', None)
+    parallel = kwargs.pop('parallel', None)
     q = Query(*args, **kwargs)
     try:
-        res = q.run(start=start, end=end)
+        res = q.run(start=start, end=end, parallel=parallel)
     except TypeError as e:
         warnings.warn('Cannot run, query object is None: {0}.'.format(e), MarvinUserWarning)
         res = None
@@ -143,6 +160,41 @@ class Query(object):
             The sort order.  Can be either ascending or descending.
         limit (int):
             The number limit on the number of returned results
+        caching (bool):
+            If True (the default), the results are looked up in and stored to
+            ``config.query_cache``. See :mod:`marvin.utils.general.querycache`.
+        use_summary (bool):
+            If True, ``npergood`` conditions are answered from the precomputed
+            spaxel summary tables when they can give the exact result. Files
+            without summary rows are not returned, so the tables must be up to
+            date with the spaxelprop data. Defaults to False.
+            See :mod:`marvin.utils.db.spaxelsummary`.
+        count_mode ({'exact', 'estimate', 'auto'}):
+            How the total number of results is computed in local mode.
+            ``'exact'`` (the default) runs a ``COUNT`` of the query.
+            ``'estimate'`` uses the number of rows estimated by the query
+            planner, which is fast but approximate. ``'auto'`` uses the
+            estimate if it is above ``count_threshold`` and the exact count
+            otherwise.
+        pagination ({'offset', 'keyset'}):
+            How pages of results are retrieved in local mode. ``'offset'``
+            (the default) uses OFFSET and LIMIT. ``'keyset'`` orders the
+            results by the sort parameter and the primary key of the spaxel
+            or cube table, and retrieves the next or previous page with a
+            condition on the last or first row of the current page, so that
+            every page costs the same as the first one. With ``'keyset'``,
+            rows with a NULL sort parameter are returned last.
+        profile (bool):
+            If True, every local run records its SQL, plan hash, row count,
+            and the time spent counting, fetching, and building the results
+            in the query history. Defaults to ``config.profile_queries``.
+            See :mod:`marvin.utils.db.queryprofile`.
+        use_flat_views (bool):
+            If True, local queries whose parameters are all in the flat
+            materialised views of the release run on the view instead of
+            joining the tables, if the view is up to date with the data.
+            Defaults to ``config.use_flat_views``. See
+            :mod:`marvin.utils.db.flatviews`.
 
     Returns:
         results:
@@ -164,6 +216,7 @@ class Query(object):
         self._drpver, self._dapver = config.lookUpVersions(release=self._release)
 
         self.query = None
+        self._built_query = None
         self.params = []
         self.filterparams = {}
         self.queryparams = None
@@ -181,6 +234,21 @@ class Query(object):
         self._caching = kwargs.get('caching', True)
         self.verbose = kwargs.get('verbose', True)
         self.count_threshold = kwargs.get('count_threshold', 1000)
+        self.use_summary = kwargs.get('use_summary', False)
+        self.from_cache = False
+        self._job = None
+        self.count_mode = kwargs.get('count_mode', 'exact')
+        self.count_estimated = False
+        self.pagination = kwargs.get('pagination', 'offset')
+        self._keyset_columns = None
+        self._sort_columns = []
+        self._keyset = None
+        self._grouped = False
+        self.profile = kwargs.get('profile', config.profile_queries)
+        self.use_flat_views = kwargs.get('use_flat_views', config.use_flat_views)
+        self._flatview = None
+        self._flatjoins = []
+        self.totalcount = None
         self.allspaxels = kwargs.get('allspaxels', None)
         self.mode = kwargs.get('mode', None)
         self.limit = int(kwargs.get('limit', 100))
@@ -190,6 +258,10 @@ class Query(object):
         self.datamodel = datamodel[self._release]
         self.marvinform = self.datamodel._marvinform
 
+        assert self.count_mode in ['exact', 'estimate', 'auto'], \
+            'count_mode must be either exact, estimate, or auto'
+        assert self.pagination in ['offset', 'keyset'], 'pagination must be either offset or keyset'
+
         # drop breadcrumb
         breadcrumb.drop(message='Initializing MarvinQuery {0}'.format(self.__class__),
                         category=self.__class__)
@@ -234,20 +306,35 @@ class Query(object):
             # this adds spaxel x, y into default for query 1 dap zonal query
             self._adjust_defaults()
 
-            # join tables
-            self._join_tables()
+            # use a flat view instead of the joins if it has all the parameters
+            if self.use_flat_views:
+                self._flatview = self._get_flat_view(self._parsed if searchfilter else None)
+
+            if self._flatview is not None:
+                self._modellist = [param.class_ for param in self.queryparams]
+                self._createBaseQuery()
+
+                # add condition
+                if searchfilter:
+                    self.add_condition()
+            else:
+                # join tables
+                self._join_tables()
+
+                # add condition
+                if searchfilter:
+                    self.add_condition()
 
-            # add condition
-            if searchfilter:
-                self.add_condition()
+                # add PipelineInfo
+                self._addPipeline()
 
-            # add PipelineInfo
-            self._addPipeline()
+                # check if query if a dap query
+                if self._isdapquery:
+                    self._buildDapQuery()
+                    self._check_dapall_query()
 
-            # check if query if a dap query
-            if self._isdapquery:
-                self._buildDapQuery()
-                self._check_dapall_query()
+            # the query as built from the inputs, see _get_statement_key
+            self._built_query = self.query
 
     def __repr__(self):
         return ('Marvin Query(filter={4}, mode={0}, limit={1}, sort={2}, order={3})'
@@ -461,7 +548,8 @@ class Query(object):
             os.makedirs(dirname)
 
         # set bad pickled attributes to None
-        attrs = ['session', 'datamodel', 'marvinform', 'myform', '_modelgraph']
+        attrs = ['session', 'datamodel', 'marvinform', 'myform', '_modelgraph', '_job',
+                 '_flatview', '_flatjoins']
 
         # pickle the query
         try:
@@ -561,10 +649,7 @@ class Query(object):
             # if params is a string, then parse and filter
             if isinstance(searchfilter, six.string_types):
                 searchfilter = self._check_shortcuts_in_filter(searchfilter)
-                try:
-                    parsed = parse_boolean_search(searchfilter)
-                except BooleanSearchException as e:
-                    raise MarvinError('Your boolean expression contained a syntax error: {0}'.format(e))
+                parsed = self._parse_filter(searchfilter)
             else:
                 raise MarvinError('Input parameters must be a natural language string!')
 
@@ -594,6 +679,39 @@ class Query(object):
                 # Is it possible to build a query remotely but still allow for user manipulation?
                 pass
 
+    def _parse_filter(self, searchfilter):
+        ''' Parses a search filter, using the parsed filters in the compiled query cache
+
+        The parsed filter is modified by the query, so a copy of the cached
+        one is returned.
+        '''
+
+        key = (self._release, normalise_searchfilter(searchfilter))
+        parsed = compiled_cache.get('parsed', key)
+
+        if parsed is None:
+            try:
+                parsed = parse_boolean_search(searchfilter)
+            except BooleanSearchException as e:
+                raise MarvinError('Your boolean expression contained a syntax error: {0}'.format(e))
+            compiled_cache.set('parsed', key, parsed)
+
+        return copy.deepcopy(parsed)
+
+    def _get_joins(self, models):
+        ''' Returns the models to join for a list of models, using the cached join plans '''
+
+        key = tuple(models)
+        joins = compiled_cache.get('joins', key)
+
+        if joins is None:
+            # Uses Cube as nexus, so that the order of the joins is the correct one.
+            joins = self._modelgraph.getJoins(models, format_out='models',
+                                              nexus=marvindb.datadb.Cube)
+            compiled_cache.set('joins', key, joins)
+
+        return list(joins)
+
     def _setForms(self):
         ''' Set the appropriate WTForms in myforms and set the parameters '''
         self._paramtree = self.marvinform._paramtree
@@ -634,7 +752,7 @@ class Query(object):
         # the order of the joins is the correct one.
         # TODO: at some point, all the queries should be generalised so that
         # we don't assume that we are querying a cube.
-        joinmodellist = self._modelgraph.getJoins(self._modellist, format_out='models', nexus=marvindb.datadb.Cube)
+        joinmodellist = self._get_joins(self._modellist)
 
         # sublist = [model for model in modellist if model.__tablename__ not in self._basetable and not self._tableInQuery(model.__tablename__)]
         # self.joins.extend([model.__tablename__ for model in sublist])
@@ -653,6 +771,8 @@ class Query(object):
         ''' Builds a filter condition to load into sqlalchemy filter. '''
         try:
             self.filter = self._parsed.filter(self._modellist)
+            if self._flatview is not None:
+                self.filter = self._to_flat(self.filter, self._flatview)
         except BooleanSearchException as e:
             raise MarvinError('Your boolean expression could not me mapped to model: {0}'.format(e))
 
@@ -693,7 +813,7 @@ class Query(object):
     @makeBaseQuery
     @checkCondition
     @updateConfig
-    def run(self, start=None, end=None, raw=None, orm=None, core=None):
+    def run(self, start=None, end=None, raw=None, orm=None, core=None, parallel=None):
         ''' Runs a Marvin Query
 
             Runs the query and return an instance of Marvin Results class
@@ -704,6 +824,12 @@ class Query(object):
                     Starting value of a subset.  Default is None
                 end (int):
                     Ending value of a subset.  Default is None
+                parallel (int):
+                    If set, queries on spaxel property tables are split in
+                    this many shards by ``file_pk`` range, which are counted
+                    and run concurrently on separate pooled connections. The
+                    sort and slice are applied to each shard and the partial
+                    results merged. Other queries run as a single statement.
 
             Returns:
                 results (object):
@@ -714,9 +840,32 @@ class Query(object):
         from marvin.utils.general import memory_usage
         if self.mode == 'local':
 
+            # the statement is only determined by the inputs if the query is as built
+            unmodified = self.query is not None and self.query is self._built_query
+
             # Check for adding a sort
             self._sortQuery()
 
+            # Check the results cache
+            query_cache = get_query_cache() if self._caching else None
+            cache_key = None
+            self.from_cache = False
+            if query_cache is not None:
+                cache_key = make_query_key(self.searchfilter, self.params, self._release,
+                                           sort=self.sort, order=self.order, start=start, end=end,
+                                           limit=self.limit, return_all=self.return_all,
+                                           count_threshold=self.count_threshold,
+                                           count_mode=self.count_mode, pagination=self.pagination,
+                                           use_summary=self.use_summary,
+                                           use_flat_views=self.use_flat_views)
+                cached = query_cache.get(cache_key)
+                if cached is not None:
+                    return self._get_cached_results(cached)
+
+            # tag the statements of a job, so that they can be cancelled
+            if self._job is not None:
+                self.query = self.query.prefix_with(self._job.tag)
+
             # Check to add the cache
             if self._caching:
                 from marvin.core.caching_query import FromCache
@@ -729,20 +878,20 @@ class Query(object):
             # get total count, and if more than 150 results, paginate and only return the first 100
             starttime = datetime.datetime.now()
 
+            # split spaxel queries in shards run concurrently
+            shards = self._get_shards(parallel)
+
             # check for query and get count
+            self.count_estimated = False
+            query_meta = None
             if marvindb.isdbconnected:
                 qm = self._check_history(check_only=True)
                 self.totalcount = qm.count if qm else None
 
             # run count if it doesn't exist
             if self.totalcount is None:
-                self.totalcount = self.query.count()
-
-            # get the new count if start and end exist
-            if start and end:
-                count = (end - start)
-            else:
-                count = self.totalcount
+                self._report_progress('count', 0.1)
+                self.totalcount = self._get_count(shards=shards)
 
             # # run the query
             # res = self.query.slice(start, end).all()
@@ -753,39 +902,45 @@ class Query(object):
             if marvindb.isdbconnected:
                 query_meta = self._check_history()
 
-            if count > self.count_threshold and self.return_all is False:
-                # res = res[0:self.limit]
-                start = 0
-                end = self.limit
-                count = (end - start)
+            counttime = datetime.datetime.now()
+
+            # get the slice to return
+            start, end, count, reason = self._get_slice(start, end, self.totalcount)
+            if reason == 'truncated':
                 warnings.warn('Results contain more than {0} entries.  '
                               'Only returning first {1}'.format(self.count_threshold, self.limit), MarvinUserWarning)
-            elif self.return_all is True:
+            elif reason == 'all':
                 warnings.warn('Warning: Attempting to return all results. This may take a long time or crash.', MarvinUserWarning)
-                start = None
-                end = None
-            elif start and end:
+            elif reason == 'subset':
                 warnings.warn('Getting subset of data {0} to {1}'.format(start, end), MarvinUserWarning)
 
             # slice the query
+            unsliced = self.query
             self.query = self.query.slice(start, end)
 
+            # with keyset pagination, also retrieve the keyset values of the rows
+            runquery = self._get_run_query(self.query)
+
             # run the query
             if not any([raw, core, orm]):
                 raw = True
 
-            if raw:
+            self._report_progress('execute', 0.3)
+
+            if shards:
+                # run the shards concurrently and merge them
+                res = self._run_shards(unsliced, shards, start=start, end=end)
+            elif raw:
                 # use the db api cursor
-                sql = str(self.show())
-                conn = marvindb.db.engine.raw_connection()
-                cursor = conn.cursor('query_cursor')
-                cursor.execute(sql)
-                #res = cursor.fetchall()
-                res = self._fetch_data(cursor)
-                conn.close()
+                statement_key = self._get_statement_key(start, end) if unmodified else None
+                sql, prepared_sql, params = self._get_compiled(runquery, key=statement_key)
+                if self._use_prepared():
+                    res = self._execute_prepared(prepared_sql, params)
+                else:
+                    res = self._execute_raw(sql)
             elif core:
                 # use the core connection
-                sql = str(self.show())
+                sql = self._get_sql(runquery)
                 with marvindb.db.engine.connect() as conn:
                     results = conn.execution_options(stream_results=True).execute(sql)
                     #res = results.fetchall()
@@ -793,9 +948,12 @@ class Query(object):
             elif orm:
                 # use the orm query
                 yield_num = int(10**(np.floor(np.log10(self.totalcount))))
-                results = string_folding_wrapper(self.query.yield_per(yield_num), keys=self.params)
+                results = string_folding_wrapper(runquery.yield_per(yield_num), keys=self.params)
                 res = list(results)
 
+            if runquery is not self.query:
+                res, self._keyset = self._split_keyset(res)
+
             # get the runtime
             endtime = datetime.datetime.now()
             self.runtime = (endtime - starttime)
@@ -803,16 +961,28 @@ class Query(object):
             # clear the session
             self.session.close()
 
+            # store in the results cache
+            if cache_key is not None:
+                query_cache.set(cache_key, {'rows': res, 'count': count, 'start': start,
+                                            'end': end, 'totalcount': self.totalcount,
+                                            'count_estimated': self.count_estimated,
+                                            'keyset': self._keyset})
+
             # memory_usage('7 - after session close, before results dump')
 
             final = Results(results=res, query=self.query, count=count, mode=self.mode,
                             returntype=self.returntype, queryobj=self, totalcount=self.totalcount,
-                            chunk=self.limit, runtime=self.runtime, start=start, end=end)
+                            chunk=self.limit, runtime=self.runtime, start=start, end=end,
+                            count_estimated=self.count_estimated, keyset=self._keyset)
 
             # get the final time
             posttime = datetime.datetime.now()
             self.finaltime = (posttime - starttime)
 
+            if self.profile and query_meta is not None:
+                self._record_profile(query_meta, runquery, len(res),
+                                     timings=[starttime, counttime, endtime, posttime])
+
             return final
 
         elif self.mode == 'remote':
@@ -826,43 +996,652 @@ class Query(object):
             # Get the query route
             url = config.urlmap['api']['querycubes']['url']
 
-            params = {'searchfilter': self.searchfilter,
-                      'params': ','.join(self._returnparams) if self._returnparams else None,
-                      'returntype': self.returntype,
-                      'limit': self.limit,
-                      'sort': self.sort, 'order': self.order,
-                      'release': self._release,
-                      'return_all': self.return_all,
-                      'start': start,
-                      'end': end,
-                      'caching': self._caching}
+            params = self._get_remote_params(start=start, end=end, parallel=parallel)
             try:
                 ii = Interaction(route=url, params=params, stream=True)
             except Exception as e:
                 # if a remote query fails for any reason, then try to clean them up
                 # self._cleanUpQueries()
                 raise MarvinError('API Query call failed: {0}'.format(e))
+
+            return self._get_remote_results(ii, start=start, end=end)
+
+    def _get_remote_params(self, start=None, end=None, parallel=None):
+        ''' Returns the parameters sent to the API to run the query remotely '''
+
+        params = {'searchfilter': self.searchfilter,
+                  'params': ','.join(self._returnparams) if self._returnparams else None,
+                  'returntype': self.returntype,
+                  'limit': self.limit,
+                  'sort': self.sort, 'order': self.order,
+                  'release': self._release,
+                  'return_all': self.return_all,
+                  'start': start,
+                  'end': end,
+                  'caching': self._caching,
+                  'count_mode': self.count_mode,
+                  'parallel': parallel}
+
+        return params
+
+    def _get_remote_results(self, ii, start=None, end=None):
+        ''' Creates the Results from the response of a remote query
+
+        Parameters:
+            ii (`~marvin.api.api.Interaction`):
+                The response of the query API call.
+            start, end (int):
+                The requested slice of results.
+
+        Returns:
+            results (object):
+                An instance of the Marvin Results class.
+        '''
+
+        res = ii.getData()
+        self.queryparams_order = ii.results['queryparams_order']
+        self.params = ii.results['params']
+        self.query = ii.results['query']
+        count = ii.results['count']
+        chunk = int(ii.results['chunk'])
+        totalcount = ii.results['totalcount']
+        count_estimated = ii.results.get('count_estimated', False)
+        query_runtime = ii.results['runtime']
+        resp_runtime = ii.response_time
+
+        if self.return_all:
+            msg = 'Returning all {0} results'.format(totalcount)
+        else:
+            msg = 'Only returning the first {0} results.'.format(count)
+
+        if not self.quiet:
+            print('Results contain of a total of {0}. {1}'.format(totalcount, msg))
+        return Results(results=res, query=self.query, mode=self.mode, queryobj=self, count=count,
+                       returntype=self.returntype, totalcount=totalcount, chunk=chunk,
+                       runtime=query_runtime, response_time=resp_runtime, start=start, end=end,
+                       count_estimated=count_estimated)
+
+    @makeBaseQuery
+    @checkCondition
+    @updateConfig
+    def submit(self, start=None, end=None, parallel=None):
+        ''' Runs a Marvin Query asynchronously
+
+            Submits the query to run in the background and returns a job
+            handle. In local mode, the query runs in a pool of
+            ``config.query_workers`` threads. In remote mode, it runs as a
+            job on the server. See :mod:`marvin.tools.queryjob`.
+
+            Parameters:
+                start (int):
+                    Starting value of a subset.  Default is None
+                end (int):
+                    Ending value of a subset.  Default is None
+                parallel (int):
+                    The number of shards of spaxel queries run concurrently,
+                    as in `run`.
+
+            Returns:
+                job (object):
+                    A `~marvin.tools.queryjob.QueryJob` with the ``status``,
+                    ``progress``, ``cancel``, and ``result`` methods.
+
+            Example:
+                >>> q = Query(searchfilter='nsa.z < 0.1')
+                >>> job = q.submit()
+                >>> job.status()
+                'running'
+                >>> results = job.result()
+
+        '''
+
+        if self.mode == 'local':
+            return LocalQueryJob(self, start=start, end=end, parallel=parallel)
+        elif self.mode == 'remote':
+            return RemoteQueryJob(self, start=start, end=end, parallel=parallel)
+
+    def _report_progress(self, stage, progress):
+        ''' Reports the progress of a query run as a job
+
+        Raises a MarvinError, which stops the query, if the job has been cancelled.
+        '''
+
+        if self._job is not None:
+            self._job._update(stage, progress)
+
+    def _get_slice(self, start=None, end=None, totalcount=None):
+        ''' Returns the slice of results returned by ``run``
+
+        Parameters:
+            start, end (int):
+                The requested slice.
+            totalcount (int):
+                The total number of results of the query.
+
+        Returns:
+            A tuple ``(start, end, count, reason)``, where ``reason`` is
+            ``'truncated'`` if there are more than ``count_threshold``
+            results and only the first ``limit`` are returned, ``'all'`` if
+            all the results are returned, ``'subset'`` for a requested subset,
+            and None otherwise.
+        '''
+
+        # get the new count if start and end exist
+        if start and end:
+            count = (end - start)
+        else:
+            count = totalcount
+
+        if count > self.count_threshold and self.return_all is False:
+            return 0, self.limit, self.limit, 'truncated'
+        elif self.return_all is True:
+            return None, None, count, 'all'
+        elif start and end:
+            return start, end, count, 'subset'
+
+        return start, end, count, None
+
+    def _get_run_query(self, query):
+        ''' Returns the query executed by ``run``
+
+        With keyset pagination, the keyset values of the rows are also
+        retrieved.
+        '''
+
+        if self._keyset_columns and not self.return_all:
+            return query.add_columns(*self._get_keyset_labels())
+
+        return query
+
+    def _get_statement_key(self, start, end):
+        ''' Returns the key of the statement run, from the inputs of the query
+
+        The statement of a query built in `__init__` and not modified since
+        is determined by its release, search filter, parameters, sort, and
+        slice, and the options that change how it is built. Statements of
+        jobs, which are tagged with the job id, have no key.
+
+        Parameters:
+            start, end (int):
+                The slice of the query run.
+
+        Returns:
+            A hashable key, or None if the statement cannot be keyed.
+        '''
+
+        if self._job is not None:
+            return None
+
+        return (self._release, normalise_searchfilter(getattr(self, 'searchfilter', None)),
+                tuple(self.params),
+                self.sort, self.order, start, end, bool(self.return_all), self.pagination,
+                bool(self.use_summary), bool(self.use_flat_views), self.allspaxels)
+
+    def _get_compiled(self, query, key=None):
+        ''' Returns the compiled SQL of the query run, using the compiled query cache
+
+        The SQL with the parameters plugged in, and the SQL with placeholders
+        and its parameters, are cached under a key built from the inputs of
+        the query (see `_get_statement_key`), so that a query already run
+        is not compiled again. Without a key, e.g., for a query modified
+        after it was built or for a job, the query is compiled every time.
+
+        Parameters:
+            query (object):
+                The query to run.
+            key (tuple):
+                The key of the statement in the cache.
+
+        Returns:
+            A tuple ``(sql, prepared_sql, params)`` with the SQL with the
+            parameters plugged in, and the SQL with ``$n`` placeholders and
+            its parameters, for a prepared statement.
+        '''
+
+        compiled = compiled_cache.get('sql', key) if key is not None else None
+
+        if compiled is None:
+            prepared_sql, params = self._get_prepared_sql(query)
+            compiled = (self._get_sql(query), prepared_sql, params)
+            if key is not None:
+                compiled_cache.set('sql', key, compiled)
+
+        return compiled
+
+    def _get_prepared_sql(self, query):
+        ''' Returns the SQL of a query with ``$n`` placeholders and its parameters '''
+
+        compiled = query.statement.compile(dialect=postgresql.dialect(paramstyle='format'))
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+
+        counter = itertools.count(1)
+        sql = re.sub(r'%%|%s', lambda match: '%' if match.group(0) == '%%'
+                     else '${0}'.format(next(counter)), compiled.string)
+
+        return sql, params
+
+    def _use_prepared(self):
+        ''' Returns True if the query runs as a server-side prepared statement
+
+        Prepared statements are only used for bounded results, which are
+        fetched at once, since they cannot be read with a server-side cursor,
+        and not for jobs or through an external pooler, which does not keep
+        the statements of a connection.
+        '''
+
+        return (config.prepared_statements and not self.return_all and self._job is None and
+                not getattr(marvindb.db, 'external_pooler', False))
+
+    def _execute_prepared(self, sql, params):
+        ''' Executes SQL as a prepared statement on a pooled connection and returns the rows
+
+        The statement is prepared once per connection. The names of the
+        statements of a connection are kept in its info, see `_prepare`.
+        '''
+
+        name = 'marvin_{0}'.format(hashlib.md5(sql.encode('utf-8')).hexdigest()[:24])
+
+        conn = marvindb.db.engine.raw_connection()
+        try:
+            prepared = conn.info.setdefault('marvin_prepared', OrderedDict())
+            cursor = conn.cursor()
+            self._prepare(cursor, prepared, name, sql)
+            if params:
+                cursor.execute('EXECUTE {0} ({1})'.format(name, ', '.join(['%s'] * len(params))),
+                               params)
             else:
-                res = ii.getData()
-                self.queryparams_order = ii.results['queryparams_order']
-                self.params = ii.results['params']
-                self.query = ii.results['query']
-                count = ii.results['count']
-                chunk = int(ii.results['chunk'])
+                cursor.execute('EXECUTE {0}'.format(name))
+            res = self._fetch_data(cursor)
+            cursor.close()
+            conn.commit()
+        finally:
+            conn.close()
+
+        return res
+
+    @staticmethod
+    def _prepare(cursor, prepared, name, sql, max_prepared=None):
+        ''' Prepares a statement on a connection, unless it already is
+
+        The statements of a connection are kept in least-recently-used order.
+        When there are more than ``max_prepared``, the least recently used
+        one is deallocated.
+
+        Parameters:
+            cursor (object):
+                A cursor of the connection.
+            prepared (OrderedDict):
+                The names of the statements prepared on the connection.
+            name (str):
+                The name of the statement.
+            sql (str):
+                The SQL of the statement, with ``$n`` placeholders.
+            max_prepared (int):
+                The maximum number of statements. Defaults to ``MAX_PREPARED``.
+        '''
+
+        max_prepared = max_prepared or MAX_PREPARED
+
+        if name in prepared:
+            prepared.pop(name)
+            prepared[name] = True
+            return
+
+        cursor.execute('PREPARE {0} AS {1}'.format(name, sql))
+        prepared[name] = True
+
+        while len(prepared) > max_prepared:
+            oldest, __ = prepared.popitem(last=False)
+            cursor.execute('DEALLOCATE {0}'.format(oldest))
+
+    def _execute_raw(self, sql):
+        ''' Executes SQL with a server-side cursor on a pooled connection and returns the rows '''
+
+        # the named (server-side) cursor lives in the transaction of the
+        # connection, which is only ended after the cursor is closed, so it
+        # also works through an external pooler in transaction mode
+        conn = marvindb.db.engine.raw_connection()
+        try:
+            cursor = conn.cursor('query_cursor_{0}'.format(uuid.uuid4().hex))
+            cursor.execute(sql)
+            res = self._fetch_data(cursor)
+            cursor.close()
+            conn.commit()
+        finally:
+            conn.close()
+
+        return res
+
+    def _get_shards(self, parallel=None):
+        ''' Returns the conditions that split a spaxel query in shards
+
+        The range of ``file_pk`` of the spaxel property table is split in
+        ``parallel`` intervals.
+
+        Parameters:
+            parallel (int):
+                The number of shards.
+
+        Returns:
+            A list of conditions, one per shard, or None if the query is
+            not a spaxel query, is grouped by object, or ``parallel`` is
+            less than 2.
+        '''
+
+        if not parallel or parallel < 2 or self._grouped or not self._check_query('spaxelprop'):
+            return None
+
+        if self._flatview is not None:
+            file_pk = self._flatview.c[presence_key(marvindb.dapdb.File)]
+        else:
+            file_pk = self.marvinform._param_form_lookup['spaxelprop.file'].Meta.model.file_pk
+
+        low, high = self.session.query(func.min(file_pk), func.max(file_pk)).one()
+
+        if low is None:
+            return None
+
+        edges = sorted(set(int(edge) for edge in np.linspace(low, high + 1, parallel + 1)))
+
+        return [and_(file_pk >= lower, file_pk < upper)
+                for lower, upper in zip(edges[:-1], edges[1:])]
+
+    def _map_shards(self, function, sqls):
+        ''' Applies a function to the SQL of each shard in a pool of threads '''
+
+        executor = ThreadPoolExecutor(max_workers=len(sqls))
+        try:
+            return list(executor.map(function, sqls))
+        finally:
+            executor.shutdown(wait=True)
+
+    def _run_shards(self, query, shards, start=None, end=None):
+        ''' Runs the shards of a query concurrently and merges their rows
+
+        Each shard is sorted as the query and limited to its first ``end``
+        rows, which contain all the rows of the shard that can end up in the
+        slice. The shards are merged on their sort values, and the slice is
+        taken from the merged rows.
+
+        Parameters:
+            query (object):
+                The sorted query, without slice.
+            shards (list):
+                The conditions returned by `_get_shards`.
+            start, end (int):
+                The slice of results to return.
+
+        Returns:
+            The list of rows in the slice.
+        '''
+
+        labels = [column.label('shard_sort_{0}'.format(ii))
+                  for ii, column in enumerate(self._sort_columns)]
+
+        sqls = []
+        for shard in shards:
+            shardquery = query.limit(None).offset(None).filter(shard)
+            if end is not None:
+                shardquery = shardquery.slice(0, end)
+            shardquery = self._get_run_query(shardquery)
+            if labels:
+                shardquery = shardquery.add_columns(*labels)
+            sqls.append(self._get_sql(shardquery))
+
+        rows = list(itertools.chain(*self._map_shards(self._execute_raw, sqls)))
+
+        if labels:
+            nsort = len(labels)
+            # nulls are sorted last in ascending order and first in descending order, as in Postgres
+            rows = sorted(rows, key=lambda row: [(value is None, value) for value in row[-nsort:]],
+                          reverse='desc' in self.order)
+            rows = [tuple(row[:-nsort]) for row in rows]
+
+        return rows[start or 0:end]
+
+    def _count_sql(self, sql):
+        ''' Returns the number of rows of an SQL statement '''
+
+        with marvindb.db.engine.connect() as conn:
+            return conn.execute('select count(*) from ({0}) as counted'.format(sql)).scalar()
+
+    @makeBaseQuery
+    @checkCondition
+    @updateConfig
+    def explain(self, analyze=False, start=None, end=None, plan_format='text'):
+        ''' Returns the Postgres plan of the query
+
+            Returns the plan of the statement executed by `run` for the same
+            ``start`` and ``end``, including the sort, the slice, and, with
+            keyset pagination, the keyset columns. Only available in local mode.
+
+            Parameters:
+                analyze (bool):
+                    If True, runs the query and returns the actual times and
+                    row counts of each node (``EXPLAIN ANALYZE``).
+                start (int):
+                    Starting value of a subset.  Default is None
+                end (int):
+                    Ending value of a subset.  Default is None
+                plan_format ({'text', 'json'}):
+                    The format of the plan.
+
+            Returns:
+                plan (str or list):
+                    The plan as text or, if ``plan_format='json'``, as the
+                    decoded JSON plan.
+
+            Example:
+                >>> q = Query(searchfilter='nsa.z < 0.1')
+                >>> print(q.explain(analyze=True))
+                Limit  (cost=0.85..30.30 rows=100 width=27) (actual time=0.05..0.60 rows=100 loops=1)
+                ...
+
+        '''
+
+        if self.mode != 'local':
+            raise MarvinError('explain is only available for queries in local mode')
+
+        assert plan_format in ['text', 'json'], 'plan_format must be either text or json'
+
+        # works on a copy, so the query and its sort columns are left untouched
+        explained = copy.copy(self)
+
+        # remove the slice of a previous run
+        explained.query = explained.query.limit(None).offset(None)
+        explained._sortQuery()
+
+        totalcount = explained.totalcount
+        if totalcount is None and marvindb.isdbconnected:
+            qm = explained._check_history(check_only=True)
+            totalcount = qm.count if qm else None
+        if totalcount is None:
+            totalcount = explained._estimate_count()
+
+        start, end, count, reason = explained._get_slice(start, end, totalcount)
+        runquery = explained._get_run_query(explained.query.slice(start, end))
+
+        return self._explain(self._get_sql(runquery), analyze=analyze, plan_format=plan_format)
+
+    def _explain(self, sql, analyze=False, plan_format='text'):
+        ''' Runs EXPLAIN on an SQL statement and returns the plan '''
+
+        options = ['ANALYZE'] if analyze else []
+        options.append('FORMAT {0}'.format(plan_format.upper()))
+
+        with marvindb.db.engine.connect() as conn:
+            rows = conn.execute('EXPLAIN ({0}) {1}'.format(', '.join(options), sql)).fetchall()
+
+        if plan_format == 'json':
+            plan = rows[0][0]
+            return json.loads(plan) if isinstance(plan, six.string_types) else plan
+
+        return '\n'.join(row[0] for row in rows)
+
+    def _record_profile(self, query_meta, runquery, nrows, timings):
+        ''' Records the profile of a run in the query history
+
+        Profiling never makes a query fail; errors are reported as warnings.
+
+        Parameters:
+            query_meta (object):
+                The query history row of the query.
+            runquery (object):
+                The query executed.
+            nrows (int):
+                The number of rows returned.
+            timings (list):
+                The times at the start of the run, after the count, after
+                fetching the rows, and after building the results.
+        '''
+
+        from marvin.utils.db.queryprofile import record_query_profile
+
+        starttime, counttime, endtime, posttime = timings
+
+        try:
+            sql = self._get_sql(runquery)
+            record_query_profile(query_meta, sql, self._explain(sql, plan_format='json'), nrows,
+                                 count_time=(counttime - starttime).total_seconds(),
+                                 fetch_time=(endtime - counttime).total_seconds(),
+                                 build_time=(posttime - endtime).total_seconds(),
+                                 total_time=(posttime - starttime).total_seconds(),
+                                 session=self.session)
+        except Exception as ee:
+            warnings.warn('Could not record the query profile: {0}'.format(ee), MarvinUserWarning)
+
+    @makeBaseQuery
+    @checkCondition
+    @updateConfig
+    def stream(self, chunksize=10000, prefetch=True):
+        ''' Runs the query and yields the full set of results in batches
+
+            Unlike :meth:`run`, the results are never held in memory all at once.
+            In local mode, the rows are read from a server-side cursor. In remote
+            mode, they are retrieved as successive pages from the ``getsubset``
+            API route. By default, the next batch is fetched in a background thread
+            while the current one is being processed.
+
+            Parameters:
+                chunksize (int):
+                    The number of rows in each batch. In remote mode, this is capped
+                    to the count threshold of the server (1000).
+                prefetch (bool):
+                    If True, fetches the next batch in the background.
+
+            Returns:
+                batches (generator):
+                    A generator of lists of rows. Each row is a tuple of values in the
+                    order of ``Query.params``.
+
+            Example:
+                >>> q = Query(searchfilter='nsa.z < 0.1', returnparams=['spaxelprop.emline_gflux_ha_6564'])
+                >>> for rows in q.stream(chunksize=50000):
+                >>>     process(rows)
+
+        '''
+
+        if self.mode == 'local':
+            batches = self._stream_local(chunksize)
+        elif self.mode == 'remote':
+            if not config.urlmap:
+                raise MarvinError('No URL Map found.  Cannot make remote call')
+            batches = self._stream_remote(min(chunksize, self.count_threshold))
+        else:
+            raise MarvinError('cannot stream a query in mode {0}'.format(self.mode))
+
+        if prefetch:
+            batches = prefetch_iterator(batches)
+
+        return batches
+
+    def _stream_local(self, chunksize):
+        ''' Yields batches of rows from a server-side cursor '''
+
+        # sorts a copy, so the query and its sort columns are left untouched
+        streamer = copy.copy(self)
+        streamer._sortQuery()
+
+        # removes any pagination applied by a previous run
+        query = streamer.query.limit(None).offset(None)
+        sql = str(query.statement.compile(dialect=postgresql.dialect(),
+                                          compile_kwargs={'literal_binds': True}))
+
+        conn = marvindb.db.engine.raw_connection()
+        try:
+            # named uniquely, since streams can be open at once on a connection
+            cursor = conn.cursor('marvin_stream_{0}'.format(uuid.uuid4().hex))
+            cursor.itersize = chunksize
+            cursor.execute(sql)
+            while True:
+                rows = cursor.fetchmany(chunksize)
+                if not rows:
+                    break
+                yield rows
+            cursor.close()
+        finally:
+            conn.close()
+
+    def _stream_remote(self, chunksize):
+        ''' Yields batches of rows from successive getsubset API pages '''
+
+        url = config.urlmap['api']['getsubset']['url']
+
+        start = 0
+        totalcount = None
+        while totalcount is None or start < totalcount:
+            params = {'searchfilter': self.searchfilter,
+                      'params': ','.join(self._returnparams) if self._returnparams else None,
+                      'start': start, 'end': start + chunksize, 'limit': chunksize,
+                      'sort': self.sort, 'order': self.order,
+                      'release': self._release, 'caching': self._caching}
+            try:
+                ii = Interaction(route=url, params=params, stream=True)
+            except Exception as e:
+                raise MarvinError('API Query stream call failed: {0}'.format(e))
+
+            rows = ii.getData()
+            if totalcount is None:
                 totalcount = ii.results['totalcount']
-                query_runtime = ii.results['runtime']
-                resp_runtime = ii.response_time
+                self.params = ii.results['params']
+                self.queryparams_order = ii.results['queryparams_order']
 
-            if self.return_all:
-                msg = 'Returning all {0} results'.format(totalcount)
-            else:
-                msg = 'Only returning the first {0} results.'.format(count)
+            if not rows:
+                break
 
-            if not self.quiet:
-                print('Results contain of a total of {0}. {1}'.format(totalcount, msg))
-            return Results(results=res, query=self.query, mode=self.mode, queryobj=self, count=count,
-                           returntype=self.returntype, totalcount=totalcount, chunk=chunk,
-                           runtime=query_runtime, response_time=resp_runtime, start=start, end=end)
+            yield rows
+            start += len(rows)
+
+    def _get_cached_results(self, cached):
+        ''' Returns the Results for a query found in the results cache
+
+        Parameters:
+            cached (dict):
+                The cached rows, counts, and slice of the query.
+
+        Returns:
+            results (object):
+                An instance of the Marvin Results class.
+        '''
+
+        starttime = datetime.datetime.now()
+
+        self.from_cache = True
+        self.totalcount = cached['totalcount']
+        self.count_estimated = cached.get('count_estimated', False)
+        self._keyset = cached.get('keyset', None)
+        self.query = self.query.slice(cached['start'], cached['end'])
+        self.runtime = datetime.datetime.now() - starttime
+
+        final = Results(results=list(cached['rows']), query=self.query, count=cached['count'],
+                        mode=self.mode, returntype=self.returntype, queryobj=self,
+                        totalcount=self.totalcount, chunk=self.limit, runtime=self.runtime,
+                        start=cached['start'], end=cached['end'],
+                        count_estimated=self.count_estimated, keyset=self._keyset)
+
+        self.finaltime = datetime.datetime.now() - starttime
+
+        return final
 
     def _fetch_data(self, obj):
         ''' Fetch query using fetchall or fetchmany '''
@@ -876,6 +1655,7 @@ class Query(object):
                 rows = obj.fetchmany(100000)
                 if rows:
                     res.extend(rows)
+                    self._report_progress('fetch', 0.3 + 0.7 * len(res) / max(self.totalcount, 1))
                 else:
                     break
         return res
@@ -892,7 +1672,9 @@ class Query(object):
 
         with self.session.begin():
             if not qm:
-                qm = sf.class_(searchfilter=stringfilter, n_run=1, release=self._release, count=self.totalcount)
+                # estimated counts are not stored, so the next run computes the count again
+                count = None if self.count_estimated else self.totalcount
+                qm = sf.class_(searchfilter=stringfilter, n_run=1, release=self._release, count=count)
                 self.session.add(qm)
             else:
                 qm.n_run += 1
@@ -978,28 +1760,259 @@ class Query(object):
         return procs
 
     def _sortQuery(self):
-        ''' Sort the query by a given parameter '''
+        ''' Sort the query by a given parameter
 
+        With keyset pagination, the primary key is added to the sort so
+        that the order of the results is unique, and NULL values of the sort
+        parameter are placed last.
+        '''
+
+        sortparam = None
         if not isinstance(self.sort, type(None)):
-            # set the sort variable ModelClass parameter
-            if '.' in self.sort:
-                param = self.datamodel.parameters[str(self.sort)].full
+            sortparam = self._get_sort_column()
+            if self._flatview is not None:
+                key = column_key(sortparam)
+                if key not in self._flatview.c:
+                    raise MarvinError('sort parameter {0} is not in the flat view. '
+                                      'Use use_flat_views=False.'.format(self.sort))
+                sortparam = self._flatview.c[key]
+
+        self._set_keyset_columns(sortparam)
+        sortparams = self._keyset_columns or ([sortparam] if sortparam is not None else [])
+        self._sort_columns = sortparams if self.order else []
+
+        # If order is specified, then do the sort
+        if sortparams and self.order:
+            assert self.order in ['asc', 'desc'], 'Sort order parameter must be either "asc" or "desc"'
+
+            # Check if order by already applied
+            if 'ORDER' in str(self.query.statement):
+                self.query = self.query.order_by(None)
+            # Do the sorting
+            if self._keyset_columns:
+                self.query = self.query.order_by(*self._get_keyset_order())
+            elif 'desc' in self.order:
+                self.query = self.query.order_by(*[desc(param) for param in sortparams])
             else:
-                param = self.datamodel.parameters.get_full_from_remote(self.sort)
-            sortparam = self.marvinform._param_form_lookup.mapToColumn(param)
-
-            # If order is specified, then do the sort
-            if self.order:
-                assert self.order in ['asc', 'desc'], 'Sort order parameter must be either "asc" or "desc"'
-
-                # Check if order by already applied
-                if 'ORDER' in str(self.query.statement):
-                    self.query = self.query.order_by(None)
-                # Do the sorting
-                if 'desc' in self.order:
-                    self.query = self.query.order_by(desc(sortparam))
-                else:
-                    self.query = self.query.order_by(sortparam)
+                self.query = self.query.order_by(*sortparams)
+
+    def _get_sort_column(self):
+        ''' Returns the model column of the sort parameter '''
+
+        # set the sort variable ModelClass parameter
+        if '.' in self.sort:
+            param = self.datamodel.parameters[str(self.sort)].full
+        else:
+            param = self.datamodel.parameters.get_full_from_remote(self.sort)
+
+        return self.marvinform._param_form_lookup.mapToColumn(param)
+
+    def _set_keyset_columns(self, sortparam=None):
+        ''' Sets the columns used for keyset pagination
+
+        The columns are the sort parameter, if any, and the primary key of
+        the spaxel property table, for spaxel queries, or of the cube table.
+        Keyset pagination is not used for queries grouped by object (e.g.,
+        DAPall queries), which are paginated with offsets.
+
+        Parameters:
+            sortparam (column):
+                The column to sort by, or None.
+        '''
+
+        self._keyset_columns = None
+
+        if self.pagination != 'keyset' or self._grouped:
+            return
+
+        if self._check_query('spaxelprop'):
+            pkmodel = self.marvinform._param_form_lookup['spaxelprop.file'].Meta.model
+        else:
+            pkmodel = marvindb.datadb.Cube
+
+        if self._flatview is not None:
+            pkcol = self._flatview.c[presence_key(pkmodel)]
+        else:
+            pkcol = pkmodel.pk
+
+        self._keyset_columns = [sortparam, pkcol] if sortparam is not None else [pkcol]
+
+    def _get_keyset_order(self, reverse=False):
+        ''' Returns the ORDER BY clauses for keyset pagination
+
+        NULL values of the sort parameter are placed last, or first if
+        ``reverse``, so that they can be paginated explicitly (see
+        `_get_keyset_filter`).
+
+        Parameters:
+            reverse (bool):
+                If True, returns the reverse of the order of the query, used
+                to retrieve the page before a row.
+        '''
+
+        descending = ('desc' in (self.order or 'asc')) != reverse
+        nkeys = len(self._keyset_columns)
+
+        clauses = []
+        for ii, column in enumerate(self._keyset_columns):
+            clause = desc(column) if descending else asc(column)
+            # the primary key, the last column, is never NULL
+            if ii < nkeys - 1:
+                clause = nullsfirst(clause) if reverse else nullslast(clause)
+            clauses.append(clause)
+
+        return clauses
+
+    @staticmethod
+    def _get_keyset_filter(columns, values, greater, nulls_ahead):
+        ''' Returns the filter that selects the rows after a keyset
+
+        A row-value comparison is NULL when any of the values is NULL, so
+        the NULLs of the sort parameter are handled explicitly.
+
+        Parameters:
+            columns (list):
+                The keyset columns: the sort parameter, if any, and the
+                primary key.
+            values (tuple):
+                The keyset values of the row to start from.
+            greater (bool):
+                Whether the rows to select have greater (True) or smaller
+                values than ``values``.
+            nulls_ahead (bool):
+                Whether the rows with a NULL sort parameter come after
+                (True) or before the rows with a value, in the direction of
+                the selection.
+        '''
+
+        pkcol, pkvalue = columns[-1], values[-1]
+        pkfilter = pkcol > pkvalue if greater else pkcol < pkvalue
+
+        if len(columns) == 1:
+            return pkfilter
+
+        sortcol, sortvalue = columns[0], values[0]
+
+        if sortvalue is None:
+            nullfilter = and_(sortcol.is_(None), pkfilter)
+            return nullfilter if nulls_ahead else or_(sortcol.isnot(None), nullfilter)
+
+        valuefilter = or_(sortcol > sortvalue if greater else sortcol < sortvalue,
+                          and_(sortcol == sortvalue, pkfilter))
+
+        return or_(valuefilter, sortcol.is_(None)) if nulls_ahead else valuefilter
+
+    def _get_keyset_labels(self):
+        ''' Returns the keyset columns labelled to be added to the query '''
+
+        return [column.label('keyset_{0}'.format(ii)) for ii, column in enumerate(self._keyset_columns)]
+
+    def _split_keyset(self, rows):
+        ''' Removes the keyset columns from the rows
+
+        Parameters:
+            rows (list):
+                The rows returned by a query with the keyset columns added.
+
+        Returns:
+            rows, keyset (tuple):
+                The rows without the keyset columns, and a tuple with the
+                keyset values of the first and last rows, or None if there
+                are no rows.
+        '''
+
+        nkeys = len(self._keyset_columns)
+
+        if not rows:
+            return rows, None
+
+        keyset = (tuple(rows[0][-nkeys:]), tuple(rows[-1][-nkeys:]))
+        rows = [tuple(row[:-nkeys]) for row in rows]
+
+        return rows, keyset
+
+    def _get_keyset_page(self, limit, offset=None, after=None, before=None):
+        ''' Retrieves a page of results using keyset pagination
+
+        Parameters:
+            limit (int):
+                The number of rows to return.
+            offset (int):
+                The offset of the page. Only used if ``after`` and ``before``
+                are not set.
+            after (tuple):
+                The keyset values of the row after which the page starts.
+            before (tuple):
+                The keyset values of the row before which the page ends.
+
+        Returns:
+            rows, keyset (tuple):
+                The rows of the page, and the keyset values of its first and
+                last rows (see `_split_keyset`).
+        '''
+
+        assert self._keyset_columns, 'keyset pagination is not enabled for this query'
+
+        columns = self._keyset_columns
+        descending = 'desc' in (self.order or 'asc')
+        backwards = before is not None
+
+        query = self.query.limit(None).offset(None)
+
+        if after is not None or before is not None:
+            # forwards in ascending order, or backwards in descending order, are ">".
+            # NULLs are last, so they are ahead only when moving forwards.
+            query = query.filter(self._get_keyset_filter(columns, before if backwards else after,
+                                                         greater=descending == backwards,
+                                                         nulls_ahead=not backwards))
+            offset = None
+
+        if backwards:
+            query = query.order_by(None).order_by(*self._get_keyset_order(reverse=True))
+
+        query = query.add_columns(*self._get_keyset_labels()).limit(limit)
+        if offset:
+            query = query.offset(offset)
+
+        rows = query.all()
+        if backwards:
+            rows = rows[::-1]
+
+        return self._split_keyset(rows)
+
+    def _get_count(self, shards=None):
+        ''' Returns the total number of results of the query, following ``count_mode``
+
+        Parameters:
+            shards (list):
+                If set, the exact count is the sum of the counts of the
+                shards returned by `_get_shards`, run concurrently.
+        '''
+
+        if self.count_mode in ['estimate', 'auto']:
+            estimate = self._estimate_count()
+            if self.count_mode == 'estimate' or estimate > self.count_threshold:
+                self.count_estimated = True
+                return estimate
+
+        if shards:
+            sqls = [self._get_sql(self.query.limit(None).offset(None).order_by(None).filter(shard)) for shard in shards]
+            return sum(self._map_shards(self._count_sql, sqls))
+
+        return self.query.count()
+
+    def _estimate_count(self):
+        ''' Returns the number of rows of the query estimated by the query planner '''
+
+        plan = self._explain(self._get_sql(self.query), plan_format='json')
+
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def _get_sql(self, query):
+        ''' Returns the SQL of a query with the parameters plugged in '''
+
+        return str(query.statement.compile(dialect=postgresql.dialect(),
+                                           compile_kwargs={'literal_binds': True}))
 
     @updateConfig
     def show(self, prop=None):
@@ -1052,9 +2065,83 @@ class Query(object):
         ''' Create the base query session object.  Passes in a list of parameters defined in
             returnparams, filterparams, and defaultparams
         '''
+        if self._flatview is not None:
+            labeledqps = [self._flatview.c[column_key(qp)].label(self.params[i])
+                          for i, qp in enumerate(self.queryparams)]
+            # the tables used by the query must be present, as in the joins
+            present = [self._flatview.c[presence_key(model)].isnot(None)
+                       for model in self._flatjoins if not is_dap_model(model)]
+            self.query = self.session.query(*labeledqps).filter(*present)
+            return
+
         labeledqps = [qp.label(self.params[i]) for i, qp in enumerate(self.queryparams)]
         self.query = self.session.query(*labeledqps)
 
+    def _get_flat_view(self, parsed=None):
+        ''' Returns the flat view with all the parameters of the query, or None
+
+        The query can run on the cube view if it does not use DAP tables,
+        and on the spaxel view otherwise. Queries with functions or on the
+        DAPall table, and filters using columns not in the view, always use
+        the joins. See :mod:`marvin.utils.db.flatviews`.
+
+        Parameters:
+            parsed (object):
+                The parsed search filter, if any.
+        '''
+
+        if parsed is not None and parsed.functions:
+            return None
+
+        models = [param.class_ for param in self.queryparams]
+        if any('dapall' in model.__tablename__ for model in models):
+            return None
+
+        level = 'spaxel' if any(is_dap_model(model) for model in models) else 'cube'
+        view = get_flat_view(self._release, level)
+        if view is None:
+            return None
+
+        joins = [model for model in self._get_joins(models) if model is not marvindb.datadb.Cube]
+
+        keys = [column_key(param) for param in self.queryparams]
+        keys.extend(presence_key(model) for model in joins)
+        if self.sort:
+            try:
+                keys.append(column_key(self._get_sort_column()))
+            except (KeyError, MarvinError):
+                return None
+
+        if any(key not in view.c for key in keys):
+            return None
+
+        # the filter must only use columns of the view
+        if parsed is not None:
+            try:
+                flatfilter = self._to_flat(parsed.filter(models), view)
+            except BooleanSearchException:
+                return None
+            columns = [element for element in visitors.iterate(flatfilter, {})
+                       if isinstance(element, Column)]
+            if any(column.table is not view for column in columns):
+                return None
+
+        self._flatjoins = joins
+
+        return view
+
+    def _to_flat(self, clause, view):
+        ''' Replaces the table columns in a clause with the columns of a flat view '''
+
+        def replace(element):
+            if isinstance(element, Column) and element.table is not view:
+                key = column_key(element)
+                if key in view.c:
+                    return view.c[key]
+            return None
+
+        return visitors.replacement_traverse(clause, {}, replace)
+
     def _query_column(self, column_name):
         ''' query and return a specific column from the current query '''
         qp = self.marvinform._param_form_lookup.mapToColumn(column_name)
@@ -1182,6 +2269,7 @@ class Query(object):
         isdapall = self._check_query('dapall')
         if isdapall:
             self.query = self._group_by()
+            self._grouped = True
 
     def _getGoodSpaxels(self):
         ''' Subquery - Counts the number of good spaxels
@@ -1240,6 +2328,70 @@ class Query(object):
 
         return valcount
 
+    def _getSummaryCounts(self, expression):
+        ''' Summary tables - Counts spaxels satisfying an expression
+
+        Looks up the number of good spaxels and the number of spaxels
+        satisfying an expression in the precomputed summary tables (see
+        :mod:`marvin.utils.db.spaxelsummary`), joining them into the main
+        query. This is only possible if the value in the expression is one of
+        the histogram edges of the parameter, in which case the counts are exact.
+
+        Parameters:
+            expression (str):
+                The filter expression to parse
+
+        Returns:
+            A tuple with the good spaxel count and expression count columns,
+            or None if the summary tables cannot answer the expression.
+        '''
+
+        from marvin.utils.db.spaxelsummary import get_histogram_edges
+
+        if not self.use_summary or not hasattr(marvindb.dapdb, 'SpaxelHistogram'):
+            return None
+
+        param, ops, value = self._parseExpression(expression)
+        if ops not in ['>', '>=', '<', '<=']:
+            return None
+
+        attribute = self.marvinform._param_form_lookup.mapToColumn(param)
+        prop = getattr(attribute, 'key', None)
+        if prop is None:
+            return None
+
+        source = self._junkclass.__tablename__
+        edges = get_histogram_edges(source, prop, session=self.session)
+        if not edges or float(value) not in edges:
+            return None
+
+        # postgres arrays are 1-indexed
+        index = edges.index(float(value)) + 1
+
+        summary = aliased(marvindb.dapdb.SpaxelSummary)
+        histogram = aliased(marvindb.dapdb.SpaxelHistogram)
+
+        self.query = self.query.\
+            join(summary, and_(summary.file_pk == self._junkclass.file_pk,
+                               summary.source == source)).\
+            join(histogram, and_(histogram.file_pk == self._junkclass.file_pk,
+                                 histogram.source == source,
+                                 histogram.property == prop))
+
+        if ops == '>':
+            valcount = histogram.nabove[index]
+        elif ops == '>=':
+            valcount = histogram.natleast[index]
+        elif ops == '<':
+            valcount = histogram.nvalid - histogram.natleast[index]
+        else:
+            valcount = histogram.nvalid - histogram.nabove[index]
+
+        # files with no matching spaxels are not returned by the _getCountOf subquery
+        self.query = self.query.filter(valcount > 0)
+
+        return summary.goodcount, valcount
+
     def getPercent(self, fxn, **kwargs):
         ''' Query - Computes count comparisons
 
@@ -1268,14 +2420,19 @@ class Query(object):
         percent = float(value) / 100.
         op = opdict[ops]
 
-        # Retrieve the necessary subqueries
-        bincount = self._getGoodSpaxels()
-        valcount = self._getCountOf(condition)
+        # Use the summary tables if possible, otherwise retrieve the necessary subqueries
+        counts = self._getSummaryCounts(condition)
+        if counts is not None:
+            goodcount, valcount = counts
+            self.query = self.query.filter(op(valcount, percent * goodcount))
+        else:
+            bincount = self._getGoodSpaxels()
+            valcount = self._getCountOf(condition)
 
-        # Join to the main query
-        self.query = self.query.join(bincount, bincount.c.binfile == self._junkclass.file_pk).\
-            join(valcount, valcount.c.valfile == self._junkclass.file_pk).\
-            filter(op(valcount.c.valcount, percent * bincount.c.goodcount))
+            # Join to the main query
+            self.query = self.query.join(bincount, bincount.c.binfile == self._junkclass.file_pk).\
+                join(valcount, valcount.c.valfile == self._junkclass.file_pk).\
+                filter(op(valcount.c.valcount, percent * bincount.c.goodcount))
 
         # Group the results by main defaultdatadb parameters,
         # so as not to include all spaxels
@@ -0,0 +1,428 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# queryjob.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Asynchronous execution of Marvin Queries.
+
+`~marvin.tools.query.Query.submit` runs a query in the background and returns
+a job handle instead of blocking until the results are available::
+
+    >>> q = Query(searchfilter='nsa.z < 0.1 and emline_gflux_ha_6564 > 25')
+    >>> job = q.submit()
+    >>> job.status()
+    'running'
+    >>> job.progress()
+    0.3
+    >>> results = job.result()
+
+In local mode the query runs in a pool of ``config.query_workers`` threads.
+Every statement of the job is tagged with an SQL comment with the job id, so
+`~LocalQueryJob.cancel` can cancel the statement running in the database
+with ``pg_cancel_backend``, for the backends of the job only.
+
+In remote mode the query is submitted to the API, where it runs as a local
+job, and the handle polls the server for its status. Long queries do not hold
+a web worker or an HTTP request for their full runtime. Jobs are kept in the
+memory of the server process, so all the requests for a job must reach the
+same process.
+
+"""
+
+from __future__ import print_function, division, absolute_import
+
+import abc
+import datetime
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import six
+
+import marvin
+from marvin import marvindb
+from marvin.api.api import Interaction
+from marvin.core.exceptions import MarvinError
+
+
+__all__ = ['QueryJob', 'LocalQueryJob', 'RemoteQueryJob', 'get_job', 'JOB_STATES']
+
+
+JOB_STATES = ['pending', 'running', 'done', 'failed', 'cancelled']
+
+# Time, in seconds, that finished jobs are kept in the registry.
+JOB_TTL = 3600
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def _get_executor():
+    """Returns the thread pool used to run local query jobs."""
+
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=marvin.config.query_workers)
+
+    return _executor
+
+
+def _register_job(job):
+    """Adds a job to the registry and removes the expired ones."""
+
+    now = datetime.datetime.now()
+
+    with _jobs_lock:
+        for job_id in list(_jobs):
+            finished = _jobs[job_id].finished
+            if finished is not None and (now - finished).total_seconds() > JOB_TTL:
+                del _jobs[job_id]
+        _jobs[job.id] = job
+
+
+def get_job(job_id):
+    """Returns a local job from the registry.
+
+    Parameters:
+        job_id (str):
+            The id of the job.
+
+    Raises:
+        MarvinError: If the job does not exist or has expired.
+
+    """
+
+    try:
+        return _jobs[job_id]
+    except KeyError:
+        raise MarvinError('query job {0} not found'.format(job_id))
+
+
+def _cancel_backends(tag):
+    """Cancels the statements tagged with ``tag`` that belong to the current user."""
+
+    sql = ("select pg_cancel_backend(pid) from pg_stat_activity "
+           "where pid <> pg_backend_pid() and usename = current_user "
+           "and position('{0}' in query) > 0".format(tag))
+
+    with marvindb.db.engine.connect() as conn:
+        return any(row[0] for row in conn.execute(sql))
+
+
+class QueryJob(six.with_metaclass(abc.ABCMeta, object)):
+    """Base class for the handles of asynchronous queries.
+
+    Attributes:
+        id (str):
+            The id of the job.
+        query (`~marvin.tools.query.Query`):
+            The query being run.
+
+    """
+
+    def __repr__(self):
+
+        return '<{0} (id={1!r}, status={2!r})>'.format(self.__class__.__name__, self.id,
+                                                      self.status())
+
+    @abc.abstractmethod
+    def status(self):
+        """Returns the status of the job, one of `JOB_STATES`."""
+
+        pass
+
+    @abc.abstractmethod
+    def progress(self):
+        """Returns the approximate fraction of the job completed, between 0 and 1."""
+
+        pass
+
+    @abc.abstractmethod
+    def cancel(self):
+        """Cancels the job. Returns False if the job had already finished."""
+
+        pass
+
+    @abc.abstractmethod
+    def result(self, timeout=None):
+        """Waits for the job to finish and returns its `~marvin.tools.results.Results`.
+
+        Parameters:
+            timeout (float):
+                The maximum time to wait, in seconds. If None, waits until
+                the job finishes.
+
+        Raises:
+            MarvinError: If the job failed, was cancelled, or did not finish in
+                ``timeout`` seconds.
+
+        """
+
+        pass
+
+    def done(self):
+        """Returns True if the job has finished, successfully or not."""
+
+        return self.status() in ['done', 'failed', 'cancelled']
+
+
+class LocalQueryJob(QueryJob):
+    """Runs a query in the local query thread pool.
+
+    Parameters:
+        query (`~marvin.tools.query.Query`):
+            The local query to run.
+        start, end (int):
+            The slice of results to return, as in `~marvin.tools.query.Query.run`.
+        parallel (int):
+            The number of shards of spaxel queries, as in `~marvin.tools.query.Query.run`.
+
+    """
+
+    def __init__(self, query, start=None, end=None, parallel=None):
+
+        assert query.mode == 'local', 'LocalQueryJob requires a query in local mode.'
+
+        self.id = uuid.uuid4().hex
+        self.query = query
+        self.submitted = datetime.datetime.now()
+        self.started = None
+        self.finished = None
+        self.stage = None
+        self.error = None
+
+        self._status = 'pending'
+        self._progress = 0.
+        self._cancelled = threading.Event()
+        # Makes the cancellation and the end of the job mutually exclusive
+        self._state_lock = threading.Lock()
+
+        query._job = self
+        _register_job(self)
+
+        self._future = _get_executor().submit(self._run, start, end, parallel)
+
+    @property
+    def tag(self):
+        """The SQL comment added to the statements of the job."""
+
+        return '/* marvin-job:{0} */'.format(self.id)
+
+    def _run(self, start, end, parallel):
+        """Runs the query in a worker thread."""
+
+        with self._state_lock:
+            if self._cancelled.is_set():
+                self._finish('cancelled')
+                raise MarvinError('query job {0} was cancelled'.format(self.id))
+
+            self._status = 'running'
+            self.started = datetime.datetime.now()
+
+        # Sessions are not thread-safe, so the query uses a session of this thread
+        session = marvindb.db.Session()
+        self.query.session = session
+        if self.query.query is not None:
+            self.query.query = self.query.query.with_session(session)
+
+        try:
+            results = self.query.run(start=start, end=end, parallel=parallel)
+        except Exception as ee:
+            with self._state_lock:
+                if self._cancelled.is_set():
+                    self._finish('cancelled')
+                    raise MarvinError('query job {0} was cancelled'.format(self.id))
+                self.error = '{0}: {1}'.format(ee.__class__.__name__, ee)
+                self._finish('failed')
+            raise
+        finally:
+            self.query._job = None
+            marvindb.db.Session.remove()
+
+        # A job cancelled after its last statement does not return its results,
+        # so that a successful cancel always ends in the cancelled status.
+        with self._state_lock:
+            if self._cancelled.is_set():
+                self._finish('cancelled')
+                raise MarvinError('query job {0} was cancelled'.format(self.id))
+            self._progress = 1.
+            self._finish('done')
+
+        return results
+
+    def _finish(self, status):
+
+        self._status = status
+        self.finished = datetime.datetime.now()
+
+    def _update(self, stage, progress):
+        """Called by the query to report its progress.
+
+        Raises:
+            MarvinError: If the job has been cancelled, to stop the query.
+
+        """
+
+        if self._cancelled.is_set():
+            raise MarvinError('query job {0} was cancelled'.format(self.id))
+
+        self.stage = stage
+        self._progress = min(max(progress, self._progress), 1.)
+
+    def status(self):
+
+        return self._status
+
+    def progress(self):
+
+        return self._progress
+
+    def cancel(self):
+
+        with self._state_lock:
+            if self.done():
+                return False
+            self._cancelled.set()
+
+        if self._future.cancel():
+            self._finish('cancelled')
+            return True
+
+        # The query is running. Cancels its statement, if any is running.
+        _cancel_backends(self.tag)
+
+        return True
+
+    def result(self, timeout=None):
+
+        try:
+            return self._future.result(timeout=timeout)
+        except CancelledError:
+            raise MarvinError('query job {0} was cancelled'.format(self.id))
+        except FuturesTimeoutError:
+            raise MarvinError('query job {0} did not finish in {1} s'.format(self.id, timeout))
+
+    def to_dict(self):
+        """Returns the status of the job as a dictionary, for the API."""
+
+        def _isoformat(date):
+            return date.isoformat() if date is not None else None
+
+        return {'job_id': self.id, 'status': self.status(), 'progress': self.progress(),
+                'stage': self.stage, 'error': self.error,
+                'submitted': _isoformat(self.submitted), 'started': _isoformat(self.started),
+                'finished': _isoformat(self.finished)}
+
+
+class RemoteQueryJob(QueryJob):
+    """Submits a query to the API and polls the server for its status.
+
+    Parameters:
+        query (`~marvin.tools.query.Query`):
+            The remote query to run.
+        start, end (int):
+            The slice of results to return, as in `~marvin.tools.query.Query.run`.
+        parallel (int):
+            The number of shards of spaxel queries, as in `~marvin.tools.query.Query.run`.
+        poll_interval (float):
+            The time, in seconds, between status requests in `result`.
+
+    """
+
+    def __init__(self, query, start=None, end=None, parallel=None, poll_interval=1.):
+
+        assert query.mode == 'remote', 'RemoteQueryJob requires a query in remote mode.'
+
+        if not marvin.config.urlmap:
+            raise MarvinError('No URL Map found.  Cannot make remote call')
+
+        self.query = query
+        self.start = start
+        self.end = end
+        self.poll_interval = poll_interval
+
+        url = marvin.config.urlmap['api']['submitquery']['url']
+
+        try:
+            ii = Interaction(route=url, params=query._get_remote_params(start=start, end=end,
+                                                                       parallel=parallel))
+        except Exception as ee:
+            raise MarvinError('API Query submit call failed: {0}'.format(ee))
+
+        self._state = ii.getData()
+        self.id = self._state['job_id']
+
+    def _get_state(self):
+        """Retrieves the status of the job from the server."""
+
+        if self._state['status'] in ['done', 'failed', 'cancelled']:
+            return self._state
+
+        url = marvin.config.urlmap['api']['getqueryjob']['url'].format(jobid=self.id)
+
+        try:
+            ii = Interaction(route=url, request_type='get')
+        except Exception as ee:
+            raise MarvinError('API Query job call failed: {0}'.format(ee))
+
+        self._state = ii.getData()
+
+        return self._state
+
+    def status(self):
+
+        return self._get_state()['status']
+
+    def progress(self):
+
+        return self._get_state()['progress']
+
+    def cancel(self):
+
+        if self.done():
+            return False
+
+        url = marvin.config.urlmap['api']['cancelqueryjob']['url'].format(jobid=self.id)
+
+        try:
+            ii = Interaction(route=url, params={'release': self.query._release})
+        except Exception as ee:
+            raise MarvinError('API Query cancel call failed: {0}'.format(ee))
+
+        self._state = ii.getData()
+
+        return self._state['status'] not in ['done', 'failed']
+
+    def result(self, timeout=None):
+
+        starttime = time.time()
+
+        while not self.done():
+            if timeout is not None and time.time() - starttime > timeout:
+                raise MarvinError('query job {0} did not finish in {1} s'.format(self.id, timeout))
+            time.sleep(self.poll_interval)
+
+        if self._state['status'] != 'done':
+            raise MarvinError('query job {0} {1}: {2}'.format(self.id, self._state['status'],
+                                                             self._state['error']))
+
+        url = marvin.config.urlmap['api']['getqueryjobresults']['url'].format(jobid=self.id)
+
+        try:
+            ii = Interaction(route=url, params={'release': self.query._release}, stream=True)
+        except Exception as ee:
+            raise MarvinError('API Query results call failed: {0}'.format(ee))
+
+        return self.query._get_remote_results(ii, start=self.start, end=self.end)
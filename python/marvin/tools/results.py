@@ -17,7 +17,8 @@ from marvin import config, log
 from marvin.utils.general import getImagesByList, downloadList, map_bins_to_column
 from marvin.utils.general import temp_setattr, turn_off_ion
 from marvin.api.api import Interaction
-from marvin.core import marvin_pickle
+from marvin.api.batch import get_batch_payloads, has_batch_route
+from marvin.core import marvin_pickle, snapshot
 import marvin.utils.plot.scatter
 from operator import add
 import warnings
@@ -30,7 +31,9 @@ import copy
 from fuzzywuzzy import process
 from functools import wraps
 from astropy.table import Table, vstack, hstack
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import itertools
 
 try:
     import cPickle as pickle
@@ -82,6 +85,88 @@ class ColumnGroup(ParameterGroup):
                 '{2}'.format(self, len(self), old))
 
 
+class ToolProxy(object):
+    ''' A lazy proxy for a Marvin Tool
+
+    Stores the class and keyword arguments of a Marvin Tool and only
+    instantiates it when one of its attributes is first accessed. Used by
+    :meth:`Results.convertToTool` with ``lazy=True``.
+
+    Parameters:
+        toolclass (class):
+            The Marvin Tool class, e.g., `~marvin.tools.cube.Cube`.
+        kwargs:
+            The keyword arguments used to instantiate the tool.
+
+    '''
+
+    def __init__(self, toolclass, **kwargs):
+        self._toolclass = toolclass
+        self._kwargs = kwargs
+        self._tool = None
+
+    def __repr__(self):
+        if self._tool is None:
+            return '<ToolProxy for {0} ({1}), not loaded>'.format(
+                self._toolclass.__name__,
+                ', '.join('{0}={1!r}'.format(key, val) for key, val in sorted(self._kwargs.items())))
+        return repr(self._tool)
+
+    def _load(self):
+        ''' Instantiates the tool, if it has not been done yet, and returns it '''
+        if self._tool is None:
+            self._tool = self._toolclass(**self._kwargs)
+        return self._tool
+
+    def __getattr__(self, name):
+        # only called if the attribute is not found in the proxy itself
+        if name.startswith('__') or name in ['_toolclass', '_kwargs', '_tool']:
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+
+def _init_tool(toolclass, kwargs):
+    ''' Instantiates a tool. Module-level so that it can be used with a process pool '''
+    return toolclass(**kwargs)
+
+
+def _create_tools(toolclass, kwargs_list, n_workers=1, pool='thread', lazy=False):
+    ''' Creates a list of Marvin Tools, optionally concurrently or as lazy proxies
+
+    Parameters:
+        toolclass (class):
+            The Marvin Tool class.
+        kwargs_list (list):
+            A list of dictionaries with the keyword arguments for each tool.
+        n_workers (int):
+            The number of workers in the pool. If 1, tools are created serially.
+        pool ({'thread', 'process'}):
+            The type of pool. Process pools require the tools to be picklable.
+        lazy (bool):
+            If True, returns `ToolProxy` objects that instantiate the tools on first access.
+
+    Returns:
+        tools (list):
+            The list of tools, in the same order as ``kwargs_list``.
+
+    '''
+
+    assert pool in ['thread', 'process'], 'pool must be either thread or process'
+
+    if lazy:
+        return [ToolProxy(toolclass, **kwargs) for kwargs in kwargs_list]
+
+    if n_workers <= 1 or len(kwargs_list) <= 1:
+        return [toolclass(**kwargs) for kwargs in kwargs_list]
+
+    Executor = ThreadPoolExecutor if pool == 'thread' else ProcessPoolExecutor
+    with Executor(max_workers=min(n_workers, len(kwargs_list))) as executor:
+        return list(executor.map(_init_tool, itertools.repeat(toolclass), kwargs_list))
+
+
 def marvintuple(name, params=None, **kwargs):
     ''' Custom namedtuple class factory for Marvin Results rows
 
@@ -354,10 +439,17 @@ class Results(object):
             For paginated results, the starting index value of the results.  Defaults to 0.
         end (int):
             For paginated results, the ending index value of the resutls.  Defaults to start+chunk.
+        count_estimated (bool):
+            If True, ``totalcount`` is an estimate. See the ``count_mode`` of
+            :class:`~marvin.tools.query.Query`.
+        keyset (tuple):
+            For keyset pagination, the keyset values of the first and last rows
+            of the current page.
 
     Attributes:
         count (int):  The count of objects in your current page of results
         totalcount (int): The total number of results in the query
+        count_estimated (bool): Whether totalcount is an estimate
         query_time (datetime): A datetime TimeDelta representation of the query runtime
 
     Returns:
@@ -377,6 +469,8 @@ class Results(object):
 
     def __init__(self, *args, **kwargs):
 
+        self._rowclass = None
+        self._index = None
         self.results = kwargs.get('results', None)
         self._queryobj = kwargs.get('queryobj', None)
         self._updateQueryObj(**kwargs)
@@ -389,6 +483,8 @@ class Results(object):
         self.chunk = kwargs.get('chunk', None)
         self.start = kwargs.get('start', None)
         self.end = kwargs.get('end', None)
+        self.count_estimated = kwargs.get('count_estimated', False)
+        self._keyset = kwargs.get('keyset', None)
         self.datamodel = datamodel[self._release]
         self.objects = None
         self.sortcol = None
@@ -407,6 +503,44 @@ class Results(object):
         if self.returntype:
             self.convertToTool(self.returntype)
 
+    @property
+    def results(self):
+        ''' The current page of results, as a `ResultSet` of ResultRow tuples
+
+        The results are stored by column (numpy arrays). The ResultRow tuples are
+        only created the first time this attribute is accessed, and modifying
+        them does not change the stored columns. Use :meth:`sort` to sort the
+        results.
+        '''
+
+        if self._resultset is None and self._data is not None:
+            self._resultset = self._build_result_set()
+
+        if self._resultset is not None:
+            return self._resultset
+
+        return self._rawrows
+
+    @results.setter
+    def results(self, value):
+        ''' Sets the current page of results from a ResultSet or a list of raw rows '''
+
+        self._data = None
+        self._resultset = None
+        self._rawrows = None
+
+        if isinstance(value, ResultSet):
+            if len(value) > 0:
+                self._rowclass = type(value[0])
+                fields = self._rowclass._fields
+            else:
+                fields = value.columns.list_params('remote') if value.columns else []
+            self._data = self._rows_to_columns(value, fields)
+            self._index = value.index
+            self._resultset = value
+        else:
+            self._rawrows = value
+
     def __add__(self, other):
         assert isinstance(other, Results) is True, 'Can only add Marvin Results together'
         assert self._release == other._release, 'Cannot add Marvin Results from different releases'
@@ -532,10 +666,17 @@ class Results(object):
         self.order = order
 
         if self.mode == 'local':
-            reverse = True if order == 'desc' else False
             self.getAll()
-            self.results.sort(remotename, reverse=reverse)
-            self.results = self.results[0:self.limit]
+            data = self._get_column_data()
+            column = data[remotename]
+            if order == 'desc':
+                # a stable descending sort, as with list.sort(reverse=True)
+                indices = (len(column) - 1 - np.argsort(column[::-1], kind='mergesort'))[::-1]
+            else:
+                indices = np.argsort(column, kind='mergesort')
+            indices = indices[0:self.limit]
+            self._set_column_data(OrderedDict((key, value[indices]) for key, value in data.items()),
+                                  index=0)
         elif self.mode == 'remote':
             # Fail if no route map initialized
             if not config.urlmap:
@@ -576,7 +717,7 @@ class Results(object):
             >>>   4-4602     1901      -9999.0
         '''
         try:
-            tabres = Table(rows=self.results, names=self.columns.full)
+            tabres = Table(list(self._get_column_data().values()), names=self.columns.full)
         except ValueError as e:
             raise MarvinError('Could not make astropy Table from results: {0}'.format(e))
         return tabres
@@ -696,7 +837,7 @@ class Results(object):
             4  1-22948   7992   9102  1.023530e+11  0.119399
         '''
         try:
-            dfres = pd.DataFrame(self.results.to_list())
+            dfres = pd.DataFrame(self._get_column_data())
         except (ValueError, NameError) as e:
             raise MarvinError('Could not make pandas dataframe from results: {0}'.format(e))
         return dfres
@@ -704,6 +845,9 @@ class Results(object):
     def _create_result_set(self, index=None, rows=None):
         ''' Creates a Marvin ResultSet
 
+        The rows are stored by column. The `ResultSet` of ResultRow tuples is
+        only created when the ``results`` attribute is accessed.
+
         Parameters:
             index (int):
                 The starting index of the result subset
@@ -718,20 +862,71 @@ class Results(object):
         # grab the columns from the results
         self.columns = self.getColumns()
         ntnames = self.columns.list_params('remote')
-        # dynamically create a new ResultRow Class
         rows = rows if rows else self.results
-        row_is_dict = isinstance(rows[0], dict)
-        if not isinstance(rows, ResultSet):
-            nt = marvintuple('ResultRow', ntnames, results=self)
-            if row_is_dict:
-                results = [nt(**r) for r in rows]
-            else:
-                results = [nt(*r) for r in rows]
+        if isinstance(rows, ResultSet):
+            self.count = len(rows)
+            self.results = ResultSet(rows, count=self.count, total=self.totalcount, index=index,
+                                     results=self)
+        else:
+            # dynamically create a new ResultRow Class
+            self._rowclass = marvintuple('ResultRow', ntnames, results=self)
+            data = self._rows_to_columns(rows, self._rowclass._fields)
+            self._set_column_data(data, index=index)
+
+    @staticmethod
+    def _rows_to_columns(rows, fields):
+        ''' Converts a list of rows (tuples or dicts) into an OrderedDict of column arrays '''
+
+        if len(rows) == 0:
+            return OrderedDict((field, np.array([])) for field in fields)
+
+        if isinstance(rows[0], dict):
+            columns = [[row[field] for row in rows] for field in fields]
         else:
-            results = rows
-        self.count = len(results)
-        # Build the ResultSet
-        self.results = ResultSet(results, count=self.count, total=self.totalcount, index=index, results=self)
+            columns = list(zip(*rows))
+
+        data = OrderedDict()
+        for field, column in zip(fields, columns):
+            array = np.array(column)
+            if array.ndim > 1:
+                # array-valued columns are kept as one object per row
+                array = np.empty(len(column), dtype=object)
+                for ii, value in enumerate(column):
+                    array[ii] = value
+            data[field] = array
+
+        return data
+
+    def _build_result_set(self):
+        ''' Creates the ResultSet of ResultRow tuples from the column data '''
+
+        values = zip(*[column.tolist() for column in self._data.values()])
+        rows = [self._rowclass._make(value) for value in values]
+
+        return ResultSet(rows, count=self.count, total=self.totalcount, index=self._index,
+                         results=self)
+
+    def _get_column_data(self):
+        ''' Returns the current page of results as an OrderedDict of column arrays '''
+
+        return self._data
+
+    def _set_column_data(self, data, index=None):
+        ''' Sets the current page of results from an OrderedDict of column arrays
+
+        Any ResultRow tuples created from the previous page are discarded.
+
+        Parameters:
+            data (OrderedDict):
+                The column arrays, keyed by the fields of the ResultRow class.
+            index (int):
+                The starting index of the page within the total set.
+        '''
+
+        self.results = None
+        self._data = data
+        self._index = index
+        self.count = len(next(iter(data.values()))) if data else 0
 
     def _set_page(self):
         ''' Set the page of the data '''
@@ -746,14 +941,20 @@ class Results(object):
         self.index = self.start
         self.current_page = (int(self.index) + self.count) / self.count
 
-    def save(self, path=None, overwrite=False):
-        ''' Save the results as a pickle object
+    def save(self, path=None, overwrite=False, format=None):
+        ''' Save the results as a pickle object or an HDF5 snapshot
+
+        Snapshots (see :mod:`marvin.core.snapshot`) store the current page of
+        results column by column, and can be restored without pickle.
 
         Parameters:
             path (str):
                 Filepath and name of the pickled object
             overwrite (bool):
                 Set this to overwrite an existing pickled file
+            format ({None, 'mpf', 'hdf5'}):
+                The format of the file. If None, paths with extension ``.h5`` or
+                ``.hdf5`` are saved as snapshots and any other path is pickled.
 
         Returns:
             path (str):
@@ -761,15 +962,21 @@ class Results(object):
 
         '''
 
+        use_snapshot = snapshot.use_snapshot(path, format=format)
+        extension = '.h5' if use_snapshot else '.mpf'
+
         # set the filename and path
         sf = self.searchfilter.replace(' ', '') if self.searchfilter else 'anon'
         # set the path
         if not path:
-            path = os.path.expanduser('~/marvin_results_{0}.mpf'.format(sf))
+            path = os.path.expanduser('~/marvin_results_{0}{1}'.format(sf, extension))
 
         # check for file extension
         if not os.path.splitext(path)[1]:
-            path = os.path.join(path + '.mpf')
+            path = os.path.join(path + extension)
+
+        if use_snapshot:
+            return snapshot.save_snapshot(self, path, overwrite=overwrite)
 
         path = os.path.realpath(path)
 
@@ -788,8 +995,8 @@ class Results(object):
         dict_results = self.results.to_dict()
 
         # set bad pickled attributes to None
-        attrs = ['results', 'datamodel', 'columns', '_queryobj']
-        vals = [dict_results, None, None, None]
+        attrs = ['results', 'datamodel', 'columns', '_queryobj', '_rowclass']
+        vals = [dict_results, None, None, None, None]
         isnotstr = not isinstance(self.query, six.string_types)
         if isnotstr:
             attrs += ['query']
@@ -808,7 +1015,7 @@ class Results(object):
 
     @classmethod
     def restore(cls, path, delete=False):
-        ''' Restore a pickled Results object
+        ''' Restore a pickled Results object or an HDF5 snapshot
 
         Parameters:
             path (str):
@@ -821,7 +1028,13 @@ class Results(object):
             Results (instance):
                 The instantiated Marvin Results class
         '''
+        if snapshot.is_snapshot(path):
+            return snapshot.restore_snapshot(path, delete=delete)
+
         obj = marvin_pickle.restore(path, delete=delete)
+        if 'results' in obj.__dict__:
+            # results pickled before they were stored by column
+            obj.results = obj.__dict__.pop('results')
         obj._create_result_set()
         obj.getColumns()
         obj.datamodel = datamodel[obj._release]
@@ -963,6 +1176,7 @@ class Results(object):
 
         # check column name and get full name
         fullname = self._check_column(name, 'full')
+        remotename = self._check_column(name, 'remote')
 
         # deal with the output
         if return_all:
@@ -973,7 +1187,7 @@ class Results(object):
             output = self._interaction(url, params, calltype='getList')
         else:
             # only deal with current page
-            output = self.results[name] if self.results.count > 1 else [self.results[name]]
+            output = self._get_column_data()[remotename].tolist()
 
         if to_json:
             output = json.dumps(output) if output else None
@@ -1033,9 +1247,6 @@ class Results(object):
         remotename = self._check_column(name, 'remote') if name else None
         fullname = self._check_column(name, 'full') if name else None
 
-        # create the dictionary
-        output = self.results.to_dict(name=remotename, format_type=format_type)
-
         # deal with the output
         if return_all:
             # grab all or of a specific column
@@ -1045,13 +1256,69 @@ class Results(object):
             output = self._interaction(url, params, calltype='getDict')
         else:
             # only deal with current page
-            output = self.results.to_dict(name=remotename, format_type=format_type)
+            data = self._get_column_data()
+            keys = [remotename] if remotename else self.columns.list_params('remote')
+            if format_type == 'listdict':
+                values = zip(*[data[key].tolist() for key in keys])
+                output = [dict(zip(keys, value)) for value in values]
+            elif format_type == 'dictlist':
+                output = dict((key, data[key].tolist()) for key in keys)
+            else:
+                raise MarvinError('Cannot output dictionaries.  Check your input format_type.')
 
         if to_json:
             output = json.dumps(output) if output else None
 
         return output
 
+    def iter_rows(self, chunksize=10000, prefetch=True):
+        ''' Iterates over the full set of results in batches
+
+        Yields all the results of the query, in batches of ``chunksize`` rows,
+        without holding the full set in memory and without modifying the
+        current page of results. In local mode the rows are streamed from a
+        server-side cursor; in remote mode they are retrieved page by page
+        from the API. By default, the next batch is fetched in the background
+        while the current one is being processed. See :meth:`Query.stream
+        <marvin.tools.query.Query.stream>`.
+
+        Parameters:
+            chunksize (int):
+                The number of rows in each batch.
+            prefetch (bool):
+                If True, fetches the next batch in the background.
+
+        Returns:
+            batches (generator):
+                A generator of :class:`ResultSet` objects.
+
+        Example:
+            >>> r = q.run()
+            >>> for rows in r.iter_rows(chunksize=50000):
+            >>>     plateifus = rows['plateifu']
+
+        '''
+
+        if not self._queryobj:
+            raise MarvinError('iter_rows requires the Query that generated these results')
+
+        # builds the columns without replacing those of the current results
+        try:
+            columns = ColumnGroup('Columns', self._params, parent=self.datamodel)
+        except Exception as e:
+            raise MarvinError('Could not create query columns: {0}'.format(e))
+        nt = marvintuple('ResultRow', columns.list_params('remote'), results=self)
+
+        index = 0
+        for rows in self._queryobj.stream(chunksize=chunksize, prefetch=prefetch):
+            if isinstance(rows[0], dict):
+                rowset = [nt(**row) for row in rows]
+            else:
+                rowset = [nt(*row) for row in rows]
+            yield ResultSet(rowset, count=len(rowset), total=self.totalcount, index=index,
+                            columns=columns, results=self)
+            index += len(rowset)
+
     def loop(self, chunk=None):
         ''' Loop over the full set of results
 
@@ -1101,14 +1368,45 @@ class Results(object):
 
         '''
 
-        oldset = copy.copy(self.results)
+        olddata, oldindex = self._get_column_data(), self._index or 0
         if start is not None:
-            nextset = self.getSubset(start, limit=chunk)
+            self.getSubset(start, limit=chunk)
+        else:
+            self.getNext(chunk=chunk)
+        newdata, newindex = self._get_column_data(), self._index or 0
+        if olddata is None or newdata is None:
+            return
+
+        # the pages are joined in index order, without the rows they share
+        if newindex < oldindex:
+            olddata, oldindex, newdata, newindex = newdata, newindex, olddata, oldindex
+        oldcount = len(next(iter(olddata.values()))) if olddata else 0
+        if newindex - oldindex > oldcount:
+            warnings.warn('You are combining non-consectuive sets! '
+                          'The indexing and ordering will be messed up')
+        overlap = max(oldindex + oldcount - newindex, 0)
+        data = OrderedDict((key, np.concatenate([value, newdata[key][overlap:]]))
+                           for key, value in olddata.items())
+        self._set_column_data(data, index=oldindex)
+
+    def _get_page(self, start, end, after=None, before=None):
+        ''' Retrieves the rows from start to end in local mode
+
+        If the query uses keyset pagination, the page is retrieved with
+        a condition on the keyset values of the row before (``after``) or
+        after (``before``) the page, or with an offset if neither is set.
+        Otherwise, the query is sliced from start to end.
+
+        '''
+
+        if getattr(self._queryobj, '_keyset_columns', None):
+            self.results, self._keyset = self._queryobj._get_keyset_page(end - start, offset=start,
+                                                                         after=after, before=before)
         else:
-            nextset = self.getNext(chunk=chunk)
-        newset = oldset + nextset
-        self.count = len(newset)
-        self.results = newset
+            self.results = self.query.slice(start, end).all()
+
+        if self.results:
+            self._create_result_set(index=start)
 
     def getNext(self, chunk=None):
         ''' Retrieve the next chunk of results
@@ -1154,7 +1452,7 @@ class Results(object):
             return self.results
 
         # This handles the end edge case
-        if newend > self.totalcount:
+        if newend > self.totalcount and not self.count_estimated:
             warnings.warn('You have reached the end.', MarvinUserWarning)
             newend = self.totalcount
             newstart = self.end
@@ -1162,9 +1460,7 @@ class Results(object):
         # This grabs the next chunk
         log.info('Retrieving next {0}, from {1} to {2}'.format(self.chunk, newstart, newend))
         if self.mode == 'local':
-            self.results = self.query.slice(newstart, newend).all()
-            if self.results:
-                self._create_result_set(index=newstart)
+            self._get_page(newstart, newend, after=self._keyset[1] if self._keyset else None)
         elif self.mode == 'remote':
             # Fail if no route map initialized
             if not config.urlmap:
@@ -1178,6 +1474,13 @@ class Results(object):
             self._interaction(url, params, calltype='getNext', create_set=True,
                               index=newstart)
 
+        # With an estimated count, the end is only known when reached
+        if self.count_estimated and len(self.results) < newend - newstart:
+            warnings.warn('You have reached the end.', MarvinUserWarning)
+            newend = newstart + len(self.results)
+            self.totalcount = newend
+            self.count_estimated = False
+
         self.start = newstart
         self.end = newend
         self.count = len(self.results)
@@ -1239,9 +1542,7 @@ class Results(object):
         # This grabs the previous chunk
         log.info('Retrieving previous {0}, from {1} to {2}'.format(self.chunk, newstart, newend))
         if self.mode == 'local':
-            self.results = self.query.slice(newstart, newend).all()
-            if self.results:
-                self._create_result_set(index=newstart)
+            self._get_page(newstart, newend, before=self._keyset[0] if self._keyset else None)
         elif self.mode == 'remote':
             # Fail if no route map initialized
             if not config.urlmap:
@@ -1310,9 +1611,7 @@ class Results(object):
         self.end = end
         self.chunk = limit
         if self.mode == 'local':
-            self.results = self.query.slice(start, end).all()
-            if self.results:
-                self._create_result_set(index=start)
+            self._get_page(start, end)
         elif self.mode == 'remote':
             # Fail if no route map initialized
             if not config.urlmap:
@@ -1391,6 +1690,19 @@ class Results(object):
             mode (str):
                 The mode to use when attempting to convert to Tool. Default mode
                 is to use the mode internal to Results. (most often remote mode)
+            n_workers (int):
+                The number of tools to initialise concurrently. Defaults to
+                ``config.tool_workers`` in remote mode and 1 (serial) otherwise.
+            pool ({'thread', 'process'}):
+                The type of pool used when ``n_workers > 1``. Default is thread.
+                Process pools require the tools to be picklable.
+            lazy (bool):
+                If True, ``Results.objects`` contains lazy proxies that only
+                initialise each tool when it is first accessed. Default is False.
+            prefetch (bool):
+                In remote mode, if True (the default) and the server supports it,
+                the data to initialise cubes and maps is retrieved for all the
+                results with a few batch requests. See `marvin.api.batch`.
 
         Example:
             >>> # Get the results from some query
@@ -1420,17 +1732,32 @@ class Results(object):
         tooltype = tooltype if tooltype else self.returntype
         assert tooltype in toollist, 'Returned tool type must be one of {0}'.format(toollist)
 
+        # set up the pool
+        n_workers = kwargs.get('n_workers', None)
+        if n_workers is None:
+            n_workers = config.tool_workers if mode == 'remote' else 1
+        poolkwargs = {'n_workers': n_workers, 'pool': kwargs.get('pool', 'thread'),
+                      'lazy': kwargs.get('lazy', False)}
+
+        # only remote tools can be initialised from the batch routes
+        prefetch = (kwargs.get('prefetch', True) and mode == 'remote' and
+                    has_batch_route('cube' if tooltype == 'spaxel' else tooltype))
+
         # get the parameter list to check against
         paramlist = self.columns.full
 
         print('Converting results to Marvin {0} objects'.format(tooltype.title()))
-        if tooltype == 'cube':
-            self.objects = [Cube(plateifu=res.plateifu, mode=mode) for res in self.results[0:limit]]
-        elif tooltype == 'maps':
+        if tooltype in ['cube', 'rss']:
+            toolclass = Cube if tooltype == 'cube' else RSS
+            toolkwargs = [{'plateifu': res.plateifu, 'mode': mode} for res in self.results[0:limit]]
+            if prefetch:
+                self._prefetch_tool_data(tooltype, toolkwargs)
+            self.objects = _create_tools(toolclass, toolkwargs, **poolkwargs)
+        elif tooltype in ['maps', 'modelcube']:
 
             isbin = 'bintype.name' in paramlist
             istemp = 'template.name' in paramlist
-            self.objects = []
+            toolkwargs = []
 
             for res in self.results[0:limit]:
                 mapkwargs = {'mode': mode, 'plateifu': res.plateifu}
@@ -1443,7 +1770,12 @@ class Results(object):
                     tempval = res.template_name
                     mapkwargs['template_kin'] = tempval
 
-                self.objects.append(Maps(**mapkwargs))
+                toolkwargs.append(mapkwargs)
+
+            toolclass = Maps if tooltype == 'maps' else ModelCube
+            if prefetch:
+                self._prefetch_tool_data(tooltype, toolkwargs)
+            self.objects = _create_tools(toolclass, toolkwargs, **poolkwargs)
         elif tooltype == 'spaxel':
 
             assert 'spaxelprop.x' in paramlist and 'spaxelprop.y' in paramlist, \
@@ -1458,33 +1790,51 @@ class Results(object):
             tab = self.toTable()
             uniq_plateifus = list(set(self.getListOf('plateifu')))
 
-            for plateifu in uniq_plateifus:
-                c = Cube(plateifu=plateifu, mode=mode)
+            # the cubes are always loaded, since they are indexed right away
+            poolkwargs['lazy'] = False
+            cubekwargs = [{'plateifu': plateifu, 'mode': mode} for plateifu in uniq_plateifus]
+            if prefetch:
+                self._prefetch_tool_data('cube', cubekwargs)
+            cubes = _create_tools(Cube, cubekwargs, **poolkwargs)
+
+            for plateifu, c in zip(uniq_plateifus, cubes):
                 univals = tab['cube.plateifu'] == plateifu
                 x = tab[univals]['spaxelprop.x'].tolist()
                 y = tab[univals]['spaxelprop.y'].tolist()
                 spaxels = c[y, x]
                 self.objects.extend(spaxels)
-        elif tooltype == 'rss':
-            self.objects = [RSS(plateifu=res.plateifu, mode=mode) for res in self.results[0:limit]]
-        elif tooltype == 'modelcube':
 
-            isbin = 'bintype.name' in paramlist
-            istemp = 'template.name' in paramlist
-            self.objects = []
+    def _prefetch_tool_data(self, tooltype, toolkwargs):
+        ''' Adds the data from the batch API routes to the keyword arguments of each tool
 
-            for res in self.results[0:limit]:
-                mapkwargs = {'mode': mode, 'plateifu': res.plateifu}
+        Tools whose data cannot be retrieved are initialised normally.
 
-                if isbin:
-                    binval = res.bintype_name
-                    mapkwargs['bintype'] = binval
+        Parameters:
+            tooltype ({'cube', 'maps'}):
+                The type of tool.
+            toolkwargs (list):
+                The list of keyword arguments for each tool. Modified in place.
 
-                if istemp:
-                    tempval = res.template_name
-                    mapkwargs['template_kin'] = tempval
+        '''
 
-                self.objects.append(ModelCube(**mapkwargs))
+        # group by bintype and template, since each batch request is for a single combination
+        groups = OrderedDict()
+        for kw in toolkwargs:
+            groups.setdefault((kw.get('bintype'), kw.get('template_kin')), []).append(kw)
+
+        for (bintype, template), group in groups.items():
+            plateifus = list(OrderedDict.fromkeys(kw['plateifu'] for kw in group))
+            try:
+                payloads = get_batch_payloads(tooltype, plateifus, bintype=bintype,
+                                              template=template)
+            except MarvinError as ee:
+                warnings.warn('could not prefetch the {0} data: {1}. Loading each object '
+                              'individually.'.format(tooltype, ee), MarvinUserWarning)
+                continue
+
+            for kw in group:
+                if kw['plateifu'] in payloads:
+                    kw['data'] = payloads[kw['plateifu']]
 
     def plot(self, x_name, y_name, **kwargs):
         ''' Make a scatter plot from two columns of results
@@ -1540,8 +1890,9 @@ class Results(object):
             x_data = self.getListOf(x_name, return_all=True)
             y_data = self.getListOf(y_name, return_all=True)
         else:
-            x_data = self.results[x_name]
-            y_data = self.results[y_name]
+            data = self._get_column_data()
+            x_data = data[x_col.remote]
+            y_data = data[y_col.remote]
 
         with turn_off_ion(show_plot=show_plot):
             output = marvin.utils.plot.scatter.plot(x_data, y_data, xlabel=x_col, ylabel=y_col, **kwargs)
@@ -1604,7 +1955,7 @@ class Results(object):
         if self.count != self.totalcount:
             data = self.getListOf(name, return_all=True)
         else:
-            data = self.results[name]
+            data = self._get_column_data()[col.remote]
 
         # xhist, fig, ax_hist_x = output
         with turn_off_ion(show_plot=show_plot):
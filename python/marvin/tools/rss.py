@@ -15,24 +15,49 @@ from __future__ import print_function
 
 import warnings
 
-from astropy.io import fits
+import astropy.units as u
 import numpy as np
 
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
 import marvin
 
 from marvin.core.core import MarvinToolsClass
 from marvin.core.exceptions import MarvinError, MarvinUserWarning
 
 from marvin.tools.quantities.spectrum import Spectrum
+from marvin.utils.general.fitsaccess import open_fits
+
+
+fiber_unit = u.Unit('fiber', represents=u.pixel, doc='A spectroscopic fibre',
+                    parse_strict='silent')
 
+# The RSS flux is in 1e-17 erg/s/cm^2/Ang/fiber.
+flux_unit = u.erg / u.s / (u.cm ** 2) / u.Angstrom / fiber_unit
+flux_scale = 1e-17
 
-class RSS(MarvinToolsClass, list):
+
+class RSS(MarvinToolsClass, Sequence):
     """A class to interface with MaNGA RSS data.
 
     This class represents a fully reduced RSS file, initialised either
     from a file, a database, or remotely via the Marvin API. The class
-    inherits from Python's list class, and is defined as a list of
-    RSSFiber objects.
+    is a read-only sequence of RSSFiber objects, which can be indexed,
+    sliced (returning a list), and iterated. A fibre is ``in`` an RSS if
+    it was created by indexing it.
+
+    The flux, inverse variance, and mask of all the fibres are kept as
+    single arrays of shape ``(nfibers, nwave)``, available as `flux`,
+    `ivar`, and `mask`, with the common `wavelength`. The `RSSFiber`
+    objects are views of a row of those arrays, created the first time each
+    fibre is accessed. Operations across fibres, such as `stack`, `snr`, or
+    `masked_flux`, work on the arrays directly.
+
+    When loaded from the database, the arrays are retrieved, in a single
+    query, the first time they are used.
 
     Parameters:
         filename (str):
@@ -63,9 +88,17 @@ class RSS(MarvinToolsClass, list):
 
     Return:
         rss:
-            An object representing the RSS entity. The object is a list of
+            An object representing the RSS entity. The object is a sequence of
             RSSFiber objects, one for each fibre in the RSS entity.
 
+    Example:
+        >>> rss = RSS(plateifu='8485-1901')
+        >>> rss.flux.shape
+        (171, 4563)
+        >>> rss[0]
+        <Marvin RSSFiber (mangaid='1-209232', plateifu='8485-1901', data_origin='file')>
+        >>> central = rss.stack(fibers=range(7))
+
     """
 
     def __init__(self, *args, **kwargs):
@@ -78,6 +111,12 @@ class RSS(MarvinToolsClass, list):
             assert kw in valid_kwargs, 'keyword {0} is not valid'.format(kw)
 
         self.data = None
+        self._arrays = None
+        self._fiber_pks = None
+        self._wavelength_quantity = None
+
+        # Fibres are created on first access, by _get_fiber.
+        self._fibers = {}
 
         MarvinToolsClass.__init__(self, *args, **kwargs)
 
@@ -88,8 +127,7 @@ class RSS(MarvinToolsClass, list):
         elif self.data_origin == 'api':
             self._load_rss_from_api()
 
-        _fibers = self._init_fibers()
-        list.__init__(self, _fibers)
+        self._nfibers = self._get_nfibers()
 
         # TODO: check that the drpver of the loaded data matches the one in the object.
 
@@ -99,6 +137,62 @@ class RSS(MarvinToolsClass, list):
         return ('<Marvin RSS (mangaid={self.mangaid!r}, plateifu={self.plateifu!r}, '
                 'mode={self.mode!r}, data_origin={self.data_origin!r})>'.format(self=self))
 
+    def __len__(self):
+
+        return self._nfibers
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self._get_fiber(ii) for ii in range(len(self))[index]]
+
+        return self._get_fiber(index)
+
+    def __iter__(self):
+
+        for ii in range(len(self)):
+            yield self._get_fiber(ii)
+
+    def __contains__(self, fiber):
+
+        # Fibres are compared by identity, since comparing spectra is element-wise.
+        return any(item is fiber for item in self._fibers.values())
+
+    def index(self, fiber):
+        """Returns the index of a fibre of this RSS."""
+
+        for index, item in self._fibers.items():
+            if item is fiber:
+                return index
+
+        raise ValueError('the fibre is not in this RSS')
+
+    def count(self, fiber):
+        """Returns 1 if the fibre belongs to this RSS and 0 otherwise."""
+
+        return int(fiber in self)
+
+    def __getstate__(self):
+
+        # Fibres are views of the arrays and are created again when accessed.
+        odict = super(RSS, self).__getstate__()
+        odict['_fibers'] = {}
+
+        return odict
+
+    def _get_fiber(self, index):
+        """Returns the `RSSFiber` for a fibre index, creating it if needed."""
+
+        index = range(len(self))[index]
+
+        fiber = self._fibers.get(index, None)
+
+        if fiber is None:
+            fiber = RSSFiber._init_from_rss(self, index)
+            self._fibers[index] = fiber
+
+        return fiber
+
     def _getFullPath(self):
         """Returns the full path of the file in the tree."""
 
@@ -123,7 +217,7 @@ class RSS(MarvinToolsClass, list):
         """Initialises the RSS object from a file."""
 
         try:
-            self.data = fits.open(self.filename)
+            self.data = open_fits(self.filename)
             self.mangaid = self.data[0].header['MANGAID'].strip()
             self.plateifu = '{0}-{1}'.format(
                 self.data[0].header['PLATEID'], self.data[0].header['IFUDSGN'])
@@ -157,13 +251,18 @@ class RSS(MarvinToolsClass, list):
 
         plate, ifudesign = [item.strip() for item in self.plateifu.split('-')]
 
+        # Only the cube and the primary keys of its fibres are retrieved here.
+        # The arrays are loaded on first use, by _load_arrays_from_db.
         try:
-            self.data = mdb.session.query(mdb.datadb.RssFiber).join(
-                mdb.datadb.Cube, mdb.datadb.PipelineInfo,
-                mdb.datadb.PipelineVersion, mdb.datadb.IFUDesign).filter(
+            self.data = mdb.session.query(mdb.datadb.Cube).join(
+                mdb.datadb.PipelineInfo, mdb.datadb.PipelineVersion,
+                mdb.datadb.IFUDesign).filter(
                     mdb.datadb.PipelineVersion.version == self._drpver,
                     mdb.datadb.Cube.plate == plate,
-                    mdb.datadb.IFUDesign.name == ifudesign).all()
+                    mdb.datadb.IFUDesign.name == ifudesign).one()
+
+            self._fiber_pks = [row[0] for row in mdb.session.query(mdb.datadb.RssFiber.pk).filter(
+                mdb.datadb.RssFiber.cube_pk == self.data.pk).order_by(mdb.datadb.RssFiber.pk)]
 
         except sqlalchemy.orm.exc.NoResultFound as ee:
             raise MarvinError('Could not retrieve RSS for plate-ifu {0}: '
@@ -175,7 +274,7 @@ class RSS(MarvinToolsClass, list):
                               'Unknown exception: {1}'
                               .format(self.plateifu, ee))
 
-        if not self.data:
+        if not self._fiber_pks:
             raise MarvinError('Could not retrieve RSS for plate-ifu {0}: '
                               'Unknown error.'.format(self.plateifu))
 
@@ -189,46 +288,180 @@ class RSS(MarvinToolsClass, list):
         # Make the API call
         self._toolInteraction(url)
 
-    def _init_fibers(self):
-        """Initialises the object as a list of RSSFiber instances."""
+    def _get_nfibers(self):
+        """Returns the number of fibres."""
 
         if self.data_origin == 'file':
-            _fibers = [RSSFiber._init_from_hdu(hdulist=self.data, index=ii)
-                       for ii in range(self.data[1].data.shape[0])]
-
+            return self.data['FLUX'].header['NAXIS2']
         elif self.data_origin == 'db':
-            _fibers = [RSSFiber._init_from_db(rssfiber=rssfiber) for rssfiber in self.data]
+            return len(self._fiber_pks)
 
-        elif self.data_origin == 'api':
-            # Makes a call to the API to retrieve all the arrays for all the fibres.
+        return self.flux.shape[0]
+
+    def _get_arrays(self):
+        """Returns a dictionary with the flux, ivar, mask, and wavelength arrays."""
 
-            routeparams = {'name': self.plateifu}
-            url = marvin.config.urlmap['api']['getRSSAllFibers']['url'].format(**routeparams)
+        if self.data_origin == 'file':
+            # The HDUs are memory-mapped, so slicing a fibre does not read the others.
+            return {'flux': self.data['FLUX'].data, 'ivar': self.data['IVAR'].data,
+                    'mask': self.data['MASK'].data, 'wavelength': self.data['WAVE'].data}
+
+        if self._arrays is None:
+            if self.data_origin == 'db':
+                self._arrays = self._load_arrays_from_db()
+            elif self.data_origin == 'api':
+                self._arrays = self._load_arrays_from_api()
+
+        return self._arrays
 
-            # Make the API call
-            response = self._toolInteraction(url)
-            data = response.getData()
+    def _load_arrays_from_db(self):
+        """Loads the arrays of all the fibres from the DB in a single query."""
+
+        from marvin.db.arrayloader import load_row_arrays
+
+        mdb = marvin.marvindb
+        rssfiber = mdb.datadb.RssFiber
 
-            wavelength = np.array(data['wavelength'])
+        arrays = load_row_arrays(mdb.session, rssfiber, ['flux', 'ivar', 'mask'],
+                                 rssfiber.cube_pk == self.data.pk, order_by=rssfiber.pk,
+                                 nrows=len(self._fiber_pks), dtypes={'mask': np.int32})
+        arrays['wavelength'] = np.array(self.data.wavelength.wavelength)
 
-            _fibers = []
-            for ii in range(len(data) - 1):
-                flux = np.array(data[str(ii)][0])
-                ivar = np.array(data[str(ii)][1])
-                mask = np.array(data[str(ii)][2])
-                _fibers.append(
-                    RSSFiber(flux, ivar=ivar, mask=mask, wavelength=wavelength,
-                             mangaid=self.mangaid, plateifu=self.plateifu, data_origin='api'))
+        return arrays
+
+    def _load_arrays_from_api(self):
+        """Retrieves the arrays of all the fibres from the API."""
+
+        routeparams = {'name': self.plateifu}
+        url = marvin.config.urlmap['api']['getRSSAllFibers']['url'].format(**routeparams)
+
+        # Make the API call
+        response = self._toolInteraction(url)
+        data = response.getData()
 
-        return _fibers
+        if 'flux' in data:
+            return {'flux': np.asarray(data['flux']), 'ivar': np.asarray(data['ivar']),
+                    'mask': np.asarray(data['mask']),
+                    'wavelength': np.asarray(data['wavelength'])}
+
+        # Servers that do not stack the fibres return a list per fibre.
+        fibers = [data[str(ii)] for ii in range(len(data) - 1)]
+
+        return {'flux': np.array([fiber[0] for fiber in fibers]),
+                'ivar': np.array([fiber[1] for fiber in fibers]),
+                'mask': np.array([fiber[2] for fiber in fibers]),
+                'wavelength': np.array(data['wavelength'])}
+
+    @property
+    def flux(self):
+        """The flux of all the fibres, as an array of shape ``(nfibers, nwave)``.
+
+        In units of 1e-17 erg/s/cm^2/Ang/fiber.
+        """
+
+        return self._get_arrays()['flux']
+
+    @property
+    def ivar(self):
+        """The inverse variance of `flux`, as an array of shape ``(nfibers, nwave)``."""
+
+        return self._get_arrays()['ivar']
+
+    @property
+    def mask(self):
+        """The ``MANGA_DRP2PIXMASK`` of all the fibres, of shape ``(nfibers, nwave)``."""
+
+        return self._get_arrays()['mask']
+
+    @property
+    def wavelength(self):
+        """The wavelength of all the fibres, in Angstrom."""
+
+        return self._get_arrays()['wavelength']
+
+    def _get_wavelength_quantity(self):
+        """Returns the wavelength as a Quantity, shared by all the fibres."""
+
+        if self._wavelength_quantity is None:
+            self._wavelength_quantity = u.Quantity(self.wavelength, u.Angstrom)
+
+        return self._wavelength_quantity
+
+    @property
+    def snr(self):
+        """The signal-to-noise ratio of each pixel, of shape ``(nfibers, nwave)``."""
+
+        return np.abs(self.flux) * np.sqrt(self.ivar)
+
+    def masked_flux(self, use_ivar=True):
+        """Returns the flux as a masked array.
+
+        Parameters:
+            use_ivar (bool):
+                If True, pixels with zero inverse variance are masked, along
+                with those with any bit of `mask` set.
+
+        Returns:
+            masked_flux (`numpy.ma.MaskedArray`):
+                The flux of all the fibres, of shape ``(nfibers, nwave)``.
+
+        """
+
+        bad = self.mask > 0
+        if use_ivar:
+            bad |= self.ivar <= 0
+
+        return np.ma.MaskedArray(self.flux, mask=bad)
+
+    def stack(self, fibers=None, use_mask=True):
+        """Stacks the spectra of several fibres.
+
+        The stacked flux is the mean of the fibres weighted by their inverse
+        variance, and its inverse variance the sum of theirs.
+
+        Parameters:
+            fibers (list or None):
+                The indices of the fibres to stack, or a boolean array of
+                length ``nfibers``. If None, all the fibres are stacked.
+            use_mask (bool):
+                If True, pixels with any bit of `mask` set are excluded.
+
+        Returns:
+            spectrum (`~marvin.tools.quantities.Spectrum`):
+                The stacked spectrum. Its mask is the bitwise OR of the masks
+                of the fibres for the pixels without valid data, and zero
+                elsewhere.
+
+        """
+
+        index = slice(None) if fibers is None else np.asarray(fibers)
+
+        flux = self.flux[index]
+        ivar = np.asarray(self.ivar[index], dtype=np.float64)
+        mask = self.mask[index]
+
+        if use_mask:
+            ivar = np.where(mask > 0, 0., ivar)
+
+        weight = ivar.sum(axis=0)
+        good = weight > 0
+
+        stacked = np.zeros(flux.shape[1], dtype=np.float64)
+        stacked[good] = (flux * ivar).sum(axis=0)[good] / weight[good]
+
+        stacked_mask = np.where(good, 0, np.bitwise_or.reduce(mask, axis=0))
+
+        return Spectrum(stacked, wavelength=self._get_wavelength_quantity(), ivar=weight,
+                        mask=stacked_mask, unit=flux_unit, scale=flux_scale)
 
 
 class RSSFiber(Spectrum):
     """A class to represent a MaNGA RSS fiber.
 
     This class is basically a subclass of |spectrum| with additional
-    functionality. It is not intended to be initialised directly, but via
-    the :py:meth:`RSS._initFibers` method.
+    functionality. It is not intended to be initialised directly, but by
+    indexing an `RSS`. The flux, ivar, and mask of the fibre are views of
+    a row of the arrays of the RSS, so no data are copied.
 
     Parameters:
         args:
@@ -250,13 +483,6 @@ class RSSFiber(Spectrum):
         self.plateifu = kwargs.pop('plateifu', None)
         self.data_origin = kwargs.pop('data_origin', None)
 
-        flux_units = '1e-17 erg/s/cm^2/Ang/fiber'
-        wavelength_unit = 'Angstrom'
-        kwargs['units'] = flux_units
-        kwargs['wavelength_unit'] = wavelength_unit
-
-        # Spectrum.__init__(self, **kwargs)
-
     def __repr__(self):
         """Representation for RSSFiber."""
 
@@ -264,34 +490,15 @@ class RSSFiber(Spectrum):
                 'data_origin={self.data_origin!r})>'.format(self=self))
 
     @classmethod
-    def _init_from_hdu(cls, hdulist, index):
-        """Initialises a RSSFiber object from a RSS HDUList."""
-
-        assert index is not None, \
-            'if hdu is defined, an index is required.'
-
-        mangaid = hdulist[0].header['MANGAID'].strip()
-        plateifu = '{0}-{1}'.format(hdulist[0].header['PLATEID'], hdulist[0].header['IFUDSGN'])
-
-        flux = hdulist['FLUX'].data[index, :]
-        ivar = hdulist['IVAR'].data[index, :]
-        mask = hdulist['MASK'].data[index, :]
-        wave = hdulist['WAVE'].data
-
-        obj = RSSFiber(flux, ivar=ivar, mask=mask, wavelength=wave, mangaid=mangaid,
-                       plateifu=plateifu, data_origin='file')
-
-        return obj
-
-    @classmethod
-    def _init_from_db(cls, rssfiber):
-        """Initialites a RSS fiber from the DB."""
+    def _init_from_rss(cls, rss, index):
+        """Initialises a RSSFiber as a view of a row of the arrays of a RSS."""
 
-        mangaid = rssfiber.cube.mangaid
-        plateifu = '{0}-{1}'.format(rssfiber.cube.plate, rssfiber.cube.ifu.name)
+        obj = RSSFiber(rss.flux[index], wavelength=rss._get_wavelength_quantity(),
+                       unit=flux_unit, scale=flux_scale, copy=False, mangaid=rss.mangaid,
+                       plateifu=rss.plateifu, data_origin=rss.data_origin)
 
-        obj = RSSFiber(rssfiber.flux, ivar=rssfiber.ivar, mask=rssfiber.mask,
-                       wavelength=rssfiber.cube.wavelength.wavelength, mangaid=mangaid,
-                       plateifu=plateifu, data_origin='db')
+        # Spectrum copies ivar and mask, so they are set afterwards to avoid it.
+        obj.ivar = rss.ivar[index]
+        obj.mask = rss.mask[index]
 
         return obj
@@ -634,3 +634,209 @@ class Bin(SpaxelBase):
 
         for spaxel in self.spaxels:
             spaxel.load()
+
+
+class SpaxelBatchQuantity(object):
+    """The columnar arrays of a single quantity for a batch of spaxels.
+
+    Parameters:
+        value (`~numpy.ndarray`):
+            The values of the quantity. For spectral quantities the array has
+            shape ``(N, nwave)``, one row per spaxel. For `~marvin.tools.maps.Maps`
+            properties the shape is ``(N, )``. Spectra that are the same for
+            all the spaxels in the cube (e.g., the spectral resolution) are
+            stored only once, as a 1D array.
+        ivar,mask,std (`~numpy.ndarray` or None):
+            The associated arrays, with the same shape as ``value``.
+        unit (`~astropy.units.Unit`):
+            The unit of the quantity.
+        wavelength (`~numpy.ndarray` or None):
+            The wavelength array for spectral quantities.
+
+    """
+
+    def __init__(self, value, ivar=None, mask=None, std=None, unit=None, wavelength=None):
+
+        self.value = value
+        self.ivar = ivar
+        self.mask = mask
+        self.std = std
+        self.unit = unit
+        self.wavelength = wavelength
+
+    def __repr__(self):
+
+        return '<SpaxelBatchQuantity (shape={0!r}, unit={1!r})>'.format(
+            getattr(self.value, 'shape', None), str(self.unit))
+
+    def __len__(self):
+
+        return len(self.value)
+
+
+class SpaxelBatch(object):
+    """A columnar representation of the quantities for many spaxels.
+
+    A `.SpaxelBatch` is the bulk equivalent of a list of `.SpaxelBase`
+    objects. Instead of one object per spaxel, each quantity is stored as a
+    `.SpaxelBatchQuantity` whose arrays have one row per spaxel, in the same
+    order as ``x`` and ``y``. It is normally created by calling
+    `~marvin.tools.cube.Cube.getSpaxels`,
+    `~marvin.tools.maps.Maps.getSpaxels`, or
+    `~marvin.tools.modelcube.ModelCube.getSpaxels`.
+
+    As for `.SpaxelBase`, the quantities can be accessed via
+    ``cube_quantities``, ``maps_quantities``, and ``modelcube_quantities``,
+    or directly as attributes (e.g., ``batch.flux.value``).
+
+    Parameters:
+        x,y (array):
+            The coordinates of the spaxels in the cube (0-indexed).
+        plateifu (str):
+            The plate-ifu of the parent objects.
+        release (str):
+            The release of the parent objects.
+
+    """
+
+    def __init__(self, x, y, plateifu=None, release=None):
+
+        self.x = np.atleast_1d(x).astype(int)
+        self.y = np.atleast_1d(y).astype(int)
+
+        assert self.x.shape == self.y.shape, 'x and y must have the same size.'
+
+        self.plateifu = plateifu
+        self.release = release
+
+        self.cube_quantities = FuzzyDict({})
+        self.maps_quantities = FuzzyDict({})
+        self.modelcube_quantities = FuzzyDict({})
+
+        self._cube = None
+        self._maps = None
+        self._modelcube = None
+
+        self.ra = None
+        self.dec = None
+
+    @classmethod
+    def from_tools(cls, x, y, cube=None, maps=None, modelcube=None, **kwargs):
+        """Creates a `.SpaxelBatch` from a set of Marvin tools.
+
+        At least one of ``cube``, ``maps``, or ``modelcube`` must be an
+        instance of the corresponding class. The others can be ``True``, in
+        which case they will be initialised from that instance, or
+        ``False``/``None``. ``kwargs`` are passed to `~marvin.tools.maps.Maps`
+        and `~marvin.tools.modelcube.ModelCube` when initialised.
+
+        """
+
+        Cube = marvin.tools.cube.Cube
+        Maps = marvin.tools.maps.Maps
+        ModelCube = marvin.tools.modelcube.ModelCube
+
+        parents = [obj for obj in [maps, modelcube, cube]
+                   if isinstance(obj, (Cube, Maps, ModelCube))]
+
+        if len(parents) == 0:
+            raise MarvinError('getSpaxels requires at least one Cube, Maps, '
+                              'or ModelCube instance.')
+
+        parent = parents[0]
+
+        if cube is True:
+            cube = parent.getCube()
+
+        if maps is True:
+            maps = parent.getMaps(**kwargs) if isinstance(parent, Cube) else parent.getMaps()
+
+        if modelcube is True:
+            if parent.release == 'MPL-4':
+                warnings.warn('ModelCube cannot be instantiated for MPL-4.', MarvinUserWarning)
+                modelcube = None
+            elif isinstance(parent, Maps):
+                modelcube = parent.getModelCube()
+            else:
+                modelcube = ModelCube(plateifu=parent.plateifu, release=parent.release,
+                                      **kwargs)
+
+        batch = cls(x, y, plateifu=parent.plateifu, release=parent.release)
+
+        if cube:
+            batch._cube = cube
+            batch.cube_quantities = cube._get_spaxels_quantities(batch.x, batch.y)
+
+        if maps:
+            batch._maps = maps
+            batch.maps_quantities = maps._get_spaxels_quantities(batch.x, batch.y)
+
+        if modelcube:
+            batch._modelcube = modelcube
+            batch.modelcube_quantities = modelcube._get_spaxels_quantities(batch.x, batch.y)
+
+        batch._set_radec()
+
+        return batch
+
+    def __repr__(self):
+
+        return ('<Marvin SpaxelBatch (plateifu={0.plateifu}, n_spaxels={1})>'
+                .format(self, len(self)))
+
+    def __len__(self):
+
+        return len(self.x)
+
+    def __dir__(self):
+
+        class_members = list(list(zip(*inspect.getmembers(self.__class__)))[0])
+        instance_attr = list(self.__dict__.keys())
+
+        items = self.cube_quantities.__dir__()
+        items += self.maps_quantities.__dir__()
+        items += self.modelcube_quantities.__dir__()
+        items += class_members + instance_attr
+
+        return sorted(items)
+
+    def __getattr__(self, value):
+
+        _getattr = super(SpaxelBatch, self).__getattribute__
+
+        if value in _getattr('cube_quantities'):
+            return _getattr('cube_quantities')[value]
+        if value in _getattr('maps_quantities'):
+            return _getattr('maps_quantities')[value]
+        if value in _getattr('modelcube_quantities'):
+            return _getattr('modelcube_quantities')[value]
+
+        return super(SpaxelBatch, self).__getattribute__(value)
+
+    def _set_radec(self):
+        """Calculates ra and dec for all the spaxels in the batch."""
+
+        for obj in [self._cube, self._maps, self._modelcube]:
+            if hasattr(obj, 'wcs'):
+                if obj.wcs.naxis == 2:
+                    pix = np.array([self.x, self.y]).T
+                    self.ra, self.dec = obj.wcs.wcs_pix2world(pix, 0).T
+                elif obj.wcs.naxis == 3:
+                    pix = np.array([self.x, self.y, np.zeros(len(self))]).T
+                    self.ra, self.dec, __ = obj.wcs.wcs_pix2world(pix, 0).T
+                return
+
+    def getCube(self):
+        """Returns the associated `~marvin.tools.cube.Cube`"""
+
+        return self._cube
+
+    def getMaps(self):
+        """Returns the associated `~marvin.tools.maps.Maps`"""
+
+        return self._maps
+
+    def getModelCube(self):
+        """Returns the associated `~marvin.tools.modelcube.ModelCube`"""
+
+        return self._modelcube
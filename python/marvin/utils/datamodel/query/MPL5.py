@@ -22,10 +22,7 @@ GROUPS = copy.deepcopy(query_params)
 # list of tables to exclude
 EXCLUDE = set(EXCLUDE) - set(['modelcube', 'modelspaxel', 'redcorr']) | set(['executionplan', 'current_default'])
 
-MPL5 = QueryDataModel(release='MPL-5', groups=GROUPS, aliases=['MPL5', 'v2_0_2', '2.0.1'], exclude=EXCLUDE, dapdm=DAPDM)
-
 GRPDICT = {'Emission': 'spaxelprop.emline', 'Kinematic': 'spaxelprop.stellar', 'Spectral Indices': 'spaxelprop.specindex', 'NSA Catalog': 'nsa'}
-MPL5.regroup(GRPDICT)
-MPL5.add_group('Other')
-MPL5.add_to_group('Other')
+
+MPL5 = QueryDataModel(release='MPL-5', groups=GROUPS, aliases=['MPL5', 'v2_0_2', '2.0.1'], exclude=EXCLUDE, dapdm=DAPDM, regroup=GRPDICT)
 
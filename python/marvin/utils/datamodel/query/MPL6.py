@@ -22,10 +22,7 @@ GROUPS = copy.deepcopy(query_params)
 # list of tables to exclude
 EXCLUDE = set(EXCLUDE) - set(['obsinfo', 'dapall'])
 
-MPL6 = QueryDataModel(release='MPL-6', groups=GROUPS, aliases=['MPL6', 'v2_3_1', '2.1.3'], exclude=EXCLUDE, dapdm=DAPDM)
-
 GRPDICT = {'Emission': 'spaxelprop.emline', 'Kinematic': 'spaxelprop.stellar', 'Spectral Indices': 'spaxelprop.specindex', 'NSA Catalog': 'nsa'}
-MPL6.regroup(GRPDICT)
-MPL6.add_group('Other')
-MPL6.add_to_group('Other')
+
+MPL6 = QueryDataModel(release='MPL-6', groups=GROUPS, aliases=['MPL6', 'v2_3_1', '2.1.3'], exclude=EXCLUDE, dapdm=DAPDM, regroup=GRPDICT)
 
@@ -10,6 +10,8 @@
 
 from __future__ import print_function, division, absolute_import
 
+from marvin import config
+from marvin.core.timing import timed
 from marvin.utils.datamodel.query.forms import MarvinForm
 from marvin.utils.datamodel import DataModelList
 from marvin.core.exceptions import MarvinError
@@ -24,6 +26,7 @@ import six
 import yaml
 import yamlordereddictloader
 import inspect
+import threading
 
 from astropy.table import Table
 from fuzzywuzzy import process
@@ -37,19 +40,72 @@ query_params = None
 
 
 class QueryDataModel(object):
-    """ A class representing a Query datamodel """
+    """ A class representing a Query datamodel
 
-    def __init__(self, release, groups=[], aliases=[], exclude=[], **kwargs):
+    The parameters of the datamodel come from the forms built from the
+    ModelClasses of the release. If ``regroup`` is set, the parameters
+    matching its values are added to its groups (see `regroup`), and the
+    remaining ones to an ``Other`` group.
+
+    With ``config.lazy_init``, the forms are built, and the parameters
+    grouped, the first time the groups, the parameters, or the forms are used.
+    """
+
+    def __init__(self, release, groups=[], aliases=[], exclude=[], regroup=None, **kwargs):
 
         self.release = release
         self._groups = groups
         self._groups.set_parent(self)
         self.aliases = aliases
         self._exclude = exclude
+        self._regroup = regroup
         self.dap_datamodel = kwargs.get('dapdm', None)
-        self._marvinform = MarvinForm(release=release)
-        self._cleanup_keys()
-        self._check_datamodels()
+        self._form = None
+        self._built = False
+        self._building = False
+        self._build_lock = threading.RLock()
+        if not config.lazy_init:
+            self._build()
+
+    def _build(self):
+        ''' Builds the forms of the release and groups its parameters '''
+
+        with self._build_lock:
+            # The datamodel is used while it is built, in the same thread.
+            if self._built or self._building:
+                return
+
+            self._building = True
+
+            try:
+                with timed('forms.{0}'.format(self.release)):
+                    if self._form is None:
+                        self._form = MarvinForm(release=self.release)
+                    self._cleanup_keys()
+                    self._check_datamodels()
+
+                    if self._regroup:
+                        self.regroup(self._regroup)
+                        self.add_group('Other')
+                        self.add_to_group('Other')
+            finally:
+                self._building = False
+
+            self._built = True
+
+    @property
+    def _marvinform(self):
+        """The forms of the release, built on first use."""
+
+        if not self._built:
+            self._build()
+
+        return self._form
+
+    @_marvinform.setter
+    def _marvinform(self, value):
+
+        self._form = value
 
     def __repr__(self):
 
@@ -144,6 +200,8 @@ class QueryDataModel(object):
     @property
     def groups(self):
         """Returns the groups for this datamodel. """
+        if not self._built:
+            self._build()
         return self._groups
 
     @groups.setter
@@ -154,11 +212,11 @@ class QueryDataModel(object):
 
     def add_group(self, group, copy=True):
         ''' '''
-        self._groups.add_group(group, copy=copy, parent=self)
+        self.groups.add_group(group, copy=copy, parent=self)
 
     def add_groups(self, groups, copy=True):
         ''' '''
-        self._groups.add_groups(groups, copy=copy, parent=self)
+        self.groups.add_groups(groups, copy=copy, parent=self)
 
     @property
     def parameters(self):
@@ -167,7 +225,7 @@ class QueryDataModel(object):
     def add_to_group(self, group, value=None):
         ''' Add free-floating Parameters into a Group '''
 
-        thegroup = self._groups == group
+        thegroup = self.groups == group
         keys = []
         allkeys = copy_mod.copy(self._keys)
         if value is None:
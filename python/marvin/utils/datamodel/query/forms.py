@@ -53,9 +53,6 @@ class ModelForm(BaseModelForm):
     def get_session(self):
         return marvindb.session
 
-# Builds a dictionary for modelclasses with key ClassName and value SQLalchemy model class
-modelclasses = marvindb.buildUberClassDict()
-
 
 # Class factory
 def formClassFactory(name, model, baseclass):
@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# flatviews.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Denormalised materialised views of the most queried parameters.
+
+Almost every `~marvin.tools.query.Query` joins ``cube``, ``ifudesign``,
+``nsa`` and, for DAP queries, ``file``, ``structure``, ``bintype``,
+``template`` and a spaxelprop table, and filters on the pipeline versions of
+the release. This module builds, for each release, two materialised views in
+the ``mangaflatdb`` schema with the default and best query parameters already
+joined:
+
+- ``flat_cube_<release>``: one row per cube of the DRP version, with the
+  DRP and sample parameters.
+- ``flat_spaxel_<release>``: one row per spaxelprop row of the DAP version,
+  with the DAP parameters as well.
+
+Besides the parameters, each view has a ``pk:<table>`` column with the primary
+key of each joined table. Non-DAP tables are outer-joined, and a query on the
+view requires the primary keys of the tables it uses to be non-null, so the
+results are the same as those of the joined query. The views assume that the
+joined non-DAP tables have at most one row per cube.
+
+With ``use_flat_views=True``, when every parameter returned, filtered, or
+sorted by a query is in one of the views, `~marvin.tools.query.Query` runs on
+the view instead of the joins. Queries with functions, such as ``npergood``,
+or on the DAPall table always use the joins. The views must be refreshed after
+loading data::
+
+    >>> build_flat_views('MPL-6')
+    >>> refresh_flat_views('MPL-6')
+
+Building or refreshing a view stores a signature of the data it was built from
+in the comment of the view: the layout version, the pipeline versions, and the
+number and largest primary key of the cubes and DAP files. A view whose
+signature does not match the current data, e.g., after loading new files, is
+not used until it is refreshed.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import json
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Column
+
+from marvin import config, marvindb
+
+
+__all__ = ['FLAT_SCHEMA', 'LEVELS', 'build_flat_views', 'refresh_flat_views', 'drop_flat_views',
+           'get_flat_view', 'get_view_name', 'column_key', 'presence_key', 'is_dap_model']
+
+
+FLAT_SCHEMA = 'mangaflatdb'
+
+LEVELS = ['cube', 'spaxel']
+
+# Parameters always included in the views: the Query defaults and the DAP defaults.
+_default_params = ['cube.mangaid', 'cube.plate', 'cube.plateifu', 'ifu.name',
+                   'spaxelprop.x', 'spaxelprop.y', 'bintype.name', 'template.name']
+
+# The version of the layout of the views. Views built with another version,
+# or without a signature, are not used.
+_VIEW_VERSION = 1
+
+# The time, in seconds, during which a view found up to date is not checked again.
+FRESHNESS_TTL = 60
+
+# (release, level) -> reflected view.
+_views_cache = {}
+
+# (release, level) -> time at which the view was last found up to date.
+_fresh_cache = {}
+
+
+def get_view_name(release, level):
+    """Returns the name of the view of a release and level, e.g., ``flat_cube_mpl_6``."""
+
+    assert level in LEVELS, 'level must be one of {0}'.format(', '.join(LEVELS))
+
+    return 'flat_{0}_{1}'.format(level, release.lower().replace('-', '_').replace('.', '_'))
+
+
+def column_key(column):
+    """Returns the name of the view column of a model attribute or table column, e.g., ``nsa.z``.
+
+    The name is built from the table and the database column, so that the
+    attributes of the models and the columns of the clauses built from them
+    map to the same view column.
+
+    """
+
+    if not isinstance(column, Column):
+        mapped = getattr(getattr(column, 'property', None), 'columns', [])
+        if len(mapped) != 1 or not isinstance(mapped[0], Column):
+            return '{0}.{1}'.format(column.class_.__tablename__, column.key)
+        column = mapped[0]
+
+    return '{0}.{1}'.format(column.table.name, column.key)
+
+
+def presence_key(model):
+    """Returns the name of the view column with the primary key of a model."""
+
+    return 'pk:{0}'.format(model.__tablename__)
+
+
+def is_dap_model(model):
+    """Returns True if the model is in the DAP schema."""
+
+    return 'dapdb' in model.__table__.schema
+
+
+def _get_view_columns(release, level):
+    """Returns the model attributes of the parameters of a view, by column name."""
+
+    from marvin.utils.datamodel.query import datamodel
+
+    dm = datamodel[release]
+    lookup = dm._marvinform._param_form_lookup
+
+    columns = OrderedDict()
+    for param in _default_params + [param.full for param in dm.best]:
+        try:
+            column = lookup.mapToColumn(param)
+        except KeyError:
+            continue
+
+        if 'dapall' in column.class_.__tablename__:
+            continue
+
+        if level == 'cube' and is_dap_model(column.class_):
+            continue
+
+        columns.setdefault(column_key(column), column)
+
+    return columns
+
+
+def _get_pipeline_pk(session, name, version):
+    """Returns the primary key of the pipeline info of a pipeline version."""
+
+    datadb = marvindb.datadb
+
+    return session.query(datadb.PipelineInfo.pk).\
+        join(datadb.PipelineName, datadb.PipelineVersion).\
+        filter(datadb.PipelineName.label == name,
+               datadb.PipelineVersion.version == version).scalar()
+
+
+def _build_select(release, level, session):
+    """Returns the SQL that selects the rows of a view."""
+
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.orm import aliased
+
+    datadb = marvindb.datadb
+    dapdb = marvindb.dapdb
+
+    columns = _get_view_columns(release, level)
+    models = list(OrderedDict.fromkeys(column.class_ for column in columns.values()))
+    joins = marvindb.modelgraph.getJoins(models, format_out='models', nexus=datadb.Cube)
+    joins = [model for model in joins if model is not datadb.Cube]
+
+    selected = [column.label(key) for key, column in columns.items()]
+    selected += [model.pk.label(presence_key(model)) for model in [datadb.Cube] + joins]
+
+    query = session.query(*selected).select_from(datadb.Cube)
+
+    # DAP tables are always present in DAP queries, the others may be missing.
+    for model in joins:
+        target = [model, dapdb.Structure.template_kin] if 'template' in model.__tablename__ \
+            else [model]
+        query = query.join(*target) if is_dap_model(model) else query.outerjoin(*target)
+
+    drpver, dapver = config.lookUpVersions(release=release)
+
+    drp_alias = aliased(datadb.PipelineInfo, name='drpalias')
+    query = query.join(drp_alias, datadb.Cube.pipelineInfo).\
+        filter(drp_alias.pk == _get_pipeline_pk(session, 'DRP', drpver))
+
+    if level == 'spaxel':
+        dap_alias = aliased(datadb.PipelineInfo, name='dapalias')
+        query = query.join(dap_alias, dapdb.File.pipelineinfo).\
+            filter(dap_alias.pk == _get_pipeline_pk(session, 'DAP', dapver))
+
+    return str(query.statement.compile(dialect=postgresql.dialect(),
+                                       compile_kwargs={'literal_binds': True}))
+
+
+def _view_exists(conn, name):
+
+    sql = ("select 1 from pg_matviews where schemaname = '{0}' "
+           "and matviewname = '{1}'".format(FLAT_SCHEMA, name))
+
+    return conn.execute(sql).scalar() is not None
+
+
+def _get_signature(conn, release, level):
+    """Returns the signature of the data the view of a release and level is built from."""
+
+    from sqlalchemy import func, select
+
+    drpver, dapver = config.lookUpVersions(release=release)
+
+    signature = {'version': _VIEW_VERSION, 'drpver': drpver,
+                 'dapver': dapver if level == 'spaxel' else None}
+
+    models = [marvindb.datadb.Cube] + ([marvindb.dapdb.File] if level == 'spaxel' else [])
+    for model in models:
+        count, maxpk = conn.execute(select([func.count(model.pk), func.max(model.pk)])).first()
+        signature[model.__tablename__] = [count, maxpk]
+
+    return signature
+
+
+def _write_signature(conn, release, level):
+    """Stores the signature of the current data in the comment of a view."""
+
+    signature = json.dumps(_get_signature(conn, release, level), sort_keys=True)
+
+    conn.execute("comment on materialized view {0}.{1} is '{2}'".format(
+        FLAT_SCHEMA, get_view_name(release, level), signature.replace("'", "''")))
+
+
+def _is_fresh(conn, release, level):
+    """Returns True if a view exists and was built from the current data."""
+
+    name = get_view_name(release, level)
+
+    if not _view_exists(conn, name):
+        return False
+
+    comment = conn.execute("select obj_description('{0}.{1}'::regclass, 'pg_class')".format(
+        FLAT_SCHEMA, name)).scalar()
+
+    try:
+        signature = json.loads(comment)
+    except (TypeError, ValueError):
+        return False
+
+    return signature == _get_signature(conn, release, level)
+
+
+def build_flat_views(release, levels=None, indexes=None, rebuild=False, session=None):
+    """Creates the flat views of a release.
+
+    Parameters:
+        release (str):
+            The release of the views.
+        levels (list):
+            The views to build, among `LEVELS`. Defaults to all of them.
+        indexes (list):
+            The names of the view columns to index, e.g., ``['nsa.z']``.
+            The ``pk:`` columns are always indexed.
+        rebuild (bool):
+            If True, existing views are dropped and created again, e.g., after
+            changing the best parameters. Otherwise, they are left untouched.
+        session:
+            The SQLAlchemy session to use. Defaults to ``marvindb.session``.
+
+    Returns:
+        names (list):
+            The names of the views created.
+
+    """
+
+    session = session or marvindb.session
+
+    assert marvindb.isdbconnected, 'no DB connection found.'
+
+    created = []
+
+    with marvindb.db.engine.begin() as conn:
+
+        conn.execute('create schema if not exists {0}'.format(FLAT_SCHEMA))
+
+        for level in (levels or LEVELS):
+
+            name = get_view_name(release, level)
+            fullname = '{0}.{1}'.format(FLAT_SCHEMA, name)
+
+            if _view_exists(conn, name):
+                if not rebuild:
+                    continue
+                conn.execute('drop materialized view {0}'.format(fullname))
+
+            conn.execute('create materialized view {0} as {1}'.format(
+                fullname, _build_select(release, level, session)))
+
+            for ii, key in enumerate(_get_index_columns(conn, name, indexes)):
+                conn.execute('create index {0}_{1}_idx on {2} ("{3}")'.format(name, ii, fullname,
+                                                                             key))
+
+            conn.execute('analyze {0}'.format(fullname))
+            _write_signature(conn, release, level)
+
+            _views_cache.pop((release, level), None)
+            _fresh_cache.pop((release, level), None)
+            created.append(name)
+
+    return created
+
+
+def _get_index_columns(conn, name, indexes=None):
+    """Returns the view columns to index: the ``pk:`` columns and ``indexes``."""
+
+    sql = ("select attname from pg_attribute where attrelid = '{0}.{1}'::regclass "
+           "and attnum > 0 and not attisdropped order by attnum".format(FLAT_SCHEMA, name))
+    names = [row[0] for row in conn.execute(sql)]
+
+    return [key for key in names if key.startswith('pk:') or key in (indexes or [])]
+
+
+def refresh_flat_views(release, levels=None):
+    """Refreshes the flat views of a release after loading new data.
+
+    Parameters:
+        release (str):
+            The release of the views.
+        levels (list):
+            The views to refresh, among `LEVELS`. Defaults to all of them.
+
+    """
+
+    with marvindb.db.engine.begin() as conn:
+        for level in (levels or LEVELS):
+            name = get_view_name(release, level)
+            if _view_exists(conn, name):
+                conn.execute('refresh materialized view {0}.{1}'.format(FLAT_SCHEMA, name))
+                conn.execute('analyze {0}.{1}'.format(FLAT_SCHEMA, name))
+                _write_signature(conn, release, level)
+                _fresh_cache.pop((release, level), None)
+
+
+def drop_flat_views(release, levels=None):
+    """Drops the flat views of a release, so that queries use the joins again."""
+
+    with marvindb.db.engine.begin() as conn:
+        for level in (levels or LEVELS):
+            conn.execute('drop materialized view if exists {0}.{1}'.format(
+                FLAT_SCHEMA, get_view_name(release, level)))
+            _views_cache.pop((release, level), None)
+            _fresh_cache.pop((release, level), None)
+
+
+def get_flat_view(release, level):
+    """Returns the reflected flat view of a release and level, or None if it cannot be used.
+
+    The view is only returned if it exists and was built or refreshed from the
+    current data. A view found up to date is not checked again for
+    `FRESHNESS_TTL` seconds. Missing and out-of-date views are not cached, so
+    they are used as soon as they are built or refreshed.
+
+    """
+
+    from sqlalchemy import MetaData, Table
+    from sqlalchemy.exc import SQLAlchemyError
+
+    key = (release, level)
+
+    checked = _fresh_cache.get(key)
+    if key in _views_cache and checked is not None and time.time() - checked < FRESHNESS_TTL:
+        return _views_cache[key]
+
+    try:
+        with marvindb.db.engine.connect() as conn:
+            if not _is_fresh(conn, release, level):
+                _fresh_cache.pop(key, None)
+                return None
+            if key not in _views_cache:
+                _views_cache[key] = Table(get_view_name(release, level), MetaData(),
+                                          schema=FLAT_SCHEMA, autoload=True, autoload_with=conn)
+    except SQLAlchemyError:
+        return None
+
+    _fresh_cache[key] = time.time()
+
+    return _views_cache[key]
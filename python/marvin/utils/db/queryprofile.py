@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# queryprofile.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Profiling of local queries.
+
+If a `~marvin.tools.query.Query` is created with ``profile=True``, or
+``marvin.config.profile_queries`` is set, every local run records the rendered
+SQL, a hash of its plan, the number of rows, and the time spent counting,
+fetching, and building the results in ``history.query_profile``, linked to the
+query history row of its search filter::
+
+    >>> marvin.config.profile_queries = True
+    >>> results = Query(searchfilter='nsa.z < 0.1').run()
+    >>> get_slow_queries('MPL-6', limit=5)
+    [{'searchfilter': 'nsa.z<0.1', 'nprofiles': 3, 'mean_time': 2.1, ...}, ...]
+
+The plan hash only depends on the structure of the plan (node types,
+relations, indices, and joins), not on the costs, so a change of hash for the
+same search filter means that the planner chose a different plan.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import datetime
+import hashlib
+import json
+
+import six
+
+from marvin import marvindb
+
+
+__all__ = ['plan_hash', 'record_query_profile', 'get_slow_queries']
+
+
+# The URLs of the databases where the profile table is known to exist.
+_table_checked = set()
+
+_plan_keys = ['Node Type', 'Join Type', 'Strategy', 'Relation Name', 'Index Name',
+              'Parent Relationship']
+
+
+def _plan_structure(node):
+    """Returns the structure of a plan node and its children, without costs."""
+
+    structure = dict((key, node[key]) for key in _plan_keys if key in node)
+    structure['Plans'] = [_plan_structure(child) for child in node.get('Plans', [])]
+
+    return structure
+
+
+def plan_hash(plan):
+    """Returns a hash of the structure of a query plan.
+
+    Parameters:
+        plan (list or str):
+            The plan returned by ``EXPLAIN (FORMAT JSON)``, decoded or not.
+
+    Returns:
+        hash (str):
+            The md5 hex digest of the node types, relations, indices, and
+            joins of the plan. Costs, row estimates, and timings are ignored.
+
+    """
+
+    if isinstance(plan, six.string_types):
+        plan = json.loads(plan)
+
+    structure = _plan_structure(plan[0]['Plan'])
+
+    return hashlib.md5(json.dumps(structure, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _check_table(session, create=False):
+    """Returns True if the profile table exists, creating it if ``create=True``.
+
+    The database is only checked until the table is found, once per process.
+
+    """
+
+    engine = session.get_bind().engine
+    url = str(engine.url)
+
+    if url in _table_checked:
+        return True
+
+    table = marvindb.datadb.QueryProfile.__table__
+
+    if create:
+        table.create(bind=engine, checkfirst=True)
+    elif not table.exists(bind=engine):
+        return False
+
+    _table_checked.add(url)
+
+    return True
+
+
+def record_query_profile(query_meta, sql, plan, nrows, count_time=None, fetch_time=None,
+                         build_time=None, total_time=None, session=None):
+    """Stores the profile of a query run.
+
+    Parameters:
+        query_meta (`~marvin.db.models.DataModelClasses.QueryMeta`):
+            The query history row of the search filter.
+        sql (str):
+            The SQL executed by the query.
+        plan (list or str):
+            The plan of ``sql``, from ``EXPLAIN (FORMAT JSON)``.
+        nrows (int):
+            The number of rows returned.
+        count_time, fetch_time, build_time, total_time (float):
+            The time, in seconds, spent counting the results, fetching the
+            rows, building the `~marvin.tools.results.Results`, and in total.
+        session:
+            The SQLAlchemy session to use. Defaults to ``marvindb.session``.
+
+    Returns:
+        profile (`~marvin.db.models.DataModelClasses.QueryProfile`):
+            The new profile row.
+
+    """
+
+    session = session or marvindb.session
+
+    _check_table(session, create=True)
+
+    profile = marvindb.datadb.QueryProfile(query_pk=query_meta.pk, sql=sql,
+                                           plan_hash=plan_hash(plan), nrows=nrows,
+                                           count_time=count_time, fetch_time=fetch_time,
+                                           build_time=build_time, total_time=total_time,
+                                           created=datetime.datetime.now())
+
+    with session.begin():
+        session.add(profile)
+
+    return profile
+
+
+def get_slow_queries(release, limit=20, session=None):
+    """Returns the profiled search filters of a release, slowest first.
+
+    Parameters:
+        release (str):
+            The release of the queries.
+        limit (int):
+            The maximum number of search filters to return.
+        session:
+            The SQLAlchemy session to use. Defaults to ``marvindb.session``.
+
+    Returns:
+        queries (list):
+            A list of dictionaries with the ``searchfilter``, the number of
+            profiled runs (``nprofiles``), the mean and maximum total time,
+            the mean count, fetch, and build times, the maximum number of
+            rows, and the number of distinct plans (``nplans``), sorted by
+            decreasing mean total time. Empty if no query has been profiled.
+
+    """
+
+    from sqlalchemy import desc, func
+
+    session = session or marvindb.session
+
+    if not _check_table(session):
+        return []
+
+    meta = marvindb.datadb.QueryMeta
+    profile = marvindb.datadb.QueryProfile
+
+    mean_time = func.avg(profile.total_time).label('mean_time')
+
+    rows = session.query(meta.searchfilter,
+                         func.count(profile.pk).label('nprofiles'),
+                         mean_time,
+                         func.max(profile.total_time).label('max_time'),
+                         func.avg(profile.count_time).label('mean_count_time'),
+                         func.avg(profile.fetch_time).label('mean_fetch_time'),
+                         func.avg(profile.build_time).label('mean_build_time'),
+                         func.max(profile.nrows).label('max_rows'),
+                         func.count(func.distinct(profile.plan_hash)).label('nplans')).\
+        join(profile, profile.query_pk == meta.pk).\
+        filter(meta.release == release).\
+        group_by(meta.searchfilter).\
+        order_by(desc(mean_time)).\
+        limit(limit).all()
+
+    return [row._asdict() for row in rows]
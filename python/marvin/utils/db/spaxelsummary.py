@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# spaxelsummary.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Precomputed per-galaxy spaxel aggregates for ``npergood`` queries.
+
+A query such as ``npergood(junk.emline_gflux_ha_6564 > 25) >= 20`` needs, for
+each DAP file, the number of good spaxels and the number of spaxels satisfying
+the expression. Computing both with ``GROUP BY`` subqueries scans the whole
+spaxelprop table on every run. This module maintains two summary tables in
+``mangadapdb``:
+
+- ``spaxel_summary``: the number of good spaxels (``binid != -1``) for each
+  file and spaxelprop table.
+- ``spaxel_histogram``: for each file, spaxelprop table, and property, the
+  number of non-null values and the cumulative counts of values ``> edge``
+  and ``>= edge`` for a fixed list of edges.
+
+When the value in an expression is one of the edges of the property, the
+counts read from the histogram are exact and `~marvin.tools.query.Query`,
+with ``use_summary=True``, answers the query from the summary tables instead.
+Otherwise the query falls back to the full subqueries. Files without summary
+rows are not returned, so the tables must be rebuilt (or updated for the new
+files) every time spaxelprop data are loaded::
+
+    >>> from marvin import marvindb
+    >>> build_spaxel_summary(marvindb.dapdb.CleanSpaxelProp6,
+    ...                      ['emline_gflux_ha_6564', 'stellar_vel'])
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import time
+
+import numpy as np
+
+from marvin import marvindb
+
+
+__all__ = ['DEFAULT_EDGES', 'build_spaxel_summary', 'get_histogram_edges']
+
+
+# Common thresholds for fluxes, equivalent widths, velocities, and dispersions.
+_positive_edges = [0.1, 0.2, 0.5, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 25, 30, 40, 50, 60, 70,
+                   75, 80, 90, 100, 125, 150, 175, 200, 250, 300, 350, 400, 500, 750, 1000]
+DEFAULT_EDGES = sorted([-edge for edge in _positive_edges] + [0] + _positive_edges)
+
+# Time, in seconds, that the edges of a property are cached. A rebuild clears
+# the cache of its own process only, so other processes (e.g., the workers of
+# the web server) see new edges once their entries expire.
+EDGES_TTL = 60
+
+# (source, property) -> (edges, time cached). Properties without a usable
+# histogram are not cached, so that they are found once the summary is built.
+_edges_cache = {}
+
+
+def _create_tables(session):
+    """Creates the summary tables if they do not exist."""
+
+    bind = session.get_bind()
+
+    for model in [marvindb.dapdb.SpaxelSummary, marvindb.dapdb.SpaxelHistogram]:
+        model.__table__.create(bind=bind, checkfirst=True)
+
+
+def _good_filter(junkclass):
+    """Returns the filter for good spaxels, matching ``Query._getGoodSpaxels``."""
+
+    if 'CleanSpaxelProp' in junkclass.__name__:
+        return None
+
+    return junkclass.binid != -1
+
+
+def build_spaxel_summary(junkclass, properties, edges=None, file_pks=None, session=None):
+    """(Re)builds the summary rows for a spaxelprop table.
+
+    Parameters:
+        junkclass (class):
+            The spaxelprop model class, e.g., ``marvindb.dapdb.CleanSpaxelProp6``.
+        properties (list):
+            The names of the columns for which to build histograms.
+        edges (list):
+            The histogram edges. Queries whose value is one of the edges are
+            answered from the summary. Defaults to `DEFAULT_EDGES`.
+        file_pks (list):
+            If set, only the summaries for these files are rebuilt, e.g.,
+            after loading new data. Otherwise, the whole table is summarised.
+        session:
+            The SQLAlchemy session to use. Defaults to ``marvindb.session``.
+
+    """
+
+    from sqlalchemy import func, literal, select
+    from sqlalchemy.dialects import postgresql
+
+    session = session or marvindb.session
+    dapdb = marvindb.dapdb
+
+    assert marvindb.isdbconnected, 'no DB connection found.'
+
+    edges = sorted(set(float(edge) for edge in (edges or DEFAULT_EDGES)))
+    source = junkclass.__tablename__
+
+    _create_tables(session)
+
+    summary = dapdb.SpaxelSummary.__table__
+    histogram = dapdb.SpaxelHistogram.__table__
+
+    def _where(stmt, table_file_pk):
+        return stmt.where(table_file_pk.in_(file_pks)) if file_pks else stmt
+
+    # Removes the rows being rebuilt
+    session.execute(_where(summary.delete().where(summary.c.source == source),
+                           summary.c.file_pk))
+    session.execute(_where(histogram.delete().where(histogram.c.source == source)
+                           .where(histogram.c.property.in_(properties)),
+                           histogram.c.file_pk))
+
+    # Good spaxel counts
+    good = select([junkclass.file_pk, literal(source), func.count(junkclass.pk)])
+    good_filter = _good_filter(junkclass)
+    if good_filter is not None:
+        good = good.where(good_filter)
+    good = _where(good, junkclass.file_pk).group_by(junkclass.file_pk)
+
+    session.execute(summary.insert().from_select(['file_pk', 'source', 'goodcount'], good))
+
+    # Histograms. As in Query._getCountOf, all the spaxels are counted.
+    for prop in properties:
+
+        column = getattr(junkclass, prop)
+
+        nabove = postgresql.array([func.count(junkclass.pk).filter(column > edge)
+                                   for edge in edges])
+        natleast = postgresql.array([func.count(junkclass.pk).filter(column >= edge)
+                                     for edge in edges])
+
+        hist = select([junkclass.file_pk, literal(source), literal(prop),
+                       postgresql.array([literal(edge) for edge in edges]),
+                       func.count(column), nabove, natleast])
+        hist = _where(hist, junkclass.file_pk).group_by(junkclass.file_pk)
+
+        session.execute(histogram.insert().from_select(
+            ['file_pk', 'source', 'property', 'edges', 'nvalid', 'nabove', 'natleast'], hist))
+
+        _edges_cache.pop((source, prop), None)
+
+    session.commit()
+
+
+def get_histogram_edges(source, prop, session=None):
+    """Returns the histogram edges of a property, or None if it is not summarised.
+
+    None is also returned if the histograms of the property do not all use the
+    same edges, since the counts would then not be exact for all the files.
+    The lookup uses its own session, so a missing table does not affect the
+    transaction of ``session``. The edges are cached for `EDGES_TTL` seconds.
+
+    Parameters:
+        source (str):
+            The name of the spaxelprop table, e.g., ``'cleanspaxelprop6'``.
+        prop (str):
+            The name of the property.
+        session:
+            The SQLAlchemy session whose engine is used. Defaults to
+            ``marvindb.session``.
+
+    """
+
+    from sqlalchemy.exc import SQLAlchemyError
+    from sqlalchemy.orm import sessionmaker
+
+    key = (source, prop)
+
+    if key in _edges_cache:
+        edges, cached = _edges_cache[key]
+        if time.time() - cached < EDGES_TTL:
+            return edges
+        _edges_cache.pop(key, None)
+
+    session = session or marvindb.session
+    histogram = marvindb.dapdb.SpaxelHistogram
+
+    lookup = sessionmaker(bind=session.get_bind())()
+    try:
+        rows = lookup.query(histogram.edges).filter(histogram.source == source,
+                                                    histogram.property == prop).\
+            distinct().limit(2).all()
+    except SQLAlchemyError:
+        # The summary tables do not exist
+        rows = []
+    finally:
+        lookup.close()
+
+    if len(rows) != 1:
+        return None
+
+    edges = np.array(rows[0][0], dtype=float).tolist()
+    _edges_cache[key] = (edges, time.time())
+
+    return edges
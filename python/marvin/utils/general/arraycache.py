@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# arraycache.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Persistent local cache for arrays downloaded from the API.
+
+In remote mode, tools such as `~marvin.tools.cube.Cube` download whole
+extensions from the API. Those arrays are kept in memory by each instance,
+but a new instance for the same galaxy would download them again. Setting
+``marvin.config.array_cache`` to an `ArrayCache` makes the downloaded arrays
+persist on disk and be shared between all tools and processes on a host::
+
+    >>> from marvin.utils.general.arraycache import NpzArrayCache
+    >>> marvin.config.array_cache = NpzArrayCache('~/.marvin/arrays', max_size=10 * 1024**3)
+
+Any object implementing ``get(key)`` and ``set(key, array)`` can be used as a
+cache backend. `NpzArrayCache` stores each array as a compressed ``.npz``
+file.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import abc
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import six
+
+import marvin
+
+
+__all__ = ['ArrayCache', 'NpzArrayCache', 'get_array_cache', 'evict_lru']
+
+
+def evict_lru(directory, max_size, keep=None, suffix=None):
+    """Removes the least recently used files until a directory fits in ``max_size`` bytes.
+
+    Files are ordered by modification time, so readers are expected to touch
+    the files they use.
+
+    Parameters:
+        directory (str):
+            The directory to trim.
+        max_size (int):
+            The maximum total size of the files in the directory, in bytes.
+        keep (str):
+            A path that must not be removed (e.g., the file just written).
+        suffix (str):
+            If set, only files ending with ``suffix`` are considered.
+
+    """
+
+    entries = []
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name.endswith('.tmp') or not os.path.isfile(path):
+            continue
+        if suffix is not None and not name.endswith(suffix):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(entry[1] for entry in entries)
+
+    for __, size, path in sorted(entries):
+        if total <= max_size:
+            break
+        if path == keep:
+            continue
+        try:
+            # On POSIX, processes that have the file open keep their view.
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def get_array_cache():
+    """Returns the array cache configured in ``marvin.config.array_cache`` or None."""
+
+    return getattr(marvin.config, 'array_cache', None)
+
+
+class ArrayCache(six.with_metaclass(abc.ABCMeta, object)):
+    """Base class for array caches.
+
+    Keys are tuples of strings, e.g.,
+    ``(release, plateifu, extension, bintype, template)``.
+
+    """
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Returns the array for ``key`` or None if it is not cached."""
+
+        pass
+
+    @abc.abstractmethod
+    def set(self, key, array):
+        """Stores ``array`` with ``key``."""
+
+        pass
+
+    @abc.abstractmethod
+    def clear(self):
+        """Removes all the cached arrays."""
+
+        pass
+
+
+class NpzArrayCache(ArrayCache):
+    """An on-disk array cache that stores compressed ``.npz`` files.
+
+    Files are written to a temporary file and atomically renamed so that the
+    cache can be shared between processes.
+
+    Parameters:
+        directory (str):
+            The directory where the arrays are stored. Created if needed.
+        max_size (int):
+            The maximum total size of the cache in bytes. When exceeded after
+            a write, the least recently used arrays are removed. If ``None``,
+            the cache is not bounded.
+
+    """
+
+    def __init__(self, directory, max_size=None):
+
+        self.directory = os.path.expanduser(os.path.expandvars(directory))
+        self.max_size = max_size
+
+        if not os.path.exists(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+
+    def __repr__(self):
+
+        return '<NpzArrayCache (directory={0!r}, max_size={1!r})>'.format(self.directory,
+                                                                          self.max_size)
+
+    def _get_path(self, key):
+        """Returns the path of the file for a key."""
+
+        key = ':'.join(str(item) for item in key)
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+
+        return os.path.join(self.directory, digest + '.npz')
+
+    def get(self, key):
+
+        path = self._get_path(key)
+
+        try:
+            with np.load(path) as data:
+                array = data['data']
+            # Touches the file so that eviction is least-recently-used.
+            os.utime(path, None)
+        except (IOError, OSError, KeyError, ValueError):
+            return None
+
+        return array
+
+    def set(self, key, array):
+
+        if array is None:
+            return
+
+        path = self._get_path(key)
+
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as ff:
+                np.savez_compressed(ff, data=np.asarray(array))
+            os.rename(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        if self.max_size is not None:
+            evict_lru(self.directory, self.max_size, keep=path, suffix='.npz')
+
+    def clear(self):
+
+        evict_lru(self.directory, 0, suffix='.npz')
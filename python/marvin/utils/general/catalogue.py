@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# catalogue.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Indexed, shared access to the drpall and DAPall catalogues.
+
+Each catalogue is opened once per version, memory-mapped, and kept in a
+module-level registry. Hash indexes on the lookup columns (e.g.,
+``mangaid``, ``plateifu``, or ``(plateifu, daptype)``) are built on first
+use, so that single lookups are O(1) and a list of identifiers can be
+matched against the catalogue in a single pass::
+
+    >>> drpall = get_drpall_index(drpver='v2_3_1')
+    >>> drpall.find('1-209232', key='mangaid')
+    [1234]
+    >>> rows = drpall.lookup(['8485-1901', '7443-12701'], key='plateifu')
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import threading
+
+import numpy as np
+import six
+from astropy import table
+from astropy.io import fits
+
+import marvin
+
+
+__all__ = ['CatalogueIndex', 'get_drpall_index', 'get_dapall_index', 'clear_catalogues']
+
+
+_catalogues = {}
+_catalogues_lock = threading.Lock()
+
+
+def _as_str(column):
+    """Returns a column as an array of stripped strings."""
+
+    column = np.asarray(column)
+
+    if column.dtype.kind == 'S':
+        column = np.char.decode(column, 'ascii')
+    elif column.dtype.kind != 'U':
+        column = column.astype(six.text_type)
+
+    return np.char.strip(column)
+
+
+class CatalogueIndex(object):
+    """An indexed, read-only view of a FITS catalogue.
+
+    Parameters:
+        filename (str):
+            The path to the catalogue.
+        hdu (int or str):
+            The extension with the binary table.
+
+    Attributes:
+        header (`~astropy.io.fits.Header`):
+            The primary header of the file.
+        data (`~astropy.io.fits.FITS_rec`):
+            The memory-mapped table.
+
+    """
+
+    def __init__(self, filename, hdu=1):
+
+        self.filename = filename
+
+        hdulist = fits.open(filename, memmap=True)
+        self.header = hdulist[0].header
+        self.data = hdulist[hdu].data
+
+        self._columns = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+
+        return '<CatalogueIndex (filename={0!r}, n_rows={1})>'.format(self.filename,
+                                                                      len(self.data))
+
+    def __len__(self):
+
+        return len(self.data)
+
+    def get_column(self, name):
+        """Returns a column as an array of stripped strings.
+
+        Column names are case-insensitive.
+
+        """
+
+        name = name.lower()
+
+        if name not in self._columns:
+            self._columns[name] = _as_str(self.data[name])
+
+        return self._columns[name]
+
+    def _get_index(self, key):
+        """Returns (building it if needed) the hash index for a column or tuple of columns."""
+
+        key = tuple(kk.lower() for kk in key) if isinstance(key, (tuple, list)) else key.lower()
+
+        if key not in self._indexes:
+            with self._lock:
+                if key not in self._indexes:
+                    if isinstance(key, tuple):
+                        values = six.moves.zip(*[self.get_column(kk) for kk in key])
+                    else:
+                        values = self.get_column(key)
+
+                    index = {}
+                    for ii, value in enumerate(values):
+                        index.setdefault(value, []).append(ii)
+
+                    self._indexes[key] = index
+
+        return self._indexes[key]
+
+    def find(self, value, key='plateifu'):
+        """Returns the indices of all the rows matching a value.
+
+        Parameters:
+            value (str or tuple):
+                The value to match. A tuple if ``key`` is a tuple of columns.
+            key (str or tuple):
+                The column, or tuple of columns, to match.
+
+        Returns:
+            indices (list):
+                The matching row indices. Empty if there are no matches.
+
+        """
+
+        return self._get_index(key).get(value, [])
+
+    def get_indices(self, values, key='plateifu'):
+        """Returns the index of the first row matching each value.
+
+        Parameters:
+            values (list):
+                The values to match.
+            key (str or tuple):
+                The column, or tuple of columns, to match.
+
+        Returns:
+            indices (`numpy.ndarray`):
+                An integer array with the row index for each value, or -1 if
+                the value is not in the catalogue.
+
+        """
+
+        index = self._get_index(key)
+
+        return np.array([index.get(value, [-1])[0] for value in values], dtype=int)
+
+    def get_rows(self, indices):
+        """Returns an `~astropy.table.Table` with the rows at ``indices``."""
+
+        return table.Table(self.data[np.asarray(indices, dtype=int)])
+
+    def lookup(self, values, key='plateifu'):
+        """Returns the catalogue rows matching a list of values.
+
+        Parameters:
+            values (list):
+                The values to match.
+            key (str or tuple):
+                The column, or tuple of columns, to match.
+
+        Returns:
+            rows (`~astropy.table.Table`):
+                The first row matching each value, in the same order as
+                ``values``. Values not found in the catalogue are skipped.
+
+        """
+
+        indices = self.get_indices(values, key=key)
+
+        return self.get_rows(indices[indices >= 0])
+
+
+def _get_catalogue(filename, hdu=1):
+    """Returns the `CatalogueIndex` for a file from the registry."""
+
+    if filename not in _catalogues:
+        with _catalogues_lock:
+            if filename not in _catalogues:
+                _catalogues[filename] = CatalogueIndex(filename, hdu=hdu)
+
+    return _catalogues[filename]
+
+
+def get_drpall_index(drpver=None, drpall=None):
+    """Returns the shared `CatalogueIndex` for a drpall file.
+
+    Parameters:
+        drpver (str):
+            The DRP version. Defaults to the version for ``config.release``.
+        drpall (str):
+            The path to the drpall file. If not set, the default file for
+            ``drpver`` is used.
+
+    """
+
+    if not drpall:
+        drpver = drpver or marvin.config.lookUpVersions()[0]
+        drpall = marvin.config._getDrpAllPath(drpver=drpver)
+
+    if not drpall:
+        raise ValueError('no drpall file can be found.')
+
+    return _get_catalogue(drpall)
+
+
+def get_dapall_index(drpver, dapver):
+    """Returns the shared `CatalogueIndex` for the DAPall file of ``(drpver, dapver)``."""
+
+    from marvin.utils.general.general import get_dapall_file
+
+    dapall = get_dapall_file(drpver, dapver)
+
+    assert dapall is not None, 'cannot build DAPall file.'
+
+    return _get_catalogue(dapall, hdu=-1)
+
+
+def clear_catalogues():
+    """Removes all the catalogues from the registry."""
+
+    with _catalogues_lock:
+        _catalogues.clear()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# fitsaccess.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Lazy, memory-mapped access to MaNGA FITS files.
+
+Uncompressed FITS files are opened with ``memmap=True`` so that slicing
+``hdulist['FLUX'].data[:, y, x]`` only reads the pages that contain those
+pixels. Gzipped files cannot be memory-mapped; astropy decompresses each
+extension fully into memory the first time its data is accessed. If
+``marvin.config.fits_cache_dir`` is set, gzipped files are decompressed once
+into that directory and the uncompressed copy is memory-mapped instead. The
+cache is shared between processes and its total size can be bounded with
+``marvin.config.fits_cache_size``, evicting the least recently used files.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import gzip
+import hashlib
+import os
+import shutil
+import tempfile
+
+from astropy.io import fits
+
+import marvin
+from marvin.utils.general.arraycache import evict_lru
+
+
+__all__ = ['open_fits', 'get_uncompressed_path', 'clear_fits_cache']
+
+
+# Default of open_fits, so that None can be passed to disable the configured cache.
+_from_config = object()
+
+
+def _is_gzip(filename):
+    """Returns True if the file is gzip-compressed."""
+
+    with open(filename, 'rb') as ff:
+        return ff.read(2) == b'\x1f\x8b'
+
+
+def _cache_name(filename):
+    """Returns the name of the uncompressed copy of ``filename`` in the cache.
+
+    The name includes a hash of the absolute path, size, and modification time
+    of the original file, so that a modified file is not served stale.
+
+    """
+
+    stat = os.stat(filename)
+    key = '{0}:{1}:{2}'.format(os.path.abspath(filename), stat.st_size, stat.st_mtime)
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()[0:16]
+
+    basename = os.path.basename(filename)
+    if basename.endswith('.gz'):
+        basename = basename[0:-3]
+
+    return '{0}_{1}'.format(digest, basename)
+
+
+def get_uncompressed_path(filename, cache_dir, max_size=None):
+    """Returns the path to an uncompressed copy of a gzipped file.
+
+    The copy is created in ``cache_dir`` if it does not exist. The file is
+    first decompressed to a temporary file and then atomically renamed, so
+    several processes can share the same cache directory.
+
+    Parameters:
+        filename (str):
+            The path to the gzipped file.
+        cache_dir (str):
+            The directory where the uncompressed copies are stored.
+        max_size (int):
+            The maximum total size of the cache, in bytes. If ``None``, the
+            cache is not bounded.
+
+    Returns:
+        path (str):
+            The path to the uncompressed file.
+
+    """
+
+    cache_dir = os.path.expanduser(os.path.expandvars(cache_dir))
+    if not os.path.exists(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+
+    cached = os.path.join(cache_dir, _cache_name(filename))
+
+    if os.path.exists(cached):
+        # Touches the file so that eviction is least-recently-used.
+        os.utime(cached, None)
+        return cached
+
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+
+    try:
+        with gzip.open(filename, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 16 * 1024 * 1024)
+        os.rename(tmp, cached)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    if max_size is not None:
+        evict_lru(cache_dir, max_size, keep=cached)
+
+    return cached
+
+
+def clear_fits_cache(cache_dir=None):
+    """Removes all the files in the uncompressed FITS cache.
+
+    Parameters:
+        cache_dir (str):
+            The cache directory. Defaults to ``marvin.config.fits_cache_dir``.
+
+    """
+
+    cache_dir = cache_dir or marvin.config.fits_cache_dir
+    if not cache_dir:
+        return
+
+    cache_dir = os.path.expanduser(os.path.expandvars(cache_dir))
+    if os.path.isdir(cache_dir):
+        evict_lru(cache_dir, 0)
+
+
+def open_fits(filename, cache_dir=_from_config, max_size=_from_config):
+    """Opens a FITS file with memory-mapped, lazily loaded extensions.
+
+    Parameters:
+        filename (str):
+            The path to the FITS file.
+        cache_dir (str):
+            The directory in which to cache uncompressed copies of gzipped
+            files. Defaults to ``marvin.config.fits_cache_dir``. If None,
+            gzipped files are opened directly, even if a cache is configured.
+        max_size (int):
+            The maximum size of the cache in bytes. Defaults to
+            ``marvin.config.fits_cache_size``. If None, the cache is not
+            bounded.
+
+    Returns:
+        hdulist (`~astropy.io.fits.HDUList`):
+            The opened file. Note that its ``filename()`` may point to the
+            cached, uncompressed copy.
+
+    """
+
+    cache_dir = marvin.config.fits_cache_dir if cache_dir is _from_config else cache_dir
+    max_size = marvin.config.fits_cache_size if max_size is _from_config else max_size
+
+    if cache_dir and _is_gzip(filename):
+        filename = get_uncompressed_path(filename, cache_dir, max_size=max_size)
+
+    return fits.open(filename, memmap=True)
@@ -15,6 +15,7 @@ from __future__ import absolute_import
 import collections
 import inspect
 import sys
+import threading
 import warnings
 import contextlib
 import re
@@ -22,13 +23,14 @@ import re
 from collections import OrderedDict
 from builtins import range
 
+import six
+
 import numpy as np
 
 from scipy.interpolate import griddata
 import matplotlib.pyplot as plt
 import PIL
 
-from astropy import table
 from astropy import wcs
 from astropy.units.quantity import Quantity
 
@@ -59,14 +61,14 @@ except ImportError as e:
 
 # General utilities
 __all__ = ('convertCoords', 'parseIdentifier', 'mangaid2plateifu', 'findClosestVector',
-           'getWCSFromPng', 'convertImgCoords', 'getSpaxelXY',
-           'downloadList', 'getSpaxel', 'get_drpall_row', 'getDefaultMapPath',
+           'getWCSFromPng', 'convertImgCoords', 'getSpaxelXY', 'getSpaxelRowsXY',
+           'getSpaxelRowsColumn',
+           'downloadList', 'getSpaxel', 'getSpaxels', 'get_drpall_row', 'getDefaultMapPath',
            'getDapRedux', 'get_nsa_data', '_check_file_parameters', 'get_plot_params',
            'invalidArgs', 'missingArgs', 'getRequiredArgs', 'getKeywordArgs',
            'isCallableWithArgs', 'map_bins_to_column', '_sort_dir',
-           'get_dapall_file', 'temp_setattr', 'map_dapall', 'turn_off_ion', 'memory_usage')
-
-drpTable = {}
+           'get_dapall_file', 'temp_setattr', 'map_dapall', 'turn_off_ion', 'memory_usage',
+           'prefetch')
 
 
 def getSpaxel(cube=True, maps=True, modelcube=True,
@@ -125,10 +127,83 @@ def getSpaxel(cube=True, maps=True, modelcube=True,
 
     # TODO: for now let's put these imports here, but we should fix the
     # circular imports soon.
+    import marvin.tools.spaxel
+
+    xCube, yCube, isScalar = _get_spaxel_indices(cube=cube, maps=maps, modelcube=modelcube,
+                                                 x=x, y=y, ra=ra, dec=dec, xyorig=xyorig)
+
+    _spaxels = []
+    for ii in range(len(xCube)):
+        _spaxels.append(
+            marvin.tools.spaxel.SpaxelBase(xCube[ii], yCube[ii],
+                                           cube=cube, maps=maps, modelcube=modelcube,
+                                           **kwargs))
+
+    if len(_spaxels) == 1 and isScalar:
+        return _spaxels[0]
+    else:
+        return _spaxels
+
+
+def getSpaxels(cube=True, maps=True, modelcube=True,
+               x=None, y=None, ra=None, dec=None, xyorig=None, **kwargs):
+    """Returns a |spaxelbatch| with the quantities for a list of coordinates.
+
+    Like :func:`getSpaxel` but, instead of creating one |spaxel| per
+    coordinate, each extension in the cube, maps, and modelcube is indexed
+    only once for all the coordinates. The result is a columnar
+    |spaxelbatch| in which each quantity is an array with one row per
+    input coordinate.
+
+    This function is intended to be called by
+    :func:`~marvin.tools.cube.Cube.getSpaxels`,
+    :func:`~marvin.tools.maps.Maps.getSpaxels`, and
+    :func:`~marvin.tools.modelcube.ModelCube.getSpaxels`. At least one of
+    ``cube``, ``maps``, or ``modelcube`` must be a Marvin tools instance.
+
+    Parameters:
+        cube,maps,modelcube:
+            As in :func:`getSpaxel`. If ``True``, the corresponding object
+            will be initialised from the input Marvin tools instance.
+        x,y,ra,dec,xyorig:
+            As in :func:`getSpaxel`.
+        kwargs (dict):
+            Arguments to be passed to `~marvin.tools.maps.Maps` or
+            `~marvin.tools.modelcube.ModelCube` if they need to be
+            initialised (e.g., ``bintype`` or ``template``).
+
+    Returns:
+        batch (`~marvin.tools.spaxel.SpaxelBatch`):
+            The |spaxelbatch| with the quantities for the input coordinates,
+            in the same order as the inputs.
+
+    .. |spaxel| replace:: :class:`~marvin.tools.spaxel.Spaxel`
+    .. |spaxelbatch| replace:: :class:`~marvin.tools.spaxel.SpaxelBatch`
+
+    """
+
+    import marvin.tools.spaxel
+
+    xCube, yCube, __ = _get_spaxel_indices(cube=cube, maps=maps, modelcube=modelcube,
+                                           x=x, y=y, ra=ra, dec=dec, xyorig=xyorig)
+
+    return marvin.tools.spaxel.SpaxelBatch.from_tools(xCube, yCube, cube=cube, maps=maps,
+                                                      modelcube=modelcube, **kwargs)
+
+
+def _get_spaxel_indices(cube=True, maps=True, modelcube=True,
+                        x=None, y=None, ra=None, dec=None, xyorig=None):
+    """Checks the inputs of `.getSpaxel` and converts them to array indices.
+
+    Returns the arrays of ``x`` and ``y`` indices (0-indexed, relative to
+    the lower-left corner) and a boolean that is ``True`` if the input
+    coordinates were scalars.
+
+    """
+
     import marvin.tools.cube
     import marvin.tools.maps
     import marvin.tools.modelcube
-    import marvin.tools.spaxel
 
     # Checks that the cube and maps data are correct
     assert cube or maps or modelcube, \
@@ -180,20 +255,10 @@ def getSpaxel(cube=True, maps=True, modelcube=True,
         ww = modelcube.wcs if inputMode == 'sky' else None
         cube_shape = modelcube._shape
 
-    iCube, jCube = zip(convertCoords(coords, wcs=ww, shape=cube_shape,
-                                     mode=inputMode, xyorig=xyorig).T)
+    yCube, xCube = convertCoords(coords, wcs=ww, shape=cube_shape,
+                                 mode=inputMode, xyorig=xyorig).T
 
-    _spaxels = []
-    for ii in range(len(iCube[0])):
-        _spaxels.append(
-            marvin.tools.spaxel.SpaxelBase(jCube[0][ii], iCube[0][ii],
-                                           cube=cube, maps=maps, modelcube=modelcube,
-                                           **kwargs))
-
-    if len(_spaxels) == 1 and isScalar:
-        return _spaxels[0]
-    else:
-        return _spaxels
+    return xCube, yCube, isScalar
 
 
 def convertCoords(coords, mode='sky', wcs=None, xyorig='center', shape=None):
@@ -329,13 +394,11 @@ def mangaid2plateifu(mangaid, mode='auto', drpall=None, drpver=None):
         if not drpall:
             raise ValueError('no drpall file can be found.')
 
-        # Loads the drpall table if it was not cached from a previos session.
-        if drpver not in drpTable:
-            drpTable[drpver] = table.Table.read(drpall)
+        from marvin.utils.general.catalogue import get_drpall_index
 
-        mangaids = np.array([mm.strip() for mm in drpTable[drpver]['mangaid']])
+        drpall_index = get_drpall_index(drpver=drpver, drpall=drpall)
 
-        plateifus = drpTable[drpver][np.where(mangaids == mangaid)]
+        plateifus = drpall_index.get_rows(drpall_index.find(mangaid.strip(), key='mangaid'))
 
         if len(plateifus) > 1:
             warnings.warn('more than one plate-ifu found for mangaid={0}. '
@@ -635,6 +698,89 @@ def getSpaxelXY(cube, plateifu, x, y):
     return spaxel
 
 
+def getSpaxelRowsXY(table, x, y, *criteria):
+    """Gets the DB rows for a list of spaxel coordinates in a single query.
+
+    This function is mostly intended for internal use.
+
+    Parameters:
+        table (SQLAlchemy model class):
+            The table to query (e.g., ``datadb.Spaxel``). Must have ``x`` and
+            ``y`` columns.
+        x,y (array):
+            The coordinates of the spaxels in the database.
+        criteria:
+            Additional filters to apply, usually restricting the query to
+            the rows of a single cube or file.
+
+    Returns:
+        rows (list):
+            The SQLAlchemy rows, in the same order as the input coordinates.
+
+    """
+
+    import sqlalchemy
+
+    mdb = marvin.marvindb
+
+    coords = list(zip(np.atleast_1d(x).tolist(), np.atleast_1d(y).tolist()))
+
+    # Undefers all columns so that the array columns are not loaded one row at a time.
+    rows = mdb.session.query(table).options(sqlalchemy.orm.undefer('*')).filter(
+        sqlalchemy.tuple_(table.x, table.y).in_(list(set(coords))), *criteria).all()
+
+    rows = dict(((row.x, row.y), row) for row in rows)
+
+    missing = [coord for coord in coords if coord not in rows]
+    if len(missing) > 0:
+        raise MarvinError('Could not retrieve {0} spaxels from {1}: No Results Found for '
+                          'positions {2}'.format(len(missing), table.__tablename__, missing[:5]))
+
+    return [rows[coord] for coord in coords]
+
+
+def getSpaxelRowsColumn(rows, colname, ext=None, nwave=None):
+    """Returns the values of a column for a list of spaxel rows as an array.
+
+    This function is mostly intended for internal use. NULL values are
+    replaced by a fill value that depends on ``ext``: ``NaN`` for values,
+    zero (no information) for ``ivar``, and zero for ``mask``. For array
+    columns (e.g., spectra), a NULL row is replaced by an array filled with
+    that value.
+
+    Parameters:
+        rows (list):
+            The SQLAlchemy rows, as returned by `getSpaxelRowsXY`.
+        colname (str):
+            The name of the column.
+        ext ({None, 'ivar', 'mask'}):
+            The kind of column, which defines the dtype and the fill value.
+        nwave (int or None):
+            The length of the values of an array column. If None, it is
+            taken from the first row that is not NULL.
+
+    Returns:
+        array (`numpy.ndarray`):
+            A ``float64`` array (``int64`` for masks) with one element per row
+            or, for array columns, with shape ``(len(rows), nwave)``.
+
+    """
+
+    dtype, fill_value = (np.int64, 0) if ext == 'mask' else \
+        (np.float64, 0. if ext == 'ivar' else np.nan)
+
+    values = [getattr(row, colname) for row in rows]
+
+    if nwave is None:
+        first = next((value for value in values if value is not None), None)
+        if first is not None and np.ndim(first) > 0:
+            nwave = len(first)
+
+    null_value = fill_value if nwave is None else np.full(nwave, fill_value, dtype=dtype)
+
+    return np.array([null_value if value is None else value for value in values], dtype=dtype)
+
+
 def getDapRedux(release=None):
     """Retrieve SAS url link to the DAP redux directory.
 
@@ -843,24 +989,17 @@ def downloadList(inputlist, dltype='cube', **kwargs):
 def get_drpall_row(plateifu, drpver=None, drpall=None):
     """Returns a dictionary from drpall matching the plateifu."""
 
-    from marvin import config
+    from marvin.utils.general.catalogue import get_drpall_index
 
-    if drpall:
-        drpall_table = table.Table.read(drpall)
-    else:
-        config_drpver, __ = config.lookUpVersions()
-        drpver = drpver if drpver else config_drpver
-        if drpver not in drpTable:
-            drpall = drpall if drpall else config._getDrpAllPath(drpver=drpver)
-            drpTable[drpver] = table.Table.read(drpall)
-        drpall_table = drpTable[drpver]
+    drpall_index = get_drpall_index(drpver=drpver, drpall=drpall)
 
-    row = drpall_table[drpall_table['plateifu'] == plateifu]
+    indices = drpall_index.find(plateifu.strip(), key='plateifu')
 
-    if len(row) != 1:
-        raise ValueError('{0} results found for {1} in drpall table'.format(len(row), plateifu))
+    if len(indices) != 1:
+        raise ValueError('{0} results found for {1} in drpall table'.format(len(indices),
+                                                                            plateifu))
 
-    return row[0]
+    return drpall_index.get_rows(indices)[0]
 
 
 def _db_row_to_dict(row, remove_columns=False):
@@ -1489,3 +1628,67 @@ def memory_usage(where):
     print("Memory summary: {0}".format(where))
     pympler.summary.print_(mem_summary, limit=2)
     print("VM: {0:.2f}Mb".format(get_virtual_memory_usage_kb() / 1024.0))
+
+
+def prefetch(iterable, size=1):
+    """Iterates over an iterable while fetching the next items in a background thread.
+
+    Useful to overlap I/O (e.g., fetching the next page of query results) with
+    the processing of the current item. At most ``size`` items are kept in
+    memory ahead of the consumer. Exceptions raised by ``iterable`` are
+    re-raised in the consumer. If the consumer stops early, the background
+    thread stops and the iterable is closed, if possible.
+
+    Parameters:
+        iterable (iterable):
+            The iterable to consume.
+        size (int):
+            The number of items to fetch ahead of the consumer.
+
+    Example:
+        >>> for batch in prefetch(query.stream(prefetch=False)):
+        >>>     process(batch)
+
+    """
+
+    queue = six.moves.queue.Queue(maxsize=size)
+    stop = threading.Event()
+    done = object()
+
+    def _put(item):
+        """Puts an item in the queue unless the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except six.moves.queue.Full:
+                continue
+        return False
+
+    def _producer():
+        try:
+            for item in iterable:
+                if not _put((item, None)):
+                    break
+            else:
+                _put((done, None))
+        except Exception as ee:
+            _put((done, ee))
+        finally:
+            if stop.is_set() and hasattr(iterable, 'close'):
+                iterable.close()
+
+    thread = threading.Thread(target=_producer)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            item, error = queue.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
@@ -165,39 +165,94 @@ class Maskbit(object):
 
         return bits_set
 
-    def _get_uniq_bits(self, values):
-        ''' Return a dictionary of unique bits
+    def _get_values(self, values=None):
+        """Returns the mask values as an int64 array, defaulting to ``Maskbit.mask``."""
+
+        assert (self.mask is not None) or (values is not None), 'Must provide values.'
+
+        values = np.asarray(self.mask if values is None else values)
+
+        return values.astype(np.int64, copy=False)
+
+    def _get_planes(self, values):
+        """Returns a boolean array of shape ``values.shape + (nbits,)`` with the bits set."""
+
+        bits = self.schema.bit.values.astype(np.int64)
+
+        return np.bitwise_and(values[..., np.newaxis], np.left_shift(1, bits)) != 0
+
+    def values_to_bit_array(self, values=None, flatten=False):
+        """Convert mask values to a boolean array of the bits set.
+
+        The last axis runs over the bits of the schema, in order. The array
+        takes one byte per value and bit, so for large masks it may be
+        preferable to use `any_of` and `all_of`, which return one boolean
+        per value.
 
         Parameters:
-            values (list):
-                A flattened list of mask values
+            values (int or array):
+                Mask values. If ``None``, apply to entire
+                ``Maskbit.mask`` array.  Default is ``None``.
+            flatten (bool):
+                If True, returns an array of shape ``(N, nbits)``, with the
+                values flattened. Otherwise, the shape is
+                ``values.shape + (nbits,)``.
 
         Returns:
-            dict:
-                A unique dictionary of {mask value: bit list} as {key: value}
-        '''
-        uniqvals = set(values)
-        vdict = {v: self._value_to_bits(v, self.schema.bit.values) for v in uniqvals}
-        return vdict
+            array: Boolean array of the bits set.
+
+        Example:
+            >>> maps = Maps(plateifu='8485-1901')
+            >>> ha = maps['emline_gflux_ha_6564']
+            >>> ha.pixmask.values_to_bit_array(flatten=True).shape
+            (1156, 31)
+        """
+        values = self._get_values(values)
+        planes = self._get_planes(values)
+
+        return planes.reshape(-1, planes.shape[-1]) if flatten else planes
 
-    def _get_uniq_labels(self, values):
-        ''' Return a dictionary of unique labels
+    def encode_label_sets(self, values=None):
+        """Encode mask values as indices into a list of the distinct sets of labels.
 
         Parameters:
-            values (list):
-                A flattened list of mask values
+            values (int or array):
+                Mask values. If ``None``, apply to entire
+                ``Maskbit.mask`` array.  Default is ``None``.
 
         Returns:
-            dict:
-                A unique dictionary of {mask value: labels list} as {key: value}
-        '''
-        uniqbits = self._get_uniq_bits(values)
-        uniqlabels = {k: self.schema.label[self.schema.bit.isin(v)].values.tolist() for k, v in uniqbits.items()}
-        return uniqlabels
+            tuple: ``(codes, label_sets)``, where ``codes`` is an integer
+            array with the shape of the values and ``label_sets[codes[i]]``
+            is the list of labels set in the value ``i``.
+
+        Example:
+            >>> maps = Maps(plateifu='8485-1901')
+            >>> ha = maps['emline_gflux_ha_6564']
+            >>> codes, label_sets = ha.pixmask.encode_label_sets()
+            >>> label_sets
+            [[], ['NOCOV', 'LOWCOV', 'NOVALUE', 'DONOTUSE']]
+        """
+        values = self._get_values(values)
+        uniqvals, codes = np.unique(values, return_inverse=True)
+
+        return codes.ravel().reshape(values.shape), self._decode_unique(uniqvals, convert_to='labels')
+
+    def _decode_unique(self, uniqvals, convert_to='bits'):
+        """Returns the list of bits or labels set for each of a 1-D array of values."""
+
+        if convert_to == 'bits':
+            names = self.schema.bit.values
+        elif convert_to == 'labels':
+            names = self.schema.label.values
+
+        return [names[planes].tolist() for planes in self._get_planes(uniqvals)]
 
     def _get_a_set(self, values, convert_to='bits'):
         ''' Convert mask values to a list of either bit or label sets.
 
+        Only the distinct values are decoded, with numpy bitwise operations,
+        and the lists of equal values are the same object.
+
         Parameters:
             values (int or array):
                 Mask values. If ``None``, apply to entire
@@ -210,28 +265,18 @@ class Maskbit(object):
                 Bits/Labels that are set.
 
         '''
-        assert (self.mask is not None) or (values is not None), 'Must provide values.'
-
-        values = np.array(self.mask) if values is None else np.array(values)
-        ndim = values.ndim
-        shape = values.shape
+        values = self._get_values(values)
 
-        assert ndim <= 3, '`value` must be int, 1-D array, 2-D array, or 3-D array.'
+        assert values.ndim <= 3, '`value` must be int, 1-D array, 2-D array, or 3-D array.'
 
-        flatmask = values.flatten()
+        uniqvals, inverse = np.unique(values, return_inverse=True)
 
-        if convert_to == 'bits':
-            uniqvals = self._get_uniq_bits(flatmask)
-        elif convert_to == 'labels':
-            uniqvals = self._get_uniq_labels(flatmask)
+        # Filled item by item, as numpy would broadcast lists of equal length.
+        uniqsets = np.empty(len(uniqvals), dtype=object)
+        for ii, uniqset in enumerate(self._decode_unique(uniqvals, convert_to=convert_to)):
+            uniqsets[ii] = uniqset
 
-        vallist = list(map(lambda x: uniqvals[x], flatmask))
-        if ndim > 0:
-            vals_set = np.reshape(vallist, shape).tolist()
-        else:
-            vals_set = vallist[0]
-
-        return vals_set
+        return uniqsets[inverse.ravel()].reshape(values.shape).tolist()
 
     def _value_to_bits(self, value, bits_all):
         """Convert mask value to a list of bits.
@@ -315,7 +360,7 @@ class Maskbit(object):
             labels = [labels]
 
         bit_values = [self.schema.bit[self.schema.label == label].values[0] for label in labels]
-        return np.sum([2**value for value in bit_values])
+        return sum(1 << int(value) for value in bit_values)
 
     def labels_to_bits(self, labels):
         """Convert bit labels into bits.
@@ -373,6 +418,52 @@ class Maskbit(object):
         """
         assert dtype in [int, bool], '``dtype`` must be either ``int`` or ``bool``.'
 
-        bits = self.labels_to_bits(labels)
-        mask = mask if mask is not None else self.mask
-        return np.sum([mask & 2**bit for bit in bits], axis=0).astype(dtype)
+        value = self.labels_to_value(labels)
+        mask = self._get_values(mask)
+
+        if dtype is bool:
+            return np.bitwise_and(mask, value) != 0
+
+        return np.bitwise_and(mask, value).astype(dtype)
+
+    def any_of(self, labels, mask=None):
+        """Boolean mask of the values with any of the bits of the labels set.
+
+        Parameters:
+            labels (str or list):
+                Labels of bits.
+            mask (int or array):
+                User-defined mask. If ``None``, use ``self.mask``.
+                Default is ``None``.
+
+        Returns:
+            array: True where any of the bits is set.
+
+        Example:
+            >>> maps = Maps(plateifu='8485-1901')
+            >>> ha = maps['emline_gflux_ha_6564']
+            >>> ha.pixmask.any_of(['NOCOV', 'DONOTUSE'])
+        """
+        return np.bitwise_and(self._get_values(mask), self.labels_to_value(labels)) != 0
+
+    def all_of(self, labels, mask=None):
+        """Boolean mask of the values with all the bits of the labels set.
+
+        Parameters:
+            labels (str or list):
+                Labels of bits.
+            mask (int or array):
+                User-defined mask. If ``None``, use ``self.mask``.
+                Default is ``None``.
+
+        Returns:
+            array: True where all the bits are set.
+
+        Example:
+            >>> maps = Maps(plateifu='8485-1901')
+            >>> ha = maps['emline_gflux_ha_6564']
+            >>> ha.pixmask.all_of(['NOCOV', 'LOWCOV'])
+        """
+        value = self.labels_to_value(labels)
+
+        return np.bitwise_and(self._get_values(mask), value) == value
@@ -0,0 +1,479 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# querycache.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Result-level cache for local queries.
+
+`~marvin.tools.query.Query.run` executes the SQL through a raw cursor, so the
+dogpile ``FromCache`` option attached to the ORM query is never used. If
+``marvin.config.query_cache`` is set to a `QueryCache`, the rows returned by a
+query, along with its counts, are cached with a key built from the normalised
+search filter, the parameters, the sort, the release, and the requested slice
+(see `make_query_key`). Repeating a query returns the cached rows without
+touching the database::
+
+    >>> from marvin.utils.general.querycache import LRUQueryCache
+    >>> marvin.config.query_cache = LRUQueryCache(max_entries=256)
+
+Three backends are provided: `LRUQueryCache` (in-process), `DiskQueryCache`
+(shared between processes on a host), and `MemcachedQueryCache`. The cached
+results of a release can be invalidated with ``invalidate(release)``, e.g.,
+after reloading its data, and each cache keeps hit and miss counts in
+``metrics``.
+
+Independently of the results cache, `compiled_cache` keeps the work done to
+build a query before it reaches the database: the parsed search filters, the
+join plans, and the SQL of the statements run, with their parameters plugged
+in, so that repeated queries, e.g., from the web search form or the API, skip
+the parsing and part of the compilation.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import abc
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import six
+from six.moves import cPickle as pickle
+
+import marvin
+from marvin.utils.general.arraycache import evict_lru
+
+
+__all__ = ['QueryCache', 'LRUQueryCache', 'DiskQueryCache', 'MemcachedQueryCache',
+           'CompiledQueryCache', 'compiled_cache', 'get_query_cache', 'make_query_key',
+           'normalise_searchfilter']
+
+
+def get_query_cache():
+    """Returns the query cache configured in ``marvin.config.query_cache`` or None."""
+
+    return getattr(marvin.config, 'query_cache', None)
+
+
+def normalise_searchfilter(searchfilter):
+    """Normalises the whitespace and boolean operators of a search filter.
+
+    Values are not modified, so filters that only differ in the case of a
+    value are considered different. Quoted strings are kept as they are.
+
+    """
+
+    if not searchfilter:
+        return ''
+
+    # the odd elements are the quoted strings
+    parts = re.split(r'(\'[^\']*\'|"[^"]*")', searchfilter.strip())
+    parts[::2] = [_normalise_unquoted(part) for part in parts[::2]]
+
+    return ''.join(parts)
+
+
+def _normalise_unquoted(text):
+    """Normalises a part of a search filter that is not within quotes."""
+
+    text = re.sub(r'\s*(<=|>=|!=|==|=|<|>)\s*', r' \1 ', text)
+    text = re.sub(r'\(\s*', '(', text)
+    text = re.sub(r'\s*\)', ')', text)
+    text = re.sub(r'(?i)\b(and|or|not)\b', lambda mm: mm.group(1).lower(), text)
+
+    return re.sub(r'\s+', ' ', text)
+
+
+def make_query_key(searchfilter, params, release, sort=None, order='asc',
+                   start=None, end=None, limit=None, return_all=False, count_threshold=None,
+                   count_mode='exact', pagination='offset', use_summary=False,
+                   use_flat_views=False):
+    """Returns the cache key for a query.
+
+    Parameters:
+        searchfilter (str):
+            The search filter. It is normalised with `normalise_searchfilter`.
+        params (list):
+            The full names of the parameters returned by the query, in order.
+        release (str):
+            The release of the query.
+        sort, order (str):
+            The sort parameter and order.
+        start, end (int):
+            The requested slice.
+        limit (int):
+            The number of rows returned if the query is truncated.
+        return_all (bool):
+            Whether all the rows were requested.
+        count_threshold (int):
+            The number of rows above which the query is truncated to ``limit``.
+        count_mode, pagination (str):
+            How the total count is computed and how pages are retrieved.
+        use_summary, use_flat_views (bool):
+            Whether the query was built against the spaxel summary tables or
+            the flat views. These can return a different set of rows than
+            the normal query, so they are part of the key.
+
+    Returns:
+        key (tuple):
+            A tuple ``(release, digest)``. The release is kept separate so
+            that the cache can be invalidated per release.
+
+    """
+
+    key = json.dumps({'searchfilter': normalise_searchfilter(searchfilter),
+                      'params': list(params or []),
+                      'sort': sort, 'order': order,
+                      'start': start, 'end': end,
+                      'limit': limit, 'return_all': bool(return_all),
+                      'count_threshold': count_threshold,
+                      'count_mode': count_mode, 'pagination': pagination,
+                      'use_summary': bool(use_summary),
+                      'use_flat_views': bool(use_flat_views)},
+                     sort_keys=True)
+
+    return (release, hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+class QueryCache(six.with_metaclass(abc.ABCMeta, object)):
+    """Base class for query caches.
+
+    Subclasses implement ``_get``, ``_set``, and ``_invalidate``. Keys are the
+    tuples returned by `make_query_key`.
+
+    Attributes:
+        metrics (dict):
+            The number of ``hits``, ``misses``, ``sets``, and ``invalidations``
+            since the cache was created.
+
+    """
+
+    def __init__(self):
+
+        self.metrics = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0}
+        self._metrics_lock = threading.Lock()
+
+    def _count(self, metric):
+
+        with self._metrics_lock:
+            self.metrics[metric] += 1
+
+    @property
+    def hit_rate(self):
+        """The fraction of lookups that were hits."""
+
+        lookups = self.metrics['hits'] + self.metrics['misses']
+
+        return self.metrics['hits'] / lookups if lookups > 0 else 0.
+
+    def get(self, key):
+        """Returns the cached value for ``key`` or None."""
+
+        value = self._get(key)
+        self._count('misses' if value is None else 'hits')
+
+        return value
+
+    def set(self, key, value):
+        """Stores ``value`` with ``key``."""
+
+        self._set(key, value)
+        self._count('sets')
+
+    def invalidate(self, release=None):
+        """Removes the cached results of a release, or all of them if ``release=None``."""
+
+        self._invalidate(release)
+        self._count('invalidations')
+
+    @abc.abstractmethod
+    def _get(self, key):
+        """Returns the cached value for ``key`` or None."""
+
+        pass
+
+    @abc.abstractmethod
+    def _set(self, key, value):
+        """Stores ``value`` with ``key``."""
+
+        pass
+
+    @abc.abstractmethod
+    def _invalidate(self, release):
+        """Removes the cached results of a release, or all of them."""
+
+        pass
+
+
+class LRUQueryCache(QueryCache):
+    """An in-process, least-recently-used query cache.
+
+    Parameters:
+        max_entries (int):
+            The maximum number of cached queries.
+
+    """
+
+    def __init__(self, max_entries=128):
+
+        super(LRUQueryCache, self).__init__()
+
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+
+        return '<LRUQueryCache (max_entries={0}, n_entries={1})>'.format(self.max_entries,
+                                                                         len(self._cache))
+
+    def _get(self, key):
+
+        with self._lock:
+            value = self._cache.pop(key, None)
+            if value is not None:
+                self._cache[key] = value
+
+        return value
+
+    def _set(self, key, value):
+
+        with self._lock:
+            self._cache.pop(key, None)
+            self._cache[key] = value
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _invalidate(self, release):
+
+        with self._lock:
+            if release is None:
+                self._cache.clear()
+            else:
+                for key in [key for key in self._cache if key[0] == release]:
+                    del self._cache[key]
+
+
+class DiskQueryCache(QueryCache):
+    """An on-disk query cache, shared between processes.
+
+    Each release is stored in its own subdirectory. Files are written to a
+    temporary file and atomically renamed.
+
+    Parameters:
+        directory (str):
+            The directory where the results are stored. Created if needed.
+        max_size (int):
+            The maximum size of each release subdirectory, in bytes. When
+            exceeded, the least recently used results are removed. If
+            ``None``, the cache is not bounded.
+
+    """
+
+    def __init__(self, directory, max_size=None):
+
+        super(DiskQueryCache, self).__init__()
+
+        self.directory = os.path.expanduser(os.path.expandvars(directory))
+        self.max_size = max_size
+
+    def __repr__(self):
+
+        return '<DiskQueryCache (directory={0!r}, max_size={1!r})>'.format(self.directory,
+                                                                           self.max_size)
+
+    def _get_path(self, key):
+
+        return os.path.join(self.directory, str(key[0]), key[1] + '.pkl')
+
+    def _get(self, key):
+
+        path = self._get_path(key)
+
+        try:
+            with open(path, 'rb') as ff:
+                value = pickle.load(ff)
+            # Touches the file so that eviction is least-recently-used.
+            os.utime(path, None)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+        return value
+
+    def _set(self, key, value):
+
+        path = self._get_path(key)
+        dirname = os.path.dirname(path)
+
+        if not os.path.exists(dirname):
+            try:
+                os.makedirs(dirname)
+            except OSError:
+                if not os.path.isdir(dirname):
+                    raise
+
+        fd, tmp = tempfile.mkstemp(dir=dirname, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'wb') as ff:
+                pickle.dump(value, ff, protocol=pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp, path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+        if self.max_size is not None:
+            evict_lru(dirname, self.max_size, keep=path, suffix='.pkl')
+
+    def _invalidate(self, release):
+
+        if not os.path.isdir(self.directory):
+            return
+
+        releases = [release] if release is not None else os.listdir(self.directory)
+
+        for rel in releases:
+            dirname = os.path.join(self.directory, str(rel))
+            if os.path.isdir(dirname):
+                evict_lru(dirname, 0, suffix='.pkl')
+
+
+class MemcachedQueryCache(QueryCache):
+    """A query cache stored in memcached, using a dogpile.cache region.
+
+    memcached cannot remove keys by prefix, so each release, and the cache as
+    a whole, has a generation number stored in memcached that is part of the
+    keys. Invalidating a release, or all of them, increments it, for all the
+    processes sharing the server, and the old results expire on their own.
+
+    Parameters:
+        url (str):
+            The address of the memcached server.
+        expiration_time (int):
+            The time, in seconds, after which the cached results expire.
+        backend (str):
+            The dogpile.cache backend to use.
+
+    """
+
+    def __init__(self, url='127.0.0.1:11211', expiration_time=3600,
+                 backend='dogpile.cache.memcached'):
+
+        from dogpile.cache import make_region
+
+        super(MemcachedQueryCache, self).__init__()
+
+        self.url = url
+        self.expiration_time = expiration_time
+        self.region = make_region().configure(backend, expiration_time=expiration_time,
+                                              arguments={'url': url})
+
+    def __repr__(self):
+
+        return '<MemcachedQueryCache (url={0!r}, expiration_time={1})>'.format(
+            self.url, self.expiration_time)
+
+    _global_generation_key = 'marvin_query_generation'
+
+    def _generation_key(self, release):
+
+        return '{0}_{1}'.format(self._global_generation_key, release)
+
+    def _generations(self, *keys):
+
+        from dogpile.cache.api import NO_VALUE
+
+        generations = self.region.get_multi(keys, expiration_time=-1)
+
+        return [0 if generation is NO_VALUE else generation for generation in generations]
+
+    def _region_key(self, key):
+
+        generation, release_generation = self._generations(self._global_generation_key,
+                                                           self._generation_key(key[0]))
+
+        return 'marvin_query_{0}_{1}_{2}_{3}'.format(generation, key[0], release_generation,
+                                                     key[1])
+
+    def _get(self, key):
+
+        from dogpile.cache.api import NO_VALUE
+
+        value = self.region.get(self._region_key(key))
+
+        return None if value is NO_VALUE else value
+
+    def _set(self, key, value):
+
+        self.region.set(self._region_key(key), value)
+
+    def _invalidate(self, release):
+
+        key = self._global_generation_key if release is None else self._generation_key(release)
+        generation, = self._generations(key)
+
+        self.region.set(key, generation + 1)
+
+
+class CompiledQueryCache(object):
+    """An in-process LRU cache of the intermediate products of building queries.
+
+    Entries are stored by kind, e.g., ``'parsed'``, ``'joins'``, or
+    ``'sql'``, and a hashable key. Values must be treated as immutable by
+    the callers.
+
+    Parameters:
+        max_entries (int):
+            The maximum number of entries of each kind.
+
+    """
+
+    def __init__(self, max_entries=512):
+
+        self.max_entries = max_entries
+        self.metrics = {'hits': 0, 'misses': 0}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+
+        return '<CompiledQueryCache (max_entries={0}, n_entries={1})>'.format(
+            self.max_entries, dict((kind, len(cache)) for kind, cache in self._caches.items()))
+
+    def get(self, kind, key):
+        """Returns the cached value or None."""
+
+        with self._lock:
+            cache = self._caches.get(kind, {})
+            value = cache.pop(key, None)
+            if value is not None:
+                cache[key] = value
+            self.metrics['misses' if value is None else 'hits'] += 1
+
+        return value
+
+    def set(self, kind, key, value):
+        """Stores a value."""
+
+        with self._lock:
+            cache = self._caches.setdefault(kind, OrderedDict())
+            cache.pop(key, None)
+            cache[key] = value
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def clear(self):
+        """Removes all the entries, e.g., after changing the data model."""
+
+        with self._lock:
+            self._caches.clear()
+
+
+compiled_cache = CompiledQueryCache()
@@ -15,12 +15,13 @@ from flask import session, request, render_template, g, jsonify, Response
 import flask_jsglue as jsg
 # Marvin imports
 from brain.utils.general.general import getDbMachine
-from marvin import config, log
+from marvin import config, log, marvindb
 from marvin.web.web_utils import updateGlobalSession
 from marvin.web.jinja_filters import jinjablue
 from marvin.web.error_handlers import errors
 from marvin.web.extensions import jsglue, flags, sentry, limiter, profiler, cache
 from marvin.web.settings import ProdConfig, DevConfig, CustomConfig
+from marvin.web.payloads import start_warming
 # Web Views
 from marvin.web.controllers.index import index
 from marvin.web.controllers.galaxy import galaxy
@@ -91,12 +92,22 @@ def create_app(debug=False, local=False, object_config=None):
         ''' updates the global session / config '''
         updateGlobalSession()
 
+    # Scope the database session to each request
+    @app.teardown_appcontext
+    def remove_db_session(exception=None):
+        ''' returns the connection of the request database session to the pool '''
+        marvindb.remove_session()
+
     # ----------------------------------
     # Registration
     register_extensions(app, app_base=marvin_base)
     register_api(app, api)
     register_blueprints(app, url_prefix=url_prefix)
 
+    # Build the galaxy page payloads of selected galaxies in the background
+    if app.config.get('WEB_PAYLOAD_WARM_GALAXIES'):
+        start_warming(app, app.config['WEB_PAYLOAD_WARM_GALAXIES'], release=config.release)
+
     return app
 
 
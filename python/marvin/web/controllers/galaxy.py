@@ -27,6 +27,7 @@ from marvin.utils.general.maskbit import Maskbit
 from marvin.web.web_utils import parseSession
 from marvin.web.controllers import BaseWebView
 from marvin.web.extensions import cache
+from marvin.web.payloads import payload_cache, make_payload_key, record_view
 from marvin.api.base import arg_validate as av
 from marvin.core.caching_query import FromCache
 from marvin.core import marvin_pickle
@@ -42,9 +43,42 @@ except ImportError as e:
 galaxy = Blueprint("galaxy_page", __name__)
 
 
+def _spectrum_key(release, plateifu, x, y, xyorig=None):
+    ''' Returns the payload key of the spectrum of a spaxel '''
+    return make_payload_key('spectrum', release, plateifu, xyorig, x, y)
+
+
 def getWebSpectrum(cube, x, y, xyorig=None, byradec=False):
-    ''' Get and format a spectrum for the web '''
+    ''' Get and format a spectrum for the web
+
+    Spectra requested by spaxel coordinates, or by the central RA/Dec of the
+    cube, are cached in the web payload cache, unless their model fit could
+    not be retrieved.
+    '''
+
+    webspec, specmsg, complete = _getWebSpectrum(cube, x, y, xyorig=xyorig, byradec=byradec)
+
+    return webspec, specmsg
+
+
+def _getWebSpectrum(cube, x, y, xyorig=None, byradec=False):
+    ''' Returns the web spectrum, its message, and whether it includes all its parts '''
+
+    # only the central RA, Dec is requested repeatedly
+    if not byradec:
+        key = _spectrum_key(cube.release, cube.plateifu, x, y, xyorig=xyorig)
+    elif (x, y) == (cube.ra, cube.dec):
+        key = _spectrum_key(cube.release, cube.plateifu, 'center', 'center')
+    else:
+        key = None
+
+    # only complete spectra are cached
+    cached = payload_cache.get(key) if key else None
+    if cached is not None:
+        return cached[0], cached[1], True
+
     webspec = None
+    complete = False
 
     # set the spaxel kwargs
     kwargs = {'xyorig': xyorig, 'properties': False}
@@ -61,9 +95,10 @@ def getWebSpectrum(cube, x, y, xyorig=None, byradec=False):
     except Exception as e:
         specmsg = 'Could not get spaxel: {0}'.format(e)
     else:
-        # get error and wavelength
-        error = convertIvarToErr(spaxel.flux.ivar)
-        wave = spaxel.flux.wavelength
+        # get error and wavelength, as lists of Python floats
+        flux = spaxel.flux.value.tolist()
+        error = np.asarray(convertIvarToErr(spaxel.flux.ivar)).tolist()
+        wave = spaxel.flux.wavelength.value.tolist()
 
         # try to get the model flux
         try:
@@ -71,71 +106,155 @@ def getWebSpectrum(cube, x, y, xyorig=None, byradec=False):
         except Exception as e:
             modelfit = None
 
+        # a spectrum whose model could not be retrieved is not cached, so that it is tried again
+        complete = 'models' not in kwargs or modelfit is not None
+
         # make input array for Dygraph
         if not isinstance(modelfit, type(None)):
-            webspec = [[wave.value[i], [s, error[i]], [modelfit.value[i], 0.0]] for i, s in enumerate(spaxel.flux.value)]
+            webspec = [[w, [s, e], [m, 0.0]]
+                       for w, s, e, m in zip(wave, flux, error, modelfit.value.tolist())]
         else:
-            webspec = [[wave.value[i], [s, error[i]]] for i, s in enumerate(spaxel.flux.value)]
+            webspec = [[w, [s, e]] for w, s, e in zip(wave, flux, error)]
 
         specmsg = "Spectrum in Spaxel ({2},{3}) at RA, Dec = ({0}, {1})".format(x, y, spaxel.x, spaxel.y)
 
-    return webspec, specmsg
+        if key and complete:
+            payload_cache.set(key, (webspec, specmsg))
+
+    return webspec, specmsg, complete
 
 
 def getWebMap(cube, parameter='emline_gflux', channel='ha_6564',
-              bintype=None, template=None):
-    ''' Get and format a map for the web '''
+              bintype=None, template=None, maps=None):
+    ''' Get and format a map for the web
+
+    If ``maps`` is set, the map is read from it instead of opening the Maps
+    of the cube.
+    '''
     name = '{0}_{1}'.format(parameter.lower(), channel)
     webmap = None
     try:
-        maps = cube.getMaps(plateifu=cube.plateifu, mode='local',
-                            bintype=bintype, template=template)
+        if maps is None:
+            maps = cube.getMaps(plateifu=cube.plateifu, mode='local',
+                                bintype=bintype, template=template)
         data = maps.getMap(parameter, channel=channel)
     except Exception as e:
         mapmsg = 'Could not get map: {0}'.format(e)
     else:
-        vals = data.value
-        ivar = data.ivar
-        mask = data.mask
-        webmap = {'values': [it.tolist() for it in data.value],
-                  'ivar': [it.tolist() for it in data.ivar] if data.ivar is not None else None,
-                  'mask': [it.tolist() for it in data.mask] if data.mask is not None else None}
+        webmap = {'values': data.value.tolist(),
+                  'ivar': data.ivar.tolist() if data.ivar is not None else None,
+                  'mask': data.mask.tolist() if data.mask is not None else None}
         mapmsg = "{0}: {1}-{2}".format(name, maps.bintype, maps.template)
     return webmap, mapmsg
 
 
-def buildMapDict(cube, params, dapver, bintemp=None):
-    ''' Build a list of dictionaries of maps
+_dappixmask = None
+_plotparams = {}
 
-    params - list of string parameter names in form of category_channel
 
-        NOT GENERALIZED
+def _get_plotparams(dapver, parameter):
+    ''' Returns the plot parameters of a map, with the bits of its masks
+
+    The parameters only depend on the DAP version and the kind of property,
+    so they are built once per process.
     '''
-    # split the bintemp
+    global _dappixmask
+
+    plotparams = get_plot_params(dapver=dapver, prop=parameter)
+    key = (dapver, tuple(plotparams['bitmasks']))
+
+    if key not in _plotparams:
+        if _dappixmask is None:
+            _dappixmask = Maskbit('MANGA_DAPPIXMASK')
+        baddata_labels = [it for it in plotparams['bitmasks'] if it != 'NOCOV']
+        baddata_bits = {it.lower(): int(_dappixmask.labels_to_bits(it)[0]) for it in baddata_labels}
+        _plotparams[key] = {'nocov': int(_dappixmask.labels_to_bits('NOCOV')[0]),
+                            'badData': baddata_bits}
+
+    plotparams['bits'] = _plotparams[key]
+
+    return plotparams
+
+
+def _get_map_keys(release, plateifu, params, dapver, bintemp=None):
+    ''' Returns the payload keys of a list of maps '''
+
+    # split the bintemp and resolve the defaults, so that keys are unique
     if bintemp:
         bintype, temp = bintemp.split('-', 1)
     else:
         bintype, temp = (None, None)
 
+    dm = datamodel[dapver]
+    bintype = dm.get_bintype(bintype).name
+    temp = dm.get_template(temp).name
+
+    keys = [make_payload_key('map', release, plateifu, bintype, temp, str(param)) for param in params]
+
+    return keys, bintype, temp
+
+
+def getCachedMapDict(release, plateifu, params, dapver, bintemp=None):
+    ''' Returns the list of map dictionaries if all of them are cached, or None '''
+
+    params = params if isinstance(params, list) else [params]
+    keys = _get_map_keys(release, plateifu, params, dapver, bintemp=bintemp)[0]
+
+    mapdict = []
+    for key in keys:
+        mapitem = payload_cache.get(key)
+        if mapitem is None:
+            return None
+        mapdict.append(mapitem)
+
+    return mapdict
+
+
+def buildMapDict(cube, params, dapver, bintemp=None):
+    ''' Build a list of dictionaries of maps
+
+    params - list of string parameter names in form of category_channel
+
+    Maps are taken from the web payload cache if possible. Otherwise, the
+    Maps of the cube is opened once for all the parameters.
+
+        NOT GENERALIZED
+    '''
+
     mapdict = []
     params = params if isinstance(params, list) else [params]
+    keys, bintype, temp = _get_map_keys(cube.release, cube.plateifu, params, dapver,
+                                        bintemp=bintemp)
+    maps = None
+
+    for param, key in zip(params, keys):
+
+        mapitem = payload_cache.get(key)
+        if mapitem is not None:
+            mapdict.append(mapitem)
+            continue
 
-    for param in params:
         param = str(param)
         try:
             parameter, channel = param.split(':')
         except ValueError as e:
             parameter, channel = (param, None)
+
+        if maps is None:
+            try:
+                maps = cube.getMaps(plateifu=cube.plateifu, mode='local',
+                                    bintype=bintype, template=temp)
+            except Exception as e:
+                raise MarvinError('Could not get map: {0}'.format(e))
+
         webmap, mapmsg = getWebMap(cube, parameter=parameter, channel=channel,
-                                   bintype=bintype, template=temp)
+                                   bintype=bintype, template=temp, maps=maps)
 
-        plotparams = get_plot_params(dapver=dapver, prop=parameter)
-        mask = Maskbit('MANGA_DAPPIXMASK')
-        baddata_labels = [it for it in plotparams['bitmasks'] if it != 'NOCOV']
-        baddata_bits = {it.lower(): int(mask.labels_to_bits(it)[0]) for it in baddata_labels}
-        plotparams['bits'] = {'nocov': int(mask.labels_to_bits('NOCOV')[0]),
-                              'badData': baddata_bits}
-        mapdict.append({'data': webmap, 'msg': mapmsg, 'plotparams': plotparams})
+        mapitem = {'data': webmap, 'msg': mapmsg,
+                   'plotparams': _get_plotparams(dapver, parameter)}
+        if webmap is not None:
+            payload_cache.set(key, mapitem)
+        mapdict.append(mapitem)
 
     anybad = [m['data'] is None for m in mapdict]
     if any(anybad):
@@ -144,6 +263,56 @@ def buildMapDict(cube, params, dapver, bintemp=None):
     return mapdict
 
 
+def buildDynamicPayload(plateifu, release, dapver, cube=None):
+    ''' Build the payload of the dynamic galaxy page: central spectrum and default maps
+
+    The payload is stored in the web payload cache if the spectrum, including
+    its model fit, and the maps were built successfully.
+    '''
+
+    if cube is None:
+        cube = Cube(plateifu=plateifu, release=release)
+
+    output = {'specstatus': -1, 'mapstatus': -1}
+
+    # get web spectrum
+    webspec, specmsg, speccomplete = _getWebSpectrum(cube, cube.ra, cube.dec, byradec=True)
+    daplist = get_dap_maplist(dapver, web=True)
+    dapdefaults = get_default_mapset(dapver)
+
+    # build the uber map dictionary
+    try:
+        mapdict = buildMapDict(cube, dapdefaults, dapver)
+        mapmsg = None
+    except Exception as e:
+        mapdict = [{'data': None, 'msg': 'Error', 'plotparams': None} for m in dapdefaults]
+        mapmsg = 'Error getting maps: {0}'.format(e)
+    else:
+        output['mapstatus'] = 1
+
+    if not webspec:
+        output['error'] = 'Error: {0}'.format(specmsg)
+    else:
+        output['specstatus'] = 1
+
+    sdss_path = Path()
+    output['image'] = sdss_path.url('mangaimage', drpver=cube._drpver, plate=cube.plate, ifu=cube.ifu, dir3d=cube.dir3d)
+    output['spectra'] = webspec
+    output['specmsg'] = specmsg
+    output['maps'] = mapdict
+    output['mapmsg'] = mapmsg
+    output['dapmaps'] = daplist
+    output['dapmapselect'] = dapdefaults
+
+    dm = datamodel[dapver]
+    output['dapbintemps'] = dm.get_bintemps()
+
+    if output['specstatus'] == 1 and output['mapstatus'] == 1 and speccomplete:
+        payload_cache.set(make_payload_key('dynamic', release, plateifu), output)
+
+    return output
+
+
 def make_nsa_dict(nsa, cols=None):
     ''' Make/rearrange the nsa dictionary of values '''
 
@@ -308,6 +477,10 @@ class Galaxy(BaseWebView):
                     self.galaxy['nsadict'] = nsadict
 
                 self.galaxy['dapmaps'] = daplist
+
+                # the dynamic payloads of the most viewed galaxies are warmed by warm_popular
+                record_view(self._release, cube.plateifu)
+
                 dm = datamodel[self._dapver]
                 self.galaxy['dapbintemps'] = dm.get_bintemps()
                 current_session['bintemp'] = '{0}-{1}'.format(dm.get_bintype(), dm.get_template())
@@ -345,42 +518,13 @@ class Galaxy(BaseWebView):
         # turning toggle on
         current_session['toggleon'] = args.get('toggleon')
 
-        # get the cube
-        cubeinputs = {'plateifu': args.get('plateifu'), 'release': self._release}
-        cube = Cube(**cubeinputs)
-        output = {'specstatus': -1, 'mapstatus': -1}
-
-        # get web spectrum
-        webspec, specmsg = getWebSpectrum(cube, cube.ra, cube.dec, byradec=True)
-        daplist = get_dap_maplist(self._dapver, web=True)
-        dapdefaults = get_default_mapset(self._dapver)
-
-        # build the uber map dictionary
-        try:
-            mapdict = buildMapDict(cube, dapdefaults, self._dapver)
-            mapmsg = None
-        except Exception as e:
-            mapdict = [{'data': None, 'msg': 'Error', 'plotparams': None} for m in dapdefaults]
-            mapmsg = 'Error getting maps: {0}'.format(e)
-        else:
-            output['mapstatus'] = 1
-
-        if not webspec:
-            output['error'] = 'Error: {0}'.format(specmsg)
-        else:
-            output['specstatus'] = 1
-
-        sdss_path = Path()
-        output['image'] = sdss_path.url('mangaimage', drpver=cube._drpver, plate=cube.plate, ifu=cube.ifu, dir3d=cube.dir3d)
-        output['spectra'] = webspec
-        output['specmsg'] = specmsg
-        output['maps'] = mapdict
-        output['mapmsg'] = mapmsg
-        output['dapmaps'] = daplist
-        output['dapmapselect'] = dapdefaults
+        # get the payload from the cache, or build it from the cube
+        plateifu = args.get('plateifu')
+        output = payload_cache.get(make_payload_key('dynamic', self._release, plateifu))
+        if output is None:
+            output = buildDynamicPayload(plateifu, self._release, self._dapver)
 
         dm = datamodel[self._dapver]
-        output['dapbintemps'] = dm.get_bintemps()
         current_session['bintemp'] = '{0}-{1}'.format(dm.get_bintype(), dm.get_template())
 
         # try to jsonify the result
@@ -432,8 +576,13 @@ class Galaxy(BaseWebView):
             x = args.get('x', None, type=int)
             y = args.get('y', None, type=int)
             if all([x, y]):
-                cube = Cube(**cubeinputs)
-                webspec, specmsg = getWebSpectrum(cube, x, y, xyorig='lower')
+                cached = payload_cache.get(_spectrum_key(self._release, cubeinputs['plateifu'],
+                                                         x, y, xyorig='lower'))
+                if cached is not None:
+                    webspec, specmsg = cached
+                else:
+                    cube = Cube(**cubeinputs)
+                    webspec, specmsg = getWebSpectrum(cube, x, y, xyorig='lower')
                 msg = 'gettin some spaxel with (x={0}, y={1})'.format(x, y)
                 if not webspec:
                     self.galaxy['error'] = 'Error: {0}'.format(specmsg)
@@ -458,6 +607,18 @@ class Galaxy(BaseWebView):
         params = args.getlist('params[]', type=str)
         bintemp = args.get('bintemp', None, type=str)
         current_session['bintemp'] = bintemp
+
+        # serve the maps from the cache if all of them are there
+        mapdict = None
+        if params:
+            try:
+                mapdict = getCachedMapDict(self._release, cubeinputs['plateifu'], params,
+                                           self._dapver, bintemp=bintemp)
+            except Exception as e:
+                mapdict = None
+        if mapdict is not None:
+            return jsonify(result={'mapmsg': None, 'status': 1, 'maps': mapdict})
+
         # get cube (self.galaxy['cube'] does not work)
         try:
             cube = Cube(**cubeinputs)
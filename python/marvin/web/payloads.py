@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# encoding: utf-8
+#
+# payloads.py
+#
+# Licensed under a 3-clause BSD license.
+
+"""Cache of the data payloads of the galaxy page.
+
+The dynamic part of the galaxy page requests the default DAP maps and the
+central spectrum of the galaxy (``/galaxy/initdynamic/``), and then other maps
+(``/galaxy/updatemaps/``) and spectra (``/galaxy/getspaxel/``). Building each
+payload opens the Cube and Maps and converts their arrays to lists. The
+payloads are stored, ready to be serialised, in the Flask cache (memcached in
+production) with keys built from the release, plate-ifu, bintype, template,
+and property (see `make_payload_key`), so that repeated interactions are
+served without touching the data.
+
+The payloads of a galaxy are built by the first request for them, and the
+payloads of some galaxies can be built in advance (warmed) by a single
+background worker thread. The galaxies listed in ``WEB_PAYLOAD_WARM_GALAXIES``
+are warmed when the app is created, and the most viewed galaxies (see
+`record_view`) can be warmed at any time with `warm_popular`, e.g., from a
+scheduled job. Galaxy page views do not warm their own payloads, since the
+page requests them right away. The queue holds at most
+``WEB_PAYLOAD_WARM_QUEUE`` galaxies; when it is full, new galaxies are not
+warmed and their payloads are built on request.
+
+The cache is configured with the ``WEB_PAYLOAD_CACHE`` (on/off),
+``WEB_PAYLOAD_TIMEOUT`` (seconds), ``WEB_PAYLOAD_WARMING`` (on/off), and
+``WEB_PAYLOAD_WARM_QUEUE`` (galaxies) Flask settings.
+
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import threading
+from collections import Counter
+
+import six
+from flask import current_app, has_app_context
+
+from marvin import config, log, marvindb
+from marvin.web.extensions import cache
+
+
+__all__ = ['WebPayloadCache', 'payload_cache', 'make_payload_key', 'record_view',
+           'popular_galaxies', 'warm_galaxy', 'start_warming', 'warm_popular']
+
+
+def make_payload_key(kind, release, plateifu, *parts):
+    """Returns the cache key of a payload.
+
+    Parameters:
+        kind (str):
+            The kind of payload, e.g., ``'map'``, ``'spectrum'``, or ``'dynamic'``.
+        release (str):
+            The release of the data.
+        plateifu (str):
+            The plate-ifu of the galaxy.
+        parts:
+            The remaining fields of the key, e.g., the bintype, template, and
+            property of a map, or the coordinates of a spectrum.
+
+    Returns:
+        key (str):
+            A key such as
+            ``'marvin_web/map/MPL-6/8485-1901/SPX/GAU-MILESHC/emline_gflux:ha_6564'``.
+
+    """
+
+    return '/'.join(['marvin_web', kind, str(release), str(plateifu)] +
+                    [str(part) for part in parts])
+
+
+class WebPayloadCache(object):
+    """Stores the payloads of the galaxy page in the Flask cache.
+
+    Outside an application context, or if ``WEB_PAYLOAD_CACHE`` is False, the
+    cache is bypassed.
+
+    Parameters:
+        backend:
+            The Flask cache to use. Defaults to `marvin.web.extensions.cache`.
+
+    Attributes:
+        metrics (dict):
+            The number of ``hits``, ``misses``, and ``sets`` in this process.
+
+    """
+
+    def __init__(self, backend=None):
+
+        self.backend = backend if backend is not None else cache
+        self.metrics = {'hits': 0, 'misses': 0, 'sets': 0}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+
+        return '<WebPayloadCache (hits={0}, misses={1})>'.format(self.metrics['hits'],
+                                                                  self.metrics['misses'])
+
+    def _count(self, metric):
+
+        with self._lock:
+            self.metrics[metric] += 1
+
+    @property
+    def enabled(self):
+        """True if payloads can be cached in the current context."""
+
+        return has_app_context() and current_app.config.get('WEB_PAYLOAD_CACHE', True)
+
+    def get(self, key):
+        """Returns the cached payload for ``key`` or None."""
+
+        if not self.enabled:
+            return None
+
+        try:
+            value = self.backend.get(key)
+        except Exception as ee:
+            log.debug('failed retrieving web payload {0}: {1}'.format(key, ee))
+            value = None
+
+        self._count('misses' if value is None else 'hits')
+
+        return value
+
+    def set(self, key, value):
+        """Stores a payload. Failures are logged and ignored."""
+
+        if not self.enabled or value is None:
+            return
+
+        try:
+            self.backend.set(key, value, timeout=current_app.config.get('WEB_PAYLOAD_TIMEOUT'))
+        except Exception as ee:
+            log.debug('failed storing web payload {0}: {1}'.format(key, ee))
+        else:
+            self._count('sets')
+
+
+payload_cache = WebPayloadCache()
+
+
+# Number of views of each (release, plate-ifu) in this process.
+_views = Counter()
+_views_lock = threading.Lock()
+
+# (release, plate-ifu) queued or being warmed, so that they are not warmed twice at once.
+_warming = set()
+_warming_lock = threading.Lock()
+
+# The queue of (app, plate-ifu, release) to warm and the worker thread that consumes it.
+_warm_queue = None
+_warm_worker = None
+
+
+def record_view(release, plateifu):
+    """Counts a view of the galaxy page of ``plateifu``."""
+
+    with _views_lock:
+        _views[(release, plateifu)] += 1
+
+
+def popular_galaxies(release, n_galaxies=20):
+    """Returns the plate-ifus of the most viewed galaxies of a release, in this process."""
+
+    with _views_lock:
+        ranked = _views.most_common()
+
+    return [plateifu for (rel, plateifu), __ in ranked if rel == release][:n_galaxies]
+
+
+def warm_galaxy(plateifu, release):
+    """Builds and caches the payloads of the dynamic galaxy page of ``plateifu``.
+
+    Must be called within an application context. Payloads already cached are
+    not built again.
+
+    """
+
+    from marvin.web.controllers.galaxy import buildDynamicPayload
+
+    dapver = config.lookUpVersions(release=release)[1]
+    key = make_payload_key('dynamic', release, plateifu)
+
+    if payload_cache.get(key) is None:
+        buildDynamicPayload(plateifu, release, dapver)
+
+
+def _warm(warm_queue):
+    """Warms the galaxies put in ``warm_queue``. Runs in the worker thread."""
+
+    while True:
+        app, plateifu, release = warm_queue.get()
+        try:
+            with app.app_context():
+                try:
+                    warm_galaxy(plateifu, release)
+                finally:
+                    marvindb.remove_session()
+        except Exception as ee:
+            log.debug('failed warming web payloads of {0}: {1}'.format(plateifu, ee))
+        finally:
+            with _warming_lock:
+                _warming.discard((release, plateifu))
+            warm_queue.task_done()
+
+
+def _get_warm_queue(app):
+    """Returns the warming queue, starting the worker thread if it is not running.
+
+    Must be called with ``_warming_lock`` held. The worker is started again if
+    it is not alive, e.g., in a process forked after it was started.
+
+    """
+
+    global _warm_queue, _warm_worker
+
+    if _warm_worker is None or not _warm_worker.is_alive():
+        _warm_queue = six.moves.queue.Queue(maxsize=app.config.get('WEB_PAYLOAD_WARM_QUEUE', 50))
+        _warm_worker = threading.Thread(target=_warm, args=(_warm_queue,),
+                                        name='marvin-web-warming')
+        _warm_worker.daemon = True
+        _warm_worker.start()
+
+    return _warm_queue
+
+
+def start_warming(app, plateifus, release=None):
+    """Queues the payloads of a list of galaxies to be warmed in the background.
+
+    All the galaxies are warmed, one at a time, by a single worker thread.
+    Galaxies already queued or being warmed are skipped, as are those that
+    do not fit in the queue. Nothing is done if ``WEB_PAYLOAD_WARMING`` is
+    False.
+
+    Parameters:
+        app:
+            The Flask application.
+        plateifus (list):
+            The plate-ifus of the galaxies to warm.
+        release (str):
+            The release. Defaults to ``marvin.config.release``.
+
+    Returns:
+        queued (list):
+            The plate-ifus that were queued.
+
+    """
+
+    if not app.config.get('WEB_PAYLOAD_WARMING', True):
+        return []
+
+    release = release or config.release
+    queued = []
+
+    with _warming_lock:
+        warm_queue = _get_warm_queue(app)
+        for plateifu in plateifus:
+            if (release, plateifu) in _warming:
+                continue
+            try:
+                warm_queue.put_nowait((app, plateifu, release))
+            except six.moves.queue.Full:
+                log.debug('web payload warming queue is full; not warming {0}'.format(plateifu))
+                break
+            _warming.add((release, plateifu))
+            queued.append(plateifu)
+
+    return queued
+
+
+def warm_popular(app, release=None, n_galaxies=20):
+    """Queues the payloads of the most viewed galaxies to be warmed in the background."""
+
+    release = release or config.release
+
+    return start_warming(app, popular_galaxies(release, n_galaxies=n_galaxies), release=release)
@@ -60,6 +60,13 @@ class Config(object):
     # RATELIMIT_DEFAULT = '10/hour;100/day;2000 per year'
     RATELIMIT_STRATEGY = 'fixed-window-elastic-expiry'
     RATELIMIT_ENABLED = True
+    WEB_PAYLOAD_CACHE = True  # Cache the map and spectrum payloads of the galaxy page
+    WEB_PAYLOAD_TIMEOUT = 7 * 24 * 3600  # Seconds
+    WEB_PAYLOAD_WARMING = True  # Build the galaxy page payloads in a background thread
+    WEB_PAYLOAD_WARM_QUEUE = 50  # Maximum number of galaxies waiting to be warmed
+    # Comma-separated plate-ifus whose galaxy page payloads are built on startup
+    WEB_PAYLOAD_WARM_GALAXIES = [plateifu for plateifu in
+                                 os.environ.get('MARVIN_WEB_WARM_GALAXIES', '').split(',') if plateifu]
 
 
 class ProdConfig(Config):
@@ -96,6 +103,7 @@ class TestConfig(Config):
     PRESERVE_CONTEXT_ON_EXCEPTION = False
     USE_PROFILER = False  # Turn off the Flask Profiler extension
     RATELIMIT_ENABLED = False  # Turn off the Flask Rate Limiter
+    WEB_PAYLOAD_WARMING = False  # Turn off the background building of payloads
 
 
 class CustomConfig(object):